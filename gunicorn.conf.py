@@ -0,0 +1,41 @@
+"""
+Gunicorn configuration for the pre-fork (preload) mode.
+
+    gunicorn -c gunicorn.conf.py src.app:app
+
+The app and all solver engines (OR-Tools, gurobipy, numpy, scipy) are
+imported once by the master process and shared copy-on-write by the
+workers. Each worker creates its own solver service (distance cache
+connections, sessions, solver lock) in the application lifespan, so a
+new or recycled worker is serving within milliseconds.
+"""
+
+import gc
+import os
+
+from src.config import get_settings
+
+settings = get_settings()
+
+bind = f"{settings.api_host}:{settings.api_port}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Solves block a worker for up to the maximum time limit (3600 s)
+timeout = 3660
+graceful_timeout = 30
+
+# Recycle workers after a number of requests (0 = never), e.g. to return
+# memory fragmented by large solves
+max_requests = int(os.environ.get("MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    """Warm shared state in the master, right before the workers are forked."""
+    from src.core.solvers import preload_engines
+    preload_engines()
+    # Move everything allocated so far out of the collector's reach: later
+    # collections in the workers then do not write to (and copy) shared pages
+    gc.freeze()
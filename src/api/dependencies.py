@@ -1,9 +1,13 @@
 """API dependencies for authentication and validation."""
 
 from typing import Optional
-from fastapi import HTTPException, status, Security
+from fastapi import Depends, HTTPException, Query, Request, status, Security
 from fastapi.security import APIKeyHeader
 from src.config.settings import get_settings
+from src.services import SolverService
+from src.services.payload_reader import PayloadColumns, PayloadError, read_payload, read_payload_object
+from .response_format import ResponseFormat
+from .wire_format import WireFormat
 
 # Security scheme for Swagger UI - API Key in header
 api_key_header = APIKeyHeader(name="api-key", auto_error=False)
@@ -21,10 +25,10 @@ def verify_api_key(
     
     Args:
         api_key: API key from 'api-key' header
-        
+    
     Raises:
         HTTPException: 401 if API key is invalid or missing when required
-        
+    
     Example:
         api-key: your-secret-key-here
     """
@@ -47,3 +51,127 @@ def verify_api_key(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key",
         )
+
+
+def _profiling_key() -> Optional[str]:
+    """Key that may request profiles (PROFILING_API_KEY, else API_KEY)."""
+    settings = get_settings()
+    return settings.profiling_api_key or settings.api_key
+
+
+def verify_profiling_key(
+    api_key: Optional[str] = Security(api_key_header)
+) -> None:
+    """
+    Verify that the caller may access profiling data.
+    
+    Profiles expose code paths and timings, so unlike the other endpoints
+    they are never open: a key must be configured (PROFILING_API_KEY, or
+    API_KEY when no separate key is set) and sent in the 'api-key' header.
+    
+    Args:
+        api_key: API key from 'api-key' header
+    
+    Raises:
+        HTTPException: 403 if profiling is disabled or the key does not match
+    """
+    key = _profiling_key()
+    if not key:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiling is disabled. Set PROFILING_API_KEY or API_KEY to enable it.",
+        )
+    if api_key != key:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="API key is not allowed to request profiles",
+        )
+
+
+def profiling_requested(
+    profile: bool = Query(False, description="Run the solve under cProfile and return the profile (requires the profiling key)"),
+    api_key: Optional[str] = Security(api_key_header)
+) -> bool:
+    """
+    Read the opt-in 'profile' query flag, checking the profiling key when set.
+    
+    Returns:
+        True if the request should be profiled
+    
+    Raises:
+        HTTPException: 403 if profiling was requested without the profiling key
+    """
+    if profile:
+        verify_profiling_key(api_key)
+    return profile
+
+
+def get_solver_service(request: Request) -> SolverService:
+    """
+    Solver service of the application.
+    
+    Created once per worker process in the application lifespan (see
+    src/app.py), so importing the API does not open the distance cache.
+    """
+    return request.app.state.solver_service
+
+
+def wire_format(request: Request) -> WireFormat:
+    """
+    Body encoding of the request and negotiated response encoding.
+    
+    Raises:
+        HTTPException: 415 if the body uses an unsupported type or compression
+    """
+    return WireFormat.from_request(request)
+
+
+async def solve_payload(
+    request: Request,
+    _: None = Depends(verify_api_key),
+    wire: WireFormat = Depends(wire_format)
+) -> PayloadColumns:
+    """
+    Request body of the solve endpoints, streamed into payload columns.
+    
+    Customers are validated while the body arrives and invalid payloads are
+    rejected with 422 and one entry per problem (e.g. ``customers.12.location``).
+    Authentication runs first, so unauthenticated bodies are not parsed.
+    JSON bodies may be compressed (gzip, deflate, zstd); MessagePack bodies
+    are decoded in one piece and validated the same way.
+    """
+    try:
+        if wire.msgpack_body:
+            return read_payload_object(await wire.unpack(request))
+        return await read_payload(wire.body(request))
+    except PayloadError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors)
+
+
+def response_format(
+    format: str = Query("full", description="Response format: 'full' or 'compact' (numeric values, columnar stops)"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, e.g. 'summary,routes.vehicle_id,routes.stops.time' "
+                          "(stops are 'routes.route' in the full format, 'routes.stops' in the compact one; either works)"
+    ),
+    wire: WireFormat = Depends(wire_format)
+) -> ResponseFormat:
+    """
+    Read the response format and field projection of a solve endpoint.
+    
+    The wire encoding (JSON or MessagePack, compression) is negotiated from
+    the Accept and Accept-Encoding headers.
+    
+    Raises:
+        HTTPException: 400 if the format or a field path is unknown
+    """
+    if format not in ResponseFormat.FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown format '{format}', expected one of {', '.join(ResponseFormat.FORMATS)}"
+        )
+    field_list = [field for field in (fields or '').split(',') if field.strip()]
+    try:
+        return ResponseFormat(compact=format == 'compact', fields=field_list or None, wire=wire)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
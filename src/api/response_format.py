@@ -0,0 +1,323 @@
+"""Response formats of solve results: full or compact, with field projection."""
+
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+from fastapi.responses import Response, StreamingResponse
+
+from .wire_format import WireFormat
+from ..utils.service_time import service_minutes
+
+# Route keys that only repeat another key (hours of a minutes value, aliases)
+REDUNDANT_ROUTE_KEYS = {
+    'distance', 'load_units', 'duration_hours', 'travel_time_hours', 'service_time_hours'
+}
+
+# Stop keys that follow from the other columns (load before = previous load after)
+REDUNDANT_STOP_KEYS = {'load_before'}
+
+# Fields that 'fields' may select. Top-level entries other than routes are
+# not checked further (summary, deadline, timings, ... vary by endpoint).
+RESULT_FIELDS = {
+    'date', 'status', 'message', 'format', 'summary', 'routes', 'objective_value', 'solver',
+    'execution_time_seconds', 'best_bound', 'mip_gap', 'warm_start', 'column_generation',
+    'deadline', 'timings', 'profile', 'memory', 'session', 'reoptimization', 'insertion',
+    'plan', 'moves', 'evaluation_ms'
+}
+ROUTE_FIELDS = {
+    'vehicle_id', 'vehicle_name', 'capacity', 'distance', 'distance_km', 'distance_formatted',
+    'load', 'load_units', 'load_formatted', 'saturation_pct', 'duration_minutes', 'duration_hours',
+    'duration_formatted', 'travel_time_minutes', 'travel_time_hours', 'travel_time_formatted',
+    'service_time_minutes', 'service_time_hours', 'service_time_formatted', 'num_customers'
+}
+STOP_FIELDS = {
+    'location', 'location_info', 'time', 'time_formatted', 'arrival_time', 'time_window',
+    'time_window_formatted', 'load_before', 'load_after', 'demand', 'segment_distance',
+    'segment_distance_formatted'
+}
+SEGMENT_FIELDS = {
+    'type', 'from_location', 'to_location', 'location', 'start_time', 'end_time',
+    'duration_minutes', 'distance_km', 'units'
+}
+
+# Compact routes keep numeric fields only; stops gain window and customer columns
+COMPACT_ROUTE_FIELDS = {
+    field for field in ROUTE_FIELDS
+    if not field.endswith('_formatted') and field != 'vehicle_name'
+} - REDUNDANT_ROUTE_KEYS
+COMPACT_STOP_FIELDS = ({
+    field for field in STOP_FIELDS
+    if not field.endswith('_formatted') and field not in ('location_info', 'time_window')
+} - REDUNDANT_STOP_KEYS) | {'tw_start', 'tw_end', 'customer_id'}
+
+
+class ResponseFormat:
+    """
+    Shapes a solve result for the response.
+    
+    The ``full`` format is the result as built by the solver service, with
+    the timeline ``segments`` of each route. The ``compact`` format keeps
+    only numeric values: routes lose their preformatted strings and
+    duplicate units, and their stops become columns (one list per field,
+    e.g. ``stops.time``, ``stops.customer_id``) instead of one object per
+    stop. Customers are referenced by ID only; their names and coordinates
+    are in the request payload.
+    
+    ``fields`` projects the response onto dotted paths such as
+    ``summary,routes.vehicle_id,routes.stops.time``; paths through lists
+    apply to every element. The stops of a route are ``routes.route`` in the
+    full format and ``routes.stops`` in the compact format; either name
+    selects them in both. Stop fields are those of each format (e.g.
+    ``routes.stops.time_formatted`` only in the full format,
+    ``routes.stops.customer_id`` only in the compact one). Segments are
+    derived from the stops and only built when they are part of the
+    response: always in the full format without projection, otherwise only
+    when ``routes.segments`` is listed.
+    """
+    
+    FORMATS = ('full', 'compact')
+    
+    def __init__(self,
+                 compact: bool = False,
+                 fields: Optional[List[str]] = None,
+                 wire: Optional[WireFormat] = None):
+        """
+        Initialize a response format.
+        
+        Args:
+            compact: Whether to use the compact format
+            fields: Dotted field paths to project the response onto
+            wire: Negotiated wire format (default: plain JSON)
+        
+        Raises:
+            ValueError: If a field path does not exist in the format
+        """
+        self.compact = compact
+        self.fields = _check_fields(_field_tree(fields), compact) if fields else None
+        self.wire = wire or WireFormat()
+    
+    def apply(self, result: Dict) -> Dict:
+        """
+        Format one solve result.
+        
+        Args:
+            result: Result of SolverService (not modified)
+        
+        Returns:
+            Formatted result; results without routes (statuses) are only projected
+        """
+        if 'routes' in result:
+            with_segments = self._with_segments()
+            result = dict(result, routes=[
+                self._route(route, with_segments) for route in result['routes']
+            ])
+            if self.compact:
+                result['format'] = 'compact'
+        return _project(result, self.fields) if self.fields is not None else result
+    
+    def render(self, result: Dict) -> Union[Dict, Response]:
+        """
+        Format a result as the return value of an endpoint.
+        
+        The full format without projection, as plain JSON, stays a dict, so
+        the endpoint's response model applies as before. Everything else is
+        returned as a ready response in the negotiated wire format, which
+        skips response model validation and FastAPI's encoding pass over the
+        whole result.
+        """
+        if not self.compact and self.fields is None and self.wire.is_default:
+            return self.apply(result)
+        return self.wire.response(self.apply(result))
+    
+    def stream(self, events: AsyncIterator[Dict]) -> StreamingResponse:
+        """Stream events (already formatted) in the negotiated wire format."""
+        return self.wire.stream(events)
+    
+    def _with_segments(self) -> bool:
+        """Whether the response includes the timeline segments of routes."""
+        if self.fields is None:
+            return not self.compact
+        if 'routes' not in self.fields:
+            return False
+        route_fields = self.fields['routes']
+        if route_fields is None:
+            return not self.compact
+        return 'segments' in route_fields
+    
+    def _route(self, route: Dict, with_segments: bool) -> Dict:
+        """Format one route of a result."""
+        segments = timeline_segments(route['route']) if with_segments else None
+        if not self.compact:
+            return dict(route, segments=segments) if with_segments else route
+        
+        out = {
+            key: value for key, value in route.items()
+            if _is_number(value) and key not in REDUNDANT_ROUTE_KEYS
+        }
+        out['stops'] = _stop_columns(route['route'])
+        if with_segments:
+            out['segments'] = segments
+        return out
+
+
+def timeline_segments(stops: List[Dict]) -> List[Dict]:
+    """
+    Build the timeline segments of a route for visualization.
+    
+    Each customer stop contributes a travel segment from the previous stop
+    followed by its service segment; the last segment is the travel back to
+    the depot. Routes whose stops carry arrival times instead of end of
+    service times (Gurobi engines) have no timeline.
+    
+    Args:
+        stops: Stops of a route, depot to depot
+    
+    Returns:
+        List of travel and service segments
+    """
+    if not stops or 'time' not in stops[0]:
+        return []
+    
+    segments = []
+    for from_stop, to_stop in zip(stops, stops[1:]):
+        time_diff = to_stop['time'] - from_stop['time']
+        distance_km = to_stop.get('segment_distance', 0.0)
+        
+        if _is_depot(to_stop):
+            segments.append({
+                'type': 'travel',
+                'from_location': from_stop['location'],
+                'to_location': to_stop['location'],
+                'start_time': from_stop['time'],
+                'end_time': to_stop['time'],
+                'duration_minutes': time_diff,
+                'distance_km': distance_km
+            })
+            continue
+        
+        # Vehicle start nodes deliver nothing and have no service
+        units_delivered = to_stop['load_before'] - to_stop['load_after']
+        service_time_minutes = service_minutes(units_delivered) if units_delivered > 0 else 0
+        travel_time_minutes = max(0, time_diff - service_time_minutes)
+        segments.append({
+            'type': 'travel',
+            'from_location': from_stop['location'],
+            'to_location': to_stop['location'],
+            'start_time': from_stop['time'],
+            'end_time': from_stop['time'] + travel_time_minutes,
+            'duration_minutes': travel_time_minutes,
+            'distance_km': distance_km
+        })
+        segments.append({
+            'type': 'service',
+            'location': to_stop['location'],
+            'start_time': from_stop['time'] + travel_time_minutes,
+            'end_time': to_stop['time'],
+            'duration_minutes': service_time_minutes,
+            'units': units_delivered
+        })
+    return segments
+
+
+def _is_depot(stop: Dict) -> bool:
+    """Whether an (enriched) stop is the depot."""
+    info = stop.get('location_info')
+    return info['type'] == 'depot' if info else stop['location'] == 0
+
+
+def _is_number(value) -> bool:
+    """Whether a value is a JSON number (booleans are ints in Python)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _stop_columns(stops: List[Dict]) -> Dict[str, List]:
+    """Turn the stops of a route into one list per numeric field."""
+    rows = []
+    for stop in stops:
+        row = {
+            key: value for key, value in stop.items()
+            if _is_number(value) and key not in REDUNDANT_STOP_KEYS
+        }
+        if stop.get('time_window'):
+            row['tw_start'], row['tw_end'] = stop['time_window'][0], stop['time_window'][1]
+        if stop.get('location_info'):
+            row['customer_id'] = stop['location_info'].get('customer_id')
+        rows.append(row)
+    
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    return {key: [row.get(key) for row in rows] for key in keys}
+
+
+def _field_tree(fields: List[str]) -> Dict[str, Optional[Dict]]:
+    """
+    Parse dotted field paths into a tree; None marks a selected subtree.
+    
+    ``['summary', 'routes.stops.time']`` becomes
+    ``{'summary': None, 'routes': {'stops': {'time': None}}}``.
+    """
+    tree: Dict[str, Optional[Dict]] = {}
+    for field in fields:
+        node = tree
+        parts = [part for part in field.strip().split('.') if part]
+        for position, part in enumerate(parts):
+            if position == len(parts) - 1:
+                node[part] = None
+            elif part not in node:
+                node[part] = {}
+            elif node[part] is None:
+                # A parent was already selected as a whole
+                break
+            node = node[part]
+    return tree
+
+
+def _check_fields(tree: Dict[str, Optional[Dict]], compact: bool) -> Dict[str, Optional[Dict]]:
+    """
+    Map the stops of routes to the format's key and check every path.
+    
+    Args:
+        tree: Field tree from _field_tree
+        compact: Whether the paths apply to the compact format
+    
+    Returns:
+        Field tree with 'routes.stops' / 'routes.route' named as in the format
+    
+    Raises:
+        ValueError: If a path does not exist in the format
+    """
+    stops_key, alias = ('stops', 'route') if compact else ('route', 'stops')
+    routes = tree.get('routes')
+    if routes and alias in routes:
+        selected = routes.pop(alias)
+        current = routes.get(stops_key, {})
+        # Both names given: selecting all stop fields wins over single fields
+        routes[stops_key] = None if selected is None or current is None else {**current, **selected}
+    
+    route_fields = dict.fromkeys(COMPACT_ROUTE_FIELDS if compact else ROUTE_FIELDS)
+    route_fields[stops_key] = dict.fromkeys(COMPACT_STOP_FIELDS if compact else STOP_FIELDS)
+    route_fields['segments'] = dict.fromkeys(SEGMENT_FIELDS)
+    schema = dict.fromkeys(RESULT_FIELDS)
+    schema['routes'] = route_fields
+    
+    def check(node: Dict, allowed: Dict, path: List[str]) -> None:
+        for key, subtree in node.items():
+            if key not in allowed:
+                raise ValueError(
+                    f"Unknown field '{'.'.join(path + [key])}' in the "
+                    f"{'compact' if compact else 'full'} format"
+                )
+            if subtree is not None and allowed[key] is not None:
+                check(subtree, allowed[key], path + [key])
+    
+    check(tree, schema, [])
+    return tree
+
+
+def _project(value, tree: Optional[Dict]):
+    """Keep only the fields of a tree in a (nested) value."""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _project(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
@@ -1,28 +1,59 @@
 """API route handlers for CVRPTW solver."""
 
 import os
-import json
 import asyncio
-import logging
 import zipfile
+import threading
 from io import BytesIO
+from typing import List
 from fastapi import APIRouter, HTTPException, Body, Query, Depends
-from fastapi.responses import StreamingResponse, Response
+from fastapi.responses import Response
 
 from ..models.api import SolveRequest, SolveResponse, HealthResponse, SolverConfig
 from ..services import SolverService
-from ..config import get_logger
-from .dependencies import verify_api_key
+from ..config import get_logger, get_settings
+from ..utils import metrics, profiling
+from ..utils.events import EventChannel, find_channel
+from .dependencies import (
+    verify_api_key, verify_profiling_key, profiling_requested, get_solver_service, solve_payload,
+    response_format
+)
+from .response_format import ResponseFormat
+from ..services.payload_reader import PayloadColumns
 
 logger = get_logger(__name__)
 router = APIRouter()
 
-# Singleton service instance
-solver_service = SolverService()
+# The solve endpoints read their body as a stream (see solve_payload), so
+# the body is declared here for the OpenAPI docs
+PAYLOAD_BODY = {
+    'requestBody': {
+        'required': True,
+        'description': (
+            "Problem data: depot, vehicles, customers (per-day or aggregated per date). "
+            "JSON or MessagePack, optionally compressed (Content-Encoding: gzip, deflate or zstd)"
+        ),
+        'content': {
+            'application/json': {'schema': {'type': 'object'}},
+            'application/msgpack': {'schema': {'type': 'object'}}
+        }
+    }
+}
+
+
+def _open_channel(incumbent_routes: bool = False) -> EventChannel:
+    """Event channel of a streaming request, configured from settings."""
+    settings = get_settings()
+    return EventChannel(
+        max_queued=settings.stream_max_queued_events,
+        min_interval=settings.stream_progress_interval_ms / 1000.0,
+        log_rate=settings.stream_log_rate,
+        incumbent_routes=incumbent_routes
+    )
 
 
 @router.get('/health', response_model=HealthResponse)
-async def health_check():
+async def health_check(solver_service: SolverService = Depends(get_solver_service)):
     """
     Health check endpoint.
     
@@ -33,40 +64,107 @@ async def health_check():
     return HealthResponse(status="ready")
 
 
-@router.post('/solve', response_model=SolveResponse)
+@router.get('/metrics')
+async def metrics_endpoint():
+    """
+    Prometheus metrics of this API process (text exposition format).
+    
+    Covers solve latency by solver and instance size, queue depth, distance
+    cache lookups, OSRM latency and errors, matrix and model build times,
+    incumbents, dropped customers and process memory.
+    """
+    return Response(
+        content=metrics.REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@router.get('/profile/stacks')
+async def profile_stacks_endpoint(
+    reset: bool = Query(False, description="Clear the aggregated stacks after reading them"),
+    _: None = Depends(verify_profiling_key)
+):
+    """
+    Stacks of solving threads aggregated by the sampling profiler.
+    
+    Folded format, one "frame;frame;... count" line per distinct stack, ready
+    for flamegraph.pl or speedscope. The sampler runs when
+    SAMPLING_PROFILER_INTERVAL_MS > 0; stacks accumulate across requests
+    until reset. Requires PROFILING_API_KEY (or API_KEY).
+    """
+    if not profiling.SAMPLER.running:
+        raise HTTPException(
+            status_code=404,
+            detail="Sampling profiler is not running. Set SAMPLING_PROFILER_INTERVAL_MS to enable it."
+        )
+    samples = profiling.SAMPLER.samples
+    return Response(
+        content=profiling.SAMPLER.folded(reset=reset),
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Profile-Samples": str(samples)}
+    )
+
+
+@router.post('/solve', response_model=SolveResponse, openapi_extra=PAYLOAD_BODY)
 async def solve_endpoint(
-    payload: dict = Body(...),
+    payload: PayloadColumns = Depends(solve_payload),
     time_limit: int = Query(60, description="Time limit in seconds", ge=1, le=3600),
-    solver: str = Query("ortools", description="Solver type: 'ortools' or 'gurobi'"),
+    solver: str = Query("ortools", description="Solver type: 'ortools', 'gurobi', 'hybrid', 'colgen', 'heuristic' or 'hgs'"),
     vehicle_penalty_weight: float = Query(None, description="Weight for minimizing vehicles"),
     distance_weight: float = Query(1.0, description="Weight for distance minimization"),
     mip_gap: float = Query(0.01, description="MIP optimality gap for Gurobi"),
+    formulation: str = Query(None, description="Gurobi formulation: 'three_index' or 'two_index'"),
+    profile: bool = Depends(profiling_requested),
+    output: ResponseFormat = Depends(response_format),
+    solver_service: SolverService = Depends(get_solver_service),
     _: None = Depends(verify_api_key)
 ):
     """
     Solve a CVRPTW problem from JSON payload.
-
+    
     Requires authentication if API_KEY environment variable is set.
     
     Query parameters:
     - time_limit: Time limit in seconds (default 60)
-    - solver: 'ortools' or 'gurobi' (default 'ortools')
+    - solver: 'ortools', 'gurobi', 'hybrid', 'colgen', 'heuristic' or 'hgs' (default 'ortools')
     - vehicle_penalty_weight: Weight for minimizing vehicles (default varies by solver)
     - distance_weight: Weight for distance minimization (default 1.0)
     - mip_gap: MIP optimality gap for Gurobi (default 0.01 = 1%)
+    - formulation: Gurobi formulation, 'three_index' or 'two_index' (default from settings)
+    - profile: Run the solve under cProfile and add the hottest functions as 'profile'
+      (requires PROFILING_API_KEY, or API_KEY; stored in PROFILE_DIR when set)
+    - format: 'full' (default) or 'compact' (numeric values only, stops as columns)
+    - fields: Comma-separated fields to return (e.g. 'summary,routes.stops.time');
+      stops are 'routes.route' in the full format and 'routes.stops' in the compact
+      one (either name works in both), unknown paths are rejected with 400, and
+      route 'segments' are only built when returned
     
     Returns:
         Solution with routes and summary statistics
     """
     try:
-        result = solver_service.solve(
+        solve_args = dict(
             payload=payload,
             solver_type=solver,
             time_limit=time_limit,
             vehicle_penalty_weight=vehicle_penalty_weight,
             distance_weight=distance_weight,
-            mip_gap=mip_gap
+            mip_gap=mip_gap,
+            formulation=formulation
         )
+        if profile:
+            settings = get_settings()
+            result, profile_summary = profiling.profile_call(
+                solver_service.solve,
+                top=settings.profile_top_functions,
+                output_dir=settings.profile_dir,
+                **solve_args
+            )
+            logger.info(f"Profiled solve: {profile_summary['total_calls']} calls in {profile_summary['wall_seconds']}s"
+                        + (f", stored in {profile_summary['file']}" if 'file' in profile_summary else ""))
+            result['profile'] = profile_summary
+        else:
+            result = solver_service.solve(**solve_args)
         
         # Check for error status
         if result.get('status') == 'error':
@@ -79,8 +177,10 @@ async def solve_endpoint(
         if result.get('status') == 'no_solution_found':
             raise HTTPException(status_code=500, detail="No solution found")
         
-        return result
-        
+        return output.render(result)
+    
+    except HTTPException:
+        raise
     except ValueError as e:
         # Solver busy
         raise HTTPException(status_code=503, detail=str(e))
@@ -89,133 +189,478 @@ async def solve_endpoint(
         raise HTTPException(status_code=500, detail=f"Solver error: {str(e)}")
 
 
-@router.post('/solve-stream')
+@router.post('/solve-stream', openapi_extra=PAYLOAD_BODY)
 async def solve_stream_endpoint(
-    payload: dict = Body(...),
+    payload: PayloadColumns = Depends(solve_payload),
     time_limit: int = Query(60, description="Time limit in seconds", ge=1, le=3600),
-    solver: str = Query("ortools", description="Solver type: 'ortools' or 'gurobi'"),
+    solver: str = Query("ortools", description="Solver type: 'ortools', 'gurobi', 'hybrid', 'colgen', 'heuristic' or 'hgs'"),
     vehicle_penalty_weight: float = Query(None, description="Weight for minimizing vehicles"),
     distance_weight: float = Query(1.0, description="Weight for distance minimization"),
     mip_gap: float = Query(0.01, description="MIP optimality gap for Gurobi"),
+    formulation: str = Query(None, description="Gurobi formulation: 'three_index' or 'two_index'"),
+    incumbent_routes: bool = Query(False, description="Include the routes in incumbent events"),
+    output: ResponseFormat = Depends(response_format),
+    solver_service: SolverService = Depends(get_solver_service),
     _: None = Depends(verify_api_key)
 ):
     """
-    Solve a CVRPTW problem with Server-Sent Events (SSE) streaming of logs.
-
+    Solve a CVRPTW problem with Server-Sent Events (SSE) streaming of progress.
+    
     Requires authentication if API_KEY environment variable is set.
     
     Query parameters:
     - time_limit: Time limit in seconds (default 60)
-    - solver: 'ortools' or 'gurobi' (default 'ortools')
+    - solver: 'ortools', 'gurobi', 'hybrid', 'colgen', 'heuristic' or 'hgs' (default 'ortools')
     - vehicle_penalty_weight: Weight for minimizing vehicles (default varies by solver)
     - distance_weight: Weight for distance minimization (default 1.0)
     - mip_gap: MIP optimality gap for Gurobi (default 0.01 = 1%)
+    - formulation: Gurobi formulation, 'three_index' or 'two_index' (default from settings)
+    - incumbent_routes: Include vehicle and customer IDs of each route in incumbent events
+    - format, fields: Format of the final solution (see /solve)
+    
+    Only the events of this request are streamed: 'started' (with the
+    stream_id), 'stage' (started and finished, with seconds and time left),
+    'progress' (matrix fetch), 'incumbent' (improving solutions of the
+    engine: objective, vehicles_used, distance, dropped stops, bound and gap
+    for Gurobi) and 'log' records, then a final 'result' or 'error'.
+    Progress and incumbent events are coalesced to the latest one per
+    STREAM_PROGRESS_INTERVAL_MS, and log records are limited to
+    STREAM_LOG_RATE per second.
+    
+    POST /solve-stream/{stream_id}/stop ends the search early; the result
+    is then the best solution found so far. Closing the stream does the same.
     
     Returns:
-        Server-Sent Events stream with logs and final solution
+        Server-Sent Events stream with progress events and final solution (a
+        stream of MessagePack objects with Accept: application/msgpack)
     """
-    # Use a queue to collect log messages
-    import queue
-    log_queue = queue.Queue()
-    
-    # Create custom logging handler for SSE
-    class SSELoggingHandler(logging.Handler):
-        """Custom logging handler that sends logs to SSE queue"""
-        def emit(self, record):
-            try:
-                msg = self.format(record)
-                log_queue.put(msg)
-            except Exception:
-                self.handleError(record)
-    
-    # Add SSE handler to loggers
-    sse_handler = SSELoggingHandler()
-    sse_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    
-    root_logger = logging.getLogger()
-    api_logger = logging.getLogger("cvrptw_api")
-    cache_logger = logging.getLogger("distance_cache")
-    
-    root_logger.addHandler(sse_handler)
-    api_logger.addHandler(sse_handler)
-    cache_logger.addHandler(sse_handler)
-    
     async def event_generator():
-        import threading
+        # Check if solver is busy
+        if solver_service.is_busy():
+            yield {'type': 'error', 'message': 'Solver is already running. Try again later.'}
+            return
         
-        try:
-            # Check if solver is busy
-            if solver_service.is_busy():
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Solver is already running. Try again later.'})}\n\n"
-                return
-            
-            # Container for solution result
-            solution_container = {}
-            error_container = {}
-            
-            def solve_in_thread():
+        channel = _open_channel(incumbent_routes)
+        yield {'type': 'started', 'stream_id': channel.stream_id}
+        
+        def solve_in_thread():
+            with channel.activate():
                 try:
-                    solution_container['result'] = solver_service.solve(
+                    solution = solver_service.solve(
                         payload=payload,
                         solver_type=solver,
                         time_limit=time_limit,
                         vehicle_penalty_weight=vehicle_penalty_weight,
                         distance_weight=distance_weight,
-                        mip_gap=mip_gap
+                        mip_gap=mip_gap,
+                        formulation=formulation
                     )
+                    if not solution:
+                        channel.publish({'type': 'error', 'message': 'No solution found'})
+                    elif solution.get('status') == 'error':
+                        error_msg = solution.get('message', 'Unknown solver error')
+                        channel.publish({'type': 'error', 'message': error_msg})
+                    else:
+                        channel.publish({'type': 'result', 'data': output.apply(solution)})
                 except ValueError as e:
                     # Solver busy
-                    error_container['error'] = f"Solver busy: {str(e)}"
+                    channel.publish({'type': 'error', 'message': f"Solver busy: {str(e)}"})
                 except Exception as e:
                     logger.exception("Solver error in thread")
-                    error_container['error'] = str(e)
-            
-            # Run solver in background thread
-            solve_thread = threading.Thread(target=solve_in_thread)
-            solve_thread.start()
-            
-            # Stream logs while solver runs
-            while solve_thread.is_alive():
-                try:
-                    msg = log_queue.get(timeout=0.1)
-                    yield f"data: {json.dumps({'type': 'log', 'message': msg})}\n\n"
-                except queue.Empty:
-                    await asyncio.sleep(0.1)
-            
-            # Get remaining logs
-            while not log_queue.empty():
+                    channel.publish({'type': 'error', 'message': str(e)})
+                finally:
+                    channel.close()
+        
+        # Run solver in background thread, its events arrive through the channel
+        threading.Thread(target=solve_in_thread, daemon=True).start()
+        async for event in channel.events():
+            yield event
+    
+    return output.stream(event_generator())
+
+
+@router.post('/solve-stream/{stream_id}/stop')
+async def stop_stream_endpoint(
+    stream_id: str,
+    _: None = Depends(verify_api_key)
+):
+    """
+    Stop the search of a running /solve-stream request early.
+    
+    Requires authentication if API_KEY environment variable is set.
+    
+    The engine finishes with its best solution so far, which is sent as the
+    stream's 'result' event. Streams are known to the worker process serving
+    them only, so with several workers the stop request has to reach the
+    same process (e.g. sticky sessions).
+    
+    Raises:
+        HTTPException: 404 if no stream with this ID is running
+    """
+    channel = find_channel(stream_id)
+    if channel is None:
+        raise HTTPException(status_code=404, detail=f"Stream {stream_id} not found")
+    channel.request_stop()
+    return {'stream_id': stream_id, 'status': 'stopping'}
+
+
+@router.post('/solve-dates', openapi_extra=PAYLOAD_BODY)
+async def solve_dates_endpoint(
+    payload: PayloadColumns = Depends(solve_payload),
+    time_limit: int = Query(60, description="Time limit per date in seconds", ge=1, le=3600),
+    solver: str = Query("ortools", description="Solver type: 'ortools', 'gurobi', 'hybrid', 'colgen', 'heuristic' or 'hgs'"),
+    vehicle_penalty_weight: float = Query(None, description="Weight for minimizing vehicles"),
+    distance_weight: float = Query(1.0, description="Weight for distance minimization"),
+    mip_gap: float = Query(0.01, description="MIP optimality gap for Gurobi"),
+    formulation: str = Query(None, description="Gurobi formulation: 'three_index' or 'two_index'"),
+    dates: List[str] = Query(None, description="Dates to solve (default: all dates of the payload)"),
+    output: ResponseFormat = Depends(response_format),
+    solver_service: SolverService = Depends(get_solver_service),
+    _: None = Depends(verify_api_key)
+):
+    """
+    Solve all dates of an aggregated payload in parallel, streaming each result.
+    
+    Requires authentication if API_KEY environment variable is set.
+    
+    The payload uses the aggregated format ('demands_units' and optional
+    'time_windows' keyed by date). One distance matrix is fetched for the
+    union of all locations and sliced per date; dates are solved in parallel
+    worker processes (MULTI_DATE_WORKERS), each with the full time limit.
+    The 'format' and 'fields' query parameters apply to each result (see /solve).
+    
+    Returns:
+        Server-Sent Events stream: a 'plan' event, one 'result' (or 'error')
+        event per date in completion order, and a final 'summary' event
+    """
+    async def event_generator():
+        channel = _open_channel()
+        
+        def solve_in_thread():
+            with channel.activate():
                 try:
-                    msg = log_queue.get_nowait()
-                    yield f"data: {json.dumps({'type': 'log', 'message': msg})}\n\n"
-                except queue.Empty:
-                    break
-            
-            # Check for errors
-            if 'error' in error_container:
-                yield f"data: {json.dumps({'type': 'error', 'message': error_container['error']})}\n\n"
-                return
-            
-            solution = solution_container.get('result')
-            if not solution:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'No solution found'})}\n\n"
-                return
-            
-            # Check if solution contains an error
-            if solution.get('status') == 'error':
-                error_msg = solution.get('message', 'Unknown solver error')
-                yield f"data: {json.dumps({'type': 'error', 'message': error_msg})}\n\n"
-                return
-            
-            # Send result
-            yield f"data: {json.dumps({'type': 'result', 'data': solution})}\n\n"
-            
-        finally:
-            # Remove SSE handler
-            root_logger.removeHandler(sse_handler)
-            api_logger.removeHandler(sse_handler)
-            cache_logger.removeHandler(sse_handler)
-    
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+                    for event in solver_service.solve_dates(
+                        payload=payload,
+                        solver_type=solver,
+                        time_limit=time_limit,
+                        vehicle_penalty_weight=vehicle_penalty_weight,
+                        distance_weight=distance_weight,
+                        mip_gap=mip_gap,
+                        formulation=formulation,
+                        dates=dates
+                    ):
+                        if event.get('type') == 'result':
+                            event = dict(event, data=output.apply(event['data']))
+                        channel.publish(event)
+                except HTTPException as e:
+                    channel.publish({'type': 'error', 'message': e.detail})
+                except ValueError as e:
+                    channel.publish({'type': 'error', 'message': str(e)})
+                except Exception as e:
+                    logger.exception("Error during multi-date solve")
+                    channel.publish({'type': 'error', 'message': f"Solver error: {str(e)}"})
+                finally:
+                    channel.close()
+        
+        threading.Thread(target=solve_in_thread, daemon=True).start()
+        async for event in channel.events():
+            yield event
+    
+    return output.stream(event_generator())
+
+
+@router.post('/sessions')
+async def create_session_endpoint(
+    payload: dict = Body(...),
+    time_limit: int = Query(60, description="Time limit in seconds", ge=1, le=3600),
+    solver: str = Query("ortools", description="Solver type: 'ortools', 'gurobi', 'hybrid', 'colgen', 'heuristic' or 'hgs'"),
+    vehicle_penalty_weight: float = Query(None, description="Weight for minimizing vehicles"),
+    distance_weight: float = Query(1.0, description="Weight for distance minimization"),
+    mip_gap: float = Query(0.01, description="MIP optimality gap for Gurobi"),
+    formulation: str = Query(None, description="Gurobi formulation: 'three_index' or 'two_index'"),
+    output: ResponseFormat = Depends(response_format),
+    solver_service: SolverService = Depends(get_solver_service),
+    _: None = Depends(verify_api_key)
+):
+    """
+    Solve a problem and keep it in memory for what-if re-solves.
+    
+    Requires authentication if API_KEY environment variable is set.
+    
+    The built problem, matrices and solver model stay alive until the session
+    is deleted or evicted (least recently used first, beyond
+    SESSION_MEMORY_BUDGET_MB). Query parameters are the same as /solve,
+    including 'format' and 'fields'.
+    
+    Returns:
+        Solution with a 'session' entry holding the session ID
+    """
+    try:
+        result = solver_service.create_session(
+            payload=payload,
+            solver_type=solver,
+            time_limit=time_limit,
+            vehicle_penalty_weight=vehicle_penalty_weight,
+            distance_weight=distance_weight,
+            mip_gap=mip_gap,
+            formulation=formulation
+        )
+        if result.get('status') == 'error':
+            raise HTTPException(status_code=500, detail=result.get('message', 'Unknown solver error'))
+        return output.render(result)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        status_code = 503 if solver_service.is_busy() else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
+    except Exception as e:
+        logger.exception("Error creating session")
+        raise HTTPException(status_code=500, detail=f"Solver error: {str(e)}")
+
+
+@router.post('/sessions/{session_id}/solve')
+async def resolve_session_endpoint(
+    session_id: str,
+    changes: dict = Body({}, description="Deltas: vehicle_penalty_weight, distance_weight, mip_gap, time_limit, time_windows"),
+    output: ResponseFormat = Depends(response_format),
+    solver_service: SolverService = Depends(get_solver_service),
+    _: None = Depends(verify_api_key)
+):
+    """
+    Apply deltas to a session and re-optimize from its last solution.
+    
+    Requires authentication if API_KEY environment variable is set.
+    
+    Body (all optional, omitted values are kept):
+    - vehicle_penalty_weight, distance_weight, mip_gap, time_limit
+    - time_windows: {"<customer_id>": {"start_min": 480, "end_min": 600}}
+    
+    Returns:
+        Solution with an updated 'session' entry
+    """
+    try:
+        result = solver_service.resolve_session(
+            session_id,
+            time_limit=changes.get('time_limit'),
+            vehicle_penalty_weight=changes.get('vehicle_penalty_weight'),
+            distance_weight=changes.get('distance_weight'),
+            mip_gap=changes.get('mip_gap'),
+            time_windows=changes.get('time_windows')
+        )
+        if result.get('status') == 'error':
+            raise HTTPException(status_code=500, detail=result.get('message', 'Unknown solver error'))
+        return output.render(result)
+    except HTTPException:
+        raise
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]) if e.args else "Unknown session")
+    except ValueError as e:
+        status_code = 503 if solver_service.is_busy() else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
+    except Exception as e:
+        logger.exception("Error during session re-solve")
+        raise HTTPException(status_code=500, detail=f"Solver error: {str(e)}")
+
+
+@router.get('/sessions')
+async def list_sessions_endpoint(
+    solver_service: SolverService = Depends(get_solver_service),
+    _: None = Depends(verify_api_key)
+):
+    """List open solve sessions, least recently used first."""
+    return {'sessions': solver_service.list_sessions()}
+
+
+@router.delete('/sessions/{session_id}')
+async def delete_session_endpoint(
+    session_id: str,
+    solver_service: SolverService = Depends(get_solver_service),
+    _: None = Depends(verify_api_key)
+):
+    """Close a solve session and free its model."""
+    if not solver_service.close_session(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or evicted session: {session_id}")
+    return {'status': 'closed', 'session_id': session_id}
+
+
+@router.post('/reoptimize')
+async def reoptimize_endpoint(
+    payload: dict = Body(..., description="Problem data of the day"),
+    state: dict = Body(..., description="Current vehicle positions, times and completed stops"),
+    time_limit: int = Query(10, description="Time limit in seconds", ge=1, le=3600),
+    solver: str = Query("ortools", description="Solver type: 'ortools', 'gurobi' or 'hybrid'"),
+    vehicle_penalty_weight: float = Query(None, description="Weight for minimizing vehicles"),
+    distance_weight: float = Query(1.0, description="Weight for distance minimization"),
+    mip_gap: float = Query(0.01, description="MIP optimality gap for Gurobi"),
+    output: ResponseFormat = Depends(response_format),
+    solver_service: SolverService = Depends(get_solver_service),
+    _: None = Depends(verify_api_key)
+):
+    """
+    Re-optimize the rest of a day already in progress.
+    
+    Requires authentication if API_KEY environment variable is set.
+    
+    Completed customers are left out; every vehicle listed in the state
+    starts from its current position at its availability time, followed by
+    its committed next stops (locked). Only the remaining customers are
+    re-planned.
+    
+    Body:
+    - payload: Problem data of the day (same as /solve)
+    - state: {"current_time_min", "completed_customers", "vehicles": [{"vehicle_id",
+      "location", "available_min", "completed_customers", "next_customers",
+      "delivered_units"}]}
+    
+    Query parameters:
+    - time_limit: Time limit in seconds (default 10)
+    - solver: 'ortools', 'gurobi' or 'hybrid' (default 'ortools')
+    - vehicle_penalty_weight: Weight for minimizing vehicles (default varies by solver)
+    - distance_weight: Weight for distance minimization (default 1.0)
+    - mip_gap: MIP optimality gap for Gurobi (default 0.01 = 1%)
+    
+    Returns:
+        Solution for the remaining customers with a 'reoptimization' report
+    """
+    try:
+        result = solver_service.solve(
+            payload=payload,
+            solver_type=solver,
+            time_limit=time_limit,
+            vehicle_penalty_weight=vehicle_penalty_weight,
+            distance_weight=distance_weight,
+            mip_gap=mip_gap,
+            state=state
+        )
+        
+        if result.get('status') == 'error':
+            raise HTTPException(status_code=500, detail=result.get('message', 'Unknown solver error'))
+        
+        if result.get('status') == 'no_active_customers':
+            return result
+        
+        if result.get('status') == 'no_solution_found':
+            raise HTTPException(status_code=500, detail="No solution found")
+        
+        return output.render(result)
+    
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # Solver busy or state inconsistent with the payload
+        status_code = 503 if solver_service.is_busy() else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
+    except Exception as e:
+        logger.exception("Error during re-optimization")
+        raise HTTPException(status_code=500, detail=f"Solver error: {str(e)}")
+
+
+@router.post('/insert-orders')
+async def insert_orders_endpoint(
+    payload: dict = Body(..., description="Problem data the solution was computed for"),
+    solution: dict = Body(..., description="Result of a previous /solve for the same date"),
+    customers: List[dict] = Body(..., description="New customers in payload format"),
+    repair: bool = Query(False, description="Run local search on the affected routes"),
+    repair_time_limit: float = Query(0.5, description="Repair time limit in seconds", gt=0, le=30),
+    vehicle_penalty_weight: float = Query(None, description="Cost of opening a route on an idle vehicle"),
+    distance_weight: float = Query(1.0, description="Weight for distance minimization"),
+    output: ResponseFormat = Depends(response_format),
+    solver_service: SolverService = Depends(get_solver_service),
+    _: None = Depends(verify_api_key)
+):
+    """
+    Insert late orders into an existing solution.
+    
+    Requires authentication if API_KEY environment variable is set.
+    
+    Each new customer goes to its cheapest feasible position; routes that
+    receive no new customer are returned unchanged. Does not wait for (or
+    block) a running solve.
+    
+    Body:
+    - payload: Problem data the solution was computed for
+    - solution: Result of a previous /solve
+    - customers: New customers, same format as payload customers
+    
+    Query parameters:
+    - repair: Run local search on the affected routes (default false)
+    - repair_time_limit: Repair time limit in seconds (default 0.5)
+    - vehicle_penalty_weight: Cost of opening a route (default from settings)
+    - distance_weight: Weight for distance minimization (default 1.0)
+    
+    Returns:
+        Updated solution with an 'insertion' report
+    """
+    try:
+        result = await asyncio.to_thread(
+            solver_service.insert_orders,
+            payload=payload,
+            solution=solution,
+            customers=customers,
+            repair=repair,
+            repair_time_limit=repair_time_limit,
+            vehicle_penalty_weight=vehicle_penalty_weight,
+            distance_weight=distance_weight
+        )
+        return output.render(result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Error during order insertion")
+        raise HTTPException(status_code=500, detail=f"Insertion error: {str(e)}")
+
+
+@router.post('/evaluate-moves')
+async def evaluate_moves_endpoint(
+    payload: dict = Body(..., description="Problem data the solution was computed for"),
+    solution: dict = Body(..., description="Result of a previous /solve for the same date"),
+    moves: List[dict] = Body(..., description="Moves to evaluate against the solution"),
+    vehicle_penalty_weight: float = Query(None, description="Cost of a used vehicle"),
+    distance_weight: float = Query(1.0, description="Weight for distance minimization"),
+    output: ResponseFormat = Depends(response_format),
+    solver_service: SolverService = Depends(get_solver_service),
+    _: None = Depends(verify_api_key)
+):
+    """
+    Check manual edits of a solution (relocate, swap, insert, remove) without re-solving.
+    
+    Requires authentication if API_KEY environment variable is set.
+    
+    Each move is evaluated independently against the solution, in constant
+    time, for time-window and capacity feasibility and its distance and
+    objective delta. Send all candidates of an edit in one batch. Does not
+    wait for (or block) a running solve.
+    
+    Body:
+    - payload: Problem data the solution was computed for
+    - solution: Result of a previous /solve
+    - moves: e.g. {"type": "relocate", "customer_id": ..., "vehicle_id": 3, "position": 0},
+      {"type": "swap", "customer_id": ..., "other_customer_id": ...},
+      {"type": "insert", "customer_id": ..., "vehicle_id": 3}, {"type": "remove", "customer_id": ...};
+      without a position, the cheapest feasible one is reported
+    
+    Query parameters:
+    - vehicle_penalty_weight: Cost of a used vehicle (default from settings)
+    - distance_weight: Weight for distance minimization (default 1.0)
+    
+    Returns:
+        The checked 'plan' and one result per move, in request order
+    """
+    try:
+        result = await asyncio.to_thread(
+            solver_service.evaluate_moves,
+            payload=payload,
+            solution=solution,
+            moves=moves,
+            vehicle_penalty_weight=vehicle_penalty_weight,
+            distance_weight=distance_weight
+        )
+        return output.render(result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Error during move evaluation")
+        raise HTTPException(status_code=500, detail=f"Evaluation error: {str(e)}")
 
 
 @router.get('/download-examples')
@@ -0,0 +1,233 @@
+"""
+Wire formats of the solve endpoints: MessagePack bodies and compression.
+
+Request bodies may be sent as MessagePack (``Content-Type:
+application/msgpack``) and compressed with gzip, deflate or zstd
+(``Content-Encoding``). Responses are negotiated from ``Accept`` and
+``Accept-Encoding``: MessagePack instead of JSON, compressed with zstd or
+gzip. Event streams become a sequence of MessagePack objects instead of
+Server-Sent Events, and compressed streams are flushed after every event.
+
+MessagePack and zstd are optional: without ``msgpack`` or ``zstandard``
+installed, responses fall back to JSON and gzip, and requests using them are
+rejected with 415.
+"""
+
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
+
+from ..config import get_settings
+from ..services.payload_reader import PayloadError
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, 'application/x-msgpack', 'application/vnd.msgpack')
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+class WireFormat:
+    """
+    Body encoding of one request and the response negotiated for it.
+    
+    Args:
+        msgpack_body: Request body is MessagePack
+        content_encoding: Compression of the request body
+        msgpack_response: Client prefers MessagePack responses
+        response_encoding: Compression of the response ('identity', 'gzip' or 'zstd')
+    """
+    
+    def __init__(self,
+                 msgpack_body: bool = False,
+                 content_encoding: str = 'identity',
+                 msgpack_response: bool = False,
+                 response_encoding: str = 'identity'):
+        self.msgpack_body = msgpack_body
+        self.content_encoding = content_encoding
+        self.msgpack_response = msgpack_response
+        self.response_encoding = response_encoding
+    
+    @classmethod
+    def from_request(cls, request: Request) -> 'WireFormat':
+        """
+        Read the body encoding and negotiate the response format of a request.
+        
+        Raises:
+            HTTPException: 415 if the body uses an unsupported encoding
+        """
+        headers = request.headers
+        content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+        msgpack_body = content_type in MSGPACK_MEDIA_TYPES
+        if msgpack_body and not MSGPACK_AVAILABLE:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="MessagePack bodies require the 'msgpack' package"
+            )
+        
+        content_encoding = headers.get('content-encoding', 'identity').strip().lower() or 'identity'
+        if content_encoding not in ('identity', 'gzip', 'deflate', 'zstd') or (
+                content_encoding == 'zstd' and not ZSTD_AVAILABLE):
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported Content-Encoding '{content_encoding}'"
+            )
+        
+        accept = _qualities(headers.get('accept', ''))
+        msgpack_q = max(accept.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+        msgpack_response = MSGPACK_AVAILABLE and msgpack_q > accept.get('application/json', 0.0)
+        
+        response_encoding = 'identity'
+        if get_settings().response_compression:
+            accept_encoding = _qualities(headers.get('accept-encoding', ''))
+            for encoding in ('zstd', 'gzip'):
+                if encoding == 'zstd' and not ZSTD_AVAILABLE:
+                    continue
+                if accept_encoding.get(encoding, accept_encoding.get('*', 0.0)) > 0:
+                    response_encoding = encoding
+                    break
+        
+        return cls(msgpack_body, content_encoding, msgpack_response, response_encoding)
+    
+    @property
+    def is_default(self) -> bool:
+        """Whether responses are plain, uncompressed JSON."""
+        return not self.msgpack_response and self.response_encoding == 'identity'
+    
+    async def body(self, request: Request) -> AsyncIterator[bytes]:
+        """
+        Stream the decompressed request body.
+        
+        Raises:
+            HTTPException: 400 if the body is not valid for its Content-Encoding
+        """
+        if self.content_encoding == 'identity':
+            async for chunk in request.stream():
+                yield chunk
+            return
+        
+        if self.content_encoding == 'zstd':
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+            errors = (zstandard.ZstdError,)
+        else:
+            wbits = 16 + zlib.MAX_WBITS if self.content_encoding == 'gzip' else zlib.MAX_WBITS
+            decompressor = zlib.decompressobj(wbits)
+            errors = (zlib.error,)
+        try:
+            async for chunk in request.stream():
+                if chunk:
+                    yield decompressor.decompress(chunk)
+            if self.content_encoding != 'zstd':
+                yield decompressor.flush()
+        except errors as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid {self.content_encoding} body: {e}"
+            )
+    
+    async def unpack(self, request: Request) -> Any:
+        """
+        Read a MessagePack request body.
+        
+        Raises:
+            PayloadError: If the body is not valid MessagePack
+        """
+        body = b''.join([chunk async for chunk in self.body(request)])
+        try:
+            return msgpack.unpackb(body, raw=False, strict_map_key=False)
+        except ValueError as e:
+            raise PayloadError([{
+                'loc': ['body'], 'msg': f"Invalid MessagePack: {str(e) or type(e).__name__}", 'type': 'msgpack_invalid'
+            }])
+    
+    def response(self, content: Any, status_code: int = 200) -> Response:
+        """Encode and compress a complete response."""
+        if self.msgpack_response:
+            body, media_type = msgpack.packb(content, use_bin_type=True, default=str), MSGPACK_MEDIA_TYPE
+        else:
+            body, media_type = _json(content), 'application/json'
+        
+        headers = {'Vary': 'Accept, Accept-Encoding'}
+        if self.response_encoding != 'identity' and len(body) >= MIN_COMPRESS_BYTES:
+            compressor = self._compressor()
+            body = compressor.compress(body) + compressor.flush()
+            headers['Content-Encoding'] = self.response_encoding
+        return Response(content=body, status_code=status_code, media_type=media_type, headers=headers)
+    
+    def stream(self, events: AsyncIterator[Dict]) -> StreamingResponse:
+        """
+        Stream events as Server-Sent Events or concatenated MessagePack objects.
+        
+        With compression, the compressor is flushed after each event so
+        clients receive every event as soon as it is produced.
+        """
+        headers = {'Vary': 'Accept, Accept-Encoding', 'Cache-Control': 'no-cache'}
+        if self.response_encoding != 'identity':
+            headers['Content-Encoding'] = self.response_encoding
+        media_type = MSGPACK_MEDIA_TYPE if self.msgpack_response else 'text/event-stream'
+        return StreamingResponse(self._encode_events(events), media_type=media_type, headers=headers)
+    
+    async def _encode_events(self, events: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+        """Encode and compress events one by one."""
+        compressor = self._compressor() if self.response_encoding != 'identity' else None
+        async for event in events:
+            if self.msgpack_response:
+                data = msgpack.packb(event, use_bin_type=True, default=str)
+            else:
+                data = b'data: ' + _json(event) + b'\n\n'
+            if compressor is None:
+                yield data
+            elif self.response_encoding == 'zstd':
+                yield compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            else:
+                yield compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if compressor is not None:
+            yield compressor.flush()
+    
+    def _compressor(self):
+        """New compressor for the negotiated response encoding."""
+        if self.response_encoding == 'zstd':
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def _json(content: Any) -> bytes:
+    """Compact JSON encoding of a response or event."""
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def _qualities(header: str) -> Dict[str, float]:
+    """Parse an Accept or Accept-Encoding header into {value: quality}."""
+    qualities: Dict[str, float] = {}
+    for part in header.split(','):
+        value, _, params = part.partition(';')
+        value = value.strip().lower()
+        if not value:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, number = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        qualities[value] = quality
+    return qualities
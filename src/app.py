@@ -1,11 +1,17 @@
 """Main application entry point."""
 
+import tracemalloc
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api import router
 from .config import setup_logging, get_settings, get_logger
+from .core.solvers import preload_engines
+from .services import SolverService
+from .utils import profiling
 
 # Setup logging
 setup_logging()
@@ -14,11 +20,43 @@ logger = get_logger(__name__)
 # Get settings
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start-up and shutdown of one worker process.
+    
+    The solver service (distance cache, sessions, solver lock) is created
+    here rather than at import time, so importing the app stays cheap and
+    every worker forked from a preloading master gets its own service.
+    """
+    logger.info(f"{settings.app_name} starting up...")
+    logger.info(f"Debug mode: {settings.debug}")
+    if settings.debug and not tracemalloc.is_tracing():
+        # Per-stage peak memory in the 'deadline' entry of responses
+        tracemalloc.start()
+    if settings.preload_engines:
+        preload_engines()
+    app.state.solver_service = SolverService()
+    if settings.sampling_profiler_interval_ms > 0:
+        profiling.SAMPLER.start(settings.sampling_profiler_interval_ms)
+        logger.info(f"Sampling profiler running every {settings.sampling_profiler_interval_ms} ms")
+    
+    yield
+    
+    logger.info(f"{settings.app_name} shutting down...")
+    app.state.solver_service.close()
+    profiling.SAMPLER.stop()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
     description="Fleet Route Optimizer - API for solving Capacitated Vehicle Routing Problem with Time Windows (CVRPTW) using real-world distances and traffic patterns",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # Enable CORS
@@ -34,19 +72,6 @@ app.add_middleware(
 app.include_router(router, tags=["solver"])
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Run on application startup."""
-    logger.info(f"{settings.app_name} starting up...")
-    logger.info(f"Debug mode: {settings.debug}")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Run on application shutdown."""
-    logger.info(f"{settings.app_name} shutting down...")
-
-
 if __name__ == "__main__":
     uvicorn.run(
         "src.app:app",
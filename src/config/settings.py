@@ -14,6 +14,7 @@ class Settings(BaseSettings):
     api_host: str = Field("127.0.0.1", description="API host")
     api_port: int = Field(8000, description="API port")
     debug: bool = Field(False, description="Debug mode")
+    response_compression: bool = Field(True, description="Compress solve responses with zstd or gzip when the client accepts it")
     
     # CORS Settings
     cors_origins: List[str] = Field(
@@ -23,12 +24,42 @@ class Settings(BaseSettings):
     
     # Solver Settings
     default_time_limit: int = Field(60, description="Default solver time limit in seconds")
-    default_solver: str = Field("ortools", description="Default solver (ortools/gurobi)")
+    default_solver: str = Field("ortools", description="Default solver (ortools/gurobi/hybrid/colgen/heuristic/hgs)")
     ortools_vehicle_penalty: float = Field(100000.0, description="OR-Tools vehicle penalty weight")
     gurobi_vehicle_penalty: float = Field(1000.0, description="Gurobi vehicle penalty weight")
     default_distance_weight: float = Field(1.0, description="Default distance weight")
     default_mip_gap: float = Field(0.01, description="Default MIP gap for Gurobi")
-    
+    default_gurobi_formulation: str = Field("three_index", description="Default Gurobi formulation (three_index/two_index)")
+    hybrid_warm_start_fraction: float = Field(0.2, description="Share of the time limit given to OR-Tools in the hybrid solver")
+    colgen_pool_fraction: float = Field(0.2, description="Share of the time limit spent building the OR-Tools route pool for column generation")
+    hgs_workers: int = Field(0, description="Processes used by the HGS solver for offspring education (0 = all cores)")
+    multi_date_workers: int = Field(0, description="Processes solving dates in parallel for /solve-dates (0 = all cores)")
+    fleet_compression: bool = Field(True, description="Collapse identical vehicles and cap fleet size before solving")
+    stop_aggregation: bool = Field(True, description="Merge co-located customers with compatible time windows into single stops before solving")
+    stop_aggregation_radius_m: float = Field(10.0, description="Customers this close to a stop's first customer are merged into it (0 = identical coordinates only)")
+    matrix_budget_fraction: float = Field(0.25, description="Share of a request's time limit that matrix fetching may use before falling back to estimates")
+    deadline_reserve_seconds: float = Field(0.5, description="Time kept from the engine's limit for building the response")
+    preload_engines: bool = Field(False, description="Import all solver engines at startup instead of on first use")
+    trace_dir: Optional[str] = Field(None, description="Directory for Chrome trace files of each solve (disabled if empty)")
+
+    # Memory Guard Settings
+    memory_admission: str = Field("downgrade", description="Requests predicted to exceed the memory budget: downgrade (lighter engine), reject (413) or off")
+    solver_memory_budget_mb: float = Field(0.0, description="Peak memory a solve may use (0 = 80% of the memory available when the request arrives)")
+
+    # Solve Session Settings
+    session_memory_budget_mb: float = Field(512.0, description="Memory budget of all solve sessions; least recently used sessions are evicted beyond it")
+
+    # Streaming Settings
+    stream_max_queued_events: int = Field(64, description="Events buffered per streaming client before producers hold them back (coalescing meanwhile)")
+    stream_progress_interval_ms: float = Field(250.0, description="Minimum interval between two progress or incumbent events of a stream")
+    stream_log_rate: float = Field(20.0, description="Log records forwarded per second to a streaming client (0 = none)")
+
+    # Profiling Settings
+    profiling_api_key: Optional[str] = Field(None, description="Key allowed to request profiles (defaults to API_KEY; profiling is disabled if neither is set)")
+    profile_dir: Optional[str] = Field(None, description="Directory where cProfile results of profiled solves are stored (disabled if empty)")
+    profile_top_functions: int = Field(40, description="Functions listed in the profile summary of a response")
+    sampling_profiler_interval_ms: float = Field(0.0, description="Sampling interval of the stack sampler for solving threads (0 = disabled)")
+
     # Distance Cache Settings
     distance_cache_db: str = Field("distance_cache.db", description="Distance cache database path")
     osrm_base_url: str = Field("http://router.project-osrm.org", description="OSRM API base URL")
@@ -1,16 +1,51 @@
-"""Solver implementations."""
+"""
+Solver implementations.
+
+Solver wrappers (and with them OR-Tools and gurobipy) are imported on first
+access, not when the package is imported.
+"""
+
+from .base import BaseSolver, SolverType, GurobiFormulation
+from .factory import (
+    SolverFactory, create_solver, gurobi_available, load_solver_class, preload_engines
+)
+
+# Lazily imported names: attribute -> (module, attribute)
+_LAZY = {
+    "ORToolsSolver": ("ortools_solver", "ORToolsSolver"),
+    "GurobiSolver": ("gurobi_solver", "GurobiSolver"),
+    "HybridSolver": ("hybrid_solver", "HybridSolver"),
+    "ColumnGenerationSolver": ("colgen_solver", "ColumnGenerationSolver"),
+    "HeuristicSolver": ("heuristic_solver", "HeuristicSolver"),
+    "HGSSolver": ("hgs_solver", "HGSSolver"),
+    "GUROBI_AVAILABLE": ("gurobi_solver", "GUROBI_AVAILABLE"),
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        module_name, attribute = _LAZY[name]
+        value = getattr(importlib.import_module(f".{module_name}", __name__), attribute)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-from .base import BaseSolver, SolverType
-from .factory import SolverFactory, create_solver
-from .ortools_solver import ORToolsSolver
-from .gurobi_solver import GurobiSolver, GUROBI_AVAILABLE
 
 __all__ = [
     "BaseSolver",
     "SolverType",
+    "GurobiFormulation",
     "SolverFactory",
     "create_solver",
+    "gurobi_available",
+    "load_solver_class",
+    "preload_engines",
     "ORToolsSolver",
     "GurobiSolver",
+    "HybridSolver",
+    "ColumnGenerationSolver",
+    "HeuristicSolver",
+    "HGSSolver",
     "GUROBI_AVAILABLE",
 ]
@@ -5,10 +5,25 @@ from typing import Dict, Optional
 from enum import Enum
 
 
+# Objective cost of leaving a customer unserved, shared by all solvers so that
+# their objectives stay comparable (OR-Tools uses the same disjunction penalty)
+UNSERVED_PENALTY = 10000000000.0
+
+
 class SolverType(str, Enum):
     """Supported solver types."""
     ORTOOLS = "ortools"
     GUROBI = "gurobi"
+    HYBRID = "hybrid"
+    COLGEN = "colgen"
+    HEURISTIC = "heuristic"
+    HGS = "hgs"
+
+
+class GurobiFormulation(str, Enum):
+    """Supported Gurobi model formulations."""
+    THREE_INDEX = "three_index"
+    TWO_INDEX = "two_index"
 
 
 class BaseSolver(ABC):
@@ -51,7 +66,7 @@ class BaseSolver(ABC):
             vehicle_penalty_weight: Weight for minimizing number of vehicles
             distance_weight: Weight for distance in objective function
             **kwargs: Additional solver-specific parameters
-            
+        
         Returns:
             Dictionary containing solution details or None if no solution found
         """
@@ -0,0 +1,458 @@
+"""
+Column Generation CVRPTW Solver Implementation
+
+Set-partitioning formulation solved by column generation: a pool of
+feasible routes (singletons, OR-Tools routes and priced routes) feeds a
+restricted master problem on Gurobi. New routes are priced with a
+labelling algorithm over the time and capacity resources, and the final
+plan comes from an integer solve of the master over the whole pool.
+Improving integer solutions of the master are published as incumbents,
+and a stop request ends pricing and keeps the best plan found.
+"""
+
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import gurobipy as gp
+    from gurobipy import GRB
+    GUROBI_AVAILABLE = True
+except ImportError:
+    GUROBI_AVAILABLE = False
+
+from .base import UNSERVED_PENALTY
+from .gurobi_impl import GurobiSolverImpl
+from .ortools_impl import ORToolsSolverImpl
+from .hybrid_impl import ORTOOLS_COST_SCALE
+from .espprc import LabellingPricer
+from ...utils.tracing import trace_add, trace_span
+from ...utils.events import emit, current_channel, stop_requested
+from ...utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Pricing effort levels: (successors per node, labels per node); None = unlimited.
+# The solver moves to the next level only when the current one finds no column.
+PRICING_LEVELS = [(12, 24), (25, 100), (None, None)]
+
+
+class ColumnGenerationSolverImpl(GurobiSolverImpl):
+    """Set-partitioning column generation on Gurobi with a heuristic route pool."""
+    
+    def solve(
+        self,
+        time_limit_seconds: int = 60,
+        log_search: bool = False,
+        vehicle_penalty_weight: float = 1000.0,
+        distance_weight: float = 1.0,
+        mip_gap: float = 0.01,
+        pool_fraction: float = 0.2,
+        master_fraction: float = 0.25,
+        **kwargs
+    ) -> Optional[Dict]:
+        """
+        Solve CVRPTW problem by column generation.
+        
+        Args:
+            time_limit_seconds: Total time for pool, pricing and integer master
+            log_search: Whether to log Gurobi output
+            vehicle_penalty_weight: Weight for minimizing number of vehicles
+            distance_weight: Weight for distance minimization
+            mip_gap: Relative MIP gap of the final integer master
+            pool_fraction: Share of the time limit for the OR-Tools route pool
+            master_fraction: Share of the time limit kept for the integer master
+            **kwargs: Additional parameters (ignored)
+        
+        Returns:
+            Solution dictionary or None if no solution found
+        """
+        start_time = time.time()
+        deadline = start_time + time_limit_seconds
+        pricing_deadline = deadline - time_limit_seconds * master_fraction
+        
+        n = len(self.problem_data['locations'])
+        depot = self.problem_data['depot']
+        customers = [i for i in range(n) if i != depot]
+        distance_matrix = self.problem_data['distance_matrix']
+        time_matrix = self.problem_data['time_matrix']
+        demands = self.problem_data['demands']
+        capacities = self.problem_data['vehicle_capacities']
+        
+        logger.info(
+            f"Starting column generation: locations={n}, "
+            f"vehicles={self.problem_data['num_vehicles']}"
+        )
+        
+        classes = self._vehicle_classes()
+        pricer = LabellingPricer(
+            distance_matrix, time_matrix, demands,
+            self.problem_data['time_windows'], depot
+        )
+        pool = _RoutePool(distance_matrix, depot, vehicle_penalty_weight, distance_weight)
+        
+        # Initial pool: one route per customer and class, plus an OR-Tools plan
+        for c, (capacity, _) in enumerate(classes):
+            for i in customers:
+                if demands[i] <= capacity and pricer.feasible_arc[depot][i]:
+                    pool.add(c, [i])
+        
+        with trace_span('route_pool'):
+            warm_routes = self._ortools_routes(
+                max(1, int(round(time_limit_seconds * pool_fraction))),
+                vehicle_penalty_weight, distance_weight
+            )
+        vehicle_class = {k: c for c, (_, vehicles) in enumerate(classes) for k in vehicles}
+        warm_columns = []
+        for k, route in warm_routes:
+            load = sum(demands[i] for i in route)
+            for c, (capacity, _) in enumerate(classes):
+                if load <= capacity:
+                    pool.add(c, route)
+            warm_columns.append(pool.find(vehicle_class[k], route))
+        
+        logger.info(f"Initial route pool: {len(pool)} columns")
+        
+        try:
+            model = gp.Model("CVRPTW_SetPartitioning")
+            model.Params.OutputFlag = 1 if log_search else 0
+            model.ModelSense = GRB.MINIMIZE
+            
+            # Dropped customers cost the penalty of the reported objective, so that
+            # the LP bound and the plan objective compare like with like
+            drop = {i: model.addVar(lb=0.0, obj=UNSERVED_PENALTY, name=f"drop_{i}") for i in customers}
+            model.update()
+            cover = {
+                i: model.addConstr(drop[i] == 1, name=f"cover_{i}") for i in customers
+            }
+            fleet = [
+                model.addConstr(gp.LinExpr() <= len(vehicles), name=f"fleet_{c}")
+                for c, (_, vehicles) in enumerate(classes)
+            ]
+            
+            route_vars = []
+            
+            def add_columns(columns):
+                for column in columns:
+                    c, route, cost = pool.columns[column]
+                    constrs = [cover[i] for i in route] + [fleet[c]]
+                    route_vars.append(model.addVar(
+                        lb=0.0, obj=cost,
+                        column=gp.Column([1.0] * len(constrs), constrs),
+                        name=f"route_{column}"
+                    ))
+            
+            add_columns(range(len(pool)))
+            
+            channel = current_channel()
+            best_objective = [float('inf')]
+            
+            def publish(chosen):
+                """Publish an integer master solution if it improves the best one."""
+                objective = self._plan_objective(pool, chosen)
+                if objective >= best_objective[0] - 1e-6:
+                    return
+                best_objective[0] = objective
+                metrics.INCUMBENTS.inc(engine='colgen')
+                if channel is not None:
+                    self._emit_plan(pool, chosen, classes, objective, start_time, channel.incumbent_routes)
+            
+            # Column generation loop on the LP relaxation
+            pricing_start = time.time()
+            iterations = 0
+            level = 0
+            lp_value = None
+            lp_proven = False
+            while time.time() < pricing_deadline and not stop_requested():
+                model.Params.TimeLimit = max(1.0, pricing_deadline - time.time())
+                model.optimize()
+                if model.Status != GRB.OPTIMAL:
+                    logger.warning(f"Master LP ended with status {model.Status}")
+                    break
+                iterations += 1
+                lp_value = model.ObjVal
+                
+                # An integral restricted master is a plan of its own
+                values = model.getAttr('X', route_vars)
+                if all(abs(value - round(value)) < 1e-6 for value in values):
+                    publish([column for column, value in enumerate(values) if value > 0.5])
+                
+                duals = [0.0] * n
+                for i, pi in zip(customers, model.getAttr('Pi', [cover[i] for i in customers])):
+                    duals[i] = pi
+                fleet_duals = model.getAttr('Pi', fleet)
+                
+                max_successors, max_labels = PRICING_LEVELS[level]
+                new_columns = []
+                exhaustive = True
+                for c, (capacity, _) in enumerate(classes):
+                    if stop_requested():
+                        exhaustive = False
+                        break
+                    priced, class_exhaustive = pricer.price(
+                        duals,
+                        vehicle_penalty_weight - fleet_duals[c],
+                        capacity,
+                        distance_weight=distance_weight,
+                        max_successors=max_successors,
+                        max_labels_per_node=max_labels,
+                        deadline=pricing_deadline
+                    )
+                    exhaustive = exhaustive and class_exhaustive
+                    for _, route in priced:
+                        column = pool.add(c, route)
+                        if column is not None:
+                            new_columns.append(column)
+                
+                if iterations == 1 or iterations % 10 == 0:
+                    logger.info(
+                        f"[{time.time() - start_time:.0f}s] Column generation iteration {iterations}: "
+                        f"LP={lp_value:.2f}, columns={len(pool)}, pricing level={level}"
+                    )
+                
+                if new_columns:
+                    add_columns(new_columns)
+                    level = 0
+                    continue
+                if exhaustive:
+                    # No negative reduced cost route exists: the LP bound is proven
+                    lp_proven = True
+                    break
+                if level + 1 < len(PRICING_LEVELS):
+                    level += 1
+                    continue
+                break
+            
+            logger.info(
+                f"Column generation finished: {iterations} iterations, {len(pool)} columns, "
+                f"LP={lp_value if lp_value is not None else float('nan'):.2f} "
+                f"({'proven' if lp_proven else 'heuristic'})"
+            )
+            trace_add(
+                'pricing', time.time() - pricing_start,
+                iterations=iterations, columns=len(pool), lp_bound_proven=lp_proven
+            )
+            
+            # Integer master over the whole pool
+            for var in route_vars:
+                var.VType = GRB.BINARY
+            for var in drop.values():
+                var.VType = GRB.BINARY
+            for var in route_vars:
+                var.Start = 0.0
+            for column in warm_columns:
+                if column is not None:
+                    route_vars[column].Start = 1.0
+            model.Params.TimeLimit = max(1.0, deadline - time.time())
+            model.Params.MIPGap = mip_gap
+            
+            master_found = [False]
+            
+            def master_callback(model, where):
+                """Publish improving plans; on a stop request, end with the first plan found."""
+                if where == GRB.Callback.MIPSOL:
+                    master_found[0] = True
+                    values = model.cbGetSolution(route_vars)
+                    publish([column for column, value in enumerate(values) if value > 0.5])
+                if master_found[0] and stop_requested():
+                    # Ends with status INTERRUPTED, keeping the incumbent
+                    model.terminate()
+            
+            if stop_requested():
+                logger.info("Stop requested: solving the integer master for its first plan")
+            with trace_span('master'):
+                model.optimize(master_callback)
+                self._trace_search(model)
+            
+            if model.SolCount == 0:
+                logger.warning(f"Integer master found no solution (status {model.Status})")
+                return None
+            
+            chosen = [
+                column for column, value in enumerate(model.getAttr('X', route_vars)) if value > 0.5
+            ]
+            solution = self._solution_from_columns(pool, chosen, classes)
+            
+            solution['column_generation'] = {
+                'iterations': iterations,
+                'columns': len(pool),
+                'lp_bound': round(lp_value, 2) if lp_value is not None else None,
+                'lp_bound_proven': lp_proven
+            }
+            if lp_proven and lp_value is not None:
+                objective = solution['objective_value']
+                solution['best_bound'] = round(lp_value, 2)
+                solution['mip_gap'] = (
+                    round(max(0.0, objective - lp_value) / abs(objective), 6) if objective else 0.0
+                )
+            
+            self._log_solution_summary(solution, capacities)
+            return solution
+        
+        except gp.GurobiError as e:
+            error_msg = str(e)
+            logger.error(f"Gurobi error: {error_msg}")
+            return {
+                'status': 'error',
+                'error_type': 'gurobi_error',
+                'message': error_msg
+            }
+        except Exception as e:
+            logger.exception(f"Error during column generation: {e}")
+            return None
+    
+    def _vehicle_classes(self) -> List[Tuple[int, List[int]]]:
+        """Group vehicles by capacity: [(capacity, [vehicle index, ...])], largest first."""
+        classes: Dict[int, List[int]] = {}
+        for k, capacity in enumerate(self.problem_data['vehicle_capacities']):
+            classes.setdefault(int(capacity), []).append(k)
+        return sorted(classes.items(), key=lambda item: -item[0])
+    
+    def _ortools_routes(
+        self,
+        time_limit_seconds: int,
+        vehicle_penalty_weight: float,
+        distance_weight: float
+    ) -> List[Tuple[int, List[int]]]:
+        """Run OR-Tools briefly and return its routes as (vehicle index, customers)."""
+        logger.info(f"Seeding route pool with OR-Tools ({time_limit_seconds}s)")
+        try:
+            solution = ORToolsSolverImpl(self.problem_data).solve(
+                time_limit_seconds=time_limit_seconds,
+                vehicle_penalty_weight=vehicle_penalty_weight * ORTOOLS_COST_SCALE,
+                distance_weight=distance_weight
+            )
+        except Exception as e:
+            logger.warning(f"OR-Tools seeding failed: {e}")
+            return []
+        
+        if not solution or solution.get('status') != 'success':
+            return []
+        
+        depot = self.problem_data['depot']
+        routes = []
+        for route in solution.get('routes', []):
+            customers = [stop['location'] for stop in route['route'] if stop['location'] != depot]
+            if customers:
+                routes.append((route['vehicle_id'], customers))
+        return routes
+    
+    def _solution_from_columns(
+        self,
+        pool: "_RoutePool",
+        chosen: List[int],
+        classes: List[Tuple[int, List[int]]]
+    ) -> Dict:
+        """Assign chosen columns to vehicles of their class and build the solution."""
+        n = len(self.problem_data['locations'])
+        depot = self.problem_data['depot']
+        distance_matrix = self.problem_data['distance_matrix']
+        time_matrix = self.problem_data['time_matrix']
+        customers = [i for i in range(n) if i != depot]
+        
+        routes = []
+        served = set()
+        for k, route in self._assign_vehicles(pool, chosen, classes):
+            route_entry = self._build_route(k, [depot] + route + [depot], distance_matrix, time_matrix)
+            routes.append(route_entry)
+            served.update(route)
+        
+        routes.sort(key=lambda r: r['vehicle_id'])
+        dropped_customers = [self._build_dropped_customer(i) for i in customers if i not in served]
+        objective = self._plan_objective(pool, chosen)
+        
+        solution = self._build_solution_summary(
+            routes, len(routes),
+            sum(r['distance'] for r in routes),
+            sum(r['load'] for r in routes),
+            dropped_customers, objective, customers, n, depot
+        )
+        solution['solver'] = 'colgen'
+        return solution
+    
+    @staticmethod
+    def _assign_vehicles(
+        pool: "_RoutePool",
+        chosen: List[int],
+        classes: List[Tuple[int, List[int]]]
+    ) -> List[Tuple[int, List[int]]]:
+        """Give each chosen column a free vehicle of its class: [(vehicle index, customers)]."""
+        free_vehicles = [list(vehicles) for _, vehicles in classes]
+        assigned = []
+        for column in chosen:
+            c, route, _ = pool.columns[column]
+            assigned.append((free_vehicles[c].pop(0), route))
+        return assigned
+    
+    def _plan_objective(self, pool: "_RoutePool", chosen: List[int]) -> float:
+        """Objective of a plan: cost of its columns plus the penalty of each dropped customer."""
+        served = sum(len(pool.columns[column][1]) for column in chosen)
+        dropped = len(self.problem_data['locations']) - 1 - served
+        return sum(pool.columns[column][2] for column in chosen) + UNSERVED_PENALTY * dropped
+    
+    def _emit_plan(
+        self,
+        pool: "_RoutePool",
+        chosen: List[int],
+        classes: List[Tuple[int, List[int]]],
+        objective: float,
+        start_time: float,
+        with_routes: bool
+    ) -> None:
+        """Publish a plan of the master to the request's event stream."""
+        assigned = self._assign_vehicles(pool, chosen, classes)
+        event = {
+            'engine': 'colgen',
+            'objective': round(objective, 2),
+            'vehicles_used': len(assigned),
+            'distance': round(sum(pool.distance(route) for _, route in assigned), 2),
+            'dropped': len(self.problem_data['locations']) - 1 - sum(len(route) for _, route in assigned),
+            'elapsed_seconds': round(time.time() - start_time, 3)
+        }
+        if with_routes:
+            event['routes'] = [{'vehicle': k, 'nodes': list(route)} for k, route in assigned]
+        emit('incumbent', **event)
+
+
+class _RoutePool:
+    """Columns of the master problem: (class index, customers, cost), without duplicates."""
+    
+    def __init__(self, distance_matrix, depot: int, vehicle_penalty_weight: float, distance_weight: float):
+        self.distance_matrix = distance_matrix
+        self.depot = depot
+        self.vehicle_penalty_weight = vehicle_penalty_weight
+        self.distance_weight = distance_weight
+        self.columns: List[Tuple[int, List[int], float]] = []
+        self._best: Dict[Tuple[int, frozenset], int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.columns)
+    
+    def distance(self, route: List[int]) -> float:
+        """Length of a route from and back to the depot in km."""
+        path = [self.depot] + list(route) + [self.depot]
+        return sum(self.distance_matrix[a][b] for a, b in zip(path[:-1], path[1:]))
+    
+    def cost(self, route: List[int]) -> float:
+        """Objective cost of a route in Gurobi units."""
+        return self.vehicle_penalty_weight + self.distance_weight * self.distance(route)
+    
+    def add(self, vehicle_class: int, route: List[int]) -> Optional[int]:
+        """
+        Add a route for a vehicle class.
+        
+        Returns:
+            Column index, or None when an equal-or-cheaper route over the same
+            customers is already in the pool
+        """
+        cost = self.cost(route)
+        key = (vehicle_class, frozenset(route))
+        if key in self._best and self.columns[self._best[key]][2] <= cost + 1e-9:
+            return None
+        self._best[key] = len(self.columns)
+        self.columns.append((vehicle_class, list(route), cost))
+        return len(self.columns) - 1
+    
+    def find(self, vehicle_class: int, route: List[int]) -> Optional[int]:
+        """Index of the cheapest column of a class over the customers of route."""
+        return self._best.get((vehicle_class, frozenset(route)))
@@ -0,0 +1,52 @@
+"""Column generation solver wrapper implementing BaseSolver interface."""
+
+try:
+    from .colgen_impl import ColumnGenerationSolverImpl
+    from .gurobi_impl import GUROBI_AVAILABLE
+except ImportError:
+    GUROBI_AVAILABLE = False
+    ColumnGenerationSolverImpl = None
+
+from .base import BaseSolver
+
+
+class ColumnGenerationSolver(BaseSolver):
+    """Set-partitioning column generation solver on Gurobi."""
+    
+    def __init__(self, data: dict):
+        """Initialize column generation solver with problem data."""
+        if not GUROBI_AVAILABLE:
+            raise RuntimeError("Gurobi is not available")
+        self._solver = ColumnGenerationSolverImpl(data)
+        self.data = data
+    
+    def _validate_data(self) -> None:
+        """Validation is done in the implementation."""
+        pass
+    
+    def _prepare_data(self) -> None:
+        """Preparation is done in the implementation."""
+        pass
+    
+    def solve(self, 
+              time_limit_seconds: int = 60, 
+              log_search: bool = False,
+              vehicle_penalty_weight: float = 1000.0,
+              distance_weight: float = 1.0,
+              mip_gap: float = 0.01,
+              pool_fraction: float = 0.2,
+              **kwargs):
+        """Solve using column generation."""
+        return self._solver.solve(
+            time_limit_seconds=time_limit_seconds,
+            log_search=log_search,
+            vehicle_penalty_weight=vehicle_penalty_weight,
+            distance_weight=distance_weight,
+            mip_gap=mip_gap,
+            pool_fraction=pool_fraction
+        )
+    
+    @property
+    def solver_name(self) -> str:
+        """Return solver name."""
+        return "Column Generation (Gurobi)"
@@ -0,0 +1,233 @@
+"""
+Heuristic ESPPRC pricing for column generation.
+
+Solves the Elementary Shortest Path Problem with Resource Constraints
+(load and time) with a forward labelling algorithm. Labels are pruned by
+dominance and, to keep pricing fast, by a restricted successor list and a
+cap on the number of labels kept per node. With both limits disabled the
+algorithm is exact.
+"""
+
+import heapq
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _Label:
+    """Partial path from the depot to ``node``."""
+    
+    __slots__ = ('node', 'cost', 'load', 'time', 'visited', 'parent', 'active')
+    
+    def __init__(self, node, cost, load, time, visited, parent):
+        self.node = node
+        self.cost = cost
+        self.load = load
+        self.time = time
+        self.visited = visited
+        self.parent = parent
+        self.active = True
+    
+    def dominates(self, other: "_Label") -> bool:
+        """Whether every extension of ``other`` is also feasible and cheaper from self."""
+        return (
+            self.cost <= other.cost
+            and self.load <= other.load
+            and self.time <= other.time
+            and (self.visited & other.visited) == self.visited
+        )
+    
+    def path(self) -> List[int]:
+        """Customers visited by this label, in order (depot excluded)."""
+        nodes = []
+        label = self
+        while label.parent is not None:
+            nodes.append(label.node)
+            label = label.parent
+        nodes.reverse()
+        return nodes
+
+
+class LabellingPricer:
+    """
+    Forward labelling pricer over the time and capacity resources.
+    
+    Arc reduced costs are ``distance_weight * d_ij - dual_j``; a route of a
+    vehicle class additionally pays the vehicle penalty minus the dual of
+    the class fleet-size constraint.
+    """
+    
+    def __init__(
+        self,
+        distance_matrix: Sequence[Sequence[float]],
+        time_matrix: Sequence[Sequence[int]],
+        demands: Sequence[int],
+        time_windows: Sequence[Tuple[int, int]],
+        depot: int = 0
+    ):
+        """
+        Initialize the pricer.
+        
+        Args:
+            distance_matrix: Distances in km
+            time_matrix: Travel plus service times (scaled by 100)
+            demands: Demand per location
+            time_windows: Time windows in minutes
+            depot: Depot index
+        """
+        self.distance = np.asarray(distance_matrix, dtype=float)
+        self.time = np.asarray(time_matrix, dtype=float)
+        self.demands = np.asarray(demands, dtype=float)
+        self.earliest = np.asarray([tw[0] for tw in time_windows], dtype=float) * 100
+        self.latest = np.asarray([tw[1] for tw in time_windows], dtype=float) * 100
+        self.depot = depot
+        self.n = len(demands)
+        self._truncated = False
+        # Routes return before the depot closes, as in the Gurobi models
+        self.horizon = self.latest[depot]
+        
+        # Arcs that can never be part of a feasible route
+        arrival = np.maximum(self.earliest[:, None] + self.time, self.earliest[None, :])
+        self.feasible_arc = (
+            (arrival <= self.latest[None, :])
+            & (arrival + self.time[:, depot][None, :] <= self.horizon)
+        )
+        np.fill_diagonal(self.feasible_arc, False)
+        self.feasible_arc[:, depot] = True
+        self.feasible_arc[depot, depot] = False
+    
+    def price(
+        self,
+        duals: Sequence[float],
+        vehicle_cost: float,
+        capacity: float,
+        distance_weight: float = 1.0,
+        max_successors: Optional[int] = 12,
+        max_labels_per_node: Optional[int] = 24,
+        max_columns: int = 50,
+        deadline: Optional[float] = None
+    ) -> Tuple[List[Tuple[float, List[int]]], bool]:
+        """
+        Find routes with negative reduced cost for one vehicle class.
+        
+        Args:
+            duals: Dual value of each location's covering constraint (depot ignored)
+            vehicle_cost: Vehicle penalty minus the class fleet-size dual
+            capacity: Vehicle capacity of the class
+            distance_weight: Weight for distance in the objective
+            max_successors: Successors kept per node, by arc reduced cost (None = all)
+            max_labels_per_node: Non-dominated labels kept per node (None = all)
+            max_columns: Maximum number of routes returned
+            deadline: Optional wall-clock time (time.time()) to stop at
+        
+        Returns:
+            Tuple of ([(reduced cost, customers), ...] sorted by reduced cost,
+            whether the search was exhaustive)
+        """
+        depot = self.depot
+        duals = np.asarray(duals, dtype=float).copy()
+        duals[depot] = 0.0
+        
+        arc_cost = distance_weight * self.distance - duals[None, :]
+        feasible = self.feasible_arc & (self.demands[None, :] <= capacity)
+        feasible[:, depot] = True
+        feasible[depot, depot] = False
+        masked = np.where(feasible, arc_cost, np.inf)
+        
+        exhaustive = max_successors is None and max_labels_per_node is None
+        successors = []
+        for i in range(self.n):
+            order = np.argsort(masked[i], kind='stable')
+            order = order[np.isfinite(masked[i][order])]
+            order = order[order != depot]
+            if max_successors is not None and len(order) > max_successors:
+                order = order[:max_successors]
+                exhaustive = False
+            successors.append(order.tolist())
+        
+        # Plain lists are much faster than numpy scalars in the labelling loop
+        return_cost = (distance_weight * self.distance[:, depot]).tolist()
+        arc_cost = arc_cost.tolist()
+        travel = self.time.tolist()
+        demands = self.demands.tolist()
+        earliest = self.earliest.tolist()
+        latest = self.latest.tolist()
+        horizon = float(self.horizon)
+        buckets: Dict[int, List[_Label]] = {}
+        heap = []
+        counter = 0
+        self._truncated = False
+        
+        root = _Label(depot, vehicle_cost, 0.0, earliest[depot], 0, None)
+        heapq.heappush(heap, (root.time, counter, root))
+        
+        best: Dict[int, Tuple[float, List[int]]] = {}
+        
+        while heap:
+            if deadline is not None and time.time() > deadline:
+                exhaustive = False
+                break
+            
+            _, _, label = heapq.heappop(heap)
+            if not label.active:
+                continue
+            
+            i = label.node
+            for j in successors[i]:
+                bit = 1 << j
+                if label.visited & bit:
+                    continue
+                load = label.load + demands[j]
+                if load > capacity:
+                    continue
+                arrival = max(label.time + travel[i][j], earliest[j])
+                if arrival > latest[j] or arrival + travel[j][depot] > horizon:
+                    continue
+                
+                new = _Label(j, label.cost + arc_cost[i][j], load, arrival, label.visited | bit, label)
+                if not self._insert(buckets.setdefault(j, []), new, max_labels_per_node):
+                    continue
+                
+                # Close the route at the depot
+                reduced_cost = new.cost + return_cost[j]
+                if reduced_cost < -1e-6:
+                    key = new.visited
+                    if key not in best or reduced_cost < best[key][0]:
+                        best[key] = (reduced_cost, new)
+                
+                counter += 1
+                heapq.heappush(heap, (arrival, counter, new))
+        
+        if self._truncated:
+            exhaustive = False
+        
+        columns = sorted(best.values(), key=lambda item: item[0])[:max_columns]
+        return [(cost, label.path()) for cost, label in columns], exhaustive
+    
+    def _insert(self, bucket: List[_Label], label: _Label, max_labels: Optional[int]) -> bool:
+        """Insert a label in a node bucket unless dominated; prune labels it dominates."""
+        for other in bucket:
+            if other.dominates(label):
+                return False
+        
+        kept = []
+        for other in bucket:
+            if label.dominates(other):
+                other.active = False
+            else:
+                kept.append(other)
+        kept.append(label)
+        
+        if max_labels is not None and len(kept) > max_labels:
+            self._truncated = True
+            kept.sort(key=lambda l: l.cost)
+            for other in kept[max_labels:]:
+                other.active = False
+            kept = kept[:max_labels]
+        
+        bucket[:] = kept
+        return label.active
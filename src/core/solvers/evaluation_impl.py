@@ -0,0 +1,380 @@
+"""
+Route Evaluation Implementation
+
+Checks manual edits of a plan (relocating, swapping, inserting or removing
+customers) without re-solving. Every route keeps concatenation data for its
+prefixes and suffixes: forward arrival times, the latest start that keeps the
+rest of the route on time (backward slack), cumulative load and distance. A
+move rebuilds the routes it touches from a constant number of such segments,
+so its time-window and capacity feasibility and its cost delta are known in
+O(1), whatever the length of the routes.
+"""
+
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .base import UNSERVED_PENALTY
+from .heuristic_impl import HeuristicSolverImpl
+
+logger = logging.getLogger(__name__)
+
+MOVE_TYPES = ('relocate', 'swap', 'insert', 'remove')
+
+
+class _Segment(NamedTuple):
+    """
+    Concatenation data of a sequence of nodes (times scaled by 100).
+    
+    ``earliest``/``latest`` bound the start at the first node, ``duration``
+    is the time to the end of the last node including waiting, and ``warp``
+    the time by which windows are missed (0 for a feasible sequence).
+    """
+    first: int
+    last: int
+    duration: float
+    warp: float
+    earliest: float
+    latest: float
+    load: float
+    distance: float
+    stops: int
+
+
+class _RouteData:
+    """Prefix and suffix segments of one route, depot to depot."""
+    
+    def __init__(self, evaluator: "RouteEvaluatorImpl", route: List[int]):
+        self.evaluator = evaluator
+        self.path = [evaluator.depot] + list(route) + [evaluator.depot]
+        self.position = {node: p for p, node in enumerate(self.path[1:-1], start=1)}
+        
+        nodes = [evaluator._start_segment()] + [evaluator._node_segment(i) for i in route]
+        nodes.append(evaluator._end_segment())
+        
+        # prefix[p] covers path[0..p], suffix[p] covers path[p..end]
+        self.prefix = [nodes[0]]
+        for node in nodes[1:]:
+            self.prefix.append(evaluator._concat(self.prefix[-1], node))
+        self.suffix = [nodes[-1]]
+        for node in reversed(nodes[:-1]):
+            self.suffix.append(evaluator._concat(node, self.suffix[-1]))
+        self.suffix.reverse()
+        self._nodes = nodes
+        self._inner: Optional[List[List[_Segment]]] = None
+    
+    @property
+    def stops(self) -> int:
+        """Number of customers on the route."""
+        return len(self.path) - 2
+    
+    @property
+    def total(self) -> _Segment:
+        """Segment of the whole route."""
+        return self.prefix[-1]
+    
+    def segment(self, i: int, j: int) -> Optional[_Segment]:
+        """Segment of path[i..j] (None if empty)."""
+        if i > j:
+            return None
+        if i == 0:
+            return self.prefix[j]
+        if j == len(self.path) - 1:
+            return self.suffix[i]
+        if self._inner is None:
+            # Inner subsequences are only needed by moves within the route
+            self._inner = self._inner_segments()
+        return self._inner[i - 1][j - i]
+    
+    def _inner_segments(self) -> List[List[_Segment]]:
+        """Segments of all customer subsequences, built once in O(n²)."""
+        concat = self.evaluator._concat
+        table = []
+        for i in range(1, len(self.path) - 1):
+            row = [self._nodes[i]]
+            for j in range(i + 1, len(self.path) - 1):
+                row.append(concat(row[-1], self._nodes[j]))
+            table.append(row)
+        return table
+
+
+class RouteEvaluatorImpl(HeuristicSolverImpl):
+    """
+    Constant-time evaluation of edits to a fixed plan.
+    
+    Times follow the heuristic solvers (see HeuristicSolverImpl): vehicles
+    leave the depot when it opens, wait for windows to open and must be back
+    within the horizon. Segments are concatenated as in Vidal et al. (2013),
+    with the time by which a window is missed counted as time warp, so an
+    infeasible move also reports how late it runs. Every move is evaluated
+    against the plan as given, independently of the other moves of a batch.
+    """
+    
+    def __init__(
+        self,
+        problem_data: Dict,
+        routes: Dict[int, List[int]],
+        vehicle_penalty_weight: float = 1000.0,
+        distance_weight: float = 1.0
+    ):
+        """
+        Initialize the evaluator with a plan.
+        
+        Args:
+            problem_data: Dictionary containing problem definition
+            routes: Customer nodes of each used vehicle, keyed by vehicle index
+            vehicle_penalty_weight: Cost of a used vehicle
+            distance_weight: Weight for distance
+        """
+        super().__init__(problem_data)
+        self.vehicle_penalty_weight = vehicle_penalty_weight
+        self.distance_weight = distance_weight
+        
+        self.routes = {
+            vehicle: _RouteData(self, routes.get(vehicle, []))
+            for vehicle in range(len(self.capacities))
+        }
+        self.vehicle_of = {
+            node: vehicle for vehicle, data in self.routes.items() for node in data.path[1:-1]
+        }
+        self.unplanned = [i for i in self.customers if i not in self.vehicle_of]
+    
+    # ------------------------------------------------------------------
+    # Segments
+    # ------------------------------------------------------------------
+    
+    def _node_segment(self, node: int) -> _Segment:
+        return _Segment(node, node, 0.0, 0.0, self._e[node], self._l[node], self._q[node], 0.0, 1)
+    
+    def _start_segment(self) -> _Segment:
+        depot = self.depot
+        return _Segment(depot, depot, 0.0, 0.0, self._e[depot], self._e[depot], 0.0, 0.0, 0)
+    
+    def _end_segment(self) -> _Segment:
+        depot = self.depot
+        return _Segment(depot, depot, 0.0, 0.0, self._e[depot], self.horizon, 0.0, 0.0, 0)
+    
+    def _concat(self, a: _Segment, b: _Segment) -> _Segment:
+        """Segment of a followed by b."""
+        travel = self._T[a.last][b.first]
+        delta = a.duration - a.warp + travel
+        wait = max(b.earliest - delta - a.latest, 0.0)
+        warp = max(a.earliest + delta - b.latest, 0.0)
+        return _Segment(
+            a.first, b.last,
+            a.duration + b.duration + travel + wait,
+            a.warp + b.warp + warp,
+            max(b.earliest - delta, a.earliest) - wait,
+            min(b.latest - delta, a.latest) + warp,
+            a.load + b.load,
+            a.distance + b.distance + self._D[a.last][b.first],
+            a.stops + b.stops
+        )
+    
+    def _join(self, pieces: List[Optional[_Segment]]) -> _Segment:
+        """Concatenate the non-empty pieces of a rebuilt route."""
+        pieces = [piece for piece in pieces if piece is not None]
+        result = pieces[0]
+        for piece in pieces[1:]:
+            result = self._concat(result, piece)
+        return result
+    
+    # ------------------------------------------------------------------
+    # Plan and moves
+    # ------------------------------------------------------------------
+    
+    def route_report(self, vehicle: int, segment: Optional[_Segment] = None) -> Dict:
+        """
+        Feasibility and cost of a route.
+        
+        Args:
+            vehicle: Vehicle index
+            segment: Whole-route segment (default: the route as planned)
+        
+        Returns:
+            Dictionary with distance, load, stops, duration, time warp and
+            overload, and whether the route is feasible
+        """
+        segment = segment or self.routes[vehicle].total
+        capacity = self.capacities[vehicle]
+        overload = max(0.0, segment.load - capacity)
+        return {
+            'vehicle_id': vehicle,
+            'feasible': segment.warp <= 0 and overload <= 0,
+            'stops': segment.stops,
+            'distance': round(segment.distance, 2),
+            'load': segment.load,
+            'capacity': capacity,
+            'overload': overload,
+            'duration_minutes': round(segment.duration / 100.0, 2),
+            'time_warp_minutes': round(segment.warp / 100.0, 2)
+        }
+    
+    def plan_objective(self) -> float:
+        """Objective value of the plan as given."""
+        return self._objective([data.path[1:-1] for data in self.routes.values() if data.stops])
+    
+    def evaluate(self, move: Dict) -> Dict:
+        """
+        Evaluate one move against the plan.
+        
+        Moves (nodes and vehicle indices of the problem):
+        
+        - ``{'type': 'relocate', 'customer': u, 'vehicle': k, 'position': r}``:
+          move a planned customer to position r (0 = first stop) of vehicle k
+        - ``{'type': 'insert', 'customer': u, 'vehicle': k, 'position': r}``:
+          add an unplanned customer
+        - ``{'type': 'swap', 'customer': u, 'other': v}``: exchange two
+          planned customers
+        - ``{'type': 'remove', 'customer': u}``: leave a customer unserved
+        
+        Without a position, relocate and insert take the cheapest feasible
+        position of the vehicle (the cheapest overall if none is feasible),
+        checking every position in O(1).
+        
+        Args:
+            move: Move description
+        
+        Returns:
+            Dictionary with 'feasible', 'distance_delta', 'objective_delta',
+            the resulting 'routes' of the vehicles involved and, for relocate
+            and insert, the 'position' used
+        
+        Raises:
+            ValueError: If the move does not apply to the plan
+        """
+        move_type = move.get('type')
+        if move_type not in MOVE_TYPES:
+            raise ValueError(f"Unknown move type '{move_type}', expected one of {', '.join(MOVE_TYPES)}")
+        customer = move.get('customer')
+        if customer not in self.vehicle_of and customer not in self.unplanned:
+            raise ValueError(f"Unknown customer node {customer}")
+        if move_type == 'swap' and move.get('other') not in self.vehicle_of and move.get('other') not in self.unplanned:
+            raise ValueError(f"Unknown customer node {move.get('other')}")
+        
+        position = None
+        if move_type == 'swap':
+            changes = self._swap(customer, move.get('other'))
+        elif move_type == 'remove':
+            changes = self._remove(customer)
+        else:
+            if move_type == 'insert' and customer in self.vehicle_of:
+                raise ValueError("Customer is already planned, use relocate")
+            if move_type == 'relocate' and customer not in self.vehicle_of:
+                raise ValueError("Customer is not planned, use insert")
+            vehicle = move.get('vehicle')
+            if vehicle not in self.routes:
+                raise ValueError(f"Unknown vehicle {vehicle}")
+            changes, position = self._place(customer, vehicle, move.get('position'))
+        
+        result = self._outcome(changes, served_delta=(
+            -1 if move_type == 'remove' else 1 if move_type == 'insert' else 0
+        ))
+        if position is not None:
+            result['position'] = position
+        return result
+    
+    def _outcome(self, changes: Dict[int, _Segment], served_delta: int) -> Dict:
+        """Feasibility and deltas of a move from the new segments of its routes."""
+        distance_delta = 0.0
+        used_delta = 0
+        reports = []
+        for vehicle, segment in changes.items():
+            before = self.routes[vehicle].total
+            distance_delta += segment.distance - before.distance
+            used_delta += (segment.stops > 0) - (before.stops > 0)
+            reports.append(self.route_report(vehicle, segment))
+        return {
+            'feasible': all(report['feasible'] for report in reports),
+            'distance_delta': round(distance_delta, 3),
+            'objective_delta': round(
+                self.distance_weight * distance_delta
+                + self.vehicle_penalty_weight * used_delta
+                - UNSERVED_PENALTY * served_delta, 3
+            ),
+            'routes': reports
+        }
+    
+    def _remove(self, customer: int) -> Dict[int, _Segment]:
+        """New segment of the route losing a customer."""
+        if customer not in self.vehicle_of:
+            raise ValueError("Customer is not planned")
+        vehicle = self.vehicle_of[customer]
+        data = self.routes[vehicle]
+        p = data.position[customer]
+        return {vehicle: self._join([data.segment(0, p - 1), data.segment(p + 1, len(data.path) - 1)])}
+    
+    def _swap(self, u: int, v: Optional[int]) -> Dict[int, _Segment]:
+        """New segments of the routes exchanging two customers."""
+        if u not in self.vehicle_of or v not in self.vehicle_of:
+            raise ValueError("Both customers of a swap must be planned")
+        if u == v:
+            raise ValueError("Cannot swap a customer with itself")
+        a, b = self.vehicle_of[u], self.vehicle_of[v]
+        route_a, route_b = self.routes[a], self.routes[b]
+        p, s = route_a.position[u], route_b.position[v]
+        end_a, end_b = len(route_a.path) - 1, len(route_b.path) - 1
+        if a != b:
+            return {
+                a: self._join([route_a.segment(0, p - 1), self._node_segment(v), route_a.segment(p + 1, end_a)]),
+                b: self._join([route_b.segment(0, s - 1), self._node_segment(u), route_b.segment(s + 1, end_b)])
+            }
+        if p > s:
+            p, s, u, v = s, p, v, u
+        return {a: self._join([
+            route_a.segment(0, p - 1), self._node_segment(v), route_a.segment(p + 1, s - 1),
+            self._node_segment(u), route_a.segment(s + 1, end_a)
+        ])}
+    
+    def _place(
+        self,
+        customer: int,
+        vehicle: int,
+        position: Optional[int]
+    ) -> Tuple[Dict[int, _Segment], int]:
+        """New segments of a relocate or insert, at a given or the cheapest position."""
+        target = self.routes[vehicle]
+        source_vehicle = self.vehicle_of.get(customer)
+        same_route = source_vehicle == vehicle
+        # Stops of the target route once the customer is placed
+        length = target.stops if same_route else target.stops + 1
+        
+        if position is not None:
+            if not isinstance(position, int) or not 0 <= position < length:
+                raise ValueError(f"Position {position} outside 0..{length - 1} for vehicle {vehicle}")
+            positions = [position]
+        else:
+            positions = range(length)
+        
+        source = {}
+        if source_vehicle is not None and not same_route:
+            source = self._remove(customer)
+        
+        best = None
+        for r in positions:
+            if same_route:
+                segment = self._shift(target, customer, r)
+            else:
+                segment = self._join([
+                    target.segment(0, r), self._node_segment(customer),
+                    target.segment(r + 1, len(target.path) - 1)
+                ])
+            feasible = segment.warp <= 0 and segment.load <= self.capacities[vehicle]
+            key = (not feasible, segment.distance)
+            if best is None or key < best[0]:
+                best = (key, segment, r)
+        
+        _, segment, r = best
+        source[vehicle] = segment
+        return source, r
+    
+    def _shift(self, data: _RouteData, customer: int, r: int) -> _Segment:
+        """Segment of a route with one of its customers moved to position r."""
+        p = data.position[customer]
+        t = r + 1
+        end = len(data.path) - 1
+        node = self._node_segment(customer)
+        if t < p:
+            return self._join([data.segment(0, t - 1), node, data.segment(t, p - 1), data.segment(p + 1, end)])
+        if t > p:
+            return self._join([data.segment(0, p - 1), data.segment(p + 1, t), node, data.segment(t + 1, end)])
+        return data.total
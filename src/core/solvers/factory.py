@@ -1,15 +1,70 @@
 """Factory for creating solver instances."""
 
-from typing import Dict
+import importlib
+import importlib.util
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Type
 from fastapi import HTTPException
 
 from .base import BaseSolver, SolverType
-from .ortools_solver import ORToolsSolver
-from .gurobi_solver import GurobiSolver, GUROBI_AVAILABLE
 from ...config import get_logger
 
 logger = get_logger(__name__)
 
+# Solver wrappers by type: (module, class, requires Gurobi, log message).
+# Modules are imported on first use, so OR-Tools and gurobipy are only
+# loaded by processes that actually solve with them.
+_SOLVERS = {
+    SolverType.ORTOOLS: ('ortools_solver', 'ORToolsSolver', False, "Using OR-Tools solver"),
+    SolverType.GUROBI: ('gurobi_solver', 'GurobiSolver', True, "Using Gurobi solver"),
+    SolverType.HYBRID: ('hybrid_solver', 'HybridSolver', True, "Using hybrid solver (OR-Tools warm start + Gurobi)"),
+    SolverType.COLGEN: ('colgen_solver', 'ColumnGenerationSolver', True, "Using column generation solver (set partitioning on Gurobi)"),
+    SolverType.HEURISTIC: ('heuristic_solver', 'HeuristicSolver', False, "Using construction heuristic solver"),
+    SolverType.HGS: ('hgs_solver', 'HGSSolver', False, "Using hybrid genetic search solver"),
+}
+
+
+@lru_cache()
+def gurobi_available() -> bool:
+    """Whether gurobipy is installed (checked without importing it)."""
+    return importlib.util.find_spec('gurobipy') is not None
+
+
+def load_solver_class(solver_type: str) -> Type[BaseSolver]:
+    """
+    Import and return the wrapper class of a solver type.
+    
+    Raises:
+        KeyError: If the solver type is unknown
+    """
+    module_name, class_name, _, _ = _SOLVERS[SolverType(solver_type)]
+    module = importlib.import_module(f".{module_name}", __package__)
+    return getattr(module, class_name)
+
+
+def preload_engines(solver_types: Optional[Iterable[str]] = None) -> list:
+    """
+    Import solver engines ahead of the first request.
+    
+    Used at startup and by the pre-fork server, where modules imported by
+    the master are shared copy-on-write by all workers. Engines that need
+    Gurobi are skipped when it is not installed.
+    
+    Args:
+        solver_types: Solvers to load (default: all available)
+    
+    Returns:
+        Loaded solver types
+    """
+    loaded = []
+    for solver_type in solver_types or [t.value for t in SolverType]:
+        if _SOLVERS[SolverType(solver_type)][2] and not gurobi_available():
+            continue
+        load_solver_class(solver_type)
+        loaded.append(solver_type)
+    logger.info(f"Preloaded solver engines: {', '.join(loaded) or 'none'}")
+    return loaded
+
 
 class SolverFactory:
     """Factory for creating solver instances based on solver type."""
@@ -20,35 +75,39 @@ class SolverFactory:
         Create a solver instance.
         
         Args:
-            solver_type: Type of solver ('ortools' or 'gurobi')
+            solver_type: Type of solver ('ortools', 'gurobi', 'hybrid', 'colgen', 'heuristic' or 'hgs')
             problem: Problem data dictionary
-            
+        
         Returns:
             Solver instance
-            
+        
         Raises:
             HTTPException: If solver type is invalid or unavailable
         """
         solver_type_lower = solver_type.lower()
         
-        if solver_type_lower == SolverType.GUROBI:
-            if not GUROBI_AVAILABLE:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Gurobi solver not available. Install with: pip install gurobipy and ensure license is configured"
-                )
-            logger.info("Using Gurobi solver")
-            return GurobiSolver(problem)
-        
-        elif solver_type_lower == SolverType.ORTOOLS:
-            logger.info("Using OR-Tools solver")
-            return ORToolsSolver(problem)
+        try:
+            _, _, requires_gurobi, message = _SOLVERS[SolverType(solver_type_lower)]
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown solver type: {solver_type}. Valid options: 'ortools', 'gurobi', 'hybrid', 'colgen', 'heuristic', 'hgs'"
+            )
         
-        else:
+        if requires_gurobi and not gurobi_available():
+            name = {
+                SolverType.GUROBI: "Gurobi solver not available",
+                SolverType.HYBRID: "Hybrid solver requires Gurobi",
+                SolverType.COLGEN: "Column generation solver requires Gurobi",
+            }[SolverType(solver_type_lower)]
             raise HTTPException(
                 status_code=400,
-                detail=f"Unknown solver type: {solver_type}. Valid options: 'ortools', 'gurobi'"
+                detail=f"{name}. Install with: pip install gurobipy and ensure license is configured"
             )
+        
+        solver_class = load_solver_class(solver_type_lower)
+        logger.info(message)
+        return solver_class(problem)
 
 
 def create_solver(solver_type: str, problem: Dict) -> BaseSolver:
@@ -56,9 +115,9 @@ def create_solver(solver_type: str, problem: Dict) -> BaseSolver:
     Convenience function to create a solver instance.
     
     Args:
-        solver_type: Type of solver ('ortools' or 'gurobi')
+        solver_type: Type of solver ('ortools', 'gurobi', 'hybrid', 'colgen', 'heuristic' or 'hgs')
         problem: Problem data dictionary
-        
+    
     Returns:
         Solver instance
     """
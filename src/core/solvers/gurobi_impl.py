@@ -10,18 +10,33 @@ import time
 import math
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
 try:
     import gurobipy as gp
     from gurobipy import GRB, quicksum
+    import scipy.sparse as sp
     GUROBI_AVAILABLE = True
 except ImportError:
     GUROBI_AVAILABLE = False
-    logging.warning("Gurobi not available. Install with: pip install gurobipy")
+    # Creating a Gurobi solver raises with the install hint
+    logger.debug("Gurobi not available. Install with: pip install gurobipy")
 
+from .base import GurobiFormulation, UNSERVED_PENALTY
 from ...utils.distance_calculator import haversine_distance, euclidean_distance
 from ...utils.time_formatter import minutes_to_time, format_time_minutes
+from ...utils.service_time import node_service_times
+from ...utils.tracing import trace_add, trace_span, trace_set
+from ...utils.events import emit, current_channel
+from ...utils import metrics
 
-logger = logging.getLogger(__name__)
+# Model build time per variable, measured on the example payloads and doubled,
+# plus the start of the Gurobi environment
+BUILD_SECONDS_PER_VEHICLE_ARC = 12e-6
+BUILD_SECONDS_PER_ARC = 70e-6
+BUILD_SECONDS_BASE = 0.25
 
 
 class GurobiSolverImpl:
@@ -40,6 +55,9 @@ class GurobiSolverImpl:
         self.problem_data = problem_data
         self._validate_data()
         self._prepare_data()
+        
+        # Three-index model kept alive between solves (reuse_model=True)
+        self._kept_model = None
     
     def _validate_data(self):
         """Validate input data."""
@@ -116,7 +134,11 @@ class GurobiSolverImpl:
         log_search: bool = False,
         vehicle_penalty_weight: float = 1000.0,
         distance_weight: float = 1.0,
-        mip_gap: float = 0.01
+        mip_gap: float = 0.01,
+        formulation: str = GurobiFormulation.THREE_INDEX,
+        initial_routes: Optional[Dict[int, List[int]]] = None,
+        cutoff: Optional[float] = None,
+        reuse_model: bool = False
     ) -> Optional[Dict]:
         """
         Solve CVRPTW problem using Gurobi MILP.
@@ -127,13 +149,23 @@ class GurobiSolverImpl:
             vehicle_penalty_weight: Weight for minimizing number of vehicles
             distance_weight: Weight for distance minimization
             mip_gap: Relative MIP optimality gap
-            
+            formulation: 'three_index' (vehicle-indexed arcs) or 'two_index'
+                (vehicle-free arcs with lazy capacity cuts and time propagation)
+            initial_routes: Optional MIP start as {vehicle index: [customer, ...]}
+            cutoff: Optional objective cutoff (solutions worse than it are discarded)
+            reuse_model: Keep the three-index model after solving and, on the
+                next call, only refresh objective weights and time windows from
+                ``problem_data`` instead of rebuilding it
+        
         Returns:
             Solution dictionary or None if no solution found
         """
+        formulation = GurobiFormulation(formulation)
+        solve_start = time.time()
+        
         logger.info(
             f"Starting Gurobi solver: locations={len(self.problem_data['locations'])}, "
-            f"vehicles={self.problem_data['num_vehicles']}"
+            f"vehicles={self.problem_data['num_vehicles']}, formulation={formulation.value}"
         )
         
         n = len(self.problem_data['locations'])
@@ -168,218 +200,136 @@ class GurobiSolverImpl:
                     f"Earliest required: {time_windows[i][0]}"
                 )
         
+        if formulation == GurobiFormulation.TWO_INDEX:
+            if any(self.problem_data.get('locked_prefixes') or []):
+                raise ValueError("Locked route prefixes require the three-index formulation")
+            return self._solve_two_index(
+                time_limit_seconds, log_search, vehicle_penalty_weight,
+                distance_weight, mip_gap, initial_routes, cutoff, solve_start
+            )
+        
         try:
-            # Create model
-            model = gp.Model("CVRPTW")
+            kept = self._kept_model if reuse_model else None
+            if kept is not None and not self._refresh_three_index_model(
+                kept, vehicle_penalty_weight, distance_weight
+            ):
+                self.release_model()
+                kept = None
+            
+            if kept is not None:
+                model, layout, v = kept
+                model.resetParams()
+                logger.info(
+                    f"Reusing Gurobi model: {model.NumVars} variables, "
+                    f"{model.NumConstrs} constraints"
+                )
+            else:
+                # Create model
+                model = gp.Model("CVRPTW")
             
-            # Set parameters
-            model.Params.TimeLimit = time_limit_seconds
+            # Set parameters (time limit once the model is built)
             model.Params.OutputFlag = 1 if log_search else 0
             model.Params.MIPGap = mip_gap
             
-            logger.info(
-                f"Building model with n={n}, vehicles={len(vehicles)}, "
-                f"customers={len(customers)}"
-            )
-            
-            # Decision variables
-            x = {}  # x[i,j,k] = 1 if vehicle k travels from i to j
-            for k in vehicles:
-                for i in range(n):
-                    for j in range(n):
-                        if i != j:
-                            x[i, j, k] = model.addVar(
-                                vtype=GRB.BINARY,
-                                name=f'x_{i}_{j}_{k}'
-                            )
-            
-            # u[i,k] = arrival time at location i for vehicle k (scaled by 100)
-            u = {}
-            max_time_bound = (
-                max(tw[1] for tw in time_windows) * 100 + 
-                max(max(row) for row in time_matrix)
-            )
-            for k in vehicles:
-                for i in range(n):
-                    u[i, k] = model.addVar(
-                        vtype=GRB.CONTINUOUS,
-                        lb=0,
-                        ub=max_time_bound,
-                        name=f'u_{i}_{k}'
-                    )
-            
-            # y[k] = 1 if vehicle k is used
-            y = {}
-            for k in vehicles:
-                y[k] = model.addVar(vtype=GRB.BINARY, name=f'y_{k}')
-            
-            # z[i,k] = 1 if customer i is visited by vehicle k
-            z = {}
-            for k in vehicles:
-                for i in customers:
-                    z[i, k] = model.addVar(vtype=GRB.BINARY, name=f'z_{i}_{k}')
-            
-            # w[i] = 1 if customer i is NOT served (dropped)
-            w = {}
-            for i in customers:
-                w[i] = model.addVar(vtype=GRB.BINARY, name=f'w_{i}')
-            
-            model.update()
+            if kept is None:
+                logger.info(
+                    f"Building model with n={n}, vehicles={len(vehicles)}, "
+                    f"customers={len(customers)}"
+                )
+                
+                build_start = time.time()
+                layout = _ThreeIndexLayout(n, depot, len(vehicles))
+                v = self._build_three_index_model(
+                    model, layout, vehicle_penalty_weight, distance_weight
+                )
+                model.update()
+                logger.info(
+                    f"Model built in {time.time() - build_start:.2f}s: "
+                    f"{model.NumVars} variables, {model.NumConstrs} constraints"
+                )
+                if reuse_model:
+                    self._kept_model = (model, layout, v)
             
-            # Objective: minimize total distance + vehicle penalty + unserved penalty
-            unserved_penalty = 10000000000.0  # Same as OR-Tools
-            obj = (
-                gp.quicksum(
-                    distance_matrix[i][j] * x[i, j, k] * distance_weight
-                    for k in vehicles
-                    for i in range(n)
-                    for j in range(n)
-                    if i != j
-                ) +
-                gp.quicksum(y[k] * vehicle_penalty_weight for k in vehicles) +
-                gp.quicksum(w[i] * unserved_penalty for i in customers)
+            # Validation and model build count against the time limit
+            build_seconds = time.time() - solve_start
+            model.Params.TimeLimit = max(1.0, time_limit_seconds - build_seconds)
+            trace_add(
+                'model_build', build_seconds, formulation=formulation.value,
+                variables=model.NumVars, constraints=model.NumConstrs,
+                nonzeros=model.NumNZs, reused=kept is not None
             )
             
-            model.setObjective(obj, GRB.MINIMIZE)
-            
             logger.info(
                 f"Objective weights: vehicle_penalty={vehicle_penalty_weight}, "
                 f"distance_weight={distance_weight}, "
-                f"unserved_penalty={unserved_penalty}, mip_gap={mip_gap}"
+                f"unserved_penalty={UNSERVED_PENALTY}, mip_gap={mip_gap}"
             )
             
-            # Constraints
-            
-            # 1. Each customer is either visited exactly once OR marked as unserved
-            for i in customers:
-                model.addConstr(
-                    gp.quicksum(z[i, k] for k in vehicles) + w[i] == 1,
-                    name=f'visit_{i}'
-                )
-            
-            # 1b. Link z variables to actual visits
-            for k in vehicles:
-                for i in customers:
-                    model.addConstr(
-                        z[i, k] == gp.quicksum(x[j, i, k] for j in range(n) if j != i),
-                        name=f'visit_link_{i}_{k}'
-                    )
-            
-            # 2. Flow conservation: if vehicle enters a node, it must leave
-            for k in vehicles:
-                for i in customers:
-                    model.addConstr(
-                        gp.quicksum(x[i, j, k] for j in range(n) if j != i) ==
-                        gp.quicksum(x[j, i, k] for j in range(n) if j != i),
-                        name=f'flow_{i}_{k}'
-                    )
-            
-            # 3. Each vehicle starts and ends at depot (if used)
-            for k in vehicles:
-                model.addConstr(
-                    gp.quicksum(x[depot, j, k] for j in customers) == y[k],
-                    name=f'start_{k}'
-                )
-                model.addConstr(
-                    gp.quicksum(x[i, depot, k] for i in customers) == y[k],
-                    name=f'end_{k}'
-                )
-            
-            # 4. Vehicle usage indicator
-            for k in vehicles:
-                model.addConstr(
-                    gp.quicksum(z[i, k] for i in customers) <= len(customers) * y[k],
-                    name=f'vehicle_used_{k}'
-                )
-            
-            # 5. Capacity constraints
-            for k in vehicles:
-                model.addConstr(
-                    gp.quicksum(demands[i] * z[i, k] for i in customers) <= capacities[k],
-                    name=f'capacity_{k}'
-                )
-            
-            # 6. Time window constraints
-            max_tw = max(tw[1] for tw in time_windows) * 100
-            max_travel = max(max(row) for row in time_matrix) if time_matrix else 0
-            M = int(max_tw - min(tw[0] for tw in time_windows) * 100 + max_travel + 1000)
-            logger.info(f"Using Big-M={M} (max_tw={max_tw}, max_travel={max_travel})")
-            
-            # Time window enforcement for customers
-            for k in vehicles:
-                for i in customers:
-                    model.addConstr(
-                        u[i, k] >= time_windows[i][0] * 100 - M * (1 - z[i, k]),
-                        name=f'tw_lower_{i}_{k}'
-                    )
-                    model.addConstr(
-                        u[i, k] <= time_windows[i][1] * 100 + M * (1 - z[i, k]),
-                        name=f'tw_upper_{i}_{k}'
-                    )
-            
-            # Time window enforcement for depot
-            for k in vehicles:
-                model.addConstr(
-                    u[depot, k] >= time_windows[depot][0] * 100 - M * (1 - y[k]),
-                    name=f'tw_lower_depot_{k}'
-                )
-                model.addConstr(
-                    u[depot, k] <= time_windows[depot][1] * 100 + M * (1 - y[k]),
-                    name=f'tw_upper_depot_{k}'
-                )
+            if initial_routes:
+                v.Start = self._three_index_start(layout, initial_routes)
+                logger.info(f"MIP start provided with {len(initial_routes)} routes")
+            if cutoff is not None:
+                model.Params.Cutoff = cutoff
+                logger.info(f"Objective cutoff set to {cutoff:.2f}")
             
             # Add callback for intermediate statistics
+            var_list = v.tolist()
+            arc_distance = np.asarray(distance_matrix, dtype=float)[layout.arc_i, layout.arc_j]
+            arc_to_depot = layout.arc_j == depot
+            demand_array = np.asarray(demands, dtype=float)[layout.customers]
+            total_capacity = sum(capacities)
             last_stats_time = [0.0]
             start_time = [time.time()]
+            channel = current_channel()
             
             def stats_callback(model, where):
-                """Gurobi callback to report intermediate statistics every 5 seconds."""
+                """Report incumbents (statistics logged every 5 seconds), stop on request."""
+                if channel is not None and channel.stop_requested:
+                    # Ends with status INTERRUPTED, keeping the incumbent
+                    model.terminate()
                 if where == GRB.Callback.MIPSOL:
+                    metrics.INCUMBENTS.inc(engine='gurobi')
                     current_time = time.time()
-                    if current_time - last_stats_time[0] >= 5.0:
+                    log_stats = current_time - last_stats_time[0] >= 5.0
+                    if channel is None and not log_stats:
+                        return
+                    
+                    # One bulk read of the incumbent serves the event and the log
+                    values = np.asarray(model.cbGetSolution(var_list)) > 0.5
+                    x_used = layout.x_values(values)
+                    vehicles_used = int(layout.y_values(values).sum())
+                    total_distance = float((x_used @ arc_distance).sum())
+                    if channel is not None:
+                        routes = None
+                        if channel.incumbent_routes:
+                            routes = []
+                            for k in np.nonzero(layout.y_values(values))[0]:
+                                arcs = np.nonzero(x_used[k])[0]
+                                successor = {
+                                    int(i): int(j) for i, j in zip(layout.arc_i[arcs], layout.arc_j[arcs])
+                                }
+                                route_indices = self._reconstruct_route(successor, depot)
+                                routes.append((int(k), [i for i in route_indices if i != depot]))
+                        self._emit_incumbent(
+                            model, start_time[0], vehicles_used, total_distance,
+                            int(layout.w_values(values).sum()), routes
+                        )
+                    
+                    if log_stats:
                         last_stats_time[0] = current_time
                         elapsed = current_time - start_time[0]
                         
                         try:
-                            vehicles_used = sum(
-                                1 for k in vehicles 
-                                if model.cbGetSolution(y[k]) > 0.5
-                            )
-                            
-                            customers_served = len(set(
-                                i for i in customers
-                                for k in vehicles
-                                if model.cbGetSolution(z[i, k]) > 0.5
-                            ))
-                            
-                            total_distance = sum(
-                                distance_matrix[i][j] / 100.0
-                                for i in range(n)
-                                for j in range(n)
-                                if i != j
-                                for k in vehicles
-                                if model.cbGetSolution(x[i, j, k]) > 0.5
-                            )
-                            
-                            total_load = sum(
-                                demands[i]
-                                for i in customers
-                                for k in vehicles
-                                if model.cbGetSolution(z[i, k]) > 0.5
-                            )
-                            
-                            total_trips = sum(
-                                1 for k in vehicles
-                                for i in customers
-                                if model.cbGetSolution(x[i, depot, k]) > 0.5
-                            )
+                            z_used = layout.z_values(values)
+                            customers_served = int(z_used.any(axis=0).sum())
+                            total_load = float((z_used @ demand_array).sum())
+                            total_trips = int(x_used[:, arc_to_depot].sum())
                             
                             avg_distance = (
                                 total_distance / vehicles_used 
                                 if vehicles_used > 0 
                                 else 0.0
                             )
-                            total_capacity = sum(capacities)
                             avg_saturation = (
                                 (total_load / total_capacity * 100) 
                                 if total_capacity > 0 
@@ -398,20 +348,23 @@ class GurobiSolverImpl:
                             pass
             
             logger.info("Starting Gurobi optimization...")
-            model.optimize(stats_callback)
+            with trace_span('search', engine='gurobi'):
+                model.optimize(stats_callback)
+                self._trace_search(model)
             
             # Check solution status
-            if model.Status == GRB.OPTIMAL or model.Status == GRB.TIME_LIMIT:
+            if model.Status in (GRB.OPTIMAL, GRB.TIME_LIMIT, GRB.INTERRUPTED):
                 if model.SolCount > 0:
                     logger.info(
                         f"Solution found! Status: {model.Status}, "
                         f"Objective: {model.ObjVal:.2f}"
                     )
-                    solution = self._extract_solution(
-                        model, x, u, y, z, w, vehicles, n, depot
-                    )
+                    values = np.asarray(model.getAttr('X', var_list))
+                    solution = self._extract_solution(model, values, layout)
                     
                     if solution:
+                        self._add_bound_info(solution, model)
+                        solution['model_build_seconds'] = round(build_seconds, 3)
                         self._log_solution_summary(solution, capacities)
                     
                     return solution
@@ -425,7 +378,571 @@ class GurobiSolverImpl:
             else:
                 logger.warning(f"Optimization ended with status {model.Status}")
                 return None
+        
+        except gp.GurobiError as e:
+            self.release_model()
+            error_msg = str(e)
+            logger.error(f"Gurobi error: {error_msg}")
+            return {
+                'status': 'error',
+                'error_type': 'gurobi_error',
+                'message': error_msg
+            }
+        except Exception as e:
+            logger.exception(f"Error during optimization: {e}")
+            return None
+    
+    def _build_three_index_model(
+        self,
+        model,
+        layout: "_ThreeIndexLayout",
+        vehicle_penalty_weight: float,
+        distance_weight: float
+    ):
+        """
+        Build the three-index model with the matrix API.
+        
+        All variables live in one flat MVar indexed through ``layout``; every
+        constraint family is assembled as a sparse coefficient matrix and added
+        with a single addMConstr call.
+        
+        Returns:
+            The MVar holding all model variables
+        """
+        n = layout.n
+        depot = layout.depot
+        num_vehicles = layout.num_vehicles
+        num_customers = layout.num_customers
+        customers = layout.customers
+        
+        time_matrix = np.asarray(self.problem_data['time_matrix'], dtype=float)
+        demands = np.asarray(self.problem_data['demands'], dtype=float)
+        time_windows = np.asarray(self.problem_data['time_windows'], dtype=float) * 100
+        capacities = np.asarray(self.problem_data['vehicle_capacities'], dtype=float)
+        
+        vehicle_ids = np.arange(num_vehicles)
+        customer_pos = np.arange(num_customers)
+        
+        # Variables: x (binary arcs), u (arrival times), y (vehicle used),
+        # z (customer assignment), w (customer dropped)
+        max_time_bound = time_windows[:, 1].max() + time_matrix.max()
+        lb = np.zeros(layout.size)
+        ub = np.ones(layout.size)
+        ub[layout.u_slice] = max_time_bound
+        vtype = np.full(layout.size, GRB.BINARY)
+        vtype[layout.u_slice] = GRB.CONTINUOUS
+        obj = self._three_index_objective(layout, vehicle_penalty_weight, distance_weight)
+        
+        # Locked route prefixes (re-optimization): fix the arcs from the depot
+        # through each prefix, and the assignment of its nodes
+        for k, prefix in enumerate(self.problem_data.get('locked_prefixes') or []):
+            path = [depot] + list(prefix)
+            for i, j in zip(path[:-1], path[1:]):
+                lb[layout.x(k, layout.arc(i, j))] = 1.0
+            for i in prefix:
+                lb[layout.z(k, layout.customer_pos[i])] = 1.0
+        
+        v = model.addMVar(layout.size, lb=lb, ub=ub, obj=obj, vtype=vtype, name='v')
+        model.ModelSense = GRB.MINIMIZE
+        
+        # (vehicle, customer position) pairs in row order k * num_customers + c
+        pair_k = np.repeat(vehicle_ids, num_customers)
+        pair_c = np.tile(customer_pos, num_vehicles)
+        pair_rows = np.arange(num_vehicles * num_customers)
+        
+        # Arcs entering / leaving customers, and arcs at the depot
+        arcs_in = np.nonzero(layout.customer_pos[layout.arc_j] >= 0)[0]
+        arcs_out = np.nonzero(layout.customer_pos[layout.arc_i] >= 0)[0]
+        arcs_from_depot = np.nonzero(layout.arc_i == depot)[0]
+        arcs_to_depot = np.nonzero(layout.arc_j == depot)[0]
+        
+        def vehicle_arc_terms(arcs, row_of_arc):
+            """Expand arc terms over all vehicles: rows and columns."""
+            k = np.repeat(vehicle_ids, len(arcs))
+            a = np.tile(arcs, num_vehicles)
+            return row_of_arc(k, a), layout.x(k, a)
+        
+        def add_rows(num_rows, rows, cols, vals, sense, rhs, name):
+            """Add one constraint family as a sparse matrix."""
+            if num_rows == 0:
+                return None
+            A = sp.csr_matrix(
+                (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                shape=(num_rows, layout.size)
+            )
+            return model.addMConstr(
+                A, v, sense, np.broadcast_to(rhs, num_rows).astype(float), name=name
+            )
+        
+        # 1. Each customer is either visited exactly once OR marked as unserved
+        add_rows(
+            num_customers,
+            [pair_c, customer_pos],
+            [layout.z(pair_k, pair_c), layout.w(customer_pos)],
+            [np.ones(len(pair_c)), np.ones(num_customers)],
+            GRB.EQUAL, 1.0, 'visit'
+        )
+        
+        # 1b. Link z variables to actual visits
+        in_rows, in_cols = vehicle_arc_terms(
+            arcs_in, lambda k, a: k * num_customers + layout.customer_pos[layout.arc_j[a]]
+        )
+        add_rows(
+            num_vehicles * num_customers,
+            [pair_rows, in_rows],
+            [layout.z(pair_k, pair_c), in_cols],
+            [np.ones(len(pair_rows)), -np.ones(len(in_rows))],
+            GRB.EQUAL, 0.0, 'visit_link'
+        )
+        
+        # 2. Flow conservation: if vehicle enters a node, it must leave
+        out_rows, out_cols = vehicle_arc_terms(
+            arcs_out, lambda k, a: k * num_customers + layout.customer_pos[layout.arc_i[a]]
+        )
+        add_rows(
+            num_vehicles * num_customers,
+            [out_rows, in_rows],
+            [out_cols, in_cols],
+            [np.ones(len(out_rows)), -np.ones(len(in_rows))],
+            GRB.EQUAL, 0.0, 'flow'
+        )
+        
+        # 3. Each vehicle starts and ends at depot (if used)
+        for name, arcs in (('start', arcs_from_depot), ('end', arcs_to_depot)):
+            rows, cols = vehicle_arc_terms(arcs, lambda k, a: k)
+            add_rows(
+                num_vehicles,
+                [rows, vehicle_ids],
+                [cols, layout.y(vehicle_ids)],
+                [np.ones(len(rows)), -np.ones(num_vehicles)],
+                GRB.EQUAL, 0.0, name
+            )
+        
+        # 4. Vehicle usage indicator
+        add_rows(
+            num_vehicles,
+            [pair_k, vehicle_ids],
+            [layout.z(pair_k, pair_c), layout.y(vehicle_ids)],
+            [np.ones(len(pair_k)), np.full(num_vehicles, -float(num_customers))],
+            GRB.LESS_EQUAL, 0.0, 'vehicle_used'
+        )
+        
+        # 4b. Symmetry breaking between identical vehicles (same class):
+        # use them in order so branch-and-bound does not explore permutations
+        vehicle_classes = self.problem_data.get('vehicle_classes')
+        if vehicle_classes:
+            classes = np.asarray(vehicle_classes)
+            pairs = np.nonzero(classes[:-1] == classes[1:])[0]
+            add_rows(
+                len(pairs),
+                [np.arange(len(pairs)), np.arange(len(pairs))],
+                [layout.y(pairs + 1), layout.y(pairs)],
+                [np.ones(len(pairs)), -np.ones(len(pairs))],
+                GRB.LESS_EQUAL, 0.0, 'symmetry'
+            )
+        
+        # 5. Capacity constraints
+        add_rows(
+            num_vehicles,
+            [pair_k],
+            [layout.z(pair_k, pair_c)],
+            [demands[customers][pair_c]],
+            GRB.LESS_EQUAL, capacities, 'capacity'
+        )
+        
+        # 6. Time window constraints
+        max_tw = time_windows[:, 1].max()
+        max_travel = time_matrix.max() if time_matrix.size else 0
+        M = int(max_tw - time_windows[:, 0].min() + max_travel + 1000)
+        logger.info(f"Using Big-M={M} (max_tw={max_tw:.0f}, max_travel={max_travel:.0f})")
+        
+        # Time window rows are kept (with their Big-M) for in-place refreshes
+        model._big_m = M
+        model._tw_rows = {}
+        rhs = self._three_index_tw_rhs(layout, M)
+        
+        # Time window enforcement for customers
+        u_cols = layout.u(pair_k, customers[pair_c])
+        z_cols = layout.z(pair_k, pair_c)
+        ones = np.ones(len(pair_rows))
+        model._tw_rows['tw_lower'] = add_rows(
+            len(pair_rows), [pair_rows, pair_rows], [u_cols, z_cols], [ones, -M * ones],
+            GRB.GREATER_EQUAL, rhs['tw_lower'], 'tw_lower'
+        )
+        model._tw_rows['tw_upper'] = add_rows(
+            len(pair_rows), [pair_rows, pair_rows], [u_cols, z_cols], [ones, M * ones],
+            GRB.LESS_EQUAL, rhs['tw_upper'], 'tw_upper'
+        )
+        
+        # Time window enforcement for depot
+        u_cols = layout.u(vehicle_ids, depot)
+        y_cols = layout.y(vehicle_ids)
+        ones = np.ones(num_vehicles)
+        model._tw_rows['tw_lower_depot'] = add_rows(
+            num_vehicles, [vehicle_ids, vehicle_ids], [u_cols, y_cols], [ones, -M * ones],
+            GRB.GREATER_EQUAL, rhs['tw_lower_depot'], 'tw_lower_depot'
+        )
+        model._tw_rows['tw_upper_depot'] = add_rows(
+            num_vehicles, [vehicle_ids, vehicle_ids], [u_cols, y_cols], [ones, M * ones],
+            GRB.LESS_EQUAL, rhs['tw_upper_depot'], 'tw_upper_depot'
+        )
+        
+        return v
+    
+    def _three_index_objective(
+        self,
+        layout: "_ThreeIndexLayout",
+        vehicle_penalty_weight: float,
+        distance_weight: float
+    ) -> "np.ndarray":
+        """Objective coefficients of the three-index model."""
+        distance = np.asarray(self.problem_data['distance_matrix'], dtype=float)
+        obj = np.zeros(layout.size)
+        obj[layout.x_slice] = np.tile(
+            distance[layout.arc_i, layout.arc_j] * distance_weight, layout.num_vehicles
+        )
+        obj[layout.y_slice] = vehicle_penalty_weight
+        obj[layout.w_slice] = UNSERVED_PENALTY
+        return obj
+    
+    def _three_index_tw_rhs(self, layout: "_ThreeIndexLayout", M: float) -> Dict[str, "np.ndarray"]:
+        """Right-hand sides of the Big-M time window rows, by constraint family."""
+        time_windows = np.asarray(self.problem_data['time_windows'], dtype=float) * 100
+        pair_c = np.tile(np.arange(layout.num_customers), layout.num_vehicles)
+        customer_tw = time_windows[layout.customers][pair_c]
+        depot_tw = np.broadcast_to(time_windows[layout.depot], (layout.num_vehicles, 2))
+        return {
+            'tw_lower': customer_tw[:, 0] - M,
+            'tw_upper': customer_tw[:, 1] + M,
+            'tw_lower_depot': depot_tw[:, 0] - M,
+            'tw_upper_depot': depot_tw[:, 1] + M,
+        }
+    
+    def _refresh_three_index_model(self, kept, vehicle_penalty_weight: float, distance_weight: float) -> bool:
+        """
+        Update a kept three-index model to the current weights and time windows.
+        
+        Returns:
+            False if the model no longer matches the problem and must be rebuilt
+        """
+        model, layout, v = kept
+        time_windows = np.asarray(self.problem_data['time_windows'], dtype=float) * 100
+        time_matrix = np.asarray(self.problem_data['time_matrix'], dtype=float)
+        if len(time_windows) != layout.n or self.problem_data['num_vehicles'] != layout.num_vehicles:
+            return False
+        
+        # The Big-M must still dominate every window
+        max_travel = time_matrix.max() if time_matrix.size else 0
+        if int(time_windows[:, 1].max() - time_windows[:, 0].min() + max_travel + 1000) > model._big_m:
+            return False
+        
+        v.Obj = self._three_index_objective(layout, vehicle_penalty_weight, distance_weight)
+        for name, rhs in self._three_index_tw_rhs(layout, model._big_m).items():
+            if model._tw_rows.get(name) is not None:
+                model._tw_rows[name].RHS = rhs
+        model.update()
+        return True
+    
+    def kept_model_size(self) -> Tuple[int, int]:
+        """(variables, nonzeros) of the model kept for reuse, (0, 0) if none."""
+        if self._kept_model is None:
+            return 0, 0
+        model = self._kept_model[0]
+        return model.NumVars, model.NumNZs
+    
+    def release_model(self) -> None:
+        """Free the model kept for reuse, if any."""
+        if self._kept_model is not None:
+            self._kept_model[0].dispose()
+            self._kept_model = None
+    
+    def _solve_two_index(
+        self,
+        time_limit_seconds: int,
+        log_search: bool,
+        vehicle_penalty_weight: float,
+        distance_weight: float,
+        mip_gap: float,
+        initial_routes: Optional[Dict[int, List[int]]] = None,
+        cutoff: Optional[float] = None,
+        solve_start: Optional[float] = None
+    ) -> Optional[Dict]:
+        """
+        Solve with the compact two-index formulation.
+        
+        Arc variables x[i,j] are not indexed by vehicle. Arrival times are
+        propagated along arcs, capacity and subtours are handled by lazy
+        rounded capacity cuts, and routes are assigned to vehicles afterwards.
+        """
+        build_start = time.time()
+        n = len(self.problem_data['locations'])
+        depot = self.problem_data['depot']
+        customers = [i for i in range(n) if i != depot]
+        
+        distance_matrix = self.problem_data['distance_matrix']
+        time_matrix = self.problem_data['time_matrix']
+        demands = self.problem_data['demands']
+        time_windows = self.problem_data['time_windows']
+        capacities = self.problem_data['vehicle_capacities']
+        num_vehicles = self.problem_data['num_vehicles']
+        max_capacity = max(capacities) if capacities else 0
+        
+        depot_open = time_windows[depot][0] * 100
+        depot_close = time_windows[depot][1] * 100
+        
+        # Earliest/latest arrival (scaled by 100), earliest tightened by the depot opening
+        earliest = {depot: depot_open}
+        latest = {depot: depot_close}
+        for i in customers:
+            earliest[i] = max(time_windows[i][0] * 100, depot_open + time_matrix[depot][i])
+            latest[i] = time_windows[i][1] * 100
+        
+        # Arc set: skip arcs that can never be part of a feasible route
+        arcs = []
+        for i in range(n):
+            for j in range(n):
+                if i == j:
+                    continue
+                if i != depot and j != depot:
+                    if demands[i] + demands[j] > max_capacity:
+                        continue
+                    if earliest[i] + time_matrix[i][j] > latest[j]:
+                        continue
+                arcs.append((i, j))
+        
+        try:
+            model = gp.Model("CVRPTW_2idx")
+            model.Params.OutputFlag = 1 if log_search else 0
+            model.Params.MIPGap = mip_gap
+            model.Params.LazyConstraints = 1
+            
+            logger.info(
+                f"Building two-index model with n={n}, arcs={len(arcs)}, "
+                f"customers={len(customers)}, max_vehicles={num_vehicles}"
+            )
+            
+            x = model.addVars(arcs, vtype=GRB.BINARY, name='x')
+            w = model.addVars(customers, vtype=GRB.BINARY, name='w')
+            t = model.addVars(
+                customers,
+                lb={i: min(earliest[i], latest[i]) for i in customers},
+                ub={i: max(earliest[i], latest[i]) for i in customers},
+                vtype=GRB.CONTINUOUS,
+                name='t'
+            )
+            
+            # Customers that cannot be reached in time or carried at all are dropped
+            for i in customers:
+                if earliest[i] > latest[i] or demands[i] > max_capacity:
+                    w[i].LB = 1
+            
+            out_arcs = {i: [] for i in range(n)}
+            in_arcs = {i: [] for i in range(n)}
+            for (i, j) in arcs:
+                out_arcs[i].append(j)
+                in_arcs[j].append(i)
+            
+            model.setObjective(
+                gp.quicksum(
+                    distance_matrix[i][j] * distance_weight * x[i, j] for (i, j) in arcs
+                ) +
+                gp.quicksum(vehicle_penalty_weight * x[depot, j] for j in out_arcs[depot]) +
+                gp.quicksum(UNSERVED_PENALTY * w[i] for i in customers),
+                GRB.MINIMIZE
+            )
+            
+            # Degree constraints: served customers are entered and left once
+            model.addConstrs(
+                (gp.quicksum(x[i, j] for j in out_arcs[i]) == 1 - w[i] for i in customers),
+                name='out_degree'
+            )
+            model.addConstrs(
+                (gp.quicksum(x[j, i] for j in in_arcs[i]) == 1 - w[i] for i in customers),
+                name='in_degree'
+            )
+            
+            # Fleet size
+            model.addConstr(
+                gp.quicksum(x[depot, j] for j in out_arcs[depot]) <= num_vehicles,
+                name='fleet_size'
+            )
+            
+            # Arc-linked arrival time propagation between customers
+            for (i, j) in arcs:
+                if i == depot:
+                    continue
+                if j == depot:
+                    # Return to the depot before it closes
+                    big_m = latest[i] + time_matrix[i][depot] - depot_close
+                    if big_m > 0:
+                        model.addConstr(
+                            t[i] + time_matrix[i][depot] <= depot_close + big_m * (1 - x[i, depot]),
+                            name=f'return_{i}'
+                        )
+                    continue
+                big_m = latest[i] + time_matrix[i][j] - earliest[j]
+                if big_m > 0:
+                    model.addConstr(
+                        t[j] >= t[i] + time_matrix[i][j] - big_m * (1 - x[i, j]),
+                        name=f'time_{i}_{j}'
+                    )
+            
+            if initial_routes:
+                self._set_two_index_start(x, w, t, initial_routes)
+                logger.info(f"MIP start provided with {len(initial_routes)} routes")
+            if cutoff is not None:
+                model.Params.Cutoff = cutoff
+                logger.info(f"Objective cutoff set to {cutoff:.2f}")
+            
+            arc_list = list(arcs)
+            arc_vars = [x[a] for a in arc_list]
+            w_list = [w[i] for i in customers]
+            last_stats_time = [0.0]
+            start_time = time.time()
+            channel = current_channel()
+            
+            def lazy_callback(model, where):
+                """Separate capacity, subtour and fleet-mix cuts on integer solutions."""
+                if channel is not None and channel.stop_requested:
+                    model.terminate()
+                if where != GRB.Callback.MIPSOL:
+                    return
+                
+                values = model.cbGetSolution(arc_vars)
+                successor = {}
+                for (i, j), val in zip(arc_list, values):
+                    if val > 0.5:
+                        successor.setdefault(i, []).append(j)
+                
+                routes, cycles = self._two_index_routes(successor, depot)
+                
+                for route in routes:
+                    route_set = set(route)
+                    route_load = sum(demands[i] for i in route)
+                    if route_load > max_capacity:
+                        # Rounded capacity cut, relaxed when a member is dropped
+                        required = math.ceil(route_load / max_capacity)
+                        model.cbLazy(
+                            gp.quicksum(
+                                x[i, j] for i in route_set for j in out_arcs[i]
+                                if j not in route_set
+                            ) >= required * (1 - gp.quicksum(w[i] for i in route_set))
+                        )
                 
+                for cycle in cycles:
+                    cycle_set = set(cycle)
+                    model.cbLazy(
+                        gp.quicksum(
+                            x[i, j] for i in cycle_set for j in out_arcs[i]
+                            if j not in cycle_set
+                        ) >= 1 - w[cycle[0]]
+                    )
+                
+                # Heterogeneous fleet: the set of routes must fit the vehicles
+                if not cycles and all(
+                    sum(demands[i] for i in r) <= max_capacity for r in routes
+                ):
+                    conflict = self._unassignable_routes(routes, capacities)
+                    if conflict:
+                        conflict_arcs = []
+                        for route in conflict:
+                            path = [depot] + route + [depot]
+                            conflict_arcs.extend(zip(path[:-1], path[1:]))
+                        model.cbLazy(
+                            gp.quicksum(x[a] for a in conflict_arcs) <= len(conflict_arcs) - 1
+                        )
+                    else:
+                        # No cut needed: the solution becomes the incumbent
+                        metrics.INCUMBENTS.inc(engine='gurobi')
+                        if channel is not None:
+                            self._emit_incumbent(
+                                model, start_time, len(routes),
+                                sum(
+                                    distance_matrix[i][j]
+                                    for route in routes
+                                    for i, j in zip([depot] + route, route + [depot])
+                                ),
+                                sum(1 for v in model.cbGetSolution(w_list) if v > 0.5),
+                                self._assign_routes_to_vehicles(routes, capacities)
+                                if channel.incumbent_routes else None
+                            )
+                
+                current_time = time.time()
+                if current_time - last_stats_time[0] >= 5.0:
+                    last_stats_time[0] = current_time
+                    dropped = sum(1 for v in model.cbGetSolution(w_list) if v > 0.5)
+                    logger.info(
+                        f"[{current_time - start_time:.0f}s] Intermediate: "
+                        f"Routes={len(routes)}, "
+                        f"Customers={len(customers) - dropped}/{len(customers)}, "
+                        f"Objective={model.cbGet(GRB.Callback.MIPSOL_OBJ):.2f}"
+                    )
+            
+            # Model build counts against the time limit
+            model.update()
+            build_seconds = time.time() - (solve_start or build_start)
+            model.Params.TimeLimit = max(1.0, time_limit_seconds - build_seconds)
+            trace_add(
+                'model_build', build_seconds, formulation='two_index',
+                variables=model.NumVars, constraints=model.NumConstrs, nonzeros=model.NumNZs
+            )
+            
+            logger.info("Starting Gurobi optimization (two-index)...")
+            with trace_span('search', engine='gurobi'):
+                model.optimize(lazy_callback)
+                self._trace_search(model)
+            
+            if model.Status in (GRB.OPTIMAL, GRB.TIME_LIMIT, GRB.INTERRUPTED) and model.SolCount > 0:
+                logger.info(
+                    f"Solution found! Status: {model.Status}, "
+                    f"Objective: {model.ObjVal:.2f}"
+                )
+                values = model.getAttr('X', arc_vars)
+                successor = {}
+                for (i, j), val in zip(arc_list, values):
+                    if val > 0.5:
+                        successor.setdefault(i, []).append(j)
+                routes, _ = self._two_index_routes(successor, depot)
+                
+                dropped_customers = [
+                    self._build_dropped_customer(i)
+                    for i, val in zip(customers, model.getAttr('X', w_list))
+                    if val > 0.5
+                ]
+                
+                assignment = self._assign_routes_to_vehicles(routes, capacities)
+                route_entries = [
+                    self._build_route(
+                        k, [depot] + route + [depot], distance_matrix, time_matrix
+                    )
+                    for k, route in assignment
+                ]
+                
+                solution = self._build_solution_summary(
+                    route_entries,
+                    len(route_entries),
+                    sum(r['distance'] for r in route_entries),
+                    sum(r['load'] for r in route_entries),
+                    dropped_customers,
+                    model.ObjVal,
+                    customers,
+                    n,
+                    depot
+                )
+                self._add_bound_info(solution, model)
+                solution['model_build_seconds'] = round(build_seconds, 3)
+                self._log_solution_summary(solution, capacities)
+                return solution
+            
+            if model.Status == GRB.INFEASIBLE:
+                logger.error("Model is infeasible")
+                self._log_infeasibility_details(model, n, depot, list(range(num_vehicles)))
+            elif model.SolCount == 0:
+                logger.warning("No feasible solution found within time limit")
+            else:
+                logger.warning(f"Optimization ended with status {model.Status}")
+            return None
+        
         except gp.GurobiError as e:
             error_msg = str(e)
             logger.error(f"Gurobi error: {error_msg}")
@@ -438,6 +955,218 @@ class GurobiSolverImpl:
             logger.exception(f"Error during optimization: {e}")
             return None
     
+    @staticmethod
+    def _two_index_routes(successor: Dict, depot: int) -> Tuple[List[List[int]], List[List[int]]]:
+        """
+        Split a two-index arc selection into depot routes and detached cycles.
+        
+        Returns:
+            Tuple of (routes as customer lists, cycles not touching the depot)
+        """
+        routes = []
+        visited = set()
+        for start in successor.get(depot, []):
+            route = []
+            current = start
+            while current != depot and current not in visited:
+                visited.add(current)
+                route.append(current)
+                current = successor.get(current, [depot])[0]
+            routes.append(route)
+        
+        cycles = []
+        for node in successor:
+            if node == depot or node in visited:
+                continue
+            cycle = []
+            current = node
+            while current not in visited and current != depot:
+                visited.add(current)
+                cycle.append(current)
+                current = successor.get(current, [depot])[0]
+            if cycle:
+                cycles.append(cycle)
+        
+        return routes, cycles
+    
+    def _assign_routes_to_vehicles(self, routes: List[List[int]], capacities: List[int]) -> List[Tuple[int, List[int]]]:
+        """Assign routes to vehicles, heaviest route to largest vehicle."""
+        demands = self.problem_data['demands']
+        vehicle_order = sorted(range(len(capacities)), key=lambda k: (-capacities[k], k))
+        route_order = sorted(routes, key=lambda r: -sum(demands[i] for i in r))
+        return sorted(zip(vehicle_order, route_order), key=lambda a: a[0])
+    
+    def _unassignable_routes(self, routes: List[List[int]], capacities: List[int]) -> Optional[List[List[int]]]:
+        """
+        Check whether routes fit the fleet when assigned heaviest-to-largest.
+        
+        Returns:
+            The heaviest routes that cannot all get a large enough vehicle,
+            or None if the assignment is feasible
+        """
+        demands = self.problem_data['demands']
+        sorted_capacities = sorted(capacities, reverse=True)
+        route_order = sorted(routes, key=lambda r: -sum(demands[i] for i in r))
+        
+        for rank, route in enumerate(route_order):
+            if rank >= len(sorted_capacities) or sum(demands[i] for i in route) > sorted_capacities[rank]:
+                return route_order[:rank + 1]
+        return None
+    
+    def estimate_build_seconds(self, formulation: str = GurobiFormulation.THREE_INDEX) -> float:
+        """
+        Generous estimate of the time solve() spends before the search starts.
+        
+        Args:
+            formulation: Gurobi formulation ('three_index' or 'two_index')
+        
+        Returns:
+            Expected validation and model build time in seconds
+        """
+        n = len(self.problem_data['locations'])
+        arcs = n * (n - 1)
+        if GurobiFormulation(formulation) == GurobiFormulation.TWO_INDEX:
+            return BUILD_SECONDS_BASE + BUILD_SECONDS_PER_ARC * arcs
+        return BUILD_SECONDS_BASE + BUILD_SECONDS_PER_VEHICLE_ARC * self.problem_data['num_vehicles'] * arcs
+    
+    def routes_objective(
+        self,
+        routes: Dict[int, List[int]],
+        vehicle_penalty_weight: float,
+        distance_weight: float
+    ) -> float:
+        """
+        Objective value of a set of routes in this model's units.
+        
+        Args:
+            routes: {vehicle index: [customer, ...]}
+            vehicle_penalty_weight: Weight for minimizing number of vehicles
+            distance_weight: Weight for distance minimization
+        
+        Returns:
+            Objective value including vehicle and unserved penalties
+        """
+        depot = self.problem_data['depot']
+        distance_matrix = self.problem_data['distance_matrix']
+        served = set()
+        objective = 0.0
+        for route in routes.values():
+            if not route:
+                continue
+            path = [depot] + list(route) + [depot]
+            objective += distance_weight * sum(
+                distance_matrix[a][b] for a, b in zip(path[:-1], path[1:])
+            )
+            objective += vehicle_penalty_weight
+            served.update(route)
+        num_customers = len(self.problem_data['locations']) - 1
+        objective += UNSERVED_PENALTY * (num_customers - len(served))
+        return objective
+    
+    def _three_index_start(self, layout: "_ThreeIndexLayout", routes: Dict[int, List[int]]) -> "np.ndarray":
+        """Build the MIP start vector of the three-index model from routes."""
+        start = np.zeros(layout.size)
+        start[layout.u_slice] = GRB.UNDEFINED
+        start[layout.w_slice] = 1.0
+        
+        for k, route in routes.items():
+            if not route:
+                continue
+            path = [layout.depot] + list(route) + [layout.depot]
+            for i, j in zip(path[:-1], path[1:]):
+                start[layout.x(k, layout.arc(i, j))] = 1.0
+            start[layout.y(k)] = 1.0
+            for i in route:
+                c = layout.customer_pos[i]
+                start[layout.z(k, c)] = 1.0
+                start[layout.w(c)] = 0.0
+        
+        return start
+    
+    def _set_two_index_start(self, x, w, t, routes: Dict[int, List[int]]) -> None:
+        """Set the MIP start of the two-index model from routes."""
+        depot = self.problem_data['depot']
+        time_matrix = self.problem_data['time_matrix']
+        time_windows = self.problem_data['time_windows']
+        
+        for var in x.values():
+            var.Start = 0.0
+        for var in w.values():
+            var.Start = 1.0
+        
+        for route in routes.values():
+            if not route:
+                continue
+            path = [depot] + list(route) + [depot]
+            for i, j in zip(path[:-1], path[1:]):
+                if (i, j) in x:
+                    x[i, j].Start = 1.0
+            
+            # Arrival times along the route, waiting for windows to open
+            current = time_windows[depot][0] * 100
+            prev = depot
+            for i in route:
+                current = max(current + time_matrix[prev][i], time_windows[i][0] * 100)
+                t[i].Start = current
+                w[i].Start = 0.0
+                prev = i
+    
+    @staticmethod
+    def _emit_incumbent(model,
+                        start_time: float,
+                        vehicles_used: int,
+                        distance: float,
+                        dropped: int,
+                        routes: Optional[List[Tuple[int, List[int]]]] = None) -> None:
+        """
+        Publish the incumbent of a MIPSOL callback to the request's event stream.
+        
+        Args:
+            model: Gurobi model inside the callback
+            start_time: Start of the search (time.time())
+            vehicles_used: Vehicles with a route
+            distance: Total distance in km
+            dropped: Customers left unserved
+            routes: (vehicle, customer nodes) of each route, if requested
+        """
+        objective = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+        bound = model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+        if abs(bound) >= GRB.INFINITY:
+            # No bound yet (e.g. a heuristic solution before the root relaxation)
+            bound = None
+        event = {
+            'engine': 'gurobi',
+            'objective': objective,
+            'bound': bound,
+            'gap': round(abs(objective - bound) / abs(objective), 6) if objective and bound is not None else None,
+            'vehicles_used': vehicles_used,
+            'distance': round(distance, 2),
+            'dropped': dropped,
+            'elapsed_seconds': round(time.time() - start_time, 3)
+        }
+        if routes is not None:
+            event['routes'] = [{'vehicle': k, 'nodes': nodes} for k, nodes in routes]
+        emit('incumbent', **event)
+    
+    @staticmethod
+    def _add_bound_info(solution: Dict, model) -> None:
+        """Add the proven lower bound and final gap to a solution."""
+        try:
+            solution['best_bound'] = round(model.ObjBound, 2)
+            solution['mip_gap'] = round(model.MIPGap, 6)
+        except Exception:
+            pass
+    
+    @staticmethod
+    def _trace_search(model) -> None:
+        """Record the outcome of an optimize call on the current span."""
+        trace_set(
+            status=model.Status,
+            solutions=model.SolCount,
+            nodes=int(model.NodeCount) if model.IsMIP else 0,
+            iterations=int(model.IterCount)
+        )
+    
     def _log_infeasibility_details(self, model, n, depot, vehicles):
         """Log details about model infeasibility."""
         time_windows = self.problem_data['time_windows']
@@ -509,59 +1238,41 @@ class GurobiSolverImpl:
     def _extract_solution(
         self, 
         model, 
-        x, 
-        u, 
-        y, 
-        z, 
-        w, 
-        vehicles, 
-        n, 
-        depot
+        values, 
+        layout
     ) -> Dict:
-        """Extract solution from Gurobi model."""
+        """Extract solution from the bulk-read variable values of the Gurobi model."""
         routes = []
         total_distance = 0.0
         total_load = 0
         vehicles_used = 0
         dropped_customers = []
         
+        n = layout.n
+        depot = layout.depot
         distance_matrix = self.problem_data['distance_matrix']
         time_matrix = self.problem_data.get('time_matrix', distance_matrix)
-        demands = self.problem_data['demands']
-        time_windows = self.problem_data['time_windows']
-        capacities = self.problem_data['vehicle_capacities']
-        customers = [idx for idx in range(n) if idx != depot]
+        customers = [int(idx) for idx in layout.customers]
+        
+        active = values > 0.5
+        x_used = layout.x_values(active)
+        z_used = layout.z_values(active)
         
         # Debug logging
         logger.info("Active arcs in solution:")
-        for k in vehicles:
-            for i in range(n):
-                for j in range(n):
-                    if i != j and (i, j, k) in x and x[i, j, k].X > 0.5:
-                        logger.info(f"  Vehicle {k}: {i} -> {j} (x={x[i, j, k].X:.2f})")
+        for k, a in zip(*np.nonzero(x_used)):
+            logger.info(f"  Vehicle {k}: {layout.arc_i[a]} -> {layout.arc_j[a]}")
         
         logger.info("Customer assignments (z variables):")
-        for k in vehicles:
-            for i in customers:
-                if (i, k) in z and z[i, k].X > 0.5:
-                    logger.info(
-                        f"  Customer {i} assigned to vehicle {k} (z={z[i, k].X:.2f})"
-                    )
+        for k, c in zip(*np.nonzero(z_used)):
+            logger.info(f"  Customer {layout.customers[c]} assigned to vehicle {k}")
         
         # Check for dropped customers
         logger.info("Checking for unserved customers (w variables):")
-        for i in customers:
-            if i in w and w[i].X > 0.5:
-                dropped_customers.append({
-                    'location': i,
-                    'demand': demands[i],
-                    'time_window': time_windows[i],
-                    'time_window_formatted': (
-                        f"{minutes_to_time(time_windows[i][0])} - "
-                        f"{minutes_to_time(time_windows[i][1])}"
-                    )
-                })
-                logger.warning(f"  Customer {i} was NOT served (dropped)")
+        for c in np.nonzero(layout.w_values(active))[0]:
+            i = customers[c]
+            dropped_customers.append(self._build_dropped_customer(i))
+            logger.warning(f"  Customer {i} was NOT served (dropped)")
         
         if dropped_customers:
             logger.warning(
@@ -571,71 +1282,24 @@ class GurobiSolverImpl:
             logger.info("All customers were served successfully!")
         
         # Extract routes for each vehicle
-        for k in vehicles:
-            if y[k].X > 0.5:
-                vehicles_used += 1
-                
-                # Reconstruct route
-                route_indices = self._reconstruct_route(x, n, depot, k)
-                
-                # Calculate route statistics
-                route_distance = sum(
-                    distance_matrix[route_indices[i]][route_indices[i+1]]
-                    for i in range(len(route_indices)-1)
-                )
-                route_load = sum(demands[idx] for idx in route_indices if idx != depot)
-                
-                # Calculate times
-                travel_time_minutes = sum(
-                    time_matrix[route_indices[i]][route_indices[i+1]]
-                    for i in range(len(route_indices)-1)
-                ) / 100.0
-                
-                num_customers = len([idx for idx in route_indices if idx != depot])
-                service_time_minutes = sum(
-                    10 + (2 * demands[idx])
-                    for idx in route_indices
-                    if idx != depot
-                )
-                
-                route_duration_minutes = travel_time_minutes + service_time_minutes
-                
-                # Build detailed route with time info
-                route_details = self._build_route_details(
-                    route_indices, depot, distance_matrix, time_matrix
-                )
-                
-                saturation_pct = (
-                    round((route_load / capacities[k]) * 100, 1)
-                    if capacities[k] > 0
-                    else 0
-                )
-                
-                routes.append({
-                    'vehicle_id': k,
-                    'route': route_details,
-                    'distance': round(route_distance, 2),
-                    'distance_km': round(route_distance, 2),
-                    'distance_formatted': f"{route_distance:.2f} km",
-                    'load': route_load,
-                    'load_units': route_load,
-                    'load_formatted': f"{route_load} units",
-                    'capacity': capacities[k],
-                    'saturation_pct': saturation_pct,
-                    'duration_minutes': round(route_duration_minutes, 2),
-                    'duration_formatted': format_time_minutes(route_duration_minutes),
-                    'duration_hours': round(route_duration_minutes / 60.0, 2),
-                    'travel_time_minutes': round(travel_time_minutes, 2),
-                    'travel_time_hours': round(travel_time_minutes / 60.0, 2),
-                    'travel_time_formatted': format_time_minutes(travel_time_minutes),
-                    'service_time_minutes': round(service_time_minutes, 2),
-                    'service_time_hours': round(service_time_minutes / 60.0, 2),
-                    'service_time_formatted': format_time_minutes(service_time_minutes),
-                    'num_customers': num_customers
-                })
-                
-                total_distance += route_distance
-                total_load += route_load
+        for k in np.nonzero(layout.y_values(active))[0]:
+            k = int(k)
+            vehicles_used += 1
+            
+            # Reconstruct route
+            arcs = np.nonzero(x_used[k])[0]
+            successor = {
+                int(i): int(j) for i, j in zip(layout.arc_i[arcs], layout.arc_j[arcs])
+            }
+            route_indices = self._reconstruct_route(successor, depot)
+            
+            route_entry = self._build_route(
+                k, route_indices, distance_matrix, time_matrix
+            )
+            routes.append(route_entry)
+            
+            total_distance += route_entry['distance']
+            total_load += route_entry['load']
         
         # Build solution summary
         return self._build_solution_summary(
@@ -643,23 +1307,90 @@ class GurobiSolverImpl:
             dropped_customers, model.ObjVal, customers, n, depot
         )
     
-    def _reconstruct_route(self, x, n, depot, k):
-        """Reconstruct route for vehicle k from solution variables."""
+    def _build_route(self, k, route_indices, distance_matrix, time_matrix) -> Dict:
+        """Build the route dictionary for vehicle k visiting route_indices."""
+        depot = self.problem_data['depot']
+        demands = self.problem_data['demands']
+        capacities = self.problem_data['vehicle_capacities']
+        
+        # Calculate route statistics
+        route_distance = sum(
+            distance_matrix[route_indices[i]][route_indices[i+1]]
+            for i in range(len(route_indices)-1)
+        )
+        route_load = sum(demands[idx] for idx in route_indices if idx != depot)
+        
+        # Calculate times
+        travel_time_minutes = sum(
+            time_matrix[route_indices[i]][route_indices[i+1]]
+            for i in range(len(route_indices)-1)
+        ) / 100.0
+        
+        num_customers = len([idx for idx in route_indices if idx != depot])
+        service_times = node_service_times(self.problem_data)
+        service_time_minutes = sum(service_times[idx] for idx in route_indices)
+        
+        route_duration_minutes = travel_time_minutes + service_time_minutes
+        
+        # Build detailed route with time info
+        route_details = self._build_route_details(
+            route_indices, depot, distance_matrix, time_matrix
+        )
+        
+        saturation_pct = (
+            round((route_load / capacities[k]) * 100, 1)
+            if capacities[k] > 0
+            else 0
+        )
+        
+        return {
+            'vehicle_id': k,
+            'route': route_details,
+            'distance': round(route_distance, 2),
+            'distance_km': round(route_distance, 2),
+            'distance_formatted': f"{route_distance:.2f} km",
+            'load': route_load,
+            'load_units': route_load,
+            'load_formatted': f"{route_load} units",
+            'capacity': capacities[k],
+            'saturation_pct': saturation_pct,
+            'duration_minutes': round(route_duration_minutes, 2),
+            'duration_formatted': format_time_minutes(route_duration_minutes),
+            'duration_hours': round(route_duration_minutes / 60.0, 2),
+            'travel_time_minutes': round(travel_time_minutes, 2),
+            'travel_time_hours': round(travel_time_minutes / 60.0, 2),
+            'travel_time_formatted': format_time_minutes(travel_time_minutes),
+            'service_time_minutes': round(service_time_minutes, 2),
+            'service_time_hours': round(service_time_minutes / 60.0, 2),
+            'service_time_formatted': format_time_minutes(service_time_minutes),
+            'num_customers': num_customers
+        }
+    
+    def _build_dropped_customer(self, i) -> Dict:
+        """Build the dropped customer entry for location i."""
+        time_windows = self.problem_data['time_windows']
+        return {
+            'location': i,
+            'demand': self.problem_data['demands'][i],
+            'time_window': time_windows[i],
+            'time_window_formatted': (
+                f"{minutes_to_time(time_windows[i][0])} - "
+                f"{minutes_to_time(time_windows[i][1])}"
+            )
+        }
+    
+    def _reconstruct_route(self, successor: Dict[int, int], depot: int) -> List[int]:
+        """Reconstruct a route from the successor map of one vehicle."""
         route_indices = [depot]
         current = depot
         visited = {depot}
         
         while True:
-            next_node = None
-            for j in range(n):
-                if j != current and j not in visited:
-                    if (current, j, k) in x and x[current, j, k].X > 0.5:
-                        next_node = j
-                        break
+            next_node = successor.get(current)
             
-            if next_node is None:
+            if next_node is None or next_node in visited:
                 # Check if returning to depot
-                if (current, depot, k) in x and x[current, depot, k].X > 0.5:
+                if next_node == depot:
                     route_indices.append(depot)
                 break
             
@@ -680,6 +1411,7 @@ class GurobiSolverImpl:
         route_details = []
         demands = self.problem_data['demands']
         time_windows = self.problem_data['time_windows']
+        service_times = node_service_times(self.problem_data)
         
         current_time = time_windows[depot][0] * 100  # Start at depot opening time
         
@@ -693,9 +1425,7 @@ class GurobiSolverImpl:
                 current_time += travel_time
                 
                 # Add service time at previous location
-                if prev_idx != depot:
-                    service_at_prev = 10 + (2 * demands[prev_idx])
-                    current_time += service_at_prev * 100
+                current_time += service_times[prev_idx] * 100
             
             arrival_time_minutes = current_time / 100.0
             
@@ -839,3 +1569,74 @@ class GurobiSolverImpl:
             'objective_value': round(objective_value, 2),
             'solver': 'gurobi'
         }
+
+
+class _ThreeIndexLayout:
+    """
+    Index layout of the flat variable vector of the three-index model.
+    
+    Variables are stored as [x | u | y | z | w] where x is indexed by
+    (vehicle, arc), u by (vehicle, location), y by vehicle, z by
+    (vehicle, customer position) and w by customer position. All index
+    helpers accept NumPy arrays.
+    """
+    
+    def __init__(self, n: int, depot: int, num_vehicles: int):
+        self.n = n
+        self.depot = depot
+        self.num_vehicles = num_vehicles
+        
+        self.customers = np.array([i for i in range(n) if i != depot], dtype=np.int64)
+        self.num_customers = len(self.customers)
+        self.customer_pos = np.full(n, -1, dtype=np.int64)
+        self.customer_pos[self.customers] = np.arange(self.num_customers)
+        
+        # Arcs (i, j) with i != j in row-major order
+        self.arc_i, self.arc_j = np.nonzero(~np.eye(n, dtype=bool))
+        self.num_arcs = len(self.arc_i)
+        
+        self.x_offset = 0
+        self.u_offset = self.x_offset + num_vehicles * self.num_arcs
+        self.y_offset = self.u_offset + num_vehicles * n
+        self.z_offset = self.y_offset + num_vehicles
+        self.w_offset = self.z_offset + num_vehicles * self.num_customers
+        self.size = self.w_offset + self.num_customers
+        
+        self.x_slice = slice(self.x_offset, self.u_offset)
+        self.u_slice = slice(self.u_offset, self.y_offset)
+        self.y_slice = slice(self.y_offset, self.z_offset)
+        self.z_slice = slice(self.z_offset, self.w_offset)
+        self.w_slice = slice(self.w_offset, self.size)
+    
+    def x(self, k, a):
+        return self.x_offset + k * self.num_arcs + a
+    
+    def u(self, k, i):
+        return self.u_offset + k * self.n + i
+    
+    def y(self, k):
+        return self.y_offset + k
+    
+    def z(self, k, c):
+        return self.z_offset + k * self.num_customers + c
+    
+    def w(self, c):
+        return self.w_offset + c
+    
+    def arc(self, i, j):
+        """Arc index of (i, j) in the row-major arc order without the diagonal."""
+        return i * (self.n - 1) + (j if j < i else j - 1)
+    
+    def x_values(self, values: "np.ndarray") -> "np.ndarray":
+        """Arc values as a (vehicle, arc) matrix."""
+        return values[self.x_slice].reshape(self.num_vehicles, self.num_arcs)
+    
+    def y_values(self, values: "np.ndarray") -> "np.ndarray":
+        return values[self.y_slice]
+    
+    def z_values(self, values: "np.ndarray") -> "np.ndarray":
+        """Assignment values as a (vehicle, customer position) matrix."""
+        return values[self.z_slice].reshape(self.num_vehicles, self.num_customers)
+    
+    def w_values(self, values: "np.ndarray") -> "np.ndarray":
+        return values[self.w_slice]
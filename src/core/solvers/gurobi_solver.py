@@ -6,7 +6,7 @@ except ImportError:
     GUROBI_AVAILABLE = False
     GurobiSolverImpl = None
 
-from .base import BaseSolver
+from .base import BaseSolver, GurobiFormulation
 
 
 class GurobiSolver(BaseSolver):
@@ -34,6 +34,10 @@ class GurobiSolver(BaseSolver):
               vehicle_penalty_weight: float = 1000.0,
               distance_weight: float = 1.0,
               mip_gap: float = 0.01,
+              formulation: str = GurobiFormulation.THREE_INDEX,
+              initial_routes=None,
+              cutoff=None,
+              reuse_model: bool = False,
               **kwargs):
         """Solve using Gurobi."""
         return self._solver.solve(
@@ -41,9 +45,21 @@ class GurobiSolver(BaseSolver):
             log_search=log_search,
             vehicle_penalty_weight=vehicle_penalty_weight,
             distance_weight=distance_weight,
-            mip_gap=mip_gap
+            mip_gap=mip_gap,
+            formulation=formulation,
+            initial_routes=initial_routes,
+            cutoff=cutoff,
+            reuse_model=reuse_model
         )
     
+    def kept_model_size(self):
+        """(variables, nonzeros) of the model kept by reuse_model=True."""
+        return self._solver.kept_model_size()
+    
+    def release_model(self) -> None:
+        """Free the model kept by reuse_model=True."""
+        self._solver.release_model()
+    
     @property
     def solver_name(self) -> str:
         """Return solver name."""
@@ -0,0 +1,717 @@
+"""
+Construction Heuristic CVRPTW Solver Implementation
+
+Fast solver for interactive previews, in pure Python/NumPy over the
+precomputed matrices: Clarke-Wright savings, sweep and time-window-aware
+insertion constructions, each improved by relocate / or-opt, 2-opt and
+2-opt* local search. Returns the same solution dictionary as OR-Tools.
+"""
+
+import math
+import time
+import logging
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .base import UNSERVED_PENALTY
+from .ortools_impl import ORToolsSolverImpl
+from ...utils.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+# Or-opt moves segments up to this length (length 1 is a plain relocate)
+MAX_SEGMENT_LENGTH = 3
+
+EPSILON = 1e-9
+
+
+class Construction(str, Enum):
+    """Available construction heuristics."""
+    SAVINGS = "savings"
+    SWEEP = "sweep"
+    INSERTION = "insertion"
+
+
+class HeuristicSolverImpl(ORToolsSolverImpl):
+    """
+    Construction heuristics followed by local search.
+    
+    Routes are plain lists of customers; each route is bound to a vehicle.
+    Times follow the OR-Tools model: vehicles leave the depot when it opens,
+    wait for windows to open, and arrival (scaled by 100) at j is
+    ``max(t_i + time_matrix[i][j], open_j)``.
+    """
+    
+    def __init__(self, problem_data: Dict):
+        """
+        Initialize heuristic solver with problem data.
+        
+        Args:
+            problem_data: Dictionary containing problem definition
+        """
+        super().__init__(problem_data)
+        
+        depot = self.problem_data['depot']
+        self.depot = depot
+        self.D = np.asarray(self.problem_data['distance_matrix'], dtype=float)
+        self.T = np.asarray(self.problem_data['time_matrix'], dtype=float)
+        self.q = np.asarray(self.problem_data['demands'], dtype=float)
+        time_windows = self.problem_data['time_windows']
+        self.e = np.asarray([tw[0] for tw in time_windows], dtype=float) * 100
+        self.l = np.asarray([tw[1] for tw in time_windows], dtype=float) * 100
+        # Same horizon as the OR-Tools time dimension
+        self.horizon = float(self.l.max())
+        self.capacities = [float(c) for c in self.problem_data['vehicle_capacities']]
+        self.customers = [i for i in range(len(self.q)) if i != depot]
+        
+        # Plain lists for the scalar loops
+        self._D = self.D.tolist()
+        self._T = self.T.tolist()
+        self._e = self.e.tolist()
+        self._l = self.l.tolist()
+        self._q = self.q.tolist()
+    
+    def solve(
+        self,
+        time_limit_seconds: int = 60,
+        log_search: bool = False,
+        vehicle_penalty_weight: float = 1000.0,
+        distance_weight: float = 1.0,
+        constructions: Optional[List[str]] = None,
+        **kwargs
+    ) -> Optional[Dict]:
+        """
+        Solve CVRPTW problem with construction heuristics and local search.
+        
+        Local search stops at a local optimum, so the time limit is only an
+        upper bound: small problems return in milliseconds.
+        
+        Args:
+            time_limit_seconds: Maximum time for all constructions together
+            log_search: Whether to log each construction's result
+            vehicle_penalty_weight: Weight for minimizing number of vehicles
+            distance_weight: Weight for distance minimization
+            constructions: Constructions to run (default: all)
+            **kwargs: Additional parameters (ignored)
+        
+        Returns:
+            Solution dictionary or None if no solution found
+        """
+        start_time = time.time()
+        deadline = start_time + time_limit_seconds
+        self.vehicle_penalty_weight = vehicle_penalty_weight
+        self.distance_weight = distance_weight
+        
+        constructions = [Construction(c) for c in (constructions or list(Construction))]
+        builders = {
+            Construction.SAVINGS: self._construct_savings,
+            Construction.SWEEP: self._construct_sweep,
+            Construction.INSERTION: self._construct_insertion,
+        }
+        
+        logger.info(
+            f"Starting heuristic solver: locations={len(self.q)}, "
+            f"vehicles={len(self.capacities)}, constructions={[c.value for c in constructions]}"
+        )
+        
+        best = None
+        for construction in constructions:
+            if best is not None and time.time() > deadline:
+                break
+            with trace_span('construction', method=construction.value) as span:
+                routes, vehicles = builders[construction]()
+                routes, vehicles = self._insert_unrouted(routes, vehicles)
+                routes, vehicles = self._local_search(routes, vehicles, deadline)
+                objective = self._objective(routes)
+                if span:
+                    span.set(routes=len(routes), objective=round(objective, 2))
+            if log_search:
+                logger.info(
+                    f"  {construction.value}: {len(routes)} routes, objective {objective:.2f}"
+                )
+            if best is None or objective < best[0] - EPSILON:
+                best = (objective, construction, routes, vehicles)
+        
+        if best is None:
+            return None
+        
+        objective, construction, routes, vehicles = best
+        logger.info(
+            f"Heuristic solution ({construction.value}) in {(time.time() - start_time) * 1000:.0f} ms: "
+            f"{len(routes)} routes, objective {objective:.2f}"
+        )
+        solution = self._to_solution(routes, vehicles, objective)
+        solution['solver'] = 'heuristic'
+        solution['construction'] = construction.value
+        return solution
+    
+    # ------------------------------------------------------------------
+    # Schedules and feasibility
+    # ------------------------------------------------------------------
+    
+    def _arrivals(self, route: List[int]) -> Optional[List[float]]:
+        """Arrival times along depot + route + depot, or None if a window is violated."""
+        T, e, l = self._T, self._e, self._l
+        depot = self.depot
+        current = e[depot]
+        arrivals = [current]
+        prev = depot
+        for node in route:
+            current = max(current + T[prev][node], e[node])
+            if current > l[node]:
+                return None
+            arrivals.append(current)
+            prev = node
+        current = current + T[prev][depot]
+        if current > self.horizon:
+            return None
+        arrivals.append(current)
+        return arrivals
+    
+    def _latest(self, route: List[int]) -> List[float]:
+        """Latest feasible arrival at each position of depot + route + depot."""
+        T, l = self._T, self._l
+        path = [self.depot] + route + [self.depot]
+        latest = [0.0] * len(path)
+        latest[-1] = self.horizon
+        for k in range(len(path) - 2, -1, -1):
+            node = path[k]
+            latest[k] = min(l[node], latest[k + 1] - T[node][path[k + 1]])
+        return latest
+    
+    def _feasible(self, route: List[int], vehicle: int) -> bool:
+        """Whether route respects the vehicle capacity and all time windows."""
+        q = self._q
+        if sum(q[i] for i in route) > self.capacities[vehicle]:
+            return False
+        return self._arrivals(route) is not None
+    
+    def _distance(self, route: List[int]) -> float:
+        """Route length in km, depot to depot."""
+        if not route:
+            return 0.0
+        path = [self.depot] + route + [self.depot]
+        return float(self.D[path[:-1], path[1:]].sum())
+    
+    def _objective(self, routes: List[List[int]]) -> float:
+        """Objective value: vehicles, distance and unserved customers."""
+        served = sum(len(r) for r in routes)
+        return (
+            self.vehicle_penalty_weight * len(routes)
+            + self.distance_weight * sum(self._distance(r) for r in routes)
+            + UNSERVED_PENALTY * (len(self.customers) - served)
+        )
+    
+    def _best_insertion(
+        self,
+        route: List[int],
+        load: float,
+        vehicle: int,
+        candidates: np.ndarray,
+        schedule: Optional[Tuple[List[float], List[float]]] = None
+    ) -> Optional[Tuple[float, int, int]]:
+        """
+        Cheapest feasible insertion of any candidate customer into a route.
+        
+        Uses forward arrival and backward latest-arrival arrays, so every
+        (customer, position) pair is checked in O(1), vectorized. Callers
+        inserting repeatedly into the same route can pass both arrays
+        precomputed as ``schedule``.
+        
+        Returns:
+            (distance delta, customer, position) or None
+        """
+        if len(candidates) == 0:
+            return None
+        if schedule is None:
+            arrivals = self._arrivals(route)
+            if arrivals is None:
+                return None
+            latest = self._latest(route)
+        else:
+            arrivals, latest = schedule
+        path = np.asarray([self.depot] + route + [self.depot])
+        prev, nxt = path[:-1], path[1:]
+        
+        fits = self.q[candidates] + load <= self.capacities[vehicle]
+        candidates = candidates[fits]
+        if len(candidates) == 0:
+            return None
+        
+        # Shape (candidates, positions)
+        arrive_u = np.maximum(
+            np.asarray(arrivals[:-1])[None, :] + self.T[prev][:, candidates].T,
+            self.e[candidates][:, None]
+        )
+        arrive_next = np.maximum(arrive_u + self.T[candidates][:, nxt], self.e[nxt][None, :])
+        feasible = (
+            (arrive_u <= self.l[candidates][:, None])
+            & (arrive_next <= np.asarray(latest[1:])[None, :])
+        )
+        if not feasible.any():
+            return None
+        
+        delta = self.D[prev][:, candidates].T + self.D[candidates][:, nxt] - self.D[prev, nxt][None, :]
+        delta = np.where(feasible, delta, np.inf)
+        c, position = np.unravel_index(np.argmin(delta), delta.shape)
+        return float(delta[c, position]), int(candidates[c]), int(position)
+    
+    # ------------------------------------------------------------------
+    # Constructions
+    # ------------------------------------------------------------------
+    
+    def _vehicles_by_capacity(self) -> List[int]:
+        """Vehicle indices, largest capacity first."""
+        return sorted(range(len(self.capacities)), key=lambda k: -self.capacities[k])
+    
+    def _construct_insertion(self) -> Tuple[List[List[int]], List[int]]:
+        """Sequential time-window-aware cheapest insertion (Solomon I1 style)."""
+        unrouted = set(self.customers)
+        routes, vehicles = [], []
+        
+        for vehicle in self._vehicles_by_capacity():
+            if not unrouted:
+                break
+            # Seed with the most urgent customer this vehicle can serve alone
+            seeds = sorted(unrouted, key=lambda i: (self._l[i], -self.D[self.depot, i]))
+            seed = next((i for i in seeds if self._feasible([i], vehicle)), None)
+            if seed is None:
+                continue
+            route = [seed]
+            load = self._q[seed]
+            unrouted.discard(seed)
+            
+            while unrouted:
+                best = self._best_insertion(
+                    route, load, vehicle, np.fromiter(unrouted, dtype=int)
+                )
+                if best is None:
+                    break
+                _, customer, position = best
+                route.insert(position, customer)
+                load += self._q[customer]
+                unrouted.discard(customer)
+            
+            routes.append(route)
+            vehicles.append(vehicle)
+        
+        return routes, vehicles
+    
+    def _construct_sweep(self) -> Tuple[List[List[int]], List[int]]:
+        """Angular sweep around the depot with cheapest feasible insertion."""
+        locations = self.problem_data['locations']
+        depot_lat, depot_lon = locations[self.depot][0], locations[self.depot][1]
+        angles = {
+            i: math.atan2(locations[i][0] - depot_lat, locations[i][1] - depot_lon)
+            for i in self.customers
+        }
+        order = sorted(self.customers, key=lambda i: angles[i])
+        unrouted = list(order)
+        routes, vehicles = [], []
+        
+        for vehicle in self._vehicles_by_capacity():
+            if not unrouted:
+                break
+            route, load = [], 0.0
+            skipped = []
+            for customer in unrouted:
+                best = self._best_insertion(route, load, vehicle, np.asarray([customer]))
+                if best is None:
+                    skipped.append(customer)
+                    continue
+                route.insert(best[2], customer)
+                load += self._q[customer]
+            if route:
+                routes.append(route)
+                vehicles.append(vehicle)
+            unrouted = skipped
+        
+        return routes, vehicles
+    
+    def _construct_savings(self) -> Tuple[List[List[int]], List[int]]:
+        """Parallel Clarke-Wright savings, then largest routes to largest vehicles."""
+        depot = self.depot
+        max_capacity = max(self.capacities) if self.capacities else 0.0
+        q = self._q
+        
+        # Single-customer routes
+        routes: Dict[int, List[int]] = {}
+        route_of: Dict[int, int] = {}
+        loads: Dict[int, float] = {}
+        for i in self.customers:
+            if q[i] <= max_capacity and self._arrivals([i]) is not None:
+                routes[i] = [i]
+                route_of[i] = i
+                loads[i] = q[i]
+        
+        # Savings s_ij = d_i0 + d_0j - d_ij of appending j's route after i's
+        nodes = np.asarray(sorted(routes), dtype=int)
+        if len(nodes) > 1:
+            savings = (
+                self.D[nodes, depot][:, None] + self.D[depot, nodes][None, :]
+                - self.D[np.ix_(nodes, nodes)]
+            )
+            np.fill_diagonal(savings, -np.inf)
+            a, b = np.nonzero(savings > 0)
+            order = np.argsort(-savings[a, b], kind='stable')
+            
+            for i, j in zip(nodes[a[order]].tolist(), nodes[b[order]].tolist()):
+                ri, rj = route_of[i], route_of[j]
+                if ri == rj:
+                    continue
+                route_i, route_j = routes[ri], routes[rj]
+                if route_i[-1] != i or route_j[0] != j:
+                    continue
+                if loads[ri] + loads[rj] > max_capacity:
+                    continue
+                merged = route_i + route_j
+                if self._arrivals(merged) is None:
+                    continue
+                routes[ri] = merged
+                loads[ri] += loads[rj]
+                for node in route_j:
+                    route_of[node] = ri
+                del routes[rj], loads[rj]
+        
+        # Largest routes to largest vehicles; the rest is reinserted later
+        out_routes, out_vehicles = [], []
+        pending = sorted(routes, key=lambda r: -loads[r])
+        for vehicle in self._vehicles_by_capacity():
+            fitting = next((r for r in pending if loads[r] <= self.capacities[vehicle]), None)
+            if fitting is None:
+                continue
+            pending.remove(fitting)
+            out_routes.append(routes[fitting])
+            out_vehicles.append(vehicle)
+        
+        return out_routes, out_vehicles
+    
+    def _insert_unrouted(
+        self,
+        routes: List[List[int]],
+        vehicles: List[int]
+    ) -> Tuple[List[List[int]], List[int]]:
+        """Insert customers missing from the routes, opening routes on idle vehicles."""
+        routed = {i for r in routes for i in r}
+        unrouted = [i for i in self.customers if i not in routed]
+        if not unrouted:
+            return routes, vehicles
+        
+        routes = [list(r) for r in routes]
+        vehicles = list(vehicles)
+        idle = [k for k in self._vehicles_by_capacity() if k not in set(vehicles)]
+        
+        for customer in sorted(unrouted, key=lambda i: self._l[i]):
+            best = None
+            for idx, route in enumerate(routes):
+                load = sum(self._q[i] for i in route)
+                found = self._best_insertion(route, load, vehicles[idx], np.asarray([customer]))
+                if found is not None and (best is None or found[0] < best[0]):
+                    best = (found[0], idx, found[2])
+            if best is not None:
+                routes[best[1]].insert(best[2], customer)
+                continue
+            vehicle = next((k for k in idle if self._feasible([customer], k)), None)
+            if vehicle is not None:
+                idle.remove(vehicle)
+                routes.append([customer])
+                vehicles.append(vehicle)
+        
+        return routes, vehicles
+    
+    # ------------------------------------------------------------------
+    # Local search
+    # ------------------------------------------------------------------
+    
+    def _local_search(
+        self,
+        routes: List[List[int]],
+        vehicles: List[int],
+        deadline: float
+    ) -> Tuple[List[List[int]], List[int]]:
+        """Apply improving moves until none is left (or time runs out)."""
+        pairs = [(list(r), k) for r, k in zip(routes, vehicles) if r]
+        routes = [r for r, _ in pairs]
+        vehicles = [k for _, k in pairs]
+        
+        operators = [self._move_or_opt, self._move_two_opt_star, self._move_two_opt]
+        improved = True
+        while improved and time.time() < deadline:
+            improved = False
+            for operator in operators:
+                while time.time() < deadline and operator(routes, vehicles):
+                    improved = True
+            if self._eliminate_route(routes, vehicles):
+                improved = True
+        
+        return routes, vehicles
+    
+    def _edges(self, routes: List[List[int]]):
+        """Flat arrays describing every arc of every route."""
+        prev, nxt, route_idx, position = [], [], [], []
+        for r, route in enumerate(routes):
+            path = [self.depot] + route + [self.depot]
+            prev.extend(path[:-1])
+            nxt.extend(path[1:])
+            route_idx.extend([r] * (len(path) - 1))
+            position.extend(range(len(path) - 1))
+        return (
+            np.asarray(prev, dtype=int), np.asarray(nxt, dtype=int),
+            np.asarray(route_idx, dtype=int), np.asarray(position, dtype=int)
+        )
+    
+    def _move_or_opt(self, routes: List[List[int]], vehicles: List[int]) -> bool:
+        """
+        Move a segment of 1..MAX_SEGMENT_LENGTH customers to another route.
+        
+        All (segment, target arc) deltas are computed as one matrix; the
+        best candidates are then checked exactly for time windows.
+        """
+        if len(routes) < 2:
+            return False
+        
+        first, last, seg_route, seg_start, seg_len, seg_load, gain = [], [], [], [], [], [], []
+        for r, route in enumerate(routes):
+            path = [self.depot] + route + [self.depot]
+            for length in range(1, MAX_SEGMENT_LENGTH + 1):
+                for k in range(len(route) - length + 1):
+                    p, s = path[k], path[k + length + 1]
+                    f, g = route[k], route[k + length - 1]
+                    removed = self.D[p, f] + self.D[g, s] - self.D[p, s]
+                    first.append(f)
+                    last.append(g)
+                    seg_route.append(r)
+                    seg_start.append(k)
+                    seg_len.append(length)
+                    seg_load.append(sum(self._q[i] for i in route[k:k + length]))
+                    # Emptying a route also saves its vehicle
+                    bonus = self.vehicle_penalty_weight / self.distance_weight if (
+                        length == len(route) and self.distance_weight > 0
+                    ) else 0.0
+                    gain.append(removed + bonus)
+        
+        if not first:
+            return False
+        
+        first = np.asarray(first)
+        last = np.asarray(last)
+        seg_route = np.asarray(seg_route)
+        seg_load = np.asarray(seg_load)
+        gain = np.asarray(gain)
+        
+        prev, nxt, edge_route, edge_pos = self._edges(routes)
+        loads = np.asarray([sum(self._q[i] for i in r) for r in routes])
+        caps = np.asarray([self.capacities[k] for k in vehicles])
+        
+        insert = self.D[prev][:, first].T + self.D[last][:, nxt] - self.D[prev, nxt][None, :]
+        delta = insert - gain[:, None]
+        valid = (
+            (seg_route[:, None] != edge_route[None, :])
+            & (loads[edge_route][None, :] + seg_load[:, None] <= caps[edge_route][None, :])
+            & (delta < -EPSILON)
+        )
+        
+        return self._apply_first(delta, valid, lambda s, e: self._try_or_opt(
+            routes, vehicles, seg_route[s], seg_start[s], seg_len[s], edge_route[e], edge_pos[e]
+        ))
+    
+    def _try_or_opt(self, routes, vehicles, r_from, start, length, r_to, position) -> bool:
+        """Apply an or-opt move if both routes stay feasible."""
+        source = routes[r_from]
+        segment = source[start:start + length]
+        new_source = source[:start] + source[start + length:]
+        target = routes[r_to]
+        new_target = target[:position] + segment + target[position:]
+        
+        if not self._feasible(new_target, vehicles[r_to]):
+            return False
+        if new_source and self._arrivals(new_source) is None:
+            return False
+        
+        routes[r_to] = new_target
+        routes[r_from] = new_source
+        if not new_source:
+            del routes[r_from]
+            del vehicles[r_from]
+        return True
+    
+    def _move_two_opt_star(self, routes: List[List[int]], vehicles: List[int]) -> bool:
+        """Exchange route tails between two routes (2-opt*)."""
+        if len(routes) < 2:
+            return False
+        
+        prev, nxt, edge_route, edge_pos = self._edges(routes)
+        prefix_load = []
+        for route in routes:
+            running = 0.0
+            prefix_load.append(running)
+            for node in route:
+                running += self._q[node]
+                prefix_load.append(running)
+        prefix_load = np.asarray(prefix_load)
+        loads = np.asarray([sum(self._q[i] for i in r) for r in routes])
+        caps = np.asarray([self.capacities[k] for k in vehicles])
+        
+        # Edge a of route A and edge b of route B:
+        # A' = A[:a] + B[b:], B' = B[:b] + A[a:]
+        delta = (
+            self.D[prev][:, nxt] + self.D[prev][:, nxt].T
+            - self.D[prev, nxt][:, None] - self.D[prev, nxt][None, :]
+        )
+        load_a = prefix_load[:, None] + (loads[edge_route] - prefix_load)[None, :]
+        load_b = prefix_load[None, :] + (loads[edge_route] - prefix_load)[:, None]
+        
+        # Routes that become empty save their vehicle
+        lengths = np.asarray([len(r) for r in routes])
+        empty_a = (edge_pos[:, None] == 0) & (edge_pos[None, :] == lengths[edge_route][None, :])
+        empty_b = (edge_pos[None, :] == 0) & (edge_pos[:, None] == lengths[edge_route][:, None])
+        if self.distance_weight > 0:
+            delta = delta - (empty_a | empty_b) * (self.vehicle_penalty_weight / self.distance_weight)
+        
+        valid = (
+            (edge_route[:, None] < edge_route[None, :])
+            & (load_a <= caps[edge_route][:, None])
+            & (load_b <= caps[edge_route][None, :])
+            & (delta < -EPSILON)
+        )
+        
+        return self._apply_first(delta, valid, lambda a, b: self._try_two_opt_star(
+            routes, vehicles, edge_route[a], edge_pos[a], edge_route[b], edge_pos[b]
+        ))
+    
+    def _try_two_opt_star(self, routes, vehicles, r_a, pos_a, r_b, pos_b) -> bool:
+        """Apply a 2-opt* move if both routes stay feasible."""
+        route_a, route_b = routes[r_a], routes[r_b]
+        new_a = route_a[:pos_a] + route_b[pos_b:]
+        new_b = route_b[:pos_b] + route_a[pos_a:]
+        
+        if new_a and self._arrivals(new_a) is None:
+            return False
+        if new_b and self._arrivals(new_b) is None:
+            return False
+        
+        routes[r_a], routes[r_b] = new_a, new_b
+        for r in sorted((r_a, r_b), reverse=True):
+            if not routes[r]:
+                del routes[r]
+                del vehicles[r]
+        return True
+    
+    def _move_two_opt(self, routes: List[List[int]], vehicles: List[int]) -> bool:
+        """Reverse a section of one route (intra-route 2-opt)."""
+        for r, route in enumerate(routes):
+            if len(route) < 3:
+                continue
+            path = np.asarray([self.depot] + route + [self.depot])
+            prev, nxt = path[:-1], path[1:]
+            
+            # Replace arcs (i, i+1) and (j, j+1) by (i, j) and (i+1, j+1);
+            # the reversed section's own arcs are checked exactly afterwards
+            delta = (
+                self.D[prev][:, prev] + self.D[nxt][:, nxt]
+                - self.D[prev, nxt][:, None] - self.D[prev, nxt][None, :]
+            )
+            idx = np.arange(len(prev))
+            valid = (idx[:, None] + 1 < idx[None, :]) & (delta < -EPSILON)
+            
+            if self._apply_first(delta, valid, lambda i, j: self._try_two_opt(routes, r, i, j)):
+                return True
+        return False
+    
+    def _try_two_opt(self, routes, r, i, j) -> bool:
+        """Reverse customers i..j-1 of route r if it improves and stays feasible."""
+        route = routes[r]
+        new_route = route[:i] + route[i:j][::-1] + route[j:]
+        if self._distance(new_route) >= self._distance(route) - EPSILON:
+            return False
+        if self._arrivals(new_route) is None:
+            return False
+        routes[r] = new_route
+        return True
+    
+    def _eliminate_route(self, routes: List[List[int]], vehicles: List[int]) -> bool:
+        """Try to empty a route, shortest first, by inserting its customers elsewhere."""
+        if len(routes) < 2:
+            return False
+        
+        for r in sorted(range(len(routes)), key=lambda idx: len(routes[idx])):
+            if self._try_eliminate(routes, vehicles, r):
+                return True
+        return False
+    
+    def _try_eliminate(self, routes: List[List[int]], vehicles: List[int], r: int) -> bool:
+        """Empty route r by cheapest insertion of its customers, if that pays off."""
+        trial = [list(route) for route in routes]
+        removed = trial[r]
+        trial[r] = []
+        added = 0.0
+        
+        for customer in removed:
+            best = None
+            for idx, route in enumerate(trial):
+                if idx == r:
+                    continue
+                load = sum(self._q[i] for i in route)
+                found = self._best_insertion(route, load, vehicles[idx], np.asarray([customer]))
+                if found is not None and (best is None or found[0] < best[0]):
+                    best = (found[0], idx, found[2])
+            if best is None:
+                return False
+            trial[best[1]].insert(best[2], customer)
+            added += best[0]
+        
+        saved = self.vehicle_penalty_weight + self.distance_weight * self._distance(removed)
+        if self.distance_weight * added >= saved - EPSILON:
+            return False
+        
+        del trial[r]
+        routes[:] = trial
+        del vehicles[r]
+        return True
+    
+    @staticmethod
+    def _apply_first(delta: np.ndarray, valid: np.ndarray, attempt) -> bool:
+        """Try candidate moves from best to worst delta until one applies."""
+        rows, cols = np.nonzero(valid)
+        if len(rows) == 0:
+            return False
+        order = np.argsort(delta[rows, cols], kind='stable')
+        for k in order:
+            if attempt(int(rows[k]), int(cols[k])):
+                return True
+        return False
+    
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    
+    def _to_solution(self, routes: List[List[int]], vehicles: List[int], objective: float) -> Dict:
+        """Build the OR-Tools style solution dictionary."""
+        entries = self._route_entries(routes, vehicles)
+        return self._build_solution_summary(
+            entries, len(entries),
+            sum(r['distance'] for r in entries),
+            sum(r['load'] for r in entries),
+            round(objective, 2)
+        )
+    
+    def _route_entries(self, routes: List[List[int]], vehicles: List[int]) -> List[Dict]:
+        """OR-Tools style route dictionaries, ordered by vehicle."""
+        distance_matrix = self.problem_data['distance_matrix']
+        depot = self.depot
+        entries = []
+        
+        for route, vehicle in sorted(zip(routes, vehicles), key=lambda item: item[1]):
+            path = [depot] + route + [depot]
+            arrivals = self._arrivals(route)
+            stops = [(node, t / 100.0) for node, t in zip(path, arrivals)]
+            segment_distances = [
+                int(distance_matrix[a][b] * 100) for a, b in zip(path[:-1], path[1:])
+            ]
+            entry = self._build_route_entry(vehicle, stops, segment_distances)
+            if entry is not None:
+                entries.append(entry)
+        
+        return entries
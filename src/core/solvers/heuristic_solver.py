@@ -0,0 +1,44 @@
+"""Construction heuristic solver wrapper implementing BaseSolver interface."""
+
+from typing import List, Optional
+
+from .base import BaseSolver
+from .heuristic_impl import HeuristicSolverImpl
+
+
+class HeuristicSolver(BaseSolver):
+    """Fast construction heuristics with local search (pure Python/NumPy)."""
+    
+    def __init__(self, data: dict):
+        """Initialize heuristic solver with problem data."""
+        self._solver = HeuristicSolverImpl(data)
+        self.data = data
+    
+    def _validate_data(self) -> None:
+        """Validation is done in the implementation."""
+        pass
+    
+    def _prepare_data(self) -> None:
+        """Preparation is done in the implementation."""
+        pass
+    
+    def solve(self, 
+              time_limit_seconds: int = 60, 
+              log_search: bool = False,
+              vehicle_penalty_weight: float = 1000.0,
+              distance_weight: float = 1.0,
+              constructions: Optional[List[str]] = None,
+              **kwargs):
+        """Solve using construction heuristics and local search."""
+        return self._solver.solve(
+            time_limit_seconds=time_limit_seconds,
+            log_search=log_search,
+            vehicle_penalty_weight=vehicle_penalty_weight,
+            distance_weight=distance_weight,
+            constructions=constructions
+        )
+    
+    @property
+    def solver_name(self) -> str:
+        """Return solver name."""
+        return "Construction Heuristics"
@@ -0,0 +1,823 @@
+"""
+Hybrid Genetic Search CVRPTW Solver Implementation
+
+HGS-style metaheuristic: giant-tour chromosomes decoded by split, OX
+crossover, education by penalized local search over granular
+neighbourhoods (capacity excess and time warp are penalized, with
+adaptive penalty weights), and survivor selection on a biased fitness
+mixing cost and broken-pairs diversity. Offspring education runs in a
+process pool so that all cores are used.
+"""
+
+import os
+import time
+import random
+import logging
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .base import UNSERVED_PENALTY
+from .heuristic_impl import HeuristicSolverImpl
+from ...utils.tracing import trace_add
+from ...utils.events import emit, current_channel, stop_requested
+from ...utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Share of feasible offspring the penalty adaptation aims for
+TARGET_FEASIBLE = 0.2
+
+# Number of closest individuals used to measure diversity
+DIVERSITY_NEIGHBOURS = 5
+
+# Number of elite individuals protected by the biased fitness
+ELITE_COUNT = 4
+
+# Longest wait for an education result before checking deadline and stop again
+STOP_POLL_SECONDS = 0.1
+
+# Time kept from the limit for the last poll, pool shutdown and the solution build
+RESULT_RESERVE_SECONDS = 0.25
+
+EPSILON = 1e-9
+
+
+class HGSSolverImpl(HeuristicSolverImpl):
+    """
+    Hybrid genetic search over giant tours.
+    
+    Individuals keep one (possibly empty) route per vehicle, so the
+    heterogeneous fleet is handled by the local search itself: moving a
+    route's customers into an empty route changes vehicle.
+    """
+    
+    def solve(
+        self,
+        time_limit_seconds: int = 60,
+        log_search: bool = False,
+        vehicle_penalty_weight: float = 1000.0,
+        distance_weight: float = 1.0,
+        workers: Optional[int] = None,
+        population_size: int = 25,
+        generation_size: int = 40,
+        granularity: int = 20,
+        seed: int = 0,
+        **kwargs
+    ) -> Optional[Dict]:
+        """
+        Solve CVRPTW problem with hybrid genetic search.
+        
+        Args:
+            time_limit_seconds: Maximum time for the whole engine, pool startup included
+            log_search: Whether to log progress of every generation batch
+            vehicle_penalty_weight: Weight for minimizing number of vehicles
+            distance_weight: Weight for distance minimization
+            workers: Processes used for education (None or 0 = all cores)
+            population_size: Minimum size of each subpopulation (mu)
+            generation_size: Offspring added before survivor selection (lambda)
+            granularity: Neighbours considered per customer in local search
+            seed: Random seed
+            **kwargs: Additional parameters (ignored)
+        
+        Returns:
+            Solution dictionary or None if no solution found
+        """
+        # The clock starts before the pool spawns; the search ends early enough
+        # to shut the pool down and build the solution within the limit
+        start_time = time.time()
+        deadline = start_time + time_limit_seconds - RESULT_RESERVE_SECONDS
+        self._configure(vehicle_penalty_weight, distance_weight, granularity)
+        rng = random.Random(seed)
+        workers = workers or os.cpu_count() or 1
+        
+        logger.info(
+            f"Starting HGS solver: locations={len(self.q)}, vehicles={len(self.capacities)}, "
+            f"workers={workers}, time limit={time_limit_seconds}s"
+        )
+        
+        executor = None
+        if workers > 1 and self.servable:
+            # Spawned (not forked) workers: the API runs solvers in threads.
+            # They start now, so their startup overlaps the constructions and
+            # counts against the time limit like everything else.
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.problem_data, vehicle_penalty_weight, distance_weight, granularity)
+            )
+            for _ in range(workers):
+                executor.submit(_worker_ready)
+        
+        try:
+            # Best plan from the constructions: always a valid fallback
+            baseline = super().solve(
+                time_limit_seconds=max(1, time_limit_seconds // 10),
+                vehicle_penalty_weight=vehicle_penalty_weight,
+                distance_weight=distance_weight
+            )
+            if baseline is None:
+                return None
+            
+            if not self.servable:
+                baseline['solver'] = 'hgs'
+                return baseline
+            
+            best_objective = baseline['objective_value']
+            best_routes = None
+            
+            penalties = self._initial_penalties()
+            population = _Population(population_size, generation_size)
+            
+            # Initial population: constructions plus random giant tours
+            initial = [
+                self._giant_tour(routes) for routes in self._construction_routes()
+            ]
+            while len(initial) < 2 * population_size:
+                tour = list(self.servable)
+                rng.shuffle(tour)
+                initial.append(tour)
+            
+            search_start = time.time()
+            iterations = 0
+            batch_size = max(1, workers) * 2
+            last_report = start_time
+            feasible_history: List[Tuple[bool, bool]] = []
+            
+            pending = initial
+            channel = current_channel()
+            while time.time() < deadline and not stop_requested():
+                tasks = [(tour, penalties, rng.randrange(1 << 30)) for tour in pending]
+                results = self._educate_batch(tasks, executor, deadline)
+                
+                for individual, capacity_ok, time_ok in results:
+                    feasible_history.append((capacity_ok, time_ok))
+                    population.add(individual)
+                    if individual.feasible and individual.cost < best_objective - EPSILON:
+                        best_objective = individual.cost
+                        best_routes = individual.routes
+                        metrics.INCUMBENTS.inc(engine='hgs')
+                        if channel is not None:
+                            self._emit_incumbent(individual, start_time, channel.incumbent_routes)
+                iterations += len(results)
+                
+                # Adapt penalties towards the target share of feasible offspring
+                if len(feasible_history) >= 50:
+                    penalties = self._adapt_penalties(penalties, feasible_history)
+                    feasible_history = []
+                    population.reevaluate(lambda ind: self._evaluate_routes(ind.routes, penalties))
+                
+                now = time.time()
+                if log_search or now - last_report >= 5.0:
+                    last_report = now
+                    logger.info(
+                        f"[{now - start_time:.0f}s] HGS: {iterations} individuals, "
+                        f"best objective {best_objective:.2f}, "
+                        f"population {len(population.feasible)}+{len(population.infeasible)}, "
+                        f"penalties capacity={penalties[0]:.1f} time={penalties[1]:.1f}"
+                    )
+                
+                # Next batch of offspring by crossover
+                population.update_fitness()
+                pending = []
+                for _ in range(batch_size):
+                    parent_a = population.select(rng)
+                    parent_b = population.select(rng)
+                    if parent_a is None or parent_b is None:
+                        tour = list(self.servable)
+                        rng.shuffle(tour)
+                    else:
+                        tour = self._crossover(parent_a.tour, parent_b.tour, rng)
+                    pending.append(tour)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        trace_add(
+            'genetic_search', time.time() - search_start, workers=workers,
+            individuals=iterations, objective=round(best_objective, 2),
+            improved=best_routes is not None
+        )
+        
+        logger.info(
+            f"HGS finished in {time.time() - start_time:.1f}s after {iterations} individuals: "
+            f"objective {best_objective:.2f}"
+        )
+        
+        if best_routes is None:
+            baseline['solver'] = 'hgs'
+            return baseline
+        
+        routes = [r for r in best_routes if r]
+        vehicles = [k for k, r in enumerate(best_routes) if r]
+        solution = self._to_solution(routes, vehicles, best_objective)
+        solution['solver'] = 'hgs'
+        solution['individuals_evaluated'] = iterations
+        return solution
+    
+    def _emit_incumbent(self, individual: "_Individual", start_time: float, with_routes: bool) -> None:
+        """Publish a new best individual to the request's event stream."""
+        used = [(k, route) for k, route in enumerate(individual.routes) if route]
+        event = {
+            'engine': 'hgs',
+            'objective': round(individual.cost, 2),
+            'vehicles_used': len(used),
+            'distance': round(sum(self._distance(route) for _, route in used), 2),
+            'dropped': len(self.customers) - len(individual.tour),
+            'elapsed_seconds': round(time.time() - start_time, 3)
+        }
+        if with_routes:
+            event['routes'] = [{'vehicle': k, 'nodes': list(route)} for k, route in used]
+        emit('incumbent', **event)
+    
+    def _educate_batch(
+        self,
+        tasks: List[Tuple[List[int], Tuple[float, float], int]],
+        executor: Optional[ProcessPoolExecutor],
+        deadline: float
+    ) -> List[Tuple["_Individual", bool, bool]]:
+        """
+        Educate offspring, each as its own task, until the deadline or a stop.
+        
+        Educations still queued when the deadline passes or a stop is
+        requested are cancelled and left out of the result.
+        
+        Args:
+            tasks: (giant tour, penalties, seed) of each offspring
+            executor: Worker pool, or None to educate in this process
+            deadline: End of the search (time.time() value)
+        
+        Returns:
+            (individual, capacity feasible, time feasible) of finished educations
+        """
+        results = []
+        if executor is None:
+            for task in tasks:
+                if time.time() >= deadline or stop_requested():
+                    break
+                results.append(self._educate(*task))
+            return results
+        
+        pending = {executor.submit(_educate_task, task) for task in tasks}
+        try:
+            while pending:
+                remaining = deadline - time.time()
+                if remaining <= 0 or stop_requested():
+                    break
+                done, pending = wait(
+                    pending, timeout=min(remaining, STOP_POLL_SECONDS), return_when=FIRST_COMPLETED
+                )
+                results.extend(future.result() for future in done)
+        finally:
+            for future in pending:
+                future.cancel()
+        return results
+    
+    def _configure(self, vehicle_penalty_weight: float, distance_weight: float, granularity: int) -> None:
+        """Set objective weights, servable customers and granular neighbour lists."""
+        self.vehicle_penalty_weight = vehicle_penalty_weight
+        self.distance_weight = distance_weight
+        
+        # Customers that no vehicle can serve alone are left out (dropped)
+        self.servable = [
+            i for i in self.customers
+            if any(self._feasible([i], k) for k in range(len(self.capacities)))
+        ]
+        
+        # Granular neighbourhoods: closest customers in distance, with a
+        # penalty for incompatible time windows
+        servable = np.asarray(self.servable, dtype=int)
+        self.neighbours: Dict[int, List[int]] = {}
+        if len(servable) > 1:
+            D = self.D[np.ix_(servable, servable)]
+            wait = np.maximum(
+                0.0, self.e[servable][None, :] - self.T[np.ix_(servable, servable)] - self.l[servable][:, None]
+            )
+            late = np.maximum(
+                0.0, self.e[servable][:, None] + self.T[np.ix_(servable, servable)] - self.l[servable][None, :]
+            )
+            correlation = D + (wait + 10.0 * late) / 100.0
+            np.fill_diagonal(correlation, np.inf)
+            order = np.argsort(correlation, axis=1)[:, :min(granularity, len(servable) - 1)]
+            for row, i in enumerate(self.servable):
+                self.neighbours[i] = servable[order[row]].tolist()
+    
+    def _initial_penalties(self) -> Tuple[float, float]:
+        """Initial penalty per unit of capacity excess and per minute of time warp."""
+        max_distance = float(self.D.max()) if self.D.size else 1.0
+        max_demand = max(self._q) if self._q else 1.0
+        scale = self.distance_weight * max_distance + self.vehicle_penalty_weight / 10.0
+        return (
+            max(1.0, scale / max(1.0, max_demand)),
+            max(1.0, scale / 60.0)
+        )
+    
+    @staticmethod
+    def _adapt_penalties(
+        penalties: Tuple[float, float],
+        history: List[Tuple[bool, bool]]
+    ) -> Tuple[float, float]:
+        """Raise penalties if too few offspring are feasible, lower them otherwise."""
+        adapted = []
+        for penalty, share in zip(
+            penalties,
+            (
+                sum(1 for c, _ in history if c) / len(history),
+                sum(1 for _, t in history if t) / len(history),
+            )
+        ):
+            if share < TARGET_FEASIBLE - 0.05:
+                penalty = min(1e6, penalty * 1.2)
+            elif share > TARGET_FEASIBLE + 0.05:
+                penalty = max(0.1, penalty * 0.85)
+            adapted.append(penalty)
+        return tuple(adapted)
+    
+    def _construction_routes(self) -> List[List[List[int]]]:
+        """Routes of each construction heuristic, without unservable customers."""
+        servable = set(self.servable)
+        solutions = []
+        for build in (self._construct_savings, self._construct_sweep, self._construct_insertion):
+            routes, vehicles = build()
+            routes, _ = self._insert_unrouted(routes, vehicles)
+            solutions.append([[i for i in r if i in servable] for r in routes])
+        return solutions
+    
+    @staticmethod
+    def _giant_tour(routes: List[List[int]]) -> List[int]:
+        """Concatenate routes into a giant tour."""
+        return [i for route in routes for i in route]
+    
+    # ------------------------------------------------------------------
+    # Penalized evaluation
+    # ------------------------------------------------------------------
+    
+    def _route_cost(self, route: List[int], vehicle: int, penalties: Tuple[float, float]) -> Tuple[float, float, float]:
+        """
+        Penalized cost of a route with its capacity excess and time warp.
+        
+        Time warp follows Vidal et al.: arriving after a window closes
+        "travels back in time" to the closing time and pays the difference.
+        """
+        if not route:
+            return 0.0, 0.0, 0.0
+        T, e, l, q = self._T, self._e, self._l, self._q
+        D = self._D
+        depot = self.depot
+        current = e[depot]
+        warp = 0.0
+        load = 0.0
+        distance = 0.0
+        prev = depot
+        for node in route:
+            distance += D[prev][node]
+            current += T[prev][node]
+            if current < e[node]:
+                current = e[node]
+            elif current > l[node]:
+                warp += current - l[node]
+                current = l[node]
+            load += q[node]
+            prev = node
+        distance += D[prev][depot]
+        current += T[prev][depot]
+        if current > self.horizon:
+            warp += current - self.horizon
+        excess = max(0.0, load - self.capacities[vehicle])
+        warp /= 100.0
+        cost = (
+            self.vehicle_penalty_weight + self.distance_weight * distance
+            + penalties[0] * excess + penalties[1] * warp
+        )
+        return cost, excess, warp
+    
+    def _evaluate_routes(self, routes: List[List[int]], penalties: Tuple[float, float]) -> float:
+        """Penalized cost of a whole individual."""
+        return sum(self._route_cost(r, k, penalties)[0] for k, r in enumerate(routes))
+    
+    # ------------------------------------------------------------------
+    # Split and crossover
+    # ------------------------------------------------------------------
+    
+    def _split(self, tour: List[int], penalties: Tuple[float, float]) -> List[List[int]]:
+        """
+        Optimal split of a giant tour into routes (Bellman on the tour DAG),
+        then assignment of routes to vehicles, largest load to largest vehicle.
+        """
+        T, e, l, q, D = self._T, self._e, self._l, self._q, self._D
+        depot = self.depot
+        n = len(tour)
+        max_capacity = max(self.capacities)
+        potential = [0.0] + [float('inf')] * n
+        predecessor = [0] * (n + 1)
+        
+        for i in range(n):
+            if potential[i] == float('inf'):
+                continue
+            load = 0.0
+            distance = 0.0
+            current = e[depot]
+            warp = 0.0
+            prev = depot
+            for j in range(i, n):
+                node = tour[j]
+                load += q[node]
+                if load > 1.5 * max_capacity and j > i:
+                    break
+                distance += D[prev][node]
+                current += T[prev][node]
+                if current < e[node]:
+                    current = e[node]
+                elif current > l[node]:
+                    warp += current - l[node]
+                    current = l[node]
+                prev = node
+                
+                back = current + T[node][depot]
+                total_warp = warp + max(0.0, back - self.horizon)
+                cost = (
+                    potential[i] + self.vehicle_penalty_weight
+                    + self.distance_weight * (distance + D[node][depot])
+                    + penalties[0] * max(0.0, load - max_capacity)
+                    + penalties[1] * total_warp / 100.0
+                )
+                if cost < potential[j + 1]:
+                    potential[j + 1] = cost
+                    predecessor[j + 1] = i
+        
+        routes = []
+        j = n
+        while j > 0:
+            i = predecessor[j]
+            routes.append(tour[i:j])
+            j = i
+        routes.reverse()
+        
+        # Largest loads to largest vehicles; extra routes join the emptiest vehicle
+        vehicles = self._vehicles_by_capacity()
+        routes.sort(key=lambda r: -sum(q[i] for i in r))
+        assigned = [[] for _ in self.capacities]
+        for idx, route in enumerate(routes):
+            if idx < len(vehicles):
+                assigned[vehicles[idx]] = route
+            else:
+                k = max(
+                    range(len(assigned)),
+                    key=lambda v: self.capacities[v] - sum(q[i] for i in assigned[v])
+                )
+                assigned[k] = assigned[k] + route
+        return assigned
+    
+    @staticmethod
+    def _crossover(parent_a: List[int], parent_b: List[int], rng: random.Random) -> List[int]:
+        """Ordered crossover (OX) of two giant tours."""
+        n = len(parent_a)
+        if n < 2:
+            return list(parent_a)
+        start, end = sorted(rng.sample(range(n), 2))
+        child = [None] * n
+        child[start:end + 1] = parent_a[start:end + 1]
+        taken = set(child[start:end + 1])
+        fill = [i for i in parent_b[end + 1:] + parent_b[:end + 1] if i not in taken]
+        positions = list(range(end + 1, n)) + list(range(0, start))
+        for position, node in zip(positions, fill):
+            child[position] = node
+        return child
+    
+    # ------------------------------------------------------------------
+    # Education (penalized local search over granular neighbourhoods)
+    # ------------------------------------------------------------------
+    
+    def _educate(self, tour: List[int], penalties: Tuple[float, float], seed: int):
+        """
+        Decode and improve one giant tour; repair infeasible results once
+        with ten times higher penalties.
+        
+        Returns:
+            (individual, capacity feasible, time feasible) before repair
+        """
+        rng = random.Random(seed)
+        routes = self._split(tour, penalties)
+        routes = self._penalized_local_search(routes, penalties, rng)
+        capacity_ok, time_ok = self._feasibility(routes)
+        
+        if not (capacity_ok and time_ok) and rng.random() < 0.5:
+            repaired = self._penalized_local_search(
+                [list(r) for r in routes], (penalties[0] * 10, penalties[1] * 10), rng
+            )
+            if all(self._feasibility(repaired)):
+                routes = repaired
+        
+        return _Individual(self, routes, penalties), capacity_ok, time_ok
+    
+    def _feasibility(self, routes: List[List[int]]) -> Tuple[bool, bool]:
+        """Whether routes respect capacities and whether they respect time windows."""
+        zero = (0.0, 0.0)
+        capacity_ok = True
+        time_ok = True
+        for k, route in enumerate(routes):
+            _, excess, warp = self._route_cost(route, k, zero)
+            capacity_ok = capacity_ok and excess <= EPSILON
+            time_ok = time_ok and warp <= EPSILON
+        return capacity_ok, time_ok
+    
+    def _penalized_local_search(
+        self,
+        routes: List[List[int]],
+        penalties: Tuple[float, float],
+        rng: random.Random
+    ) -> List[List[int]]:
+        """
+        First-improvement local search on the penalized cost.
+        
+        For each customer u and each granular neighbour v: relocate u after
+        v, swap u and v, 2-opt* between the routes of u and v, and 2-opt
+        within a route. Customers may also move into an empty vehicle.
+        """
+        routes = [list(r) for r in routes]
+        costs = [self._route_cost(r, k, penalties)[0] for k, r in enumerate(routes)]
+        where = {}
+        
+        def index_route(k):
+            for position, node in enumerate(routes[k]):
+                where[node] = (k, position)
+        
+        for k in range(len(routes)):
+            index_route(k)
+        
+        def evaluate(route, k):
+            cost, excess, warp = self._route_cost(route, k, penalties)
+            return cost, penalties[0] * excess + penalties[1] * warp
+        
+        penalty = [evaluate(r, k)[1] for k, r in enumerate(routes)]
+        
+        # Move clock: a (u, v) pair is only re-tested if one of the two
+        # routes changed since u was last examined
+        clock = [0]
+        modified = [0] * len(routes)
+        tested = {}
+        
+        def try_routes(changes, lower_bound=None) -> bool:
+            """
+            Apply {vehicle: new route} if it lowers the penalized cost.
+            
+            lower_bound is an O(1) bound on the cost change (distance and
+            vehicle delta minus the current penalties); moves that cannot
+            improve are rejected without evaluating the routes.
+            """
+            if lower_bound is not None and lower_bound >= -EPSILON:
+                return False
+            evaluated = {k: evaluate(r, k) for k, r in changes.items()}
+            if sum(c for c, _ in evaluated.values()) < sum(costs[k] for k in changes) - EPSILON:
+                clock[0] += 1
+                for k, r in changes.items():
+                    routes[k] = r
+                    costs[k], penalty[k] = evaluated[k]
+                    modified[k] = clock[0]
+                    index_route(k)
+                return True
+            return False
+        
+        D = self._D
+        depot = self.depot
+        dw = self.distance_weight
+        vpw = self.vehicle_penalty_weight
+        
+        customers = list(where)
+        improved = True
+        while improved:
+            improved = False
+            rng.shuffle(customers)
+            for u in customers:
+                last_tested = tested.get(u, -1)
+                tested[u] = clock[0]
+                for v in self.neighbours.get(u, []):
+                    ku, pu = where[u]
+                    kv, pv = where[v]
+                    if max(modified[ku], modified[kv]) <= last_tested:
+                        continue
+                    ru, rv = routes[ku], routes[kv]
+                    u_prev = ru[pu - 1] if pu > 0 else depot
+                    u_next = ru[pu + 1] if pu + 1 < len(ru) else depot
+                    v_prev = rv[pv - 1] if pv > 0 else depot
+                    v_next = rv[pv + 1] if pv + 1 < len(rv) else depot
+                    
+                    if ku != kv:
+                        current_penalty = penalty[ku] + penalty[kv]
+                        
+                        # Relocate u after v
+                        delta = (
+                            D[u_prev][u_next] - D[u_prev][u] - D[u][u_next]
+                            + D[v][u] + D[u][v_next] - D[v][v_next]
+                        )
+                        emptied = -vpw if len(ru) == 1 else 0.0
+                        if try_routes({
+                            ku: ru[:pu] + ru[pu + 1:],
+                            kv: rv[:pv + 1] + [u] + rv[pv + 1:],
+                        }, dw * delta + emptied - current_penalty):
+                            improved = True
+                            continue
+                        
+                        # Swap u and v
+                        delta = (
+                            D[u_prev][v] + D[v][u_next] - D[u_prev][u] - D[u][u_next]
+                            + D[v_prev][u] + D[u][v_next] - D[v_prev][v] - D[v][v_next]
+                        )
+                        if try_routes({
+                            ku: ru[:pu] + [v] + ru[pu + 1:],
+                            kv: rv[:pv] + [u] + rv[pv + 1:],
+                        }, dw * delta - current_penalty):
+                            improved = True
+                            continue
+                        
+                        # 2-opt*: exchange tails after u and after v
+                        delta = D[u][v_next] + D[v][u_next] - D[u][u_next] - D[v][v_next]
+                        if try_routes({
+                            ku: ru[:pu + 1] + rv[pv + 1:],
+                            kv: rv[:pv + 1] + ru[pu + 1:],
+                        }, dw * delta - current_penalty):
+                            improved = True
+                            continue
+                    else:
+                        # Relocate u after v within the route
+                        if v_next != u:
+                            delta = (
+                                D[u_prev][u_next] - D[u_prev][u] - D[u][u_next]
+                                + D[v][u] + D[u][v_next] - D[v][v_next]
+                            )
+                            moved = [node for node in ru if node != u]
+                            target = moved.index(v) + 1
+                            if try_routes(
+                                {ku: moved[:target] + [u] + moved[target:]},
+                                dw * delta - penalty[ku]
+                            ):
+                                improved = True
+                                continue
+                        
+                        # 2-opt: reverse the section between u and v
+                        a, b = sorted((pu, pv))
+                        if try_routes({ku: ru[:a] + ru[a:b + 1][::-1] + ru[b + 1:]}):
+                            improved = True
+                            continue
+                
+                # Move u into an empty vehicle (largest first)
+                ku, pu = where[u]
+                empty = [k for k in self._vehicles_by_capacity() if not routes[k] and k != ku]
+                if empty and len(routes[ku]) > 1:
+                    ru = routes[ku]
+                    if try_routes({ku: ru[:pu] + ru[pu + 1:], empty[0]: [u]}):
+                        improved = True
+            
+            # Hand whole routes to a better-fitting empty vehicle
+            for k in range(len(routes)):
+                if not routes[k] or penalty[k] <= EPSILON:
+                    continue
+                for other in range(len(routes)):
+                    if routes[other] or other == k:
+                        continue
+                    if try_routes({k: [], other: routes[k]}):
+                        improved = True
+                        break
+        
+        return routes
+
+
+class _Individual:
+    """Educated solution: routes per vehicle, giant tour and costs."""
+    
+    def __init__(self, solver: HGSSolverImpl, routes: List[List[int]], penalties: Tuple[float, float]):
+        self.routes = routes
+        self.tour = HGSSolverImpl._giant_tour(routes)
+        self.penalized_cost = solver._evaluate_routes(routes, penalties)
+        self.feasible = all(solver._feasibility(routes))
+        self.cost = (
+            solver.vehicle_penalty_weight * sum(1 for r in routes if r)
+            + solver.distance_weight * sum(solver._distance(r) for r in routes)
+            + UNSERVED_PENALTY * (len(solver.customers) - len(self.tour))
+        )
+        
+        # Successor/predecessor maps for the broken-pairs distance
+        self.successor = {}
+        self.predecessor = {}
+        for route in routes:
+            path = [solver.depot] + route + [solver.depot]
+            for a, b in zip(path[:-1], path[1:]):
+                if a != solver.depot:
+                    self.successor[a] = b
+                if b != solver.depot:
+                    self.predecessor[b] = a
+        self.fitness = 0.0
+    
+    def distance_to(self, other: "_Individual") -> float:
+        """Broken-pairs distance: share of customers whose neighbours differ."""
+        if not self.successor:
+            return 0.0
+        broken = sum(
+            1 for node, succ in self.successor.items()
+            if other.successor.get(node) != succ and other.predecessor.get(node) != succ
+        )
+        return broken / len(self.successor)
+    
+    def same_as(self, other: "_Individual") -> bool:
+        """Whether both individuals contain the same routes."""
+        return self.successor == other.successor and self.predecessor == other.predecessor
+
+
+class _Population:
+    """Feasible and infeasible subpopulations with biased-fitness survivor selection."""
+    
+    def __init__(self, size: int, generation_size: int):
+        self.size = size
+        self.generation_size = generation_size
+        self.feasible: List[_Individual] = []
+        self.infeasible: List[_Individual] = []
+    
+    def __len__(self) -> int:
+        return len(self.feasible) + len(self.infeasible)
+    
+    def add(self, individual: _Individual) -> None:
+        """Insert an individual; select survivors when a subpopulation is full."""
+        group = self.feasible if individual.feasible else self.infeasible
+        group.append(individual)
+        if len(group) > self.size + self.generation_size:
+            self._select_survivors(group)
+    
+    def reevaluate(self, penalized_cost) -> None:
+        """Recompute penalized costs after a penalty change."""
+        for individual in self.infeasible:
+            individual.penalized_cost = penalized_cost(individual)
+    
+    def select(self, rng: random.Random) -> Optional[_Individual]:
+        """Binary tournament on biased fitness (see update_fitness) over both subpopulations."""
+        candidates = self.feasible + self.infeasible
+        if not candidates:
+            return None
+        a, b = rng.choice(candidates), rng.choice(candidates)
+        return a if a.fitness <= b.fitness else b
+    
+    def update_fitness(self) -> None:
+        """Refresh the biased fitness of both subpopulations."""
+        self._update_fitness(self.feasible)
+        self._update_fitness(self.infeasible)
+    
+    def _update_fitness(self, group: List[_Individual]) -> None:
+        """Biased fitness: cost rank plus weighted diversity rank."""
+        if not group:
+            return
+        if len(group) == 1:
+            group[0].fitness = 0.0
+            return
+        diversity = []
+        for individual in group:
+            distances = sorted(individual.distance_to(other) for other in group if other is not individual)
+            closest = distances[:DIVERSITY_NEIGHBOURS]
+            diversity.append(sum(closest) / len(closest))
+        
+        by_cost = sorted(range(len(group)), key=lambda idx: group[idx].penalized_cost)
+        by_diversity = sorted(range(len(group)), key=lambda idx: -diversity[idx])
+        cost_rank = {idx: rank for rank, idx in enumerate(by_cost)}
+        diversity_rank = {idx: rank for rank, idx in enumerate(by_diversity)}
+        weight = 1.0 - ELITE_COUNT / len(group)
+        scale = len(group) - 1
+        for idx, individual in enumerate(group):
+            individual.fitness = (cost_rank[idx] + weight * diversity_rank[idx]) / scale
+    
+    def _select_survivors(self, group: List[_Individual]) -> None:
+        """Remove clones first, then the worst biased fitness, down to the minimum size."""
+        while len(group) > self.size:
+            clone = next(
+                (
+                    idx for idx, individual in enumerate(group)
+                    if any(individual.same_as(other) for other in group[idx + 1:])
+                ),
+                None
+            )
+            if clone is not None:
+                group.pop(clone)
+                continue
+            self._update_fitness(group)
+            group.remove(max(group, key=lambda individual: individual.fitness))
+
+
+# Worker-side solver, built once per process by the pool initializer
+_WORKER: Optional[HGSSolverImpl] = None
+
+
+def _init_worker(problem_data: Dict, vehicle_penalty_weight: float, distance_weight: float, granularity: int) -> None:
+    """Build the worker's solver and neighbour lists once per process."""
+    global _WORKER
+    _WORKER = HGSSolverImpl(problem_data)
+    _WORKER._configure(vehicle_penalty_weight, distance_weight, granularity)
+
+
+def _worker_ready() -> None:
+    """No-op task submitted once per worker so that all processes spawn right away."""
+
+
+def _educate_task(task):
+    """Educate one giant tour in a worker process."""
+    tour, penalties, seed = task
+    return _WORKER._educate(tour, penalties, seed)
@@ -0,0 +1,44 @@
+"""Hybrid genetic search solver wrapper implementing BaseSolver interface."""
+
+from typing import Optional
+
+from .base import BaseSolver
+from .hgs_impl import HGSSolverImpl
+
+
+class HGSSolver(BaseSolver):
+    """Hybrid genetic search (HGS) solver with parallel offspring education."""
+    
+    def __init__(self, data: dict):
+        """Initialize HGS solver with problem data."""
+        self._solver = HGSSolverImpl(data)
+        self.data = data
+    
+    def _validate_data(self) -> None:
+        """Validation is done in the implementation."""
+        pass
+    
+    def _prepare_data(self) -> None:
+        """Preparation is done in the implementation."""
+        pass
+    
+    def solve(self, 
+              time_limit_seconds: int = 60, 
+              log_search: bool = False,
+              vehicle_penalty_weight: float = 1000.0,
+              distance_weight: float = 1.0,
+              workers: Optional[int] = None,
+              **kwargs):
+        """Solve using hybrid genetic search."""
+        return self._solver.solve(
+            time_limit_seconds=time_limit_seconds,
+            log_search=log_search,
+            vehicle_penalty_weight=vehicle_penalty_weight,
+            distance_weight=distance_weight,
+            workers=workers
+        )
+    
+    @property
+    def solver_name(self) -> str:
+        """Return solver name."""
+        return "Hybrid Genetic Search"
@@ -0,0 +1,141 @@
+"""
+Hybrid CVRPTW Solver Implementation
+
+Runs OR-Tools for a short budget and hands its routes to Gurobi as a
+MIP start and objective cutoff, so that Gurobi spends its time closing
+the gap instead of searching for a first incumbent.
+"""
+
+import time
+import logging
+from typing import Dict, List, Optional
+
+from .base import GurobiFormulation
+from .ortools_impl import ORToolsSolverImpl
+from .gurobi_impl import GurobiSolverImpl
+from ...utils.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+# OR-Tools scales distances by 100, so vehicle penalties are scaled accordingly
+ORTOOLS_COST_SCALE = 100.0
+
+# Shortest gap-closing stage worth running (the Gurobi engine searches at least 1s)
+MIN_GAP_CLOSING_SECONDS = 1.0
+
+
+class HybridSolverImpl:
+    """OR-Tools warm start followed by Gurobi gap closing."""
+    
+    def __init__(self, problem_data: Dict):
+        """
+        Initialize hybrid solver with problem data.
+        
+        Args:
+            problem_data: Dictionary containing problem definition
+        """
+        self.problem_data = problem_data
+        self._ortools = ORToolsSolverImpl(problem_data)
+        self._gurobi = GurobiSolverImpl(problem_data)
+    
+    def solve(
+        self,
+        time_limit_seconds: int = 60,
+        log_search: bool = False,
+        vehicle_penalty_weight: float = 1000.0,
+        distance_weight: float = 1.0,
+        mip_gap: float = 0.01,
+        formulation: str = GurobiFormulation.THREE_INDEX,
+        warm_start_fraction: float = 0.2
+    ) -> Optional[Dict]:
+        """
+        Solve CVRPTW problem with an OR-Tools warm start and Gurobi.
+        
+        Args:
+            time_limit_seconds: Total time for both stages, model builds included
+            log_search: Whether to log search progress
+            vehicle_penalty_weight: Weight for minimizing number of vehicles (Gurobi units)
+            distance_weight: Weight for distance minimization
+            mip_gap: Relative MIP optimality gap
+            formulation: Gurobi formulation ('three_index' or 'two_index')
+            warm_start_fraction: Share of the time limit given to OR-Tools
+        
+        Returns:
+            Solution dictionary or None if no solution found
+        """
+        start_time = time.time()
+        deadline = start_time + time_limit_seconds
+        ortools_budget = max(1, int(round(time_limit_seconds * warm_start_fraction)))
+        
+        logger.info(f"Hybrid stage 1: OR-Tools warm start ({ortools_budget}s)")
+        with trace_span('warm_start'):
+            warm_solution = self._ortools.solve(
+                time_limit_seconds=ortools_budget,
+                log_search=log_search,
+                vehicle_penalty_weight=vehicle_penalty_weight * ORTOOLS_COST_SCALE,
+                distance_weight=distance_weight
+            )
+        
+        initial_routes = None
+        cutoff = None
+        if warm_solution and warm_solution.get('status') == 'success':
+            initial_routes = self._routes_from_solution(warm_solution)
+            warm_objective = self._gurobi.routes_objective(
+                initial_routes, vehicle_penalty_weight, distance_weight
+            )
+            # Keep the warm start itself acceptable under the cutoff
+            cutoff = warm_objective + max(1e-6, abs(warm_objective) * 1e-9)
+            logger.info(f"OR-Tools incumbent: objective {warm_objective:.2f} (Gurobi units)")
+        else:
+            logger.warning("OR-Tools found no warm start, Gurobi starts from scratch")
+        
+        # The Gurobi engine counts its model build against its limit, but searches
+        # at least one second: only start it when that fits before the deadline
+        build_estimate = self._gurobi.estimate_build_seconds(formulation)
+        gurobi_budget = deadline - time.time() - build_estimate
+        if gurobi_budget < MIN_GAP_CLOSING_SECONDS:
+            logger.warning(
+                f"Hybrid stage 2 skipped: {gurobi_budget:.2f}s left after the "
+                f"estimated model build ({build_estimate:.2f}s)"
+            )
+            solution = None
+        else:
+            logger.info(f"Hybrid stage 2: Gurobi gap closing ({gurobi_budget:.1f}s)")
+            with trace_span('gap_closing'):
+                solution = self._gurobi.solve(
+                    time_limit_seconds=gurobi_budget + build_estimate,
+                    log_search=log_search,
+                    vehicle_penalty_weight=vehicle_penalty_weight,
+                    distance_weight=distance_weight,
+                    mip_gap=mip_gap,
+                    formulation=formulation,
+                    initial_routes=initial_routes,
+                    cutoff=cutoff
+                )
+        
+        if not solution or solution.get('status') != 'success':
+            if initial_routes is None:
+                return solution or warm_solution
+            # Gurobi could not improve or failed: the warm start is still a valid plan
+            logger.warning("Gurobi returned no solution, using the OR-Tools warm start")
+            solution = warm_solution
+        
+        if initial_routes is not None:
+            solution['warm_start'] = {
+                'solver': 'ortools',
+                'time_limit_seconds': ortools_budget,
+                'objective_value': round(warm_objective, 2)
+            }
+        solution['solver'] = 'hybrid'
+        return solution
+    
+    @staticmethod
+    def _routes_from_solution(solution: Dict) -> Dict[int, List[int]]:
+        """Convert a solution dictionary into {vehicle index: [customer, ...]}."""
+        routes = {}
+        for route in solution.get('routes', []):
+            stops = [stop['location'] for stop in route['route']]
+            customers = [loc for loc in stops[1:-1]]
+            if customers:
+                routes[route['vehicle_id']] = customers
+        return routes
@@ -0,0 +1,54 @@
+"""Hybrid OR-Tools + Gurobi solver wrapper implementing BaseSolver interface."""
+
+try:
+    from .hybrid_impl import HybridSolverImpl
+    from .gurobi_impl import GUROBI_AVAILABLE
+except ImportError:
+    GUROBI_AVAILABLE = False
+    HybridSolverImpl = None
+
+from .base import BaseSolver, GurobiFormulation
+
+
+class HybridSolver(BaseSolver):
+    """OR-Tools warm start + Gurobi solver implementation."""
+    
+    def __init__(self, data: dict):
+        """Initialize hybrid solver with problem data."""
+        if not GUROBI_AVAILABLE:
+            raise RuntimeError("Gurobi is not available")
+        self._solver = HybridSolverImpl(data)
+        self.data = data
+    
+    def _validate_data(self) -> None:
+        """Validation is done in the implementation."""
+        pass
+    
+    def _prepare_data(self) -> None:
+        """Preparation is done in the implementation."""
+        pass
+    
+    def solve(self, 
+              time_limit_seconds: int = 60, 
+              log_search: bool = False,
+              vehicle_penalty_weight: float = 1000.0,
+              distance_weight: float = 1.0,
+              mip_gap: float = 0.01,
+              formulation: str = GurobiFormulation.THREE_INDEX,
+              warm_start_fraction: float = 0.2,
+              **kwargs):
+        """Solve using OR-Tools warm start followed by Gurobi."""
+        return self._solver.solve(
+            time_limit_seconds=time_limit_seconds,
+            log_search=log_search,
+            vehicle_penalty_weight=vehicle_penalty_weight,
+            distance_weight=distance_weight,
+            mip_gap=mip_gap,
+            formulation=formulation,
+            warm_start_fraction=warm_start_fraction
+        )
+    
+    @property
+    def solver_name(self) -> str:
+        """Return solver name."""
+        return "Hybrid (OR-Tools + Gurobi)"
@@ -0,0 +1,137 @@
+"""
+Incremental Order Insertion Implementation
+
+Adds late orders to an existing plan without re-solving the day: each new
+customer goes to its cheapest feasible position, checked in O(1) per
+position against forward arrival / backward latest-arrival arrays kept per
+route. Only the routes receiving a customer are touched; an optional short
+local search repairs those routes and nothing else.
+"""
+
+import time
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .heuristic_impl import HeuristicSolverImpl
+
+logger = logging.getLogger(__name__)
+
+
+class OrderInsertionImpl(HeuristicSolverImpl):
+    """
+    Cheapest feasible insertion of new customers into fixed routes.
+    
+    Routes are given per vehicle as lists of customer nodes. The schedule
+    arrays of a route are computed once and only refreshed after that route
+    receives a customer, so inserting k orders into a plan with m routes of
+    length n costs O(k * m * n) vectorized checks.
+    """
+    
+    def insert(
+        self,
+        routes: Dict[int, List[int]],
+        new_customers: List[int],
+        vehicle_penalty_weight: float = 1000.0,
+        distance_weight: float = 1.0,
+        repair: bool = False,
+        time_limit_seconds: float = 0.5
+    ) -> Dict:
+        """
+        Insert new customers into an existing plan.
+        
+        Args:
+            routes: Customer nodes of each used vehicle, keyed by vehicle index
+            new_customers: Customer nodes to insert
+            vehicle_penalty_weight: Cost of opening a route on an idle vehicle
+            distance_weight: Weight for distance
+            repair: Whether to run local search on the affected routes
+            time_limit_seconds: Time budget of the repair
+        
+        Returns:
+            Dictionary with the route entries of the affected vehicles
+            ('routes', empty routes omitted), 'affected_vehicles', 'inserted'
+            ((customer, vehicle) pairs), 'unassigned' and the plan's
+            'objective_value'
+        """
+        start_time = time.time()
+        self.vehicle_penalty_weight = vehicle_penalty_weight
+        self.distance_weight = distance_weight
+        
+        plan = {k: list(r) for k, r in routes.items() if r}
+        loads = {k: sum(self._q[i] for i in r) for k, r in plan.items()}
+        schedules = {k: self._schedule(r) for k, r in plan.items()}
+        idle = [k for k in self._vehicles_by_capacity() if k not in plan]
+        
+        affected = set()
+        inserted, unassigned = [], []
+        
+        # Tightest deadlines first: they have the fewest feasible positions
+        for customer in sorted(new_customers, key=lambda i: self._l[i]):
+            candidate = np.asarray([customer])
+            best = None
+            for vehicle, route in plan.items():
+                if schedules[vehicle] is None:
+                    continue
+                found = self._best_insertion(
+                    route, loads[vehicle], vehicle, candidate, schedules[vehicle]
+                )
+                if found is not None and (best is None or found[0] < best[0]):
+                    best = (found[0], vehicle, found[2])
+            
+            if best is not None:
+                _, vehicle, position = best
+                plan[vehicle].insert(position, customer)
+            else:
+                vehicle = next((k for k in idle if self._feasible([customer], k)), None)
+                if vehicle is None:
+                    unassigned.append(customer)
+                    continue
+                idle.remove(vehicle)
+                plan[vehicle] = [customer]
+            
+            loads[vehicle] = loads.get(vehicle, 0.0) + self._q[customer]
+            schedules[vehicle] = self._schedule(plan[vehicle])
+            affected.add(vehicle)
+            inserted.append((customer, vehicle))
+        
+        repaired = False
+        if repair and affected:
+            vehicles = sorted(affected)
+            repaired_routes, repaired_vehicles = self._local_search(
+                [plan[k] for k in vehicles], vehicles, time.time() + time_limit_seconds
+            )
+            for vehicle in vehicles:
+                plan.pop(vehicle)
+            plan.update(zip(repaired_vehicles, repaired_routes))
+            repaired = True
+            
+            # Repair may move new customers between the affected routes
+            vehicle_of = {i: k for k, r in plan.items() for i in r}
+            inserted = [(customer, vehicle_of[customer]) for customer, _ in inserted]
+        
+        objective = self._objective(list(plan.values()))
+        logger.info(
+            f"Inserted {len(inserted)}/{len(new_customers)} customers into "
+            f"{len(affected)} routes in {(time.time() - start_time) * 1000:.1f} ms"
+            f"{' (repaired)' if repaired else ''}"
+        )
+        
+        kept = [k for k in sorted(affected) if k in plan]
+        return {
+            'status': 'success',
+            'routes': self._route_entries([plan[k] for k in kept], kept),
+            'affected_vehicles': sorted(affected),
+            'inserted': inserted,
+            'unassigned': unassigned,
+            'repaired': repaired,
+            'objective_value': round(objective, 2),
+        }
+    
+    def _schedule(self, route: List[int]) -> Optional[tuple]:
+        """Forward arrival and backward latest-arrival arrays, or None if infeasible."""
+        arrivals = self._arrivals(route)
+        if arrivals is None:
+            return None
+        return arrivals, self._latest(route)
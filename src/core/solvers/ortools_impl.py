@@ -16,6 +16,10 @@ from ortools.constraint_solver import pywrapcp
 
 from ...utils.distance_calculator import haversine_distance
 from ...utils.time_formatter import minutes_to_time, round_to_5_minutes
+from ...utils.service_time import node_service_times
+from ...utils.tracing import trace_add, trace_span, trace_increment
+from ...utils.events import emit, current_channel
+from ...utils import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -104,13 +108,12 @@ class ORToolsSolverImpl:
         Compute time matrix (travel time + service time).
         
         Service time is calculated dynamically as:
-        - Depot: 0 minutes
+        - Depot and vehicle start nodes: 0 minutes
         - Customer: 10 minutes (fixed) + 2 minutes per unit
         """
         distance_matrix = self.problem_data['distance_matrix']
         speed = self.problem_data['vehicle_speed']
-        demands = self.problem_data['demands']
-        depot = self.problem_data['depot']
+        service_times = node_service_times(self.problem_data)
         n = len(distance_matrix)
         
         # Convert to integer time units (scaled by 100 for precision)
@@ -120,14 +123,7 @@ class ORToolsSolverImpl:
                 travel_time = int((distance_matrix[i][j] / speed) * 100)
                 
                 # Dynamic service time: 10 min + 2 min per unit
-                if j != depot:
-                    units = demands[j] if j < len(demands) else 0
-                    service_time_min = 10 + (2 * units)
-                    service_time_scaled = int(service_time_min * 100)
-                else:
-                    service_time_scaled = 0
-                
-                time_matrix[i][j] = travel_time + service_time_scaled
+                time_matrix[i][j] = travel_time + int(service_times[j] * 100)
         
         return time_matrix
     
@@ -169,6 +165,7 @@ class ORToolsSolverImpl:
         log_search: bool = False,
         vehicle_penalty_weight: float = 100000.0,
         distance_weight: float = 1.0,
+        initial_routes: Optional[Dict[int, List[int]]] = None,
         **kwargs
     ) -> Optional[Dict]:
         """
@@ -179,11 +176,14 @@ class ORToolsSolverImpl:
             log_search: Whether to log search progress
             vehicle_penalty_weight: Weight for minimizing number of vehicles
             distance_weight: Weight for distance minimization
+            initial_routes: Optional starting solution as {vehicle index: [customer, ...]};
+                the search continues from it instead of building a first solution
             **kwargs: Additional parameters (ignored)
-            
+        
         Returns:
             Solution dictionary or None if no solution found
         """
+        build_start = time.time()
         logger.info(
             f"Preparing OR-Tools model: locations={len(self.problem_data['distance_matrix'])}, "
             f"vehicles={self.problem_data['num_vehicles']}, depot={self.problem_data.get('depot', 0)}"
@@ -267,9 +267,25 @@ class ORToolsSolverImpl:
             f"distance_weight={distance_weight}"
         )
         
+        # Locked route prefixes (re-optimization): fixed successors from the
+        # vehicle start, locked nodes cannot be dropped
+        locked_prefixes = self.problem_data.get('locked_prefixes') or []
+        locked_nodes = set()
+        for vehicle_id, prefix in enumerate(locked_prefixes):
+            index = routing.Start(vehicle_id)
+            for node in prefix:
+                next_index = manager.NodeToIndex(node)
+                routing.NextVar(index).SetValue(next_index)
+                index = next_index
+                locked_nodes.add(node)
+        if locked_nodes:
+            logger.info(f"Route locks: {len(locked_nodes)} nodes fixed on {sum(1 for p in locked_prefixes if p)} vehicles")
+        
         # Allow dropping nodes with very high penalty
         penalty = 10000000000  # Extremely high to force visiting all nodes
         for node in range(1, len(self.problem_data['distance_matrix'])):
+            if node in locked_nodes:
+                continue
             routing.AddDisjunction([manager.NodeToIndex(node)], penalty)
         
         # Set search parameters
@@ -283,26 +299,40 @@ class ORToolsSolverImpl:
         search_parameters.time_limit.seconds = time_limit_seconds
         search_parameters.log_search = log_search
         
-        # Create monitoring thread for progress reporting
+        # Create monitoring thread for progress reporting and early stop
         solving = [True]
         start_time = time.time()
         num_customers = len(self.problem_data['demands']) - 1
         num_vehicles = self.problem_data['num_vehicles']
+        channel = current_channel()
+        latest = {}
         
         def monitor_progress():
-            """Monitor thread to report progress every 5 seconds."""
+            """Report the latest incumbent every 5 seconds, cancel the search on request."""
             last_report = start_time
+            cancelled = False
             while solving[0]:
-                time.sleep(1)
+                time.sleep(0.2)
+                if channel is not None and channel.stop_requested and not cancelled:
+                    # CancelSearch is safe from another thread, the search keeps its best solution
+                    cancelled = True
+                    logger.info("Stop requested, finishing OR-Tools search with the best solution")
+                    routing.CancelSearch()
                 current_time = time.time()
                 if current_time - last_report >= 5.0:
                     last_report = current_time
                     elapsed = current_time - start_time
-                    logger.info(
-                        f"[{elapsed:.0f}s] OR-Tools optimizing: "
-                        f"{num_customers} customers, {num_vehicles} vehicles available "
-                        f"(intermediate stats not available with OR-Tools)"
-                    )
+                    if latest:
+                        logger.info(
+                            f"[{elapsed:.0f}s] OR-Tools incumbent: objective {latest['objective']:,.2f}, "
+                            f"{latest['vehicles_used']}/{num_vehicles} vehicles, "
+                            f"{latest['distance']:.1f} km, {latest['dropped']} dropped"
+                        )
+                    else:
+                        logger.info(
+                            f"[{elapsed:.0f}s] OR-Tools optimizing: "
+                            f"{num_customers} customers, {num_vehicles} vehicles available"
+                        )
         
         # Start monitoring thread
         monitor_thread = threading.Thread(target=monitor_progress, daemon=True)
@@ -314,7 +344,53 @@ class ORToolsSolverImpl:
             f"locations: {len(self.problem_data['locations'])}, "
             f"vehicles: {self.problem_data['num_vehicles']})..."
         )
-        solution = routing.SolveWithParameters(search_parameters)
+        def on_solution():
+            """Count improving solutions (search span and metrics) and report them."""
+            objective = routing.CostVar().Value() / 100.0
+            if latest and objective >= latest['objective']:
+                # Guided local search also accepts worse neighbors
+                return
+            trace_increment('solutions')
+            metrics.INCUMBENTS.inc(engine='ortools')
+            latest.update(
+                objective=objective,
+                **self._incumbent_summary(
+                    manager, routing, with_routes=channel is not None and channel.incumbent_routes
+                )
+            )
+            emit('incumbent', engine='ortools', elapsed_seconds=round(time.time() - start_time, 3), **latest)
+        
+        routing.AddAtSolutionCallback(on_solution)
+        
+        initial_assignment = None
+        if initial_routes:
+            routing.CloseModelWithParameters(search_parameters)
+            initial_assignment = routing.ReadAssignmentFromRoutes(
+                [list(initial_routes.get(k, [])) for k in range(num_vehicles)], True
+            )
+            if initial_assignment is None:
+                logger.warning("Initial routes are not feasible anymore, building a first solution")
+            else:
+                logger.info(f"Warm start from {len(initial_routes)} routes")
+        
+        # Model build counts against the time limit
+        build_seconds = time.time() - build_start
+        search_parameters.time_limit.FromMilliseconds(
+            int(max(1.0, time_limit_seconds - build_seconds) * 1000)
+        )
+        trace_add(
+            'model_build', build_seconds,
+            nodes=len(self.problem_data['locations']), vehicles=num_vehicles,
+            next_variables=routing.Size(), warm_start=initial_assignment is not None
+        )
+        
+        with trace_span('search', engine='ortools') as span:
+            if initial_assignment is not None:
+                solution = routing.SolveFromAssignmentWithParameters(initial_assignment, search_parameters)
+            else:
+                solution = routing.SolveWithParameters(search_parameters)
+            if span:
+                span.set(status=routing.status(), objective=solution.ObjectiveValue() if solution else None)
         
         # Stop monitoring
         solving[0] = False
@@ -323,11 +399,61 @@ class ORToolsSolverImpl:
         if solution:
             obj_value = solution.ObjectiveValue()
             logger.info(f"✓ Solution found - Objective: {obj_value:,.0f}")
-            return self._extract_solution(manager, routing, solution)
+            result = self._extract_solution(manager, routing, solution)
+            result['model_build_seconds'] = round(build_seconds, 3)
+            return result
         else:
             logger.warning("No solution found")
             return None
     
+    def _incumbent_summary(self, manager, routing, with_routes: bool = False) -> Dict:
+        """
+        Summarize the solution at hand inside a solution callback.
+        
+        Reads the successor variables of the current assignment, so it only
+        works while the search reports a solution.
+        
+        Args:
+            manager: Routing index manager
+            routing: Routing model being searched
+            with_routes: Include the customer nodes of each used vehicle
+        
+        Returns:
+            Dictionary with vehicles_used, distance (km), dropped and
+            optionally routes ([{'vehicle', 'nodes'}])
+        """
+        distance_matrix = self.problem_data['distance_matrix']
+        vehicles_used = 0
+        total_distance = 0.0
+        routes = []
+        
+        for vehicle_id in range(self.problem_data['num_vehicles']):
+            index = routing.NextVar(routing.Start(vehicle_id)).Value()
+            if routing.IsEnd(index):
+                continue
+            previous = manager.IndexToNode(routing.Start(vehicle_id))
+            nodes = []
+            while not routing.IsEnd(index):
+                node = manager.IndexToNode(index)
+                total_distance += distance_matrix[previous][node]
+                nodes.append(node)
+                previous = node
+                index = routing.NextVar(index).Value()
+            total_distance += distance_matrix[previous][manager.IndexToNode(index)]
+            vehicles_used += 1
+            if with_routes:
+                routes.append({'vehicle': vehicle_id, 'nodes': nodes})
+        
+        # Dropped nodes point to themselves
+        dropped = sum(
+            1 for index in range(routing.Size())
+            if not routing.IsStart(index) and routing.NextVar(index).Value() == index
+        )
+        summary = {'vehicles_used': vehicles_used, 'distance': round(total_distance, 2), 'dropped': dropped}
+        if with_routes:
+            summary['routes'] = routes
+        return summary
+    
     def _extract_solution(self, manager, routing, solution) -> Dict:
         """Extract solution details from OR-Tools solution."""
         total_distance = 0
@@ -335,75 +461,18 @@ class ORToolsSolverImpl:
         routes = []
         num_vehicles_used = 0
         
-        capacity_dimension = routing.GetDimensionOrDie('Capacity')
         time_dimension = routing.GetDimensionOrDie('Time')
         
         for vehicle_id in range(self.problem_data['num_vehicles']):
             index = routing.Start(vehicle_id)
-            route = []
-            route_distance = 0
-            is_first_arc = True
+            stops = []
             segment_distances = []
-            
-            # First pass: collect all stops to calculate total load
-            temp_route = []
-            temp_index = index
-            while not routing.IsEnd(temp_index):
-                node_index = manager.IndexToNode(temp_index)
-                demand = (
-                    self.problem_data['demands'][node_index] 
-                    if node_index < len(self.problem_data['demands']) 
-                    else 0
-                )
-                temp_route.append((node_index, demand))
-                temp_index = solution.Value(routing.NextVar(temp_index))
-            
-            # Calculate total load
-            total_route_load = sum(d for _, d in temp_route)
-            
-            # Second pass: build route with delivery model
-            current_load = total_route_load
+            is_first_arc = True
             
             while not routing.IsEnd(index):
                 node_index = manager.IndexToNode(index)
                 time_var = time_dimension.CumulVar(index)
-                time_minutes = solution.Value(time_var) / 100.0
-                
-                demand = (
-                    self.problem_data['demands'][node_index] 
-                    if node_index < len(self.problem_data['demands']) 
-                    else 0
-                )
-                
-                time_window = self.problem_data['time_windows'][node_index]
-                time_window_start = time_window[0]
-                time_window_end = time_window[1]
-                
-                # Delivery model: load decreases after delivery
-                if node_index == self.problem_data['depot']:
-                    load_before = 0
-                    load_after = total_route_load
-                else:
-                    load_before = current_load
-                    load_after = current_load - demand
-                    current_load = load_after
-                
-                time_rounded = round_to_5_minutes(time_minutes)
-                
-                route.append({
-                    'location': node_index,
-                    'load_before': load_before,
-                    'load_after': load_after,
-                    'time': time_rounded,
-                    'time_formatted': minutes_to_time(time_minutes),
-                    'time_window': time_window,
-                    'time_window_formatted': (
-                        f"{minutes_to_time(time_window_start)} - "
-                        f"{minutes_to_time(time_window_end)}"
-                    ),
-                    'segment_distance': 0.0,
-                    'segment_distance_formatted': "0.00 km"
-                })
+                stops.append((node_index, solution.Value(time_var) / 100.0))
                 
                 previous_index = index
                 index = solution.Value(routing.NextVar(index))
@@ -415,21 +484,76 @@ class ORToolsSolverImpl:
                     arc_cost -= fixed_cost_scaled
                     is_first_arc = False
                 
-                route_distance += arc_cost
                 segment_distances.append(arc_cost)
             
             # Add final depot stop
             node_index = manager.IndexToNode(index)
             time_var = time_dimension.CumulVar(index)
-            time_minutes = solution.Value(time_var) / 100.0
-            time_rounded = round_to_5_minutes(time_minutes)
+            stops.append((node_index, solution.Value(time_var) / 100.0))
+            
+            route_entry = self._build_route_entry(vehicle_id, stops, segment_distances)
+            
+            # Only count routes with customers
+            if route_entry is not None:
+                num_vehicles_used += 1
+                routes.append(route_entry)
+                total_distance += route_entry['distance']
+                total_load += route_entry['load']
+        
+        # Calculate overall metrics
+        return self._build_solution_summary(
+            routes, num_vehicles_used, total_distance, total_load,
+            solution.ObjectiveValue() / 100.0
+        )
+    
+    def _build_route_entry(
+        self,
+        vehicle_id: int,
+        stops: List[tuple],
+        segment_distances: List[float]
+    ) -> Optional[Dict]:
+        """
+        Build the route dictionary of one vehicle.
+        
+        Args:
+            vehicle_id: Vehicle index
+            stops: (location, cumulative time in minutes) per stop, depot to depot
+            segment_distances: Distance of each arc, scaled by 100
+        
+        Returns:
+            Route dictionary, or None if the vehicle serves no customer
+        """
+        demands = self.problem_data['demands']
+        depot = self.problem_data['depot']
+        
+        # Calculate total load (delivery model: load decreases after each delivery)
+        total_route_load = sum(
+            demands[node_index] if node_index < len(demands) else 0
+            for node_index, _ in stops[:-1]
+        )
+        current_load = total_route_load
+        route = []
+        
+        for position, (node_index, time_minutes) in enumerate(stops):
+            demand = demands[node_index] if node_index < len(demands) else 0
             time_window = self.problem_data['time_windows'][node_index]
             
+            if position == len(stops) - 1:
+                load_before = current_load
+                load_after = 0
+            elif node_index == depot:
+                load_before = 0
+                load_after = total_route_load
+            else:
+                load_before = current_load
+                load_after = current_load - demand
+                current_load = load_after
+            
             route.append({
                 'location': node_index,
-                'load_before': current_load,
-                'load_after': 0,
-                'time': time_rounded,
+                'load_before': load_before,
+                'load_after': load_after,
+                'time': round_to_5_minutes(time_minutes),
                 'time_formatted': minutes_to_time(time_minutes),
                 'time_window': time_window,
                 'time_window_formatted': (
@@ -439,143 +563,74 @@ class ORToolsSolverImpl:
                 'segment_distance': 0.0,
                 'segment_distance_formatted': "0.00 km"
             })
-            
-            # Update segment distances
-            for i in range(1, len(route)):
-                if i - 1 < len(segment_distances):
-                    distance_km = segment_distances[i - 1] / 100.0
-                    route[i]['segment_distance'] = round(distance_km, 2)
-                    route[i]['segment_distance_formatted'] = f"{distance_km:.2f} km"
-            
-            # Build timeline segments
-            segments = self._build_timeline_segments(route, segment_distances)
-            
-            # Only count routes with customers
-            if len(route) > 2:
-                num_vehicles_used += 1
-                route_distance = route_distance / 100.0
-                route_load = total_route_load
-                
-                vehicle_capacity = self.problem_data['vehicle_capacities'][vehicle_id]
-                saturation = (
-                    (route_load / vehicle_capacity * 100) 
-                    if vehicle_capacity > 0 
-                    else 0
-                )
-                
-                route_start_time = route[0]['time']
-                route_end_time = route[-1]['time']
-                route_duration_minutes = route_end_time - route_start_time
-                
-                # Calculate service time
-                service_time_minutes = 0
-                num_customers = 0
-                for stop in route:
-                    if stop['location'] != self.problem_data['depot']:
-                        num_customers += 1
-                        units_delivered = stop['load_before'] - stop['load_after']
-                        service_time_minutes += 10 + (2 * units_delivered)
-                
-                service_time_minutes = round_to_5_minutes(service_time_minutes)
-                travel_time_minutes = max(0, route_duration_minutes - service_time_minutes)
-                
-                routes.append({
-                    'vehicle_id': vehicle_id,
-                    'route': route,
-                    'segments': segments,
-                    'distance': route_distance,
-                    'distance_km': route_distance,
-                    'distance_formatted': f"{route_distance:.2f} km",
-                    'load': route_load,
-                    'load_units': route_load,
-                    'load_formatted': f"{route_load} units",
-                    'capacity': vehicle_capacity,
-                    'saturation_pct': saturation,
-                    'duration_minutes': route_duration_minutes,
-                    'duration_formatted': (
-                        f"{int(route_duration_minutes // 60)}h "
-                        f"{int(route_duration_minutes % 60)}m"
-                    ),
-                    'duration_hours': round(route_duration_minutes / 60.0, 2),
-                    'travel_time_minutes': travel_time_minutes,
-                    'travel_time_hours': travel_time_minutes / 60.0,
-                    'travel_time_formatted': (
-                        f"{int(travel_time_minutes // 60)}h "
-                        f"{int(travel_time_minutes % 60)}m"
-                    ),
-                    'service_time_minutes': service_time_minutes,
-                    'service_time_hours': service_time_minutes / 60.0,
-                    'service_time_formatted': (
-                        f"{int(service_time_minutes // 60)}h "
-                        f"{int(service_time_minutes % 60)}m"
-                    ),
-                    'num_customers': num_customers
-                })
-                
-                total_distance += route_distance
-                total_load += route_load
         
-        # Calculate overall metrics
-        return self._build_solution_summary(
-            routes, num_vehicles_used, total_distance, total_load,
-            solution.ObjectiveValue() / 100.0
+        # Update segment distances
+        for i in range(1, len(route)):
+            if i - 1 < len(segment_distances):
+                distance_km = segment_distances[i - 1] / 100.0
+                route[i]['segment_distance'] = round(distance_km, 2)
+                route[i]['segment_distance_formatted'] = f"{distance_km:.2f} km"
+        
+        if len(route) <= 2:
+            return None
+        
+        route_distance = sum(segment_distances) / 100.0
+        route_load = total_route_load
+        
+        vehicle_capacity = self.problem_data['vehicle_capacities'][vehicle_id]
+        saturation = (
+            (route_load / vehicle_capacity * 100) 
+            if vehicle_capacity > 0 
+            else 0
         )
-    
-    def _build_timeline_segments(
-        self, 
-        route: List[Dict], 
-        segment_distances: List[float]
-    ) -> List[Dict]:
-        """Build timeline segments for route visualization."""
-        segments = []
         
-        for i in range(len(route) - 1):
-            from_stop = route[i]
-            to_stop = route[i + 1]
-            
-            segment_distance_km = 0.0
-            if i < len(segment_distances):
-                segment_distance_km = segment_distances[i] / 100.0
-            
-            time_diff = to_stop['time'] - from_stop['time']
-            
-            if to_stop['location'] != self.problem_data['depot']:
-                # Going to customer
-                units_delivered = to_stop['load_before'] - to_stop['load_after']
-                service_time_minutes = 10 + (2 * units_delivered)
-                travel_time_minutes = max(0, time_diff - service_time_minutes)
-                
-                segments.append({
-                    'type': 'travel',
-                    'from_location': from_stop['location'],
-                    'to_location': to_stop['location'],
-                    'start_time': from_stop['time'],
-                    'end_time': from_stop['time'] + travel_time_minutes,
-                    'duration_minutes': travel_time_minutes,
-                    'distance_km': round(segment_distance_km, 2)
-                })
-                
-                segments.append({
-                    'type': 'service',
-                    'location': to_stop['location'],
-                    'start_time': from_stop['time'] + travel_time_minutes,
-                    'end_time': to_stop['time'],
-                    'duration_minutes': service_time_minutes,
-                    'units': units_delivered
-                })
-            else:
-                # Returning to depot
-                segments.append({
-                    'type': 'travel',
-                    'from_location': from_stop['location'],
-                    'to_location': to_stop['location'],
-                    'start_time': from_stop['time'],
-                    'end_time': to_stop['time'],
-                    'duration_minutes': time_diff,
-                    'distance_km': round(segment_distance_km, 2)
-                })
-        
-        return segments
+        route_start_time = route[0]['time']
+        route_end_time = route[-1]['time']
+        route_duration_minutes = route_end_time - route_start_time
+        
+        # Calculate service time
+        service_times = node_service_times(self.problem_data)
+        service_time_minutes = 0
+        num_customers = 0
+        for stop in route:
+            if stop['location'] != depot:
+                num_customers += 1
+                service_time_minutes += service_times[stop['location']]
+        
+        service_time_minutes = round_to_5_minutes(service_time_minutes)
+        travel_time_minutes = max(0, route_duration_minutes - service_time_minutes)
+        
+        return {
+            'vehicle_id': vehicle_id,
+            'route': route,
+            'distance': route_distance,
+            'distance_km': route_distance,
+            'distance_formatted': f"{route_distance:.2f} km",
+            'load': route_load,
+            'load_units': route_load,
+            'load_formatted': f"{route_load} units",
+            'capacity': vehicle_capacity,
+            'saturation_pct': saturation,
+            'duration_minutes': route_duration_minutes,
+            'duration_formatted': (
+                f"{int(route_duration_minutes // 60)}h "
+                f"{int(route_duration_minutes % 60)}m"
+            ),
+            'duration_hours': round(route_duration_minutes / 60.0, 2),
+            'travel_time_minutes': travel_time_minutes,
+            'travel_time_hours': travel_time_minutes / 60.0,
+            'travel_time_formatted': (
+                f"{int(travel_time_minutes // 60)}h "
+                f"{int(travel_time_minutes % 60)}m"
+            ),
+            'service_time_minutes': service_time_minutes,
+            'service_time_hours': service_time_minutes / 60.0,
+            'service_time_formatted': (
+                f"{int(service_time_minutes // 60)}h "
+                f"{int(service_time_minutes % 60)}m"
+            ),
+            'num_customers': num_customers
+        }
     
     def _build_solution_summary(
         self,
@@ -26,13 +26,15 @@ class ORToolsSolver(BaseSolver):
               log_search: bool = False,
               vehicle_penalty_weight: float = 100000.0,
               distance_weight: float = 1.0,
+              initial_routes=None,
               **kwargs):
         """Solve using OR-Tools."""
         return self._solver.solve(
             time_limit_seconds=time_limit_seconds,
             log_search=log_search,
             vehicle_penalty_weight=vehicle_penalty_weight,
-            distance_weight=distance_weight
+            distance_weight=distance_weight,
+            initial_routes=initial_routes
         )
     
     @property
@@ -9,10 +9,11 @@ from .domain import Customer, Vehicle, Depot
 class SolverConfig(BaseModel):
     """Solver configuration parameters."""
     time_limit: int = Field(60, description="Time limit in seconds", ge=1, le=3600)
-    solver: str = Field("ortools", description="Solver type: 'ortools' or 'gurobi'")
+    solver: str = Field("ortools", description="Solver type: 'ortools', 'gurobi', 'hybrid', 'colgen', 'heuristic' or 'hgs'")
     vehicle_penalty_weight: Optional[float] = Field(None, description="Weight for minimizing vehicles")
     distance_weight: float = Field(1.0, description="Weight for distance minimization")
     mip_gap: float = Field(0.01, description="MIP optimality gap for Gurobi")
+    formulation: Optional[str] = Field(None, description="Gurobi formulation: 'three_index' or 'two_index'")
 
 
 class SolveRequest(BaseModel):
@@ -30,6 +31,10 @@ class SolveResponse(BaseModel):
     summary: Dict = Field(..., description="Summary statistics")
     routes: List[Dict] = Field(..., description="Detailed routes")
     objective_value: Optional[float] = Field(None, description="Objective function value")
+    deadline: Optional[Dict] = Field(None, description="Wall-clock budget and time spent per stage")
+    timings: Optional[Dict] = Field(None, description="Tracing spans with durations and counters")
+    profile: Optional[Dict] = Field(None, description="cProfile summary of a profiled solve")
+    memory: Optional[Dict] = Field(None, description="Memory estimate and the engine admitted by the memory guard")
 
 
 class HealthResponse(BaseModel):
@@ -1,14 +1,17 @@
 """Domain models for CVRPTW problem representation."""
 
-from typing import List, Dict, Optional, Tuple
-from pydantic import BaseModel, Field
+from typing import Annotated, List, Dict, Optional, Tuple, Union
+from pydantic import BaseModel, ConfigDict, Field
+
+# [lat, lon] in degrees, as sent in payloads
+Coordinates = Tuple[Annotated[float, Field(ge=-90, le=90)], Annotated[float, Field(ge=-180, le=180)]]
 
 
 class Location(BaseModel):
     """Geographic location with coordinates."""
     latitude: float = Field(..., description="Latitude in degrees")
     longitude: float = Field(..., description="Longitude in degrees")
-
+    
     def as_tuple(self) -> Tuple[float, float]:
         """Return location as (lat, lon) tuple."""
         return (self.latitude, self.longitude)
@@ -16,34 +19,38 @@ class Location(BaseModel):
 
 class TimeWindow(BaseModel):
     """Time window constraint for a location."""
-    start_min: int = Field(..., description="Start time in minutes from midnight")
-    end_min: int = Field(..., description="End time in minutes from midnight")
+    start_min: int = Field(240, description="Start time in minutes from midnight")
+    end_min: int = Field(1260, description="End time in minutes from midnight")
     start_hhmm: Optional[str] = Field(None, description="Start time in HH:MM format")
     end_hhmm: Optional[str] = Field(None, description="End time in HH:MM format")
 
 
 class Customer(BaseModel):
-    """Customer with location, demand, and time window."""
-    id: str = Field(..., description="Unique customer identifier")
+    """Customer with location, demand, and time window (payload format)."""
+    model_config = ConfigDict(extra='allow')
+    
+    id: Union[int, str] = Field(..., description="Unique customer identifier")
     name: Optional[str] = Field(None, description="Customer name")
-    location: Location = Field(..., description="Customer location")
-    demand_units: Optional[int] = Field(None, description="Demand for single day")
-    demands_units: Optional[Dict[str, int]] = Field(None, description="Demand per date")
+    location: Coordinates = Field(..., description="Customer location as [lat, lon]")
+    demand_units: Optional[float] = Field(None, ge=0, description="Demand for single day")
+    demands_units: Optional[Dict[str, Optional[Annotated[float, Field(ge=0)]]]] = Field(None, description="Demand per date")
     time_window: Optional[TimeWindow] = Field(None, description="Time window for single day")
-    time_windows: Optional[Dict[str, TimeWindow]] = Field(None, description="Time windows per date")
+    time_windows: Optional[Dict[str, Optional[TimeWindow]]] = Field(None, description="Time windows per date")
     service_time_min: int = Field(15, description="Service time in minutes")
 
 
 class Vehicle(BaseModel):
-    """Vehicle with capacity and time window."""
-    id: str = Field(..., description="Unique vehicle identifier")
-    capacity_units: int = Field(..., description="Vehicle capacity in units")
+    """Vehicle with capacity and time window (payload format)."""
+    model_config = ConfigDict(extra='allow')
+    
+    id: Union[int, str] = Field(..., description="Unique vehicle identifier")
+    capacity_units: int = Field(..., ge=0, description="Vehicle capacity in units")
     time_window: Optional[TimeWindow] = Field(None, description="Vehicle availability window")
 
 
 class Depot(BaseModel):
     """Depot location where vehicles start and end."""
-    location: Location = Field(..., description="Depot location")
+    location: Coordinates = Field(..., description="Depot location as [lat, lon]")
     time_window: Optional[TimeWindow] = Field(None, description="Depot operating hours")
 
 
@@ -2,5 +2,7 @@
 
 from .solver_service import SolverService
 from .problem_builder import ProblemBuilder
+from .fleet_reducer import FleetReducer
+from .stop_aggregator import StopAggregator
 
-__all__ = ["SolverService", "ProblemBuilder"]
+__all__ = ["SolverService", "ProblemBuilder", "FleetReducer", "StopAggregator"]
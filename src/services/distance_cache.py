@@ -12,9 +12,14 @@ from typing import List, Tuple, Optional, Dict
 
 from ..config import get_logger
 from ..utils import haversine_distance
+from ..utils import metrics
+from ..utils.events import emit
 
 logger = get_logger(__name__)
 
+# Timeout of a single OSRM request
+OSRM_TIMEOUT_SECONDS = 10.0
+
 
 class DistanceCacheService:
     """Manages a SQLite cache of distances and travel times between locations."""
@@ -93,10 +98,14 @@ class DistanceCacheService:
         return loc_hash
     
     def _fetch_from_osrm(self, from_lat: float, from_lon: float, 
-                         to_lat: float, to_lon: float) -> Optional[Tuple[float, float]]:
+                         to_lat: float, to_lon: float,
+                         timeout: float = OSRM_TIMEOUT_SECONDS) -> Optional[Tuple[float, float]]:
         """
         Fetch real distance and travel time from OSRM routing service.
         
+        Args:
+            timeout: Request timeout in seconds
+        
         Returns:
             (distance_km, duration_min) or None if request fails
         """
@@ -104,9 +113,10 @@ class DistanceCacheService:
         # coordinates: lon,lat;lon,lat (note: OSRM uses lon,lat order!)
         url = f"{self.osrm_base_url}/route/v1/driving/{from_lon},{from_lat};{to_lon},{to_lat}?overview=false"
         
+        request_start = time.time()
         try:
             req = urllib.request.Request(url)
-            with urllib.request.urlopen(req, timeout=10) as response:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
                 data = json.loads(response.read().decode('utf-8'))
                 
                 if data.get('code') == 'Ok' and data.get('routes'):
@@ -121,18 +131,45 @@ class DistanceCacheService:
                     return (distance_km, duration_min)
                 else:
                     logger.warning(f"OSRM returned non-Ok code: {data.get('code')}")
+                    metrics.ROUTING_BACKEND_ERRORS.inc(reason='no_route')
                     return None
-                    
+        
         except urllib.error.URLError as e:
             logger.error(f"OSRM request failed: {e}")
+            if isinstance(e, urllib.error.HTTPError):
+                reason = 'http'
+            elif isinstance(e.reason, TimeoutError):
+                reason = 'timeout'
+            else:
+                reason = 'connection'
+            metrics.ROUTING_BACKEND_ERRORS.inc(reason=reason)
+            return None
+        except TimeoutError as e:
+            logger.error(f"OSRM request timed out: {e}")
+            metrics.ROUTING_BACKEND_ERRORS.inc(reason='timeout')
             return None
         except Exception as e:
             logger.error(f"Error fetching from OSRM: {e}")
+            metrics.ROUTING_BACKEND_ERRORS.inc(reason='other')
             return None
+        finally:
+            metrics.ROUTING_BACKEND_DURATION.observe(time.time() - request_start)
+    
+    @staticmethod
+    def estimate_distance_and_time(from_lat: float, from_lon: float,
+                                   to_lat: float, to_lon: float) -> Tuple[float, float]:
+        """
+        Estimate distance (km) and travel time (min) without routing data.
+        
+        Uses the Haversine distance and a 40 km/h average speed.
+        """
+        distance_km = haversine_distance((from_lat, from_lon), (to_lat, to_lon))
+        return distance_km, distance_km / 40.0 * 60.0
     
     def get_distance_and_time(self, from_lat: float, from_lon: float,
                               to_lat: float, to_lon: float,
-                              time_of_day: str = "afternoon") -> Tuple[float, float]:
+                              time_of_day: str = "afternoon",
+                              timeout: float = OSRM_TIMEOUT_SECONDS) -> Tuple[float, float]:
         """
         Get distance (km) and travel time (min) between two locations.
         Uses cache if available, otherwise fetches from OSRM and caches result.
@@ -141,6 +178,7 @@ class DistanceCacheService:
             from_lat, from_lon: Origin coordinates
             to_lat, to_lon: Destination coordinates
             time_of_day: 'morning', 'afternoon', or 'evening' (default: 'afternoon')
+            timeout: OSRM request timeout in seconds
         
         Returns:
             (distance_km, travel_time_min)
@@ -178,14 +216,16 @@ class DistanceCacheService:
         
         # Cache miss - fetch from OSRM
         logger.info(f"Cache miss for {from_lat},{from_lon} -> {to_lat},{to_lon}, fetching from OSRM...")
-        result = self._fetch_from_osrm(from_lat, from_lon, to_lat, to_lon)
+        result = self._fetch_from_osrm(from_lat, from_lon, to_lat, to_lon, timeout)
         
         if result is None:
             # Fallback: use Haversine distance and estimate time (no traffic data)
-            distance_km = haversine_distance((from_lat, from_lon), (to_lat, to_lon))
-            # Estimate: 40 km/h average speed
-            travel_time = distance_km / 40.0 * 60.0  # minutes
+            distance_km, travel_time = self.estimate_distance_and_time(from_lat, from_lon, to_lat, to_lon)
             logger.warning(f"OSRM failed, using Haversine fallback: {distance_km:.2f}km, {travel_time:.1f}min")
+            if timeout < OSRM_TIMEOUT_SECONDS:
+                # Failure under a shortened timeout says nothing about the pair: don't cache it
+                conn.close()
+                return (distance_km, travel_time)
         else:
             distance_km, base_time = result
             # Estimate traffic variations: morning +15%, afternoon baseline, evening +10%
@@ -228,17 +268,31 @@ class DistanceCacheService:
         
         return (distance_km, travel_time_final)
     
-    def populate_matrix_all_times(self, locations: List[Tuple[float, float]]) -> Tuple[List[List[float]], List[List[float]], List[List[float]], List[List[float]]]:
+    def populate_matrix_all_times(self, locations: List[Tuple[float, float]],
+                                  deadline: Optional[float] = None,
+                                  stats: Optional[Dict] = None) -> Tuple[List[List[float]], List[List[float]], List[List[float]], List[List[float]]]:
         """
         Populate distance and all three time matrices (morning/afternoon/evening) for a list of locations.
         Fetches missing entries from OSRM and caches them.
         
+        Once ``deadline`` has passed, remaining cache misses are filled with
+        Haversine estimates instead of OSRM calls. Estimates are not cached,
+        so a later request with more time fetches the real values.
+        
+        Every pair is counted exactly once: as a cache hit, a pair of identical
+        coordinates (zero distance), an OSRM fetch, or an estimate (budget
+        exhausted, or OSRM failed under the shortened deadline timeout).
+        
         Args:
             locations: List of (latitude, longitude) tuples
+            deadline: Optional wall-clock time (time.time()) after which OSRM is no longer called
+            stats: Optional dictionary filled with 'cache_hits', 'same_location', 'osrm_calls',
+                'estimated' and 'osrm_failures' counts ('estimated' includes 'osrm_failures')
         
         Returns:
             (distance_matrix, time_matrix_morning, time_matrix_afternoon, time_matrix_evening) - all as 2D lists in minutes
         """
+        matrix_start = time.time()
         n = len(locations)
         distance_matrix = [[0.0] * n for _ in range(n)]
         time_matrix_morning = [[0.0] * n for _ in range(n)]
@@ -247,7 +301,10 @@ class DistanceCacheService:
         
         total_pairs = n * (n - 1)  # Exclude diagonal
         cache_hits = 0
+        same_location = 0
         osrm_calls = 0
+        budget_estimated = 0
+        osrm_failures = 0
         
         logger.info(f"Populating matrices for {n} locations ({total_pairs} pairs, all time periods)...")
         
@@ -262,6 +319,11 @@ class DistanceCacheService:
                     lat1, lon1 = locations[i]
                     lat2, lon2 = locations[j]
                     
+                    if abs(lat1 - lat2) < 1e-6 and abs(lon1 - lon2) < 1e-6:
+                        # Same location (e.g. co-located stops): zero distance/time, never cached
+                        same_location += 1
+                        continue
+                    
                     # Check if already in cache
                     from_hash = self._location_hash(lat1, lon1)
                     to_hash = self._location_hash(lat2, lon2)
@@ -282,11 +344,21 @@ class DistanceCacheService:
                         time_matrix_morning[i][j] = row[1]
                         time_matrix_afternoon[i][j] = row[2]
                         time_matrix_evening[i][j] = row[3]
+                    elif deadline is not None and time.time() >= deadline:
+                        # Out of time - estimate instead of calling OSRM
+                        budget_estimated += 1
+                        dist_km, travel_time = self.estimate_distance_and_time(lat1, lon1, lat2, lon2)
+                        distance_matrix[i][j] = dist_km
+                        time_matrix_morning[i][j] = travel_time
+                        time_matrix_afternoon[i][j] = travel_time
+                        time_matrix_evening[i][j] = travel_time
                     else:
                         # Cache miss - need OSRM call
-                        osrm_calls += 1
-                        dist_km, _ = self.get_distance_and_time(
-                            lat1, lon1, lat2, lon2, time_of_day='afternoon'
+                        timeout = OSRM_TIMEOUT_SECONDS
+                        if deadline is not None:
+                            timeout = max(0.1, min(timeout, deadline - time.time()))
+                        dist_km, travel_time = self.get_distance_and_time(
+                            lat1, lon1, lat2, lon2, time_of_day='afternoon', timeout=timeout
                         )
                         
                         # Now retrieve from cache (just populated)
@@ -300,17 +372,41 @@ class DistanceCacheService:
                         conn.close()
                         
                         if row:
+                            osrm_calls += 1
                             distance_matrix[i][j] = row[0]
                             time_matrix_morning[i][j] = row[1]
                             time_matrix_afternoon[i][j] = row[2]
                             time_matrix_evening[i][j] = row[3]
                         else:
-                            # Fallback (should not happen)
+                            # Uncached Haversine estimate (OSRM failed under the deadline timeout)
+                            osrm_failures += 1
                             distance_matrix[i][j] = dist_km
-                            time_matrix_morning[i][j] = dist_km / 40.0 * 60.0 * 1.15
-                            time_matrix_afternoon[i][j] = dist_km / 40.0 * 60.0
-                            time_matrix_evening[i][j] = dist_km / 40.0 * 60.0 * 1.10
+                            time_matrix_morning[i][j] = travel_time
+                            time_matrix_afternoon[i][j] = travel_time
+                            time_matrix_evening[i][j] = travel_time
+            
+            emit('progress', stage='matrix_fetch', done=(i + 1) * (n - 1), total=total_pairs,
+                 cache_hits=cache_hits, osrm_calls=osrm_calls)
         
+        estimated = budget_estimated + osrm_failures
         cache_hit_rate = (cache_hits / total_pairs * 100) if total_pairs > 0 else 0
-        logger.info(f"✓ Matrix ready - Cache: {cache_hits}/{total_pairs} hits ({cache_hit_rate:.1f}%), OSRM calls: {osrm_calls}")
+        logger.info(
+            f"✓ Matrix ready - Cache: {cache_hits}/{total_pairs} hits ({cache_hit_rate:.1f}%), "
+            f"same location: {same_location}, OSRM calls: {osrm_calls}, estimated: {estimated}"
+        )
+        if budget_estimated:
+            logger.warning(f"Matrix budget exhausted: {budget_estimated}/{total_pairs} pairs estimated with Haversine")
+        if osrm_failures:
+            logger.warning(f"OSRM failed under the matrix deadline: {osrm_failures}/{total_pairs} pairs estimated with Haversine")
+        if stats is not None:
+            stats.update({
+                'cache_hits': cache_hits, 'same_location': same_location, 'osrm_calls': osrm_calls,
+                'estimated': estimated, 'osrm_failures': osrm_failures
+            })
+        
+        # Identical coordinates are answered locally, like a cache hit
+        metrics.CACHE_LOOKUPS.inc(cache_hits + same_location, result='hit')
+        metrics.CACHE_LOOKUPS.inc(osrm_calls, result='miss')
+        metrics.CACHE_LOOKUPS.inc(estimated, result='estimated')
+        metrics.MATRIX_BUILD_DURATION.observe(time.time() - matrix_start)
         return (distance_matrix, time_matrix_morning, time_matrix_afternoon, time_matrix_evening)
@@ -0,0 +1,121 @@
+"""Fleet compression service to shrink the vehicle set before solving."""
+
+from typing import Dict, List, Tuple
+
+from ..config import get_logger
+
+logger = get_logger(__name__)
+
+
+class FleetReducer:
+    """
+    Collapses identical vehicles into classes and caps each class by a provable bound.
+    
+    Two vehicles belong to the same class when they share capacity; the engines give
+    every vehicle the depot window, so capacity is all that tells vehicles apart.
+    A class ``a`` dominates class ``b`` when ``a`` has a larger capacity than ``b``:
+    any route driven by a ``b`` vehicle can be driven by an ``a`` vehicle at
+    identical cost.
+    
+    Since every used vehicle serves at least one customer, no solution uses more
+    than ``n`` vehicles (``n`` = number of customers). A vehicle with ``n`` or more
+    dominating vehicles can therefore always hand its route to an idle dominator,
+    so it is never needed in an optimal solution. On top of that, a class can never
+    use more vehicles than there are customers it is able to serve.
+    """
+    
+    @staticmethod
+    def compress(problem: Dict) -> Tuple[Dict, List[int]]:
+        """
+        Build a reduced copy of the problem with a compressed fleet.
+        
+        The reduced fleet is ordered by class (largest capacity first), and each
+        vehicle carries its class index in ``vehicle_classes`` so that solvers can
+        add symmetry-breaking constraints between identical vehicles.
+        
+        Args:
+            problem: Problem data from ProblemBuilder
+        
+        Returns:
+            Tuple of (reduced problem, original index of each reduced vehicle)
+        """
+        capacities = problem['vehicle_capacities']
+        num_vehicles = problem['num_vehicles']
+        
+        # Vehicles with locked prefixes start from their own positions
+        if any(problem.get('locked_prefixes') or []):
+            logger.info("Fleet compression: skipped, vehicles have locked route prefixes")
+            return problem, list(range(num_vehicles))
+        depot = problem.get('depot', 0)
+        
+        customers = [
+            i for i in range(len(problem['demands'])) if i != depot
+        ]
+        n_customers = len(customers)
+        
+        # Group vehicles into classes keyed by capacity, largest first
+        classes: Dict[int, List[int]] = {}
+        for k in range(num_vehicles):
+            classes.setdefault(int(capacities[k]), []).append(k)
+        
+        class_keys = sorted(classes, reverse=True)
+        
+        reduced_indices = []
+        reduced_classes = []
+        strict_dominators = 0
+        for class_idx, capacity in enumerate(class_keys):
+            members = classes[capacity]
+            dominance_bound = max(0, n_customers - strict_dominators)
+            strict_dominators += len(members)
+            
+            servable = sum(1 for i in customers if problem['demands'][i] <= capacity)
+            
+            keep = min(len(members), dominance_bound, servable)
+            reduced_indices.extend(members[:keep])
+            reduced_classes.extend([class_idx] * keep)
+        
+        if not reduced_indices:
+            # No vehicle can serve anybody: let the solver report dropped customers
+            logger.info("Fleet compression: no vehicle can serve any customer, keeping full fleet")
+            return problem, list(range(num_vehicles))
+        
+        if len(reduced_indices) == num_vehicles:
+            logger.info(f"Fleet compression: no reduction possible ({num_vehicles} vehicles)")
+        else:
+            logger.info(
+                f"Fleet compression: {num_vehicles} -> {len(reduced_indices)} vehicles "
+                f"in {len(set(reduced_classes))} classes"
+            )
+        
+        reduced = dict(problem)
+        reduced['vehicle_capacities'] = [capacities[k] for k in reduced_indices]
+        reduced['num_vehicles'] = len(reduced_indices)
+        reduced['vehicle_classes'] = reduced_classes
+        if problem.get('vehicle_ids'):
+            reduced['vehicle_ids'] = [problem['vehicle_ids'][k] for k in reduced_indices]
+        
+        return reduced, reduced_indices
+    
+    @staticmethod
+    def expand_solution(solution: Dict, vehicle_map: List[int], original_problem: Dict) -> Dict:
+        """
+        Map routes of a reduced-fleet solution back to the original vehicles.
+        
+        Args:
+            solution: Solver solution computed on the reduced problem
+            vehicle_map: Original index of each reduced vehicle
+            original_problem: Problem data before compression
+        
+        Returns:
+            Solution referring to the original vehicle indices
+        """
+        vehicle_ids = original_problem.get('vehicle_ids') or []
+        
+        for route in solution.get('routes', []):
+            original_idx = vehicle_map[route['vehicle_id']]
+            route['vehicle_id'] = original_idx
+            if original_idx < len(vehicle_ids):
+                route['vehicle_name'] = vehicle_ids[original_idx]
+        
+        solution['total_vehicles_available'] = original_problem['num_vehicles']
+        return solution
@@ -0,0 +1,265 @@
+"""Memory estimates and admission control for solve requests."""
+
+import os
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from ..config import get_logger
+
+logger = get_logger(__name__)
+
+# Rough per-element costs (CPython lists of floats, numpy copies, Gurobi
+# variables and nonzeros, OR-Tools per node and vehicle state)
+BYTES_PER_MATRIX_ENTRY = 32
+BYTES_PER_ARRAY_ENTRY = 8
+BYTES_PER_MODEL_VAR = 120
+BYTES_PER_MODEL_NONZERO = 16
+# COO row/column/value arrays plus their CSR copy while a Gurobi model is built
+BYTES_PER_BUILD_NONZERO = 48
+# Presolve keeps a reduced copy of the model next to the original
+PRESOLVE_COPIES = 2
+ORTOOLS_BYTES_PER_NODE_VEHICLE = 48
+ORTOOLS_CACHED_CALLBACKS = 3
+ENGINE_BASELINE_BYTES = 64 * 1024 * 1024
+
+# Share of the available memory a single request may plan to use when no
+# explicit budget is configured
+AUTO_BUDGET_FRACTION = 0.8
+
+
+class MemoryGuard:
+    """
+    Predicts the peak memory of a solve and admits, downgrades or rejects it.
+    
+    The estimate only needs the number of nodes, the fleet size and the
+    engine, so it runs before matrices are fetched or models are built. It is
+    deliberately coarse (per-element costs above): its job is to tell a solve
+    that needs hundreds of MB from one that needs tens of GB.
+    
+    When a request does not fit, it is moved to the next lighter engine
+    (three-index -> two-index Gurobi model -> OR-Tools -> construction
+    heuristic; HGS first drops its worker processes) or rejected with 413.
+    """
+    
+    POLICIES = ('downgrade', 'reject', 'off')
+    
+    def __init__(self, policy: str = 'downgrade', budget_mb: float = 0.0):
+        """
+        Initialize the guard.
+        
+        Args:
+            policy: 'downgrade' (use a lighter engine), 'reject' (413) or 'off'
+            budget_mb: Memory a request may use (0 = share of the currently
+                available memory)
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown memory admission policy: {policy}. Valid options: {', '.join(self.POLICIES)}")
+        self.policy = policy
+        self.budget_mb = budget_mb
+    
+    @staticmethod
+    def estimate(num_nodes: int,
+                 num_vehicles: int,
+                 solver_type: str,
+                 formulation: Optional[str] = None,
+                 workers: int = 1) -> Dict[str, int]:
+        """
+        Estimate the peak memory of a solve in bytes.
+        
+        Args:
+            num_nodes: Nodes including the depot
+            num_vehicles: Vehicles handed to the engine
+            solver_type: Solver type
+            formulation: Gurobi formulation (gurobi and hybrid)
+            workers: HGS worker processes
+        
+        Returns:
+            Bytes of the 'matrices', the 'engine' and the 'total'
+        """
+        n = num_nodes
+        pairs = n * n
+        customers = max(0, n - 1)
+        arcs = n * (n - 1)
+        
+        # Distance and time matrices plus the three raw travel time matrices
+        matrices = 5 * pairs * BYTES_PER_MATRIX_ENTRY
+        
+        def ortools() -> int:
+            return (
+                ORTOOLS_CACHED_CALLBACKS * pairs * BYTES_PER_ARRAY_ENTRY
+                + n * num_vehicles * ORTOOLS_BYTES_PER_NODE_VEHICLE
+            )
+        
+        def gurobi(form: str) -> int:
+            if form == 'two_index':
+                variables = arcs + n + customers
+                nonzeros = 6 * arcs
+            else:
+                # x per vehicle and arc, u per vehicle and node, z per vehicle and customer
+                variables = num_vehicles * (arcs + n + customers + 1) + customers
+                nonzeros = 7 * num_vehicles * arcs
+            return (
+                2 * pairs * BYTES_PER_ARRAY_ENTRY
+                + PRESOLVE_COPIES * (variables * BYTES_PER_MODEL_VAR + nonzeros * BYTES_PER_MODEL_NONZERO)
+                + nonzeros * BYTES_PER_BUILD_NONZERO
+            )
+        
+        # numpy copies of distance and time matrices used by the heuristics
+        arrays = 2 * pairs * BYTES_PER_ARRAY_ENTRY
+        if solver_type == 'ortools':
+            engine = ortools()
+        elif solver_type == 'gurobi':
+            engine = gurobi(formulation or 'three_index')
+        elif solver_type == 'hybrid':
+            engine = ortools() + gurobi(formulation or 'three_index')
+        elif solver_type == 'colgen':
+            # Route pool from OR-Tools; the master LP over the pool is small
+            engine = ortools() + arrays
+        elif solver_type == 'hgs':
+            # Each spawned worker receives its own copy of the problem
+            copies = workers if workers > 1 else 0
+            engine = arrays + copies * (2 * pairs * BYTES_PER_MATRIX_ENTRY + arrays)
+        else:
+            engine = arrays
+        engine += ENGINE_BASELINE_BYTES
+        
+        return {'matrices': matrices, 'engine': engine, 'total': matrices + engine}
+    
+    def budget_bytes(self) -> Optional[int]:
+        """Memory a request may use, or None if it cannot be determined."""
+        if self.budget_mb > 0:
+            return int(self.budget_mb * 1024 * 1024)
+        available = _available_memory_bytes()
+        if available is None:
+            return None
+        return int(available * AUTO_BUDGET_FRACTION)
+    
+    def admit(self,
+              problem: Dict,
+              solver_type: str,
+              formulation: Optional[str] = None,
+              workers: int = 1,
+              compressed_fleet: bool = True,
+              share: int = 1) -> Dict:
+        """
+        Decide how a problem is solved before any large allocation.
+        
+        Args:
+            problem: Problem data from ProblemBuilder (matrices not needed)
+            solver_type: Requested solver
+            formulation: Requested Gurobi formulation
+            workers: HGS worker processes
+            compressed_fleet: Whether fleet compression will cap the fleet
+                (the engine then sees at most one vehicle per customer)
+            share: Number of solves running side by side, each getting an
+                equal part of the budget
+        
+        Returns:
+            Admission with the 'solver', 'formulation' and 'workers' to use,
+            the estimate in MB, the budget in MB and 'downgraded_from' when
+            the engine was changed
+        
+        Raises:
+            HTTPException: 413 if no admissible engine fits the budget
+        """
+        num_nodes = len(problem['demands'])
+        num_vehicles = problem['num_vehicles']
+        if compressed_fleet:
+            num_vehicles = min(num_vehicles, max(1, num_nodes - 1))
+        budget = self.budget_bytes() if self.policy != 'off' else None
+        if budget is not None:
+            budget //= max(1, share)
+        
+        requested = {'solver': solver_type, 'formulation': formulation, 'workers': workers}
+        candidates = [requested]
+        if self.policy == 'downgrade':
+            candidates += self._lighter_engines(requested, bool(any(problem.get('locked_prefixes') or [])))
+        
+        for candidate in candidates:
+            estimate = self.estimate(
+                num_nodes, num_vehicles, candidate['solver'], candidate['formulation'], candidate['workers']
+            )
+            if budget is None or estimate['total'] <= budget:
+                break
+        else:
+            estimate = self.estimate(num_nodes, num_vehicles, solver_type, formulation, workers)
+            raise HTTPException(
+                status_code=413,
+                detail=f"Problem too large for the available memory: {solver_type} on {num_nodes} nodes "
+                       f"and {num_vehicles} vehicles needs about {_mb(estimate['total'])} MB, "
+                       f"budget is {_mb(budget)} MB. Use a lighter solver or split the problem."
+            )
+        
+        admission = {
+            **candidate,
+            'estimated_mb': _mb(estimate['total']),
+            'estimated_matrices_mb': _mb(estimate['matrices']),
+            'estimated_engine_mb': _mb(estimate['engine']),
+            'budget_mb': _mb(budget) if budget is not None else None
+        }
+        if candidate is not requested:
+            admission['downgraded_from'] = {k: v for k, v in requested.items() if v is not None}
+            logger.warning(
+                f"Memory guard: {solver_type} needs about "
+                f"{_mb(self.estimate(num_nodes, num_vehicles, solver_type, formulation, workers)['total'])} MB "
+                f"(budget {_mb(budget)} MB), solving with {candidate['solver']}"
+                + (f" ({candidate['formulation']})" if candidate['formulation'] else "")
+            )
+        return admission
+    
+    @staticmethod
+    def _lighter_engines(requested: Dict, locked: bool) -> List[Dict]:
+        """Fallback engines for a request, lightest last."""
+        solver_type = requested['solver']
+        chain: List[Dict] = []
+        if solver_type in ('gurobi', 'hybrid') and requested['formulation'] != 'two_index' and not locked:
+            chain.append({**requested, 'formulation': 'two_index'})
+        if solver_type == 'hgs' and requested['workers'] > 1:
+            chain.append({**requested, 'workers': 1})
+        if solver_type in ('gurobi', 'hybrid', 'colgen'):
+            chain.append({'solver': 'ortools', 'formulation': None, 'workers': 1})
+        # The construction heuristic cannot keep locked route prefixes
+        if solver_type != 'heuristic' and not locked:
+            chain.append({'solver': 'heuristic', 'formulation': None, 'workers': 1})
+        return chain
+
+
+def _available_memory_bytes() -> Optional[int]:
+    """Memory this process can still allocate (cgroup limit or MemAvailable)."""
+    limits = []
+    cgroup_files = (
+        ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current'),
+        ('/sys/fs/cgroup/memory/memory.limit_in_bytes', '/sys/fs/cgroup/memory/memory.usage_in_bytes'),
+    )
+    for limit_file, usage_file in cgroup_files:
+        try:
+            with open(limit_file) as f:
+                limit = f.read().strip()
+            with open(usage_file) as f:
+                usage = int(f.read().strip())
+        except (OSError, ValueError):
+            continue
+        # "max" (v2) or a huge number (v1) mean no limit
+        if limit.isdigit() and int(limit) < 1 << 60:
+            limits.append(max(0, int(limit) - usage))
+        break
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    limits.append(int(line.split()[1]) * 1024)
+                    break
+    except (OSError, ValueError, IndexError):
+        pass
+    if not limits and hasattr(os, 'sysconf'):
+        try:
+            limits.append(os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE'))
+        except (OSError, ValueError):
+            pass
+    return min(limits) if limits else None
+
+
+def _mb(num_bytes: Optional[float]) -> Optional[float]:
+    """Bytes to MB, rounded for reports."""
+    return round(num_bytes / 1024 / 1024, 1) if num_bytes is not None else None
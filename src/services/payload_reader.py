@@ -0,0 +1,428 @@
+"""
+Streaming ingestion of problem payloads into column arrays.
+
+The request body is parsed incrementally (ijson) and every customer is
+validated against the payload models and written into flat arrays as soon
+as its object is complete, so the nested JSON tree of all customers is never
+held in memory. Without ijson the body is parsed in one piece and converted
+the same way.
+"""
+
+from array import array
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+
+from ..config import get_logger
+from ..models import Customer, Depot, Vehicle
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+# Validation errors reported before a payload is rejected
+MAX_ERRORS = 50
+
+_VEHICLES = TypeAdapter(List[Vehicle])
+
+
+class PayloadError(Exception):
+    """Invalid payload; ``errors`` uses the FastAPI validation error format."""
+    
+    def __init__(self, errors: List[Dict]):
+        super().__init__(f"{len(errors)} validation error(s) in payload")
+        self.errors = errors
+
+
+class PayloadColumns:
+    """
+    Customers of a payload as column arrays, with the small top-level sections.
+    
+    Per-date demands and time windows of aggregated payloads are stored as
+    sparse (customer row, date code, value) triplets. ProblemBuilder accepts
+    it wherever it accepts a payload dict for /solve and /solve-dates.
+    """
+    
+    def __init__(self,
+                 depot: Dict,
+                 vehicles: List[Dict],
+                 metadata: Dict,
+                 date: Optional[str],
+                 ids: List[Any],
+                 names: List[Optional[str]],
+                 lat: np.ndarray,
+                 lon: np.ndarray,
+                 demand: np.ndarray,
+                 dated: np.ndarray,
+                 tw_start: np.ndarray,
+                 tw_end: np.ndarray,
+                 service_min: np.ndarray,
+                 dates: List[str],
+                 demand_rows: np.ndarray,
+                 demand_dates: np.ndarray,
+                 demand_units: np.ndarray,
+                 tw_rows: np.ndarray,
+                 tw_dates: np.ndarray,
+                 tw_date_start: np.ndarray,
+                 tw_date_end: np.ndarray):
+        self.depot = depot
+        self.vehicles = vehicles
+        self.metadata = metadata
+        self.date = date
+        self.ids = ids
+        self.names = names
+        self.lat = lat
+        self.lon = lon
+        # Single-day demand, used by customers without per-date demands (dated == False)
+        self.demand = demand
+        self.dated = dated
+        self.tw_start = tw_start
+        self.tw_end = tw_end
+        self.service_min = service_min
+        self.dates = dates
+        self.demand_rows = demand_rows
+        self.demand_dates = demand_dates
+        self.demand_units = demand_units
+        self.tw_rows = tw_rows
+        self.tw_dates = tw_dates
+        self.tw_date_start = tw_date_start
+        self.tw_date_end = tw_date_end
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def header(self) -> Dict:
+        """Top-level sections without customers, in payload format."""
+        header = {'depot': self.depot, 'vehicles': self.vehicles, 'metadata': self.metadata}
+        if self.date is not None:
+            header['date'] = self.date
+        return header
+    
+    def demands_on(self, date: str) -> np.ndarray:
+        """Demand of every customer on a date (0 = not active)."""
+        demand = np.where(self.dated, 0.0, self.demand)
+        code = self._date_code(date)
+        if code is not None:
+            selected = self.demand_dates == code
+            demand[self.demand_rows[selected]] = self.demand_units[selected]
+        return demand
+    
+    def time_windows_on(self, date: str):
+        """(start, end) arrays of every customer's time window on a date."""
+        start, end = self.tw_start.copy(), self.tw_end.copy()
+        code = self._date_code(date)
+        if code is not None:
+            selected = self.tw_dates == code
+            start[self.tw_rows[selected]] = self.tw_date_start[selected]
+            end[self.tw_rows[selected]] = self.tw_date_end[selected]
+        return start, end
+    
+    def active_dates(self) -> List[str]:
+        """Dates with at least one positive per-date demand."""
+        codes = np.unique(self.demand_dates[self.demand_units > 0])
+        return [self.dates[int(code)] for code in codes]
+    
+    def _date_code(self, date: str) -> Optional[int]:
+        try:
+            return self.dates.index(date)
+        except ValueError:
+            return None
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the column arrays."""
+        return sum(
+            value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray)
+        )
+
+
+class PayloadReader:
+    """
+    Builds PayloadColumns from parse events or from an already parsed payload.
+    
+    Top-level sections other than 'customers' are small and kept as plain
+    objects; customers are validated one by one and appended to the columns.
+    """
+    
+    def __init__(self):
+        self._sections: Dict[str, Any] = {}
+        self._errors: List[Dict] = []
+        self._dates: Dict[str, int] = {}
+        self._ids: List[Any] = []
+        self._names: List[Optional[str]] = []
+        self._lat = array('d')
+        self._lon = array('d')
+        self._demand = array('d')
+        self._dated = array('b')
+        self._tw_start = array('i')
+        self._tw_end = array('i')
+        self._service = array('i')
+        self._demand_rows = array('i')
+        self._demand_dates = array('i')
+        self._demand_units = array('d')
+        self._tw_rows = array('i')
+        self._tw_dates = array('i')
+        self._tw_date_start = array('i')
+        self._tw_date_end = array('i')
+        # Parse state: nesting depth of the root object / customers array,
+        # current top-level key, and the value being built
+        self._started = False
+        self._depth = 0
+        self._key: Optional[str] = None
+        self._stack: List = []
+        self._keys: List = []
+        self._has_customers = False
+    
+    def feed_object(self, payload: Any) -> None:
+        """Convert an already parsed payload."""
+        if not isinstance(payload, dict):
+            self._fail([], "Payload must be a JSON object")
+        self._started = True
+        for key, value in payload.items():
+            if key == 'customers':
+                if not isinstance(value, list):
+                    self._fail(['customers'], "Input should be a valid list")
+                self._has_customers = True
+                for customer in value:
+                    self.add_customer(customer)
+            else:
+                self._sections[key] = value
+    
+    def feed(self, events: List) -> None:
+        """
+        Consume a batch of ijson basic_parse events.
+        
+        Structural events of the root object and the customers array are
+        tracked by depth; every other value (a customer or a top-level
+        section) is built from its events and handed over when complete.
+        """
+        stack, keys = self._stack, self._keys
+        for event, value in events:
+            if stack:
+                if event == 'map_key':
+                    keys[-1] = value
+                elif event == 'start_map' or event == 'start_array':
+                    container = {} if event == 'start_map' else []
+                    top = stack[-1]
+                    if type(top) is dict:
+                        top[keys[-1]] = container
+                    else:
+                        top.append(container)
+                    stack.append(container)
+                    keys.append(None)
+                elif event == 'end_map' or event == 'end_array':
+                    built = stack.pop()
+                    keys.pop()
+                    if not stack:
+                        if self._depth == 2:
+                            self.add_customer(built)
+                        else:
+                            self._sections[self._key] = built
+                else:
+                    top = stack[-1]
+                    if type(top) is dict:
+                        top[keys[-1]] = value
+                    else:
+                        top.append(value)
+            elif self._depth == 2:
+                # Inside the customers array
+                if event == 'start_map':
+                    stack.append({})
+                    keys.append(None)
+                elif event == 'end_array':
+                    self._depth = 1
+                else:
+                    self._fail(['customers', len(self._ids)], "Input should be a valid object")
+            elif self._depth == 1:
+                if event == 'map_key':
+                    self._key = value
+                elif event == 'end_map':
+                    self._depth = 0
+                elif self._key == 'customers':
+                    if event != 'start_array':
+                        self._fail(['customers'], "Input should be a valid list")
+                    self._has_customers = True
+                    self._depth = 2
+                elif event == 'start_map' or event == 'start_array':
+                    stack.append({} if event == 'start_map' else [])
+                    keys.append(None)
+                else:
+                    self._sections[self._key] = value
+            elif event == 'start_map' and not self._started:
+                self._started = True
+                self._depth = 1
+            else:
+                self._fail([], "Payload must be a JSON object")
+    
+    def add_customer(self, raw: Any) -> None:
+        """Validate one customer and append it to the columns."""
+        row = len(self._ids)
+        try:
+            customer = Customer.model_validate(raw)
+        except ValidationError as e:
+            self._collect(e, ['customers', row])
+            # Keep rows aligned with the payload so later errors point at the right customer
+            customer = None
+        
+        self._ids.append(customer.id if customer else None)
+        self._names.append(customer.name if customer else None)
+        self._lat.append(customer.location[0] if customer else 0.0)
+        self._lon.append(customer.location[1] if customer else 0.0)
+        self._demand.append((customer.demand_units or 0.0) if customer else 0.0)
+        self._dated.append(1 if customer and customer.demands_units is not None else 0)
+        tw = customer.time_window if customer else None
+        self._tw_start.append(tw.start_min if tw else 240)
+        self._tw_end.append(tw.end_min if tw else 1260)
+        self._service.append(customer.service_time_min if customer else 15)
+        if customer is None:
+            return
+        
+        for date, units in (customer.demands_units or {}).items():
+            self._demand_rows.append(row)
+            self._demand_dates.append(self._date_code(date))
+            self._demand_units.append(units or 0.0)
+        for date, window in (customer.time_windows or {}).items():
+            # Empty entries fall back to the single-day window, like missing ones
+            if window is None or not window.model_fields_set:
+                continue
+            self._tw_rows.append(row)
+            self._tw_dates.append(self._date_code(date))
+            self._tw_date_start.append(window.start_min)
+            self._tw_date_end.append(window.end_min)
+    
+    def finish(self) -> PayloadColumns:
+        """
+        Validate the top-level sections and return the columns.
+        
+        Raises:
+            PayloadError: If any part of the payload is invalid
+        """
+        if not self._started:
+            raise PayloadError([_error([], "Payload must be a JSON object", 'json_invalid')])
+        depot = self._validate_section('depot', Depot.model_validate)
+        vehicles = self._validate_section('vehicles', _VEHICLES.validate_python)
+        if not self._has_customers:
+            self._errors.append(_error(['customers'], "Field required", 'missing'))
+        metadata = self._sections.get('metadata') or {}
+        if not isinstance(metadata, dict):
+            self._errors.append(_error(['metadata'], "Input should be a valid dictionary", 'dict_type'))
+        date = self._sections.get('date')
+        if date is not None and not isinstance(date, str):
+            self._errors.append(_error(['date'], "Input should be a valid string", 'string_type'))
+        if self._errors:
+            raise PayloadError(self._errors)
+        
+        def column(values, dtype):
+            return np.frombuffer(values, dtype=dtype) if len(values) else np.zeros(0, dtype=dtype)
+        
+        columns = PayloadColumns(
+            depot=depot.model_dump(exclude_none=True),
+            vehicles=[v.model_dump(exclude_none=True) for v in vehicles],
+            metadata=metadata,
+            date=date,
+            ids=self._ids,
+            names=self._names,
+            lat=column(self._lat, np.float64),
+            lon=column(self._lon, np.float64),
+            demand=column(self._demand, np.float64),
+            dated=column(self._dated, np.int8).astype(bool),
+            tw_start=column(self._tw_start, np.int32),
+            tw_end=column(self._tw_end, np.int32),
+            service_min=column(self._service, np.int32),
+            dates=list(self._dates),
+            demand_rows=column(self._demand_rows, np.int32),
+            demand_dates=column(self._demand_dates, np.int32),
+            demand_units=column(self._demand_units, np.float64),
+            tw_rows=column(self._tw_rows, np.int32),
+            tw_dates=column(self._tw_dates, np.int32),
+            tw_date_start=column(self._tw_date_start, np.int32),
+            tw_date_end=column(self._tw_date_end, np.int32)
+        )
+        logger.info(
+            f"Payload ingested: {len(columns)} customers, {len(columns.dates)} dates, "
+            f"{columns.nbytes / 1024:.0f} KB of columns"
+        )
+        return columns
+    
+    def _validate_section(self, key: str, validate):
+        if key not in self._sections:
+            self._errors.append(_error([key], "Field required", 'missing'))
+            return None
+        try:
+            return validate(self._sections[key])
+        except ValidationError as e:
+            self._collect(e, [key])
+            return None
+    
+    def _date_code(self, date: str) -> int:
+        return self._dates.setdefault(date, len(self._dates))
+    
+    def _collect(self, error: ValidationError, loc: List) -> None:
+        for detail in error.errors(include_url=False, include_context=False, include_input=False):
+            self._errors.append(_error(loc + list(detail['loc']), detail['msg'], detail['type']))
+        if len(self._errors) >= MAX_ERRORS:
+            raise PayloadError(self._errors[:MAX_ERRORS])
+    
+    def _fail(self, loc: List, message: str) -> None:
+        raise PayloadError(self._errors + [_error(loc, message)])
+
+
+def _error(loc: List, message: str, kind: str = 'value_error') -> Dict:
+    """Validation error entry in the FastAPI format."""
+    return {'loc': ['body'] + loc, 'msg': message, 'type': kind}
+
+
+def read_payload_object(payload: Any) -> PayloadColumns:
+    """
+    Convert an already decoded payload (e.g. from MessagePack) into columns.
+    
+    Raises:
+        PayloadError: If the payload is invalid
+    """
+    reader = PayloadReader()
+    reader.feed_object(payload)
+    return reader.finish()
+
+
+async def read_payload(chunks: AsyncIterator[bytes]) -> PayloadColumns:
+    """
+    Parse a JSON payload from a byte stream into columns.
+    
+    Args:
+        chunks: Request body chunks (e.g. ``request.stream()``)
+    
+    Returns:
+        Payload columns
+    
+    Raises:
+        PayloadError: If the body is not valid JSON or the payload is invalid
+    """
+    if not IJSON_AVAILABLE:
+        import json
+        body = b''.join([chunk async for chunk in chunks])
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise PayloadError([_error([], f"Invalid JSON: {e}", 'json_invalid')])
+        return read_payload_object(payload)
+    
+    reader = PayloadReader()
+    events = ijson.sendable_list()
+    parser = ijson.basic_parse_coro(events, use_float=True)
+    try:
+        async for chunk in chunks:
+            if chunk:
+                parser.send(chunk)
+                reader.feed(events)
+                del events[:]
+        parser.close()
+    except ijson.JSONError as e:
+        message = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+        raise PayloadError([_error([], f"Invalid JSON: {message}", 'json_invalid')])
+    reader.feed(events)
+    return reader.finish()
@@ -1,24 +1,35 @@
 """Problem builder service to construct solver input from JSON payloads."""
 
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Union
+
+import numpy as np
+
+from .payload_reader import PayloadColumns
 
 
 class ProblemBuilder:
     """Builds solver input from various JSON formats."""
     
     @staticmethod
-    def build_from_payload(payload: dict, date: str, speed_kmph: float = 40.0) -> Optional[Dict]:
+    def build_from_payload(payload: Union[dict, PayloadColumns], date: str,
+                           speed_kmph: float = 40.0) -> Optional[Dict]:
         """
         Build solver input for a single date from JSON payload.
         
         Args:
-            payload: JSON data containing depot, vehicles, customers
+            payload: JSON data containing depot, vehicles, customers (or its
+                columns from the streaming reader)
             date: Date string (YYYY-MM-DD)
             speed_kmph: Vehicle speed in km/h (default: 40.0)
-            
+        
         Returns:
-            Solver data dictionary or None if no active customers
+            Solver data dictionary or None if no active customers. Its
+            'node_customers' lists the ID and name of the payload customer of
+            every node (None for the depot).
         """
+        if isinstance(payload, PayloadColumns):
+            return ProblemBuilder.build_from_columns(payload, date, speed_kmph)
+        
         depot = payload.get('depot', {}).get('location', [])
         vehicles = payload.get('vehicles', [])
         customers = payload.get('customers', [])
@@ -72,9 +83,59 @@ class ProblemBuilder:
         # Service time: choose max or default 15
         service_time = max([c.get('service_time_min', 15) for c in active_customers] + [15])
         
+        return ProblemBuilder._assemble(
+            payload, locations, demands, time_windows, service_time, speed_kmph,
+            # Node index -> payload customer, for enrichment without coordinate lookups
+            [None] + [{'id': c['id'], 'name': c['name']} for c in active_customers]
+        )
+    
+    @staticmethod
+    def build_from_columns(columns: PayloadColumns, date: str, speed_kmph: float = 40.0) -> Optional[Dict]:
+        """
+        Build solver input for a single date from streamed payload columns.
+        
+        Same result as build_from_payload on the original JSON, without
+        walking per-customer dictionaries.
+        
+        Args:
+            columns: Payload columns from the streaming reader
+            date: Date string (YYYY-MM-DD)
+            speed_kmph: Vehicle speed in km/h (default: 40.0)
+        
+        Returns:
+            Solver data dictionary or None if no active customers
+        """
+        demand = columns.demands_on(date)
+        active = np.flatnonzero(demand > 0)
+        if len(active) == 0:
+            return None
+        tw_start, tw_end = columns.time_windows_on(date)
+        
+        header = columns.header()
+        locations = [tuple(header['depot'].get('location', []))] + list(
+            zip(columns.lat[active].tolist(), columns.lon[active].tolist())
+        )
+        demands = [0] + demand[active].astype(int).tolist()
+        time_windows = [(0, 24*60)] + list(zip(tw_start[active].tolist(), tw_end[active].tolist()))
+        service_time = max(int(columns.service_min[active].max()), 15)
+        node_customers = [None] + [
+            {'id': columns.ids[i], 'name': columns.names[i]} for i in active.tolist()
+        ]
+        
+        return ProblemBuilder._assemble(
+            header, locations, demands, time_windows, service_time, speed_kmph, node_customers
+        )
+    
+    @staticmethod
+    def _assemble(payload: dict, locations: List, demands: List[int], time_windows: List,
+                  service_time: int, speed_kmph: float, node_customers: List) -> Dict:
+        """Add vehicles and the depot window to the customer data of a date."""
+        vehicles = payload.get('vehicles', [])
+        
         # Vehicle capacities and number
         vehicle_capacities = [int(v.get('capacity_units', 0)) for v in vehicles]
         num_vehicles = len(vehicle_capacities)
+        vehicle_ids = [v.get('id', idx) for idx, v in enumerate(vehicles)]
         
         # Determine depot time window
         depot_tw = payload.get('metadata', {}).get('depot_time_window')
@@ -97,14 +158,168 @@ class ProblemBuilder:
             'time_windows': time_windows,
             'vehicle_capacities': vehicle_capacities,
             'num_vehicles': num_vehicles,
+            'vehicle_ids': vehicle_ids,
             'depot': 0,
             'service_time': service_time,
             'vehicle_speed': (speed_kmph / 60.0),  # Convert km/h to km/min
-            'coord_type': 'latlon'
+            'coord_type': 'latlon',
+            'node_customers': node_customers
         }
         
         return solver_data
     
+    @staticmethod
+    def build_residual_from_payload(payload: dict, date: str, state: dict) -> Optional[Dict]:
+        """
+        Build the remaining subproblem of a day already in progress.
+        
+        Completed customers are removed. Each vehicle reported in the state
+        gets a virtual start node at its current position, with a time window
+        pinned to its availability time, and a locked route prefix: the start
+        node followed by its committed next stops. Its capacity is reduced by
+        the units already delivered. Idle vehicles leave the depot no earlier
+        than the current time.
+        
+        State format::
+        
+            {
+                "current_time_min": 720,
+                "completed_customers": ["C1", ...],
+                "vehicles": [
+                    {
+                        "vehicle_id": "V1",
+                        "location": [lat, lon],
+                        "available_min": 735,
+                        "completed_customers": ["C2", ...],
+                        "next_customers": ["C7"],
+                        "delivered_units": 12
+                    }
+                ]
+            }
+        
+        ``delivered_units`` defaults to the demand of the vehicle's completed
+        customers; ``available_min`` defaults to the current time.
+        
+        Args:
+            payload: JSON data containing depot, vehicles, customers
+            date: Date string (YYYY-MM-DD)
+            state: Current vehicle positions, times and completed stops
+        
+        Returns:
+            Solver data dictionary with 'locked_prefixes' and 'vehicle_starts',
+            or None if no customer is left
+        
+        Raises:
+            ValueError: If the state refers to unknown vehicles or customers
+        """
+        vehicle_states = state.get('vehicles', [])
+        completed = set(state.get('completed_customers', []))
+        for v in vehicle_states:
+            completed.update(v.get('completed_customers', []))
+        
+        demand_of = {}
+        for c in payload.get('customers', []):
+            if 'demands_units' in c:
+                demand_of[c.get('id')] = c.get('demands_units', {}).get(date, 0) or 0
+            elif 'demand_units' in c:
+                demand_of[c.get('id')] = c.get('demand_units', 0) or 0
+        
+        residual = dict(
+            payload,
+            customers=[c for c in payload.get('customers', []) if c.get('id') not in completed]
+        )
+        problem = ProblemBuilder.build_from_payload(residual, date)
+        if not problem:
+            return None
+        node_of = ProblemBuilder.customer_nodes(residual, date)
+        
+        # Nothing leaves the depot before the current time
+        depot_open, depot_close = problem['time_windows'][0]
+        current_time = state.get('current_time_min')
+        if current_time is not None:
+            depot_open = max(depot_open, int(current_time))
+            problem['time_windows'][0] = (depot_open, depot_close)
+        
+        vehicle_index = {vid: k for k, vid in enumerate(problem['vehicle_ids'])}
+        locked_prefixes = [[] for _ in range(problem['num_vehicles'])]
+        vehicle_starts = {}
+        
+        for v in vehicle_states:
+            k = vehicle_index.get(v.get('vehicle_id'))
+            if k is None:
+                raise ValueError(f"Unknown vehicle in state: {v.get('vehicle_id')}")
+            if k in vehicle_starts:
+                raise ValueError(f"Vehicle {v.get('vehicle_id')} appears twice in state")
+            
+            delivered = v.get('delivered_units')
+            if delivered is None:
+                delivered = sum(demand_of.get(c, 0) for c in v.get('completed_customers', []))
+            problem['vehicle_capacities'][k] = max(0, problem['vehicle_capacities'][k] - int(delivered))
+            
+            # Virtual start node at the current position
+            available = v.get('available_min', current_time)
+            available = max(int(available if available is not None else depot_open), depot_open)
+            start = len(problem['locations'])
+            problem['locations'].append(tuple(v['location']))
+            problem['demands'].append(0)
+            problem['time_windows'].append((available, available))
+            problem['node_customers'].append(None)
+            vehicle_starts[k] = start
+            
+            prefix = [start]
+            for c in v.get('next_customers', []):
+                if c not in node_of:
+                    raise ValueError(f"Committed customer {c} of vehicle {v.get('vehicle_id')} is not pending")
+                prefix.append(node_of[c])
+            locked_prefixes[k] = prefix
+        
+        problem['locked_prefixes'] = locked_prefixes
+        problem['vehicle_starts'] = vehicle_starts
+        return problem
+    
+    @staticmethod
+    def link_vehicle_starts(problem: Dict) -> None:
+        """
+        Make the depot-to-start arcs of virtual start nodes free.
+        
+        A vehicle with a start node leaves the depot, reaches its current
+        position at no distance and no time, and waits there until its
+        availability time. Call after the matrices are attached.
+        
+        Args:
+            problem: Problem data from build_residual_from_payload (modified in place)
+        """
+        depot = problem['depot']
+        for start in problem.get('vehicle_starts', {}).values():
+            problem['distance_matrix'][depot][start] = 0.0
+            problem['time_matrix'][depot][start] = 0
+    
+    @staticmethod
+    def customer_nodes(payload: dict, date: str) -> Dict[str, int]:
+        """
+        Map customer IDs to their node index in the problem built for a date.
+        
+        Follows the ordering of build_from_payload: depot is node 0, active
+        customers follow in payload order.
+        
+        Args:
+            payload: JSON data containing customers
+            date: Date string (YYYY-MM-DD)
+        
+        Returns:
+            Dictionary of customer ID to node index (active customers only)
+        """
+        nodes = {}
+        for c in payload.get('customers', []):
+            d = 0
+            if 'demands_units' in c:
+                d = c.get('demands_units', {}).get(date, 0)
+            elif 'demand_units' in c:
+                d = c.get('demand_units', 0)
+            if d and d > 0:
+                nodes[c.get('id')] = len(nodes) + 1
+        return nodes
+    
     @staticmethod
     def infer_date_from_payload(payload: dict) -> Optional[str]:
         """
@@ -114,10 +329,12 @@ class ProblemBuilder:
         
         Args:
             payload: JSON payload
-            
+        
         Returns:
             Date string or None
         """
+        if isinstance(payload, PayloadColumns):
+            payload = payload.header()
         if not isinstance(payload, dict):
             return None
         if 'date' in payload:
@@ -132,41 +349,53 @@ class ProblemBuilder:
         return None
     
     @staticmethod
-    def enrich_solution_routes(solution: Dict, problem: Dict, payload: dict, solved_date: str) -> List[Dict]:
+    def payload_dates(payload: dict) -> List[str]:
+        """
+        Dates with at least one active customer in an aggregated payload.
+        
+        Dates come from the customers' 'demands_units'; when metadata.date_range
+        is given, only dates between its first and last entry are kept.
+        
+        Args:
+            payload: JSON payload with per-date customer demands
+        
+        Returns:
+            Sorted date strings (empty for per-day payloads)
+        """
+        if isinstance(payload, PayloadColumns):
+            dates = set(payload.active_dates())
+            payload = payload.header()
+        else:
+            dates = set()
+            for c in payload.get('customers', []):
+                for date, d in (c.get('demands_units') or {}).items():
+                    if d and d > 0:
+                        dates.add(date)
+        
+        md = payload.get('metadata', {})
+        date_range = md.get('date_range') if isinstance(md, dict) else None
+        if isinstance(date_range, list) and date_range:
+            first, last = date_range[0], date_range[-1]
+            dates = {d for d in dates if first <= d <= last}
+        return sorted(dates)
+    
+    @staticmethod
+    def enrich_solution_routes(solution: Dict, problem: Dict) -> List[Dict]:
         """
         Enrich solution routes with customer information.
         
+        Customers are looked up by node index in the problem's
+        'node_customers', so customers sharing a location keep their own IDs.
+        
         Args:
             solution: Raw solver solution
             problem: Problem data used for solving
-            payload: Original request payload
-            solved_date: Date that was solved
-            
+        
         Returns:
             List of enriched routes
         """
         locations = problem['locations']
-        
-        # Rebuild active_customers by matching coordinates
-        active_customers = []
-        for loc_idx in range(1, len(locations)):
-            coord = tuple(locations[loc_idx])
-            match = None
-            for c in payload.get('customers', []):
-                if tuple(c.get('location', ())) == coord:
-                    # Find demand for this date
-                    d = 0
-                    if 'demands_units' in c:
-                        d = c.get('demands_units', {}).get(solved_date, 0)
-                    elif 'demand_units' in c:
-                        d = c.get('demand_units', 0)
-                    if d and d > 0:
-                        match = c
-                        break
-            if match:
-                active_customers.append(match)
-            else:
-                active_customers.append({'id': None, 'name': None, 'location': coord})
+        node_customers = problem['node_customers']
         
         # Transform routes
         routes_out = []
@@ -180,25 +409,15 @@ class ProblemBuilder:
                     # Depot stop
                     loc_info = {'type': 'depot', 'index': 0, 'location': locations[0]}
                 else:
-                    # Customer stop
-                    customer_idx = stop_location_idx - 1
-                    if customer_idx < len(active_customers):
-                        cust = active_customers[customer_idx]
-                        loc_info = {
-                            'type': 'customer',
-                            'index': stop_location_idx,
-                            'customer_id': cust.get('id'),
-                            'customer_name': cust.get('name'),
-                            'location': locations[stop_location_idx] if stop_location_idx < len(locations) else None
-                        }
-                    else:
-                        loc_info = {
-                            'type': 'customer',
-                            'index': stop_location_idx,
-                            'customer_id': None,
-                            'customer_name': None,
-                            'location': locations[stop_location_idx] if stop_location_idx < len(locations) else None
-                        }
+                    # Customer stop (virtual start nodes have no customer)
+                    cust = node_customers[stop_location_idx] if stop_location_idx < len(node_customers) else None
+                    loc_info = {
+                        'type': 'customer',
+                        'index': stop_location_idx,
+                        'customer_id': cust.get('id') if cust else None,
+                        'customer_name': cust.get('name') if cust else None,
+                        'location': locations[stop_location_idx] if stop_location_idx < len(locations) else None
+                    }
                 
                 new_stop = stop.copy()
                 new_stop['location_info'] = loc_info
@@ -0,0 +1,189 @@
+"""Stateful solve sessions for fast what-if re-solves."""
+
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from ..config import get_logger
+from .memory_guard import BYTES_PER_MATRIX_ENTRY, BYTES_PER_MODEL_VAR, BYTES_PER_MODEL_NONZERO
+
+logger = get_logger(__name__)
+
+
+class SolveSession:
+    """
+    Everything needed to re-solve a problem without rebuilding it.
+    
+    Keeps the built problem, the fleet-compressed solver view, the raw travel
+    time matrices (to rebuild the time matrix after time window changes), the
+    solver instance (whose Gurobi model is kept alive) and the routes of the
+    last solution, used as warm start.
+    """
+    
+    def __init__(self,
+                 payload: dict,
+                 solved_date: str,
+                 problem: Dict,
+                 solver_problem: Dict,
+                 vehicle_map: Optional[List[int]],
+                 travel_times: tuple,
+                 solver_type: str,
+                 params: Dict):
+        """
+        Initialize a session.
+        
+        Args:
+            payload: Original request payload
+            solved_date: Date the problem was built for
+            problem: Problem data with matrices
+            solver_problem: Problem handed to the solver (after fleet compression)
+            vehicle_map: Original index of each reduced vehicle, if compressed
+            travel_times: Raw (morning, afternoon, evening) travel time matrices
+            solver_type: Solver used for every solve of the session
+            params: Current solve parameters (time_limit, vehicle_penalty_weight,
+                distance_weight, mip_gap, formulation)
+        """
+        self.session_id = uuid.uuid4().hex[:16]
+        self.payload = payload
+        self.solved_date = solved_date
+        self.problem = problem
+        self.solver_problem = solver_problem
+        self.vehicle_map = vehicle_map
+        self.travel_times = travel_times
+        self.solver_type = solver_type
+        self.params = params
+        
+        self.solver = None
+        self.last_routes: Dict[int, List[int]] = {}
+        self.solves = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.lock = threading.Lock()
+    
+    def estimated_bytes(self) -> int:
+        """Approximate memory held by the session."""
+        n = len(self.problem['locations'])
+        # Distance and time matrices plus the three raw travel time matrices
+        size = 5 * n * n * BYTES_PER_MATRIX_ENTRY
+        
+        model_size = getattr(self.solver, 'kept_model_size', None)
+        if model_size is not None:
+            num_vars, num_nonzeros = model_size()
+            size += num_vars * BYTES_PER_MODEL_VAR + num_nonzeros * BYTES_PER_MODEL_NONZERO
+        return size
+    
+    def close(self) -> None:
+        """Release the engine model held by the session."""
+        release = getattr(self.solver, 'release_model', None)
+        if release is not None:
+            release()
+        self.solver = None
+    
+    def describe(self) -> Dict:
+        """Session metadata for API responses."""
+        return {
+            'session_id': self.session_id,
+            'date': self.solved_date,
+            'solver': self.solver_type,
+            'solves': self.solves,
+            'params': dict(self.params),
+            'estimated_memory_mb': round(self.estimated_bytes() / 1024 / 1024, 2),
+            'idle_seconds': round(time.time() - self.last_used, 1)
+        }
+
+
+class SessionManager:
+    """
+    In-memory registry of solve sessions with LRU eviction.
+    
+    When the estimated memory of all sessions exceeds the budget, the least
+    recently used sessions are closed until it fits again. The session being
+    added or refreshed is never evicted by its own request.
+    """
+    
+    def __init__(self, memory_budget_mb: float):
+        """
+        Initialize the session registry.
+        
+        Args:
+            memory_budget_mb: Memory budget for all sessions together
+        """
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self._sessions: "OrderedDict[str, SolveSession]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def add(self, session: SolveSession) -> List[str]:
+        """
+        Register a session and enforce the memory budget.
+        
+        Returns:
+            IDs of the evicted sessions
+        """
+        with self._lock:
+            self._sessions[session.session_id] = session
+            return self._evict(keep=session.session_id)
+    
+    def get(self, session_id: str) -> SolveSession:
+        """
+        Look up a session and mark it as most recently used.
+        
+        Raises:
+            KeyError: If the session does not exist (or was evicted)
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise KeyError(f"Unknown or evicted session: {session_id}")
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.time()
+            return session
+    
+    def refresh(self, session_id: str) -> List[str]:
+        """
+        Re-check the memory budget after a session changed size.
+        
+        Returns:
+            IDs of the evicted sessions
+        """
+        with self._lock:
+            return self._evict(keep=session_id)
+    
+    def remove(self, session_id: str) -> bool:
+        """Close and forget a session. Returns False if it did not exist."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        with session.lock:
+            session.close()
+        return True
+    
+    def list(self) -> List[Dict]:
+        """Metadata of all sessions, least recently used first."""
+        with self._lock:
+            return [session.describe() for session in self._sessions.values()]
+    
+    def _evict(self, keep: str) -> List[str]:
+        """Close least recently used sessions until the budget is met."""
+        evicted = []
+        total = sum(s.estimated_bytes() for s in self._sessions.values())
+        for session_id in list(self._sessions):
+            if total <= self.memory_budget_bytes:
+                break
+            if session_id == keep:
+                continue
+            session = self._sessions[session_id]
+            # Sessions in the middle of a solve are skipped, not interrupted
+            if not session.lock.acquire(blocking=False):
+                continue
+            try:
+                total -= session.estimated_bytes()
+                session.close()
+            finally:
+                session.lock.release()
+            del self._sessions[session_id]
+            evicted.append(session_id)
+            logger.info(f"Evicted solve session {session_id} (memory budget)")
+        return evicted
@@ -1,13 +1,25 @@
 """Solver orchestration service."""
 
+import os
 import time
 import threading
-from typing import Dict, Optional
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from fastapi import HTTPException
 
-from ..core.solvers import create_solver
+from ..core.solvers import create_solver, GurobiFormulation
 from ..config import get_logger, get_settings
+from ..utils import Deadline, Tracer, trace_span, trace_set, node_service_times
+from ..utils import metrics, profiling
+from ..utils.events import transform as event_transform
 from .distance_cache import DistanceCacheService
 from .problem_builder import ProblemBuilder
+from .fleet_reducer import FleetReducer
+from .stop_aggregator import StopAggregator
+from .memory_guard import MemoryGuard
+from .session_manager import SessionManager, SolveSession
 
 logger = get_logger(__name__)
 
@@ -23,6 +35,10 @@ class SolverService:
             osrm_base_url=settings.osrm_base_url
         )
         self.problem_builder = ProblemBuilder()
+        self.fleet_reducer = FleetReducer()
+        self.stop_aggregator = StopAggregator()
+        self.sessions = SessionManager(settings.session_memory_budget_mb)
+        self.memory_guard = MemoryGuard(settings.memory_admission, settings.solver_memory_budget_mb)
         self._solver_lock = threading.Lock()
         self._solver_running = False
     
@@ -30,126 +46,1317 @@ class SolverService:
         """Check if solver is currently running."""
         return self._solver_running
     
+    @contextmanager
+    def _exclusive_solver(self) -> Iterator[None]:
+        """
+        Hold the solver for one request.
+        
+        Raises:
+            ValueError: If another request is solving
+        """
+        metrics.SOLVER_QUEUE_DEPTH.inc()
+        try:
+            if not self._solver_lock.acquire(blocking=False):
+                metrics.SOLVER_REJECTED.inc()
+                raise ValueError("Solver is already running. Try again later.")
+            try:
+                self._solver_running = True
+                with profiling.SAMPLER.watch():
+                    yield
+            finally:
+                self._solver_running = False
+                self._solver_lock.release()
+        finally:
+            metrics.SOLVER_QUEUE_DEPTH.dec()
+    
     def solve(self, 
               payload: dict,
               solver_type: str = "ortools",
               time_limit: int = 60,
               vehicle_penalty_weight: Optional[float] = None,
               distance_weight: float = 1.0,
-              mip_gap: float = 0.01) -> Dict:
+              mip_gap: float = 0.01,
+              formulation: Optional[str] = None,
+              state: Optional[dict] = None) -> Dict:
         """
         Solve a CVRPTW problem from a JSON payload.
         
+        With a ``state`` (current vehicle positions, times and completed
+        stops), only the remaining part of the day is re-optimized: completed
+        customers are left out and each reported vehicle starts from its
+        current position through a locked route prefix.
+        
+        ``time_limit`` is the wall-clock budget of the whole request: matrix
+        fetching falls back to estimates once its share is used up, and the
+        engine (model build and search) gets whatever time remains.
+        
         Args:
             payload: Problem data in JSON format
-            solver_type: Solver to use ('ortools' or 'gurobi')
-            time_limit: Time limit in seconds
+            solver_type: Solver to use ('ortools', 'gurobi', 'hybrid', 'colgen', 'heuristic' or 'hgs')
+            time_limit: Wall-clock limit of the request in seconds
             vehicle_penalty_weight: Weight for minimizing vehicles
             distance_weight: Weight for distance minimization
             mip_gap: MIP gap for Gurobi
-            
+            formulation: Gurobi formulation ('three_index' or 'two_index')
+            state: Optional mid-day state for re-optimization
+                (see ProblemBuilder.build_residual_from_payload)
+        
         Returns:
             Solution dictionary
-            
+        
         Raises:
             ValueError: If solver is busy or problem has no active customers
         """
-        # Check if solver is already running
-        if not self._solver_lock.acquire(blocking=False):
-            raise ValueError("Solver is already running. Try again later.")
+        # One solve at a time: a busy solver rejects the request
+        with self._exclusive_solver():
+            tracer = Tracer('solve')
+            with tracer.activate():
+                deadline = Deadline(time_limit)
+                
+                with deadline.stage('problem_build'):
+                    # Infer date from payload
+                    solved_date = self.problem_builder.infer_date_from_payload(payload) or "unknown"
+                    logger.info(f"========== SOLVING FOR DATE: {solved_date} ==========")
+                    
+                    # Build problem from payload (remaining subproblem when re-optimizing)
+                    if state:
+                        problem = self.problem_builder.build_residual_from_payload(
+                            payload, solved_date, state
+                        )
+                    else:
+                        problem = self.problem_builder.build_from_payload(payload, solved_date)
+                    if problem:
+                        self._trace_problem(problem)
+                if not problem:
+                    logger.info(f"No active customers on {solved_date}")
+                    return {"status": "no_active_customers", "date": solved_date}
+                
+                # Merge customers sharing a location into single stops
+                reduced, node_groups = self._aggregate_stops(problem, deadline)
+                
+                # Check the predicted memory before matrices and models are allocated
+                admission = self._admit(reduced, solver_type, formulation, deadline)
+                solver_type, formulation = admission['solver'], admission['formulation']
+                
+                # Fetch real distances and travel times from cache
+                self._attach_matrices(reduced, deadline)
+                
+                settings = get_settings()
+                
+                # Collapse identical vehicles and drop those that can never be needed
+                solver_problem, vehicle_map = reduced, None
+                if settings.fleet_compression:
+                    with deadline.stage('fleet_compression'):
+                        solver_problem, vehicle_map = self.fleet_reducer.compress(reduced)
+                
+                # Create solver and solve
+                solve_params = self._solve_params(
+                    solver_type, solver_problem, time_limit, vehicle_penalty_weight,
+                    distance_weight, mip_gap, formulation, admission['workers']
+                )
+                logger.info(f"Creating {solver_type} solver...")
+                solver = create_solver(solver_type, solver_problem)
+                
+                logger.info("Starting optimization...")
+                # Incumbent routes of streaming requests refer to vehicles and customers of the request
+                with event_transform('incumbent', self._incumbent_mapper(problem, vehicle_map, node_groups)):
+                    solution = self._run_solver(solver, solver_type, solve_params, deadline)
+                
+                if not solution:
+                    return {"status": "no_solution_found", "date": solved_date}
+                
+                # Check for errors in solution
+                if solution.get('status') == 'error':
+                    return solution
+                
+                result = self._build_result(
+                    solution, problem, vehicle_map, payload, solved_date, solver_type, deadline,
+                    node_groups
+                )
+                result['memory'] = admission
+                
+                if state:
+                    result['reoptimization'] = self._describe_reoptimization(
+                        problem, result['routes'], state
+                    )
+            
+            return self._with_timings(result, tracer)
+    
+    def solve_dates(self,
+                    payload: dict,
+                    solver_type: str = "ortools",
+                    time_limit: int = 60,
+                    vehicle_penalty_weight: Optional[float] = None,
+                    distance_weight: float = 1.0,
+                    mip_gap: float = 0.01,
+                    formulation: Optional[str] = None,
+                    dates: Optional[List[str]] = None) -> Iterator[Dict]:
+        """
+        Solve every date of an aggregated payload in parallel processes.
         
-        try:
-            self._solver_running = True
-            start_time = time.time()
+        Distances and travel times are fetched once for the union of all
+        locations of the date range and sliced per date. Each date is then
+        solved in its own worker process with the full ``time_limit`` (minus
+        the matrix fetch), so a week takes about as long as its hardest day
+        when there are enough cores. Results are yielded as dates finish.
+        
+        Args:
+            payload: Aggregated problem data ('demands_units' keyed by date)
+            solver_type: Solver used for every date
+            time_limit: Wall-clock limit of each date in seconds
+            vehicle_penalty_weight: Weight for minimizing vehicles
+            distance_weight: Weight for distance minimization
+            mip_gap: MIP gap for Gurobi
+            formulation: Gurobi formulation ('three_index' or 'two_index')
+            dates: Dates to solve (default: all dates of the payload)
+        
+        Yields:
+            {'type': 'plan', ...} first, then one {'type': 'result', 'date', 'data'}
+            or {'type': 'error', 'date', 'message'} per date, then {'type': 'summary', ...}
+            whose 'matrix_phase' reports the shared phase before the dates are
+            dispatched and 'date_deadlines' each date's own budget
+        
+        Raises:
+            ValueError: If solver is busy or the payload has no dated demands
+        """
+        dates = dates or self.problem_builder.payload_dates(payload)
+        if not dates:
+            raise ValueError("Payload has no dates with demand ('demands_units' keyed by date)")
+        
+        with self._exclusive_solver():
+            tracer = Tracer('solve_dates')
+            with tracer.activate():
+                deadline = Deadline(time_limit)
+                settings = get_settings()
+                
+                with deadline.stage('problem_build'):
+                    problems = {
+                        date: self.problem_builder.build_from_payload(payload, date) for date in dates
+                    }
+                active = [date for date in dates if problems[date]]
+                workers = min(len(active), settings.multi_date_workers or os.cpu_count() or 1) or 1
+                aggregated = {date: self._aggregate_stops(problems[date], deadline) for date in active}
+                
+                # One matrix for the union of all locations of the range
+                union_locations = list(dict.fromkeys(
+                    loc for date in active for loc in aggregated[date][0]['locations']
+                ))
+                yield {'type': 'plan', 'dates': dates, 'active_dates': active,
+                       'union_locations': len(union_locations), 'workers': workers}
+                
+                union_matrices = None
+                if active:
+                    with deadline.stage('matrix_fetch'):
+                        union_matrices = self._fetch_matrices(union_locations, deadline)
+                union_index = {loc: i for i, loc in enumerate(union_locations)}
+                
+                jobs = {}
+                results = {}
+                for date in dates:
+                    problem = problems[date]
+                    if not problem:
+                        results[date] = {'type': 'result', 'date': date,
+                                         'data': {'status': 'no_active_customers', 'date': date}}
+                        continue
+                    try:
+                        jobs[date] = self._prepare_date(
+                            problem, *aggregated[date], union_matrices, union_index,
+                            solver_type, time_limit, vehicle_penalty_weight,
+                            distance_weight, mip_gap, formulation, deadline, workers
+                        )
+                    except HTTPException as e:
+                        results[date] = {'type': 'error', 'date': date, 'message': e.detail}
+                
+                for date in dates:
+                    if date in results:
+                        yield results[date]
+                
+                # The request deadline only covers the phase shared by all dates;
+                # each date is then measured against its own budget
+                matrix_phase = deadline.report()
+                
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                ) if jobs else None
+                try:
+                    futures = {
+                        executor.submit(_solve_in_worker, job['solver_type'], job['solver_problem'],
+                                        job['solve_params']): date
+                        for date, job in jobs.items()
+                    }
+                    for future in as_completed(futures):
+                        date = futures[future]
+                        results[date] = self._date_result(future, date, jobs[date], payload)
+                        yield results[date]
+                finally:
+                    if executor is not None:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                
+                solved = sum(1 for r in results.values() if r['type'] == 'result')
+                summary = {
+                    'type': 'summary',
+                    'dates': len(dates),
+                    'solved': solved,
+                    'union_locations': len(union_locations),
+                    'elapsed_seconds': round(time.time() - deadline.start, 2),
+                    'matrix_phase': matrix_phase,
+                    'date_deadlines': {
+                        date: {
+                            key: result['data']['deadline'][key]
+                            for key in ('budget_seconds', 'elapsed_seconds', 'met')
+                        }
+                        for date, result in results.items()
+                        if result['type'] == 'result' and 'deadline' in result['data']
+                    }
+                }
             
-            # Infer date from payload
-            solved_date = self.problem_builder.infer_date_from_payload(payload) or "unknown"
-            logger.info(f"========== SOLVING FOR DATE: {solved_date} ==========")
+            yield self._with_timings(summary, tracer)
+    
+    def _prepare_date(self, problem: Dict, reduced: Dict, node_groups: Optional[List[List[int]]],
+                      union_matrices: tuple, union_index: Dict, solver_type: str, time_limit: int, vehicle_penalty_weight: Optional[float],
+                      distance_weight: float, mip_gap: float, formulation: Optional[str],
+                      deadline: Deadline, workers: int) -> Dict:
+        """
+        Slice the union matrices for one date and prepare its solver input.
+        
+        Raises:
+            HTTPException: If the date does not fit the memory budget or the
+                parameters are invalid
+        """
+        admission = self._admit(reduced, solver_type, formulation, deadline, share=workers)
+        solver_type = admission['solver']
+        
+        with deadline.stage('matrix_slice'):
+            idx = [union_index[loc] for loc in reduced['locations']]
+            sliced = [[[matrix[i][j] for j in idx] for i in idx] for matrix in union_matrices]
+            self._set_matrices(reduced, *sliced)
+        
+        solver_problem, vehicle_map = reduced, None
+        if get_settings().fleet_compression:
+            with deadline.stage('fleet_compression'):
+                solver_problem, vehicle_map = self.fleet_reducer.compress(reduced)
+        
+        solve_params = self._solve_params(
+            solver_type, solver_problem, time_limit, vehicle_penalty_weight,
+            distance_weight, mip_gap, admission['formulation'], admission['workers']
+        )
+        # Each date gets the full limit, less what the shared matrix fetch used
+        reserve = get_settings().deadline_reserve_seconds
+        solve_params['time_limit_seconds'] = max(1, int(deadline.remaining() - reserve))
+        return {
+            'problem': problem,
+            'solver_problem': solver_problem,
+            'vehicle_map': vehicle_map,
+            'node_groups': node_groups,
+            'solver_type': solver_type,
+            'solve_params': solve_params,
+            'admission': admission,
+            'time_limit': time_limit,
+            'shared_seconds': time.time() - deadline.start
+        }
+    
+    def _date_result(self, future, date: str, job: Dict, payload: dict) -> Dict:
+        """Turn a finished worker solve into a streamed result or error event."""
+        try:
+            solution, solve_seconds = future.result()
+        except Exception as e:
+            logger.exception(f"Solving {date} failed")
+            metrics.SOLVE_REQUESTS.inc(solver=job['solver_type'], status='error')
+            return {'type': 'error', 'date': date, 'message': str(e)}
+        
+        # A date's budget covers the shared phase and its own run, not the
+        # time it waited for a free worker
+        date_deadline = Deadline(
+            job['time_limit'], start=time.time() - solve_seconds - job['shared_seconds']
+        )
+        self._record_engine_run(solution, job['solver_type'], solve_seconds, date_deadline)
+        if not solution:
+            return {'type': 'error', 'date': date, 'message': 'No solution found'}
+        if solution.get('status') == 'error':
+            return {'type': 'error', 'date': date, 'message': solution.get('message', 'Unknown solver error')}
+        
+        result = self._build_result(
+            solution, job['problem'], job['vehicle_map'], payload, date,
+            job['solver_type'], date_deadline, job['node_groups']
+        )
+        result['memory'] = job['admission']
+        return {'type': 'result', 'date': date, 'data': result}
+    
+    def create_session(self,
+                       payload: dict,
+                       solver_type: str = "ortools",
+                       time_limit: int = 60,
+                       vehicle_penalty_weight: Optional[float] = None,
+                       distance_weight: float = 1.0,
+                       mip_gap: float = 0.01,
+                       formulation: Optional[str] = None) -> Dict:
+        """
+        Build a problem once, solve it and keep it for what-if re-solves.
+        
+        Args:
+            payload: Problem data in JSON format
+            solver_type: Solver used by every solve of the session
+            time_limit: Wall-clock limit of each solve in seconds
+            vehicle_penalty_weight: Weight for minimizing vehicles
+            distance_weight: Weight for distance minimization
+            mip_gap: MIP gap for Gurobi
+            formulation: Gurobi formulation ('three_index' or 'two_index')
+        
+        Returns:
+            Solution dictionary with a 'session' entry
+        
+        Raises:
+            ValueError: If solver is busy or problem has no active customers
+        """
+        with self._exclusive_solver():
+            tracer = Tracer('session_create')
+            with tracer.activate():
+                deadline = Deadline(time_limit)
+                
+                with deadline.stage('problem_build'):
+                    solved_date = self.problem_builder.infer_date_from_payload(payload) or "unknown"
+                    logger.info(f"========== NEW SESSION FOR DATE: {solved_date} ==========")
+                    
+                    problem = self.problem_builder.build_from_payload(payload, solved_date)
+                    if problem:
+                        self._trace_problem(problem)
+                if not problem:
+                    raise ValueError(f"No active customers on {solved_date}")
+                admission = self._admit(problem, solver_type, formulation, deadline)
+                solver_type, formulation = admission['solver'], admission['formulation']
+                travel_times = self._attach_matrices(problem, deadline)
+                
+                solver_problem, vehicle_map = problem, None
+                if get_settings().fleet_compression:
+                    with deadline.stage('fleet_compression'):
+                        solver_problem, vehicle_map = self.fleet_reducer.compress(problem)
+                
+                solve_params = self._solve_params(
+                    solver_type, solver_problem, time_limit, vehicle_penalty_weight,
+                    distance_weight, mip_gap, formulation, admission['workers']
+                )
+                session = SolveSession(
+                    payload, solved_date, problem, solver_problem, vehicle_map,
+                    travel_times, solver_type,
+                    {
+                        'time_limit': int(time_limit),
+                        'vehicle_penalty_weight': solve_params['vehicle_penalty_weight'],
+                        'distance_weight': distance_weight,
+                        'mip_gap': mip_gap,
+                        'formulation': solve_params.get('formulation'),
+                        'workers': solve_params.get('workers')
+                    }
+                )
+                
+                with session.lock:
+                    result = self._solve_session(session, deadline)
+                result['memory'] = admission
+                evicted = self.sessions.add(session)
+                result['session'] = session.describe()
+                if evicted:
+                    result['session']['evicted'] = evicted
             
-            # Build problem from payload
-            problem = self.problem_builder.build_from_payload(payload, solved_date)
-            if not problem:
-                logger.info(f"No active customers on {solved_date}")
-                return {"status": "no_active_customers", "date": solved_date}
+            return self._with_timings(result, tracer)
+    
+    def resolve_session(self,
+                        session_id: str,
+                        time_limit: Optional[int] = None,
+                        vehicle_penalty_weight: Optional[float] = None,
+                        distance_weight: Optional[float] = None,
+                        mip_gap: Optional[float] = None,
+                        time_windows: Optional[Dict[str, Dict]] = None) -> Dict:
+        """
+        Apply deltas to a session and re-optimize from its last solution.
+        
+        Parameters left as None keep their previous value. Time window changes
+        update the problem in place and rebuild the time matrix from the kept
+        travel times; nothing is fetched from the distance cache again.
+        
+        Args:
+            session_id: Session to re-solve
+            time_limit: New wall-clock limit in seconds
+            vehicle_penalty_weight: New vehicle weight
+            distance_weight: New distance weight
+            mip_gap: New MIP gap
+            time_windows: New windows as {customer ID: {"start_min", "end_min"}}
+        
+        Returns:
+            Solution dictionary with a 'session' entry
+        
+        Raises:
+            KeyError: If the session does not exist
+            ValueError: If solver is busy or a customer is unknown
+        """
+        session = self.sessions.get(session_id)
+        
+        with self._exclusive_solver():
+            tracer = Tracer('session_solve')
+            with tracer.activate():
+                with session.lock:
+                    for key, value in (('time_limit', time_limit),
+                                       ('vehicle_penalty_weight', vehicle_penalty_weight),
+                                       ('distance_weight', distance_weight),
+                                       ('mip_gap', mip_gap)):
+                        if value is not None:
+                            session.params[key] = value
+                    deadline = Deadline(session.params['time_limit'])
+                    
+                    if time_windows:
+                        with deadline.stage('problem_build') as span:
+                            self._apply_time_windows(session, time_windows)
+                            if span:
+                                span.set(time_window_changes=len(time_windows))
+                    
+                    logger.info(
+                        f"========== SESSION {session_id} RE-SOLVE #{session.solves + 1} =========="
+                    )
+                    result = self._solve_session(session, deadline)
+                
+                evicted = self.sessions.refresh(session_id)
+                result['session'] = session.describe()
+                if evicted:
+                    result['session']['evicted'] = evicted
             
-            # Fetch real distances and travel times from cache
-            logger.info("Fetching distances and travel times from cache...")
-            distance_matrix, time_matrix_morning, time_matrix_afternoon, time_matrix_evening = (
-                self.distance_cache.populate_matrix_all_times(problem['locations'])
+            return self._with_timings(result, tracer)
+    
+    def close_session(self, session_id: str) -> bool:
+        """Close a session and free its model. Returns False if unknown."""
+        return self.sessions.remove(session_id)
+    
+    def list_sessions(self) -> List[Dict]:
+        """Metadata of all open sessions."""
+        return self.sessions.list()
+    
+    def close(self) -> None:
+        """Close all solve sessions and free their models (application shutdown)."""
+        for session in self.sessions.list():
+            self.sessions.remove(session['session_id'])
+    
+    def _apply_time_windows(self, session: SolveSession, time_windows: Dict[str, Dict]) -> None:
+        """
+        Change customer time windows of a session and rebuild its time matrix.
+        
+        Raises:
+            ValueError: If a customer is not part of the session's problem
+        """
+        node_of = self.problem_builder.customer_nodes(session.payload, session.solved_date)
+        problem = session.problem
+        for customer_id, tw in time_windows.items():
+            node = node_of.get(customer_id)
+            if node is None:
+                # JSON object keys are strings, payload IDs may be numbers
+                node = next((n for c, n in node_of.items() if str(c) == str(customer_id)), None)
+            if node is None:
+                raise ValueError(f"Customer {customer_id} is not part of the session")
+            start, end = problem['time_windows'][node]
+            problem['time_windows'][node] = (
+                int(tw.get('start_min', start)), int(tw.get('end_min', end))
             )
-            
-            # Replace problem matrices with real-world data
-            problem['distance_matrix'] = distance_matrix
-            
-            # Build time matrix based on delivery time windows
-            problem['time_matrix'] = self._build_time_matrix(
-                problem, distance_matrix, time_matrix_morning, 
-                time_matrix_afternoon, time_matrix_evening
+        
+        # The traffic profile of a customer depends on its window start
+        problem['time_matrix'] = self._build_time_matrix(
+            problem, problem['distance_matrix'], *session.travel_times
+        )
+        session.solver_problem['time_matrix'] = problem['time_matrix']
+        logger.info(f"Applied {len(time_windows)} time window changes")
+    
+    def _solve_session(self, session: SolveSession, deadline: Deadline) -> Dict:
+        """
+        Solve a session's problem with its current parameters.
+        
+        The Gurobi three-index model is kept in the session's solver and only
+        refreshed between solves; other engines are recreated on the kept
+        problem. OR-Tools and Gurobi start from the last solution's routes.
+        """
+        params = session.params
+        solver_type = session.solver_type
+        solve_params = self._solve_params(
+            solver_type, session.solver_problem, params['time_limit'],
+            params['vehicle_penalty_weight'], params['distance_weight'],
+            params['mip_gap'], params['formulation'], params.get('workers')
+        )
+        
+        reuse_model = (
+            solver_type == 'gurobi'
+            and solve_params['formulation'] == GurobiFormulation.THREE_INDEX.value
+        )
+        if reuse_model:
+            solve_params['reuse_model'] = True
+        if session.solver is None or not reuse_model:
+            session.solver = create_solver(solver_type, session.solver_problem)
+        if session.last_routes and solver_type in ('ortools', 'gurobi'):
+            solve_params['initial_routes'] = session.last_routes
+        
+        solution = self._run_solver(session.solver, solver_type, solve_params, deadline)
+        session.solves += 1
+        
+        if not solution:
+            return {"status": "no_solution_found", "date": session.solved_date}
+        if solution.get('status') == 'error':
+            return solution
+        
+        # Warm start for the next solve, in solver (reduced fleet) indices
+        depot = session.solver_problem['depot']
+        session.last_routes = {
+            route['vehicle_id']: [s['location'] for s in route['route'] if s['location'] != depot]
+            for route in solution.get('routes', [])
+        }
+        
+        return self._build_result(
+            solution, session.problem, session.vehicle_map, session.payload,
+            session.solved_date, solver_type, deadline
+        )
+    
+    def _solve_params(self,
+                      solver_type: str,
+                      problem: Dict,
+                      time_limit: int,
+                      vehicle_penalty_weight: Optional[float],
+                      distance_weight: float,
+                      mip_gap: float,
+                      formulation: Optional[str],
+                      workers: Optional[int] = None) -> Dict:
+        """
+        Build the keyword arguments of solver.solve for a solver type.
+        
+        Args:
+            solver_type: Solver to use
+            problem: Problem data handed to the solver
+            time_limit: Time limit in seconds
+            vehicle_penalty_weight: Weight for minimizing vehicles (None = default for the solver)
+            distance_weight: Weight for distance minimization
+            mip_gap: MIP gap for Gurobi
+            formulation: Gurobi formulation (None = default from settings)
+            workers: HGS worker processes (None = default from settings)
+        
+        Returns:
+            Solve parameters
+        
+        Raises:
+            HTTPException: If the formulation is unknown or the solver cannot
+                handle locked route prefixes
+        """
+        settings = get_settings()
+        
+        # Set default vehicle penalty weight based on solver
+        if vehicle_penalty_weight is None:
+            vehicle_penalty_weight = (
+                settings.ortools_vehicle_penalty if solver_type == 'ortools' 
+                else settings.gurobi_vehicle_penalty
             )
-            
-            # Remove obsolete vehicle_speed parameter
-            problem.pop('vehicle_speed', None)
-            
-            # Set default vehicle penalty weight based on solver
-            if vehicle_penalty_weight is None:
-                settings = get_settings()
-                vehicle_penalty_weight = (
-                    settings.ortools_vehicle_penalty if solver_type == 'ortools' 
-                    else settings.gurobi_vehicle_penalty
+        
+        if any(problem.get('locked_prefixes') or []):
+            if solver_type not in ('ortools', 'gurobi', 'hybrid'):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Re-optimization with locked routes is not supported by {solver_type}. "
+                           f"Use 'ortools', 'gurobi' or 'hybrid'."
                 )
+            if formulation == GurobiFormulation.TWO_INDEX:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Re-optimization with locked routes requires the three_index formulation"
+                )
+            formulation = formulation or GurobiFormulation.THREE_INDEX.value
+        
+        solve_params = {
+            'time_limit_seconds': int(time_limit),
+            'log_search': False,
+            'vehicle_penalty_weight': vehicle_penalty_weight,
+            'distance_weight': distance_weight
+        }
+        
+        if solver_type in ('gurobi', 'hybrid', 'colgen'):
+            solve_params['mip_gap'] = mip_gap
+        if solver_type in ('gurobi', 'hybrid'):
+            solve_params['formulation'] = formulation or settings.default_gurobi_formulation
+            valid_formulations = [f.value for f in GurobiFormulation]
+            if solve_params['formulation'] not in valid_formulations:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown Gurobi formulation: {solve_params['formulation']}. "
+                           f"Valid options: {', '.join(valid_formulations)}"
+                )
+        if solver_type == 'hybrid':
+            solve_params['warm_start_fraction'] = settings.hybrid_warm_start_fraction
+        if solver_type == 'colgen':
+            solve_params['pool_fraction'] = settings.colgen_pool_fraction
+        if solver_type == 'hgs':
+            solve_params['workers'] = workers or settings.hgs_workers or None
+        
+        return solve_params
+    
+    @staticmethod
+    def _incumbent_mapper(problem: Dict,
+                          vehicle_map: Optional[List[int]],
+                          node_groups: Optional[List[List[int]]]):
+        """
+        Build the transform of incumbent events for one solve.
+        
+        Engines report routes as solver vehicle indices and node indices of
+        the reduced problem; the transform turns them into vehicle IDs and
+        the customer IDs of the request (merged stops expand to all their
+        customers). Events without routes pass unchanged.
+        
+        Args:
+            problem: Problem data before stop aggregation and fleet compression
+            vehicle_map: Original index of each reduced vehicle, if compressed
+            node_groups: Original nodes of each merged stop, if aggregated
+        
+        Returns:
+            Function mapping an incumbent event to the event sent to the client
+        """
+        vehicle_ids = problem.get('vehicle_ids') or []
+        node_customers = problem.get('node_customers') or []
+        
+        def customer_ids(node: int) -> List:
+            nodes = node_groups[node] if node_groups is not None and node < len(node_groups) else [node]
+            return [
+                node_customers[n]['id'] for n in nodes
+                if n < len(node_customers) and node_customers[n] is not None
+            ]
+        
+        def mapper(event: Dict) -> Dict:
+            if 'routes' not in event:
+                return event
+            routes = []
+            for route in event['routes']:
+                vehicle = vehicle_map[route['vehicle']] if vehicle_map is not None else route['vehicle']
+                routes.append({
+                    'vehicle_id': vehicle_ids[vehicle] if vehicle < len(vehicle_ids) else vehicle,
+                    'customer_ids': [cid for node in route['nodes'] for cid in customer_ids(node)]
+                })
+            return dict(event, routes=routes)
+        
+        return mapper
+    
+    def _aggregate_stops(self, problem: Dict, deadline: Deadline) -> tuple:
+        """
+        Merge co-located customers when stop aggregation is enabled.
+        
+        Returns:
+            (problem to solve, original nodes of each of its nodes or None)
+        """
+        settings = get_settings()
+        if not settings.stop_aggregation:
+            return problem, None
+        with deadline.stage('stop_aggregation') as span:
+            reduced, node_groups = self.stop_aggregator.merge(
+                problem, settings.stop_aggregation_radius_m
+            )
+            if span:
+                span.set(stops=len(problem['locations']) - 1, nodes=len(reduced['locations']) - 1)
+        return reduced, node_groups
+    
+    def _admit(self,
+               problem: Dict,
+               solver_type: str,
+               formulation: Optional[str],
+               deadline: Deadline,
+               share: int = 1) -> Dict:
+        """
+        Check a problem's predicted peak memory against the memory budget.
+        
+        Args:
+            problem: Problem data from ProblemBuilder, before matrices are attached
+            solver_type: Requested solver
+            formulation: Requested Gurobi formulation (None = default from settings)
+            deadline: Deadline of the request
+            share: Number of solves running side by side (each gets an equal
+                part of the budget)
+        
+        Returns:
+            Admission from MemoryGuard.admit (solver, formulation and workers to use)
+        
+        Raises:
+            HTTPException: 413 if the problem does not fit with any allowed engine
+        """
+        settings = get_settings()
+        locked = any(problem.get('locked_prefixes') or [])
+        if solver_type in ('gurobi', 'hybrid') and not formulation and not locked:
+            formulation = settings.default_gurobi_formulation
+        workers = (settings.hgs_workers or os.cpu_count() or 1) if solver_type == 'hgs' and share == 1 else 1
+        
+        with deadline.stage('admission') as span:
+            try:
+                admission = self.memory_guard.admit(
+                    problem, solver_type, formulation, workers,
+                    compressed_fleet=settings.fleet_compression,
+                    share=share
+                )
+            except HTTPException:
+                metrics.MEMORY_ADMISSIONS.inc(outcome='rejected')
+                raise
+            if span:
+                span.set(solver=admission['solver'], estimated_mb=admission['estimated_mb'])
+        metrics.MEMORY_ADMISSIONS.inc(
+            outcome='downgraded' if 'downgraded_from' in admission else 'admitted'
+        )
+        return admission
+    
+    def _run_solver(self,
+                    solver,
+                    solver_type: str,
+                    solve_params: Dict,
+                    deadline: Deadline) -> Optional[Dict]:
+        """
+        Run a solver on whatever time the request has left.
+        
+        The engine's time limit is the remaining wall-clock budget minus the
+        reserve kept for building the response (at least one second). The
+        engine reports how much of it went into building its model, the rest
+        is recorded as search time.
+        
+        Args:
+            solver: Solver instance
+            solver_type: Solver type, used as metrics label
+            solve_params: Keyword arguments of solver.solve (time limit replaced)
+            deadline: Deadline of the request
+        
+        Returns:
+            Raw solver solution
+        """
+        reserve = get_settings().deadline_reserve_seconds
+        solve_params['time_limit_seconds'] = max(1, int(deadline.remaining() - reserve))
+        logger.info(
+            f"Engine time limit: {solve_params['time_limit_seconds']}s "
+            f"({deadline.remaining():.1f}s left of {deadline.seconds:.0f}s)"
+        )
+        
+        solve_start = time.time()
+        with trace_span('engine', solver=solver.solver_name,
+                        time_limit_seconds=solve_params['time_limit_seconds']):
+            with deadline.track_memory('engine'):
+                solution = solver.solve(**solve_params)
+        
+        self._record_engine_run(solution, solver_type, time.time() - solve_start, deadline)
+        return solution
+    
+    @staticmethod
+    def _record_engine_run(solution: Optional[Dict],
+                           solver_type: str,
+                           solve_seconds: float,
+                           deadline: Deadline) -> None:
+        """Split an engine run into model build and search time, and count failures."""
+        build_seconds = (solution or {}).pop('model_build_seconds', None)
+        if build_seconds is not None:
+            metrics.MODEL_BUILD_DURATION.observe(build_seconds, solver=solver_type)
+        deadline.record('model_build', build_seconds or 0.0)
+        deadline.record('search', max(0.0, solve_seconds - (build_seconds or 0.0)))
+        
+        if not solution or solution.get('status') == 'error':
+            status = 'error' if solution else 'no_solution_found'
+            metrics.SOLVE_REQUESTS.inc(solver=solver_type, status=status)
+    
+    def _build_result(self,
+                      solution: Dict,
+                      problem: Dict,
+                      vehicle_map: Optional[List[int]],
+                      payload: dict,
+                      solved_date: str,
+                      solver_type: str,
+                      deadline: Deadline,
+                      node_groups: Optional[List[List[int]]] = None) -> Dict:
+        """
+        Turn a raw solver solution into the API result.
+        
+        Args:
+            solution: Raw solver solution (modified in place)
+            problem: Problem data before stop aggregation and fleet compression
+            vehicle_map: Original index of each reduced vehicle, if compressed
+            payload: Original request payload
+            solved_date: Date that was solved
+            solver_type: Solver that produced the solution
+            deadline: Deadline of the request
+            node_groups: Original nodes of each merged stop, if aggregated
+        
+        Returns:
+            Result dictionary with the time spent per stage under 'deadline'
+        """
+        with deadline.stage('result_build') as span:
+            # Map routes back to the real vehicles
+            if vehicle_map is not None:
+                solution = self.fleet_reducer.expand_solution(solution, vehicle_map, problem)
             
-            # Create solver and solve
-            logger.info(f"Creating {solver_type} solver...")
-            solver = create_solver(solver_type, problem)
-            
-            solve_params = {
-                'time_limit_seconds': int(time_limit),
-                'log_search': False,
-                'vehicle_penalty_weight': vehicle_penalty_weight,
-                'distance_weight': distance_weight
-            }
-            
-            if solver_type == 'gurobi':
-                solve_params['mip_gap'] = mip_gap
-            
-            logger.info("Starting optimization...")
-            solution = solver.solve(**solve_params)
-            
-            if not solution:
-                return {"status": "no_solution_found", "date": solved_date}
-            
-            # Check for errors in solution
-            if solution.get('status') == 'error':
-                return solution
-            
-            # Calculate execution time
-            elapsed_time = time.time() - start_time
-            logger.info(f"========== COMPLETED IN {elapsed_time:.2f}s ==========")
+            # Split merged stops back into their customers
+            if node_groups is not None:
+                solution = self.stop_aggregator.expand_solution(solution, node_groups, problem)
             
             # Enrich solution with customer information
-            routes_enriched = self.problem_builder.enrich_solution_routes(
-                solution, problem, payload, solved_date
-            )
-            
-            result = {
-                'date': solved_date,
-                'summary': {
-                    'num_vehicles_used': solution['num_vehicles_used'],
-                    'total_distance_km': solution['total_distance'],
-                    'total_load': solution['total_load'],
-                    'average_saturation_pct': solution['average_saturation_pct']
-                },
-                'routes': routes_enriched,
-                'objective_value': solution.get('objective_value'),
-                'solver': solver_type,
-                'execution_time_seconds': round(elapsed_time, 2)
+            routes_enriched = self.problem_builder.enrich_solution_routes(solution, problem)
+            if span:
+                span.set(routes=len(routes_enriched))
+        
+        # Calculate execution time
+        elapsed_time = time.time() - deadline.start
+        logger.info(f"========== COMPLETED IN {elapsed_time:.2f}s ==========")
+        
+        result = {
+            'date': solved_date,
+            'summary': {
+                'num_vehicles_used': solution['num_vehicles_used'],
+                'total_distance_km': solution['total_distance'],
+                'total_load': solution['total_load'],
+                'average_saturation_pct': solution['average_saturation_pct']
+            },
+            'routes': routes_enriched,
+            'objective_value': solution.get('objective_value'),
+            'solver': solver_type,
+            'execution_time_seconds': round(elapsed_time, 2)
+        }
+        
+        # Proven bound, warm start and pricing details (Gurobi-based solvers)
+        for key in ('best_bound', 'mip_gap', 'warm_start', 'column_generation'):
+            if key in solution:
+                result[key] = solution[key]
+        
+        result['deadline'] = deadline.report()
+        
+        num_customers = len(problem['locations']) - 1
+        metrics.SOLVE_REQUESTS.inc(solver=solver_type, status='success')
+        metrics.SOLVE_DURATION.observe(
+            elapsed_time, solver=solver_type, size=metrics.size_class(num_customers)
+        )
+        dropped = solution.get('customers_total', 0) - solution.get('customers_served', 0)
+        if dropped > 0:
+            metrics.DROPPED_CUSTOMERS.inc(dropped, solver=solver_type)
+        
+        return result
+    
+    def insert_orders(self,
+                      payload: dict,
+                      solution: dict,
+                      customers: List[dict],
+                      repair: bool = False,
+                      repair_time_limit: float = 0.5,
+                      vehicle_penalty_weight: Optional[float] = None,
+                      distance_weight: float = 1.0) -> Dict:
+        """
+        Insert late orders into an existing solution without re-solving.
+        
+        New customers are appended to the payload, so planned customers keep
+        their node index and routes that receive no new customer are returned
+        exactly as given. Does not take the solver lock: it runs while a full
+        solve is in progress.
+        
+        Args:
+            payload: Problem data the solution was computed for
+            solution: Result of a previous solve for the same date
+            customers: New customers in payload format
+            repair: Whether to run local search on the affected routes
+            repair_time_limit: Time budget of the repair in seconds
+            vehicle_penalty_weight: Cost of opening a route on an idle vehicle
+            distance_weight: Weight for distance minimization
+        
+        Returns:
+            Updated solution dictionary with an 'insertion' report
+        
+        Raises:
+            ValueError: If a new customer is already planned or the solution
+                does not match the payload
+        """
+        start_time = time.time()
+        settings = get_settings()
+        
+        solved_date = (
+            solution.get('date')
+            or self.problem_builder.infer_date_from_payload(payload)
+            or "unknown"
+        )
+        planned_routes = solution.get('routes', [])
+        planned_ids = {
+            stop.get('location_info', {}).get('customer_id')
+            for r in planned_routes for stop in r.get('route', [])
+        }
+        
+        # Append new customers; an inactive entry with the same ID is replaced
+        active_ids = self.problem_builder.customer_nodes(payload, solved_date)
+        new_ids = [c.get('id') for c in customers]
+        merged = [c for c in payload.get('customers', []) if c.get('id') in active_ids
+                  or c.get('id') not in new_ids]
+        for c in customers:
+            if c.get('id') in planned_ids:
+                raise ValueError(f"Customer {c.get('id')} is already planned")
+            if c.get('id') not in active_ids:
+                merged.append(c)
+        payload = dict(payload, customers=merged)
+        
+        problem = self.problem_builder.build_from_payload(payload, solved_date)
+        if not problem:
+            raise ValueError(f"No active customers on {solved_date}")
+        node_of = self.problem_builder.customer_nodes(payload, solved_date)
+        
+        # Existing plan as customer nodes per vehicle
+        routes = self._plan_nodes(problem, planned_routes, node_of)
+        
+        new_nodes = [node_of[i] for i in new_ids if i in node_of]
+        skipped = [i for i in new_ids if i not in node_of]
+        
+        self._attach_matrices(problem)
+        if vehicle_penalty_weight is None:
+            vehicle_penalty_weight = settings.gurobi_vehicle_penalty
+        
+        # Imported here: it pulls in OR-Tools, which is only loaded on first use
+        from ..core.solvers.insertion_impl import OrderInsertionImpl
+        inserter = OrderInsertionImpl(problem)
+        outcome = inserter.insert(
+            routes, new_nodes,
+            vehicle_penalty_weight=vehicle_penalty_weight,
+            distance_weight=distance_weight,
+            repair=repair,
+            time_limit_seconds=repair_time_limit
+        )
+        
+        vehicle_ids = problem.get('vehicle_ids') or []
+        for route in outcome['routes']:
+            if route['vehicle_id'] < len(vehicle_ids):
+                route['vehicle_name'] = vehicle_ids[route['vehicle_id']]
+        changed = self.problem_builder.enrich_solution_routes(outcome, problem)
+        affected = set(outcome['affected_vehicles'])
+        routes_out = sorted(
+            [r for r in planned_routes if r.get('vehicle_id') not in affected] + changed,
+            key=lambda r: r['vehicle_id']
+        )
+        
+        total_load = sum(r['load'] for r in routes_out)
+        total_capacity = sum(r['capacity'] for r in routes_out)
+        customer_of = {node: i for i, node in node_of.items()}
+        
+        elapsed_time = time.time() - start_time
+        logger.info(f"Order insertion completed in {elapsed_time * 1000:.0f} ms")
+        
+        return {
+            'date': solved_date,
+            'summary': {
+                'num_vehicles_used': len(routes_out),
+                'total_distance_km': round(sum(r['distance'] for r in routes_out), 2),
+                'total_load': total_load,
+                'average_saturation_pct': (
+                    round(total_load / total_capacity * 100, 1) if total_capacity > 0 else 0
+                )
+            },
+            'routes': routes_out,
+            'objective_value': outcome['objective_value'],
+            'solver': 'insertion',
+            'execution_time_seconds': round(elapsed_time, 3),
+            'insertion': {
+                'inserted': [
+                    {'customer_id': customer_of[node], 'vehicle_id': vehicle}
+                    for node, vehicle in outcome['inserted']
+                ],
+                'unassigned': [customer_of[node] for node in outcome['unassigned']],
+                'skipped': skipped,
+                'affected_vehicles': outcome['affected_vehicles'],
+                'repaired': outcome['repaired']
             }
-            
+        }
+    
+    def evaluate_moves(self,
+                       payload: dict,
+                       solution: dict,
+                       moves: List[dict],
+                       vehicle_penalty_weight: Optional[float] = None,
+                       distance_weight: float = 1.0) -> Dict:
+        """
+        Check manual edits of a solution without re-solving.
+        
+        Each move is evaluated on its own against the solution as given, in
+        constant time per move, so a batch can hold every candidate of an
+        edit (e.g. all positions a dragged stop could be dropped at). Does
+        not take the solver lock.
+        
+        Moves refer to customers by ID and to vehicles by index (the
+        'vehicle_id' of solution routes) or name:
+        
+        - {"type": "relocate", "customer_id": ..., "vehicle_id": ..., "position": ...}
+        - {"type": "insert", "customer_id": ..., "vehicle_id": ..., "position": ...}
+          for a customer of the payload that is not planned
+        - {"type": "swap", "customer_id": ..., "other_customer_id": ...}
+        - {"type": "remove", "customer_id": ...}
+        
+        Without a position, relocate and insert report the cheapest feasible one.
+        
+        Args:
+            payload: Problem data the solution was computed for
+            solution: Result of a previous solve for the same date
+            moves: Moves to evaluate
+            vehicle_penalty_weight: Cost of a used vehicle
+            distance_weight: Weight for distance minimization
+        
+        Returns:
+            Dictionary with the 'plan' as given (objective and route checks)
+            and one entry per move: feasibility, distance and objective delta
+            and the resulting routes, or 'valid': false with an error
+        
+        Raises:
+            ValueError: If the solution does not match the payload
+        """
+        start_time = time.time()
+        solved_date = (
+            solution.get('date')
+            or self.problem_builder.infer_date_from_payload(payload)
+            or "unknown"
+        )
+        problem = self.problem_builder.build_from_payload(payload, solved_date)
+        if not problem:
+            raise ValueError(f"No active customers on {solved_date}")
+        node_of = self.problem_builder.customer_nodes(payload, solved_date)
+        routes = self._plan_nodes(problem, solution.get('routes', []), node_of)
+        
+        self._attach_matrices(problem)
+        if vehicle_penalty_weight is None:
+            vehicle_penalty_weight = get_settings().gurobi_vehicle_penalty
+        
+        # Imported here: it pulls in OR-Tools, which is only loaded on first use
+        from ..core.solvers.evaluation_impl import RouteEvaluatorImpl
+        evaluator = RouteEvaluatorImpl(
+            problem, routes,
+            vehicle_penalty_weight=vehicle_penalty_weight,
+            distance_weight=distance_weight
+        )
+        vehicle_ids = problem.get('vehicle_ids') or []
+        vehicle_index = {name: k for k, name in enumerate(vehicle_ids)}
+        customer_of = {node: i for i, node in node_of.items()}
+        
+        def named(report: Dict) -> Dict:
+            vehicle = report['vehicle_id']
+            if vehicle < len(vehicle_ids):
+                report['vehicle_name'] = vehicle_ids[vehicle]
+            return report
+        
+        def node(customer_id) -> int:
+            if customer_id not in node_of:
+                raise ValueError(f"Customer {customer_id} is not active on {solved_date}")
+            return node_of[customer_id]
+        
+        evaluate_start = time.time()
+        results = []
+        for index, move in enumerate(moves):
+            try:
+                vehicle = move.get('vehicle_id')
+                other = move.get('other_customer_id')
+                outcome = evaluator.evaluate({
+                    'type': move.get('type'),
+                    'customer': node(move.get('customer_id')),
+                    'other': node(other) if other is not None else None,
+                    'vehicle': vehicle_index.get(vehicle, vehicle) if isinstance(vehicle, str) else vehicle,
+                    'position': move.get('position')
+                })
+            except ValueError as e:
+                results.append({'index': index, 'valid': False, 'error': str(e)})
+                continue
+            outcome['routes'] = [named(report) for report in outcome['routes']]
+            results.append(dict(outcome, index=index, valid=True))
+        evaluate_seconds = time.time() - evaluate_start
+        
+        plan_routes = [
+            named(evaluator.route_report(vehicle))
+            for vehicle, data in evaluator.routes.items() if data.stops
+        ]
+        logger.info(
+            f"Evaluated {len(moves)} moves in {evaluate_seconds * 1000:.1f} ms "
+            f"({(time.time() - start_time) * 1000:.0f} ms with problem build)"
+        )
+        return {
+            'date': solved_date,
+            'plan': {
+                'feasible': all(report['feasible'] for report in plan_routes),
+                'objective_value': round(evaluator.plan_objective(), 2),
+                'unplanned': [customer_of[node] for node in evaluator.unplanned],
+                'routes': plan_routes
+            },
+            'moves': results,
+            'evaluation_ms': round(evaluate_seconds * 1000, 3),
+            'execution_time_seconds': round(time.time() - start_time, 3)
+        }
+    
+    @staticmethod
+    def _plan_nodes(problem: Dict, planned_routes: List[Dict], node_of: Dict) -> Dict[int, List[int]]:
+        """
+        Customer nodes of each vehicle of a solution.
+        
+        Args:
+            problem: Problem built from the payload the solution belongs to
+            planned_routes: Routes of the solution
+            node_of: Node index of each customer ID
+        
+        Returns:
+            Customer nodes per vehicle index
+        
+        Raises:
+            ValueError: If a vehicle or customer of the solution is unknown
+        """
+        routes = {}
+        for r in planned_routes:
+            vehicle = r.get('vehicle_id')
+            if not isinstance(vehicle, int) or not 0 <= vehicle < problem['num_vehicles']:
+                raise ValueError(f"Unknown vehicle in solution: {vehicle}")
+            nodes = []
+            for stop in r.get('route', []):
+                info = stop.get('location_info') or {}
+                if info.get('type') == 'depot' or stop.get('location') == problem['depot']:
+                    continue
+                if info.get('customer_id') is not None:
+                    if info['customer_id'] not in node_of:
+                        raise ValueError(f"Planned customer {info['customer_id']} is not in the payload")
+                    nodes.append(node_of[info['customer_id']])
+                else:
+                    nodes.append(stop['location'])
+            routes[vehicle] = nodes
+        return routes
+    
+    def _attach_matrices(self, problem: Dict, deadline: Optional[Deadline] = None) -> tuple:
+        """
+        Fill the problem's distance and time matrices from the distance cache.
+        
+        Args:
+            problem: Problem data from ProblemBuilder (modified in place)
+            deadline: Optional deadline of the request (see _fetch_matrices)
+        
+        Returns:
+            Raw (morning, afternoon, evening) travel time matrices in minutes,
+            needed to rebuild the time matrix after time window changes
+        """
+        stage = deadline.stage('matrix_fetch') if deadline else trace_span('matrix_fetch')
+        with stage:
+            matrices = self._fetch_matrices(problem['locations'], deadline)
+            self._set_matrices(problem, *matrices)
+        
+        return matrices[1:]
+    
+    def _fetch_matrices(self, locations: List, deadline: Optional[Deadline] = None) -> tuple:
+        """
+        Distances and raw travel times between locations from the distance cache.
+        
+        With a deadline, OSRM is only called during the matrix share of the
+        request budget (MATRIX_BUDGET_FRACTION); remaining cache misses are
+        estimated and their count is reported with the deadline.
+        
+        Args:
+            locations: (lat, lon) tuples
+            deadline: Optional deadline of the request
+        
+        Returns:
+            (distance, morning, afternoon, evening) matrices
+        """
+        logger.info("Fetching distances and travel times from cache...")
+        stats = {}
+        matrices = self.distance_cache.populate_matrix_all_times(
+            locations,
+            deadline=deadline.budget(get_settings().matrix_budget_fraction) if deadline else None,
+            stats=stats
+        )
+        n = len(locations)
+        trace_set(pairs=n * (n - 1), **stats)
+        if deadline is not None:
+            deadline.details['estimated_matrix_pairs'] = stats.get('estimated', 0)
+        return matrices
+    
+    def _set_matrices(self, problem: Dict, distance_matrix, time_matrix_morning,
+                      time_matrix_afternoon, time_matrix_evening) -> None:
+        """
+        Put real-world distances into a problem and build its time matrix.
+        
+        Args:
+            problem: Problem data from ProblemBuilder (modified in place)
+            distance_matrix: Distances in km between the problem's locations
+            time_matrix_morning, time_matrix_afternoon, time_matrix_evening:
+                Raw travel times in minutes between the problem's locations
+        """
+        # Replace problem matrices with real-world data
+        problem['distance_matrix'] = distance_matrix
+        
+        # Build time matrix based on delivery time windows
+        with trace_span('time_matrix_build'):
+            problem['time_matrix'] = self._build_time_matrix(
+                problem, distance_matrix, time_matrix_morning, 
+                time_matrix_afternoon, time_matrix_evening
+            )
+        
+        # Remove obsolete vehicle_speed parameter
+        problem.pop('vehicle_speed', None)
+        
+        if problem.get('vehicle_starts'):
+            self.problem_builder.link_vehicle_starts(problem)
+    
+    @staticmethod
+    def _trace_problem(problem: Dict) -> None:
+        """Record the size of a built problem on the current span."""
+        trace_set(
+            locations=len(problem['locations']),
+            customers=len(problem['locations']) - 1,
+            vehicles=problem['num_vehicles']
+        )
+    
+    @staticmethod
+    def _with_timings(result: Dict, tracer: Tracer) -> Dict:
+        """
+        Attach a request's spans to its result under 'timings' and export
+        them as a Chrome trace file when TRACE_DIR is set.
+        """
+        if result.get('status') in ('error', 'no_solution_found', 'no_active_customers'):
             return result
-            
-        finally:
-            self._solver_running = False
-            self._solver_lock.release()
+        
+        timings = tracer.to_dict()
+        trace_dir = get_settings().trace_dir
+        if trace_dir:
+            try:
+                timings['trace_file'] = tracer.export_chrome(trace_dir)
+            except OSError as e:
+                logger.warning(f"Could not write trace file: {e}")
+        result['timings'] = timings
+        return result
+    
+    @staticmethod
+    def _describe_reoptimization(problem: Dict, routes: List[Dict], state: dict) -> Dict:
+        """
+        Label virtual start nodes in the routes and summarize the locked state.
+        
+        Args:
+            problem: Residual problem that was solved
+            routes: Enriched routes (start node stops are relabelled in place)
+            state: Mid-day state the problem was built from
+        
+        Returns:
+            Re-optimization report
+        """
+        vehicle_ids = problem.get('vehicle_ids') or []
+        vehicle_starts = problem['vehicle_starts']
+        start_owner = {node: k for k, node in vehicle_starts.items()}
+        
+        for route in routes:
+            for stop in route['route']:
+                k = start_owner.get(stop['location'])
+                if k is not None:
+                    stop['location_info'] = {
+                        'type': 'vehicle_position',
+                        'index': stop['location'],
+                        'vehicle_id': k,
+                        'vehicle_name': vehicle_ids[k],
+                        'location': problem['locations'][stop['location']]
+                    }
+        
+        completed = set(state.get('completed_customers', []))
+        committed = {}
+        for v in state.get('vehicles', []):
+            completed.update(v.get('completed_customers', []))
+            committed[v.get('vehicle_id')] = list(v.get('next_customers', []))
+        
+        return {
+            'current_time_min': state.get('current_time_min'),
+            'completed_customers': len(completed),
+            'remaining_customers': len(problem['demands']) - 1 - len(vehicle_starts),
+            'locked_vehicles': [
+                {
+                    'vehicle_id': k,
+                    'vehicle_name': vehicle_ids[k],
+                    'remaining_capacity': problem['vehicle_capacities'][k],
+                    'committed_customers': committed.get(vehicle_ids[k], [])
+                }
+                for k in sorted(vehicle_starts)
+            ]
+        }
     
     def _build_time_matrix(self, problem: Dict, distance_matrix, 
                           time_matrix_morning, time_matrix_afternoon, 
@@ -163,13 +1370,13 @@ class SolverService:
             time_matrix_morning: Morning travel times
             time_matrix_afternoon: Afternoon travel times
             time_matrix_evening: Evening travel times
-            
+        
         Returns:
             Time matrix scaled by 100
         """
-        demands = problem['demands']
         depot = problem['depot']
         time_windows = problem['time_windows']
+        service_times = node_service_times(problem)
         n = len(distance_matrix)
         time_matrix_scaled = [[0] * n for _ in range(n)]
         
@@ -192,12 +1399,20 @@ class SolverService:
                     else:  # After 18:00
                         travel_time_min = time_matrix_evening[i][j]
                     
-                    # Calculate service time: 10 min base + 2 min per unit
-                    units = demands[j] if j < len(demands) else 0
-                    service_time_min = 10 + (2 * units)
+                    # Service time: 10 min base + 2 min per unit
+                    # (merged stops carry the sum of their customers' service times)
+                    service_time_min = service_times[j]
                 
                 # Total time = travel + service (scaled by 100 for solver precision)
                 total_time_min = travel_time_min + service_time_min
                 time_matrix_scaled[i][j] = int(total_time_min * 100)
         
         return time_matrix_scaled
+
+
+def _solve_in_worker(solver_type: str, problem: Dict, solve_params: Dict):
+    """Solve one problem in a worker process; returns (raw solution, seconds)."""
+    start = time.time()
+    solver = create_solver(solver_type, problem)
+    solution = solver.solve(**solve_params)
+    return solution, time.time() - start
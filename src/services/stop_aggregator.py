@@ -0,0 +1,279 @@
+"""Co-located stop aggregation to shrink the routing graph before solving."""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from ..config import get_logger
+from ..utils import (
+    haversine_distance, minutes_to_time, round_to_5_minutes, format_time_minutes, node_service_times
+)
+
+logger = get_logger(__name__)
+
+METERS_PER_DEGREE = 111320.0
+
+
+class StopAggregator:
+    """
+    Merges customers at the same (or nearly the same) location into one node.
+    
+    The customers of a merged node are served back to back by one vehicle.
+    The node carries their summed demand and service time, and a time window
+    that keeps every member inside its own window. The time of a node is the
+    end of its service (service time is part of the incoming arc), so with
+    members served in order ``1..k`` and ``s_r`` the service time of member
+    ``r``, member ``l`` is done at ``T - sum(s_r for r > l)`` when the node is
+    done at ``T``. The node window is the intersection of
+    ``[a_l + suffix_l, b_l + suffix_l]`` over its members.
+    
+    Members are taken by window end; one that would empty the window or push
+    the demand beyond the largest vehicle starts a new node at the same
+    location, so every merged node can still be served by some vehicle.
+    """
+    
+    @staticmethod
+    def merge(problem: Dict, radius_m: float = 10.0) -> Tuple[Dict, Optional[List[List[int]]]]:
+        """
+        Build a reduced copy of the problem with co-located customers merged.
+        
+        Args:
+            problem: Problem data from ProblemBuilder, before matrices are attached
+            radius_m: Customers within this distance of a location's first
+                customer share its node (0 = identical coordinates only)
+        
+        Returns:
+            Tuple of (reduced problem, original nodes of each reduced node in
+            service order), or (problem, None) if nothing was merged
+        """
+        # Locked prefixes and start nodes refer to original node indices
+        if any(problem.get('locked_prefixes') or []) or problem.get('vehicle_starts'):
+            logger.info("Stop aggregation: skipped, vehicles have locked route prefixes")
+            return problem, None
+        
+        depot = problem['depot']
+        demands = problem['demands']
+        time_windows = problem['time_windows']
+        service = node_service_times(problem)
+        max_capacity = max(problem['vehicle_capacities'], default=0)
+        
+        customers = [i for i in range(len(demands)) if i != depot]
+        groups: List[List[int]] = []
+        windows: List[Tuple[int, int]] = []
+        for cluster in _clusters(problem['locations'], customers, radius_m, problem['locations'][depot]):
+            group: List[int] = []
+            load = 0
+            lo = hi = 0
+            for i in sorted(cluster, key=lambda i: (time_windows[i][1], time_windows[i][0])):
+                a, b = time_windows[i]
+                if group:
+                    # Everything already in the group is now served s_i earlier than the node time
+                    new_lo, new_hi = max(lo + service[i], a), min(hi + service[i], b)
+                    if new_lo <= new_hi and load + demands[i] <= max_capacity:
+                        group.append(i)
+                        load += demands[i]
+                        lo, hi = new_lo, new_hi
+                        continue
+                    groups.append(group)
+                    windows.append((lo, hi))
+                group, load, lo, hi = [i], demands[i], a, b
+            groups.append(group)
+            windows.append((lo, hi))
+        
+        if len(groups) == len(customers):
+            logger.info(f"Stop aggregation: no co-located customers ({len(customers)} stops)")
+            return problem, None
+        
+        # Depot keeps its index, merged nodes follow in order of their first customer
+        order = sorted(range(len(groups)), key=lambda g: min(groups[g]))
+        node_groups = [[depot]] + [groups[g] for g in order]
+        node_windows = [tuple(time_windows[depot])] + [windows[g] for g in order]
+        if depot != 0:
+            node_groups.insert(depot, node_groups.pop(0))
+            node_windows.insert(depot, node_windows.pop(0))
+        
+        reduced = dict(problem)
+        reduced['locations'] = [problem['locations'][group[0]] for group in node_groups]
+        reduced['demands'] = [sum(demands[i] for i in group) for group in node_groups]
+        reduced['time_windows'] = node_windows
+        reduced['service_times'] = [
+            0 if group == [depot] else sum(service[i] for i in group) for group in node_groups
+        ]
+        # Customer records stay with the original problem, which is used for enrichment
+        reduced.pop('node_customers', None)
+        
+        logger.info(
+            f"Stop aggregation: {len(customers)} -> {len(node_groups) - 1} stops "
+            f"({sum(1 for group in node_groups if len(group) > 1)} merged)"
+        )
+        return reduced, node_groups
+    
+    @staticmethod
+    def expand_solution(solution: Dict, node_groups: List[List[int]], original_problem: Dict) -> Dict:
+        """
+        Split merged stops of a solution back into the original customers.
+        
+        Each member gets its own stop with its demand, loads, time window and
+        time (node time less the service of the members served after it).
+        Stops and dropped customers are renumbered to the original nodes, and
+        route and solution service/travel times are recomputed from the
+        members' own service times.
+        
+        Args:
+            solution: Solver solution computed on the reduced problem
+            node_groups: Original nodes of each reduced node, from merge
+            original_problem: Problem data before aggregation
+        
+        Returns:
+            Solution referring to the original nodes
+        """
+        depot = original_problem['depot']
+        demands = original_problem['demands']
+        time_windows = original_problem['time_windows']
+        service = node_service_times(original_problem)
+        
+        for route in solution.get('routes', []):
+            stops = []
+            for stop in route.get('route', []):
+                members = node_groups[stop['location']]
+                if len(members) == 1:
+                    stop['location'] = members[0]
+                    stops.append(stop)
+                    continue
+                
+                delivered = 0
+                remaining_service = sum(service[i] for i in members)
+                for position, i in enumerate(members):
+                    remaining_service -= service[i]
+                    member = dict(stop, location=i)
+                    if 'time' in stop:
+                        member['time'] = round_to_5_minutes(stop['time'] - remaining_service)
+                        member['time_formatted'] = minutes_to_time(stop['time'] - remaining_service)
+                    if 'arrival_time' in stop:
+                        member['arrival_time'] = round(stop['arrival_time'] - remaining_service, 2)
+                        member['time_formatted'] = minutes_to_time(member['arrival_time'])
+                    if 'load_before' in stop:
+                        member['load_before'] = stop['load_before'] - delivered
+                        member['load_after'] = member['load_before'] - demands[i]
+                    if 'demand' in stop:
+                        member['demand'] = demands[i]
+                    _set_time_window(member, time_windows[i])
+                    if position > 0 and 'segment_distance' in stop:
+                        member['segment_distance'] = 0.0
+                        member['segment_distance_formatted'] = "0.00 km"
+                    delivered += demands[i]
+                    stops.append(member)
+            route['route'] = stops
+            if 'num_customers' in route:
+                route['num_customers'] = sum(1 for stop in stops if stop['location'] != depot)
+            _set_route_times(route, sum(service[stop['location']] for stop in stops))
+        
+        _set_solution_times(solution)
+        
+        if 'dropped_customers' in solution:
+            dropped = []
+            for entry in solution['dropped_customers']:
+                for i in node_groups[entry['location']]:
+                    member = dict(entry, location=i)
+                    if 'demand' in entry:
+                        member['demand'] = demands[i]
+                    _set_time_window(member, time_windows[i])
+                    dropped.append(member)
+            solution['dropped_customers'] = dropped
+        
+        if 'customers_total' in solution:
+            solution['customers_total'] = len(demands) - 1
+            solution['customers_served'] = len({
+                stop['location'] for route in solution.get('routes', [])
+                for stop in route.get('route', []) if stop['location'] != depot
+            })
+        
+        return solution
+
+
+def _set_minutes(entry: Dict, prefix: str, minutes: float) -> None:
+    """Set the minutes, hours and formatted fields of one duration."""
+    entry[f'{prefix}_minutes'] = round(minutes, 2)
+    entry[f'{prefix}_hours'] = round(minutes / 60.0, 2)
+    entry[f'{prefix}_formatted'] = format_time_minutes(minutes)
+
+
+def _set_route_times(route: Dict, service_minutes: float) -> None:
+    """
+    Replace a route's service time, keeping service plus travel unchanged.
+    
+    The engine's figures treat a merged stop as one stop, so the route time
+    they add up to is split again with the members' service times.
+    """
+    if 'service_time_minutes' not in route:
+        return
+    route_minutes = route['service_time_minutes'] + route.get('travel_time_minutes', 0.0)
+    _set_minutes(route, 'service_time', service_minutes)
+    if 'travel_time_minutes' in route:
+        _set_minutes(route, 'travel_time', max(0.0, route_minutes - service_minutes))
+
+
+def _set_solution_times(solution: Dict) -> None:
+    """Recompute solution-level service and travel totals from the routes."""
+    routes = solution.get('routes', [])
+    vehicles = solution.get('num_vehicles_used') or 0
+    for kind in ('service_time', 'travel_time'):
+        if f'total_{kind}_minutes' not in solution:
+            continue
+        total = sum(route.get(f'{kind}_minutes', 0.0) for route in routes)
+        _set_minutes(solution, f'total_{kind}', total)
+        if f'avg_{kind}_per_vehicle_minutes' in solution:
+            _set_minutes(solution, f'avg_{kind}_per_vehicle', total / vehicles if vehicles else 0.0)
+
+
+def _set_time_window(entry: Dict, time_window) -> None:
+    """Replace the time window of a stop or dropped customer entry."""
+    if 'time_window' in entry:
+        entry['time_window'] = tuple(time_window)
+    if 'time_window_formatted' in entry:
+        entry['time_window_formatted'] = (
+            f"{minutes_to_time(time_window[0])} - {minutes_to_time(time_window[1])}"
+        )
+
+
+def _clusters(locations: List, nodes: List[int], radius_m: float, reference) -> List[List[int]]:
+    """
+    Group nodes lying within radius_m of a group's first node.
+    
+    Candidates are found through a grid of radius-sized cells, so each node
+    is only compared with groups in its own and the neighbouring cells.
+    """
+    clusters: List[List[int]] = []
+    cells: Dict[Tuple, List[int]] = {}
+    if radius_m <= 0:
+        for i in nodes:
+            key = tuple(locations[i])
+            if key in cells:
+                clusters[cells[key][0]].append(i)
+            else:
+                cells[key] = [len(clusters)]
+                clusters.append([i])
+        return clusters
+    
+    lat_cell = radius_m / METERS_PER_DEGREE
+    # Degrees of longitude shrink towards the poles
+    lon_cell = lat_cell / max(math.cos(math.radians(reference[0])), 0.01)
+    for i in nodes:
+        lat, lon = locations[i][0], locations[i][1]
+        row, col = math.floor(lat / lat_cell), math.floor(lon / lon_cell)
+        target = None
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                for c in cells.get((row + dr, col + dc), ()):
+                    if haversine_distance(locations[clusters[c][0]], (lat, lon)) * 1000 <= radius_m:
+                        target = c
+                        break
+                if target is not None:
+                    break
+            if target is not None:
+                break
+        if target is None:
+            cells.setdefault((row, col), []).append(len(clusters))
+            clusters.append([i])
+        else:
+            clusters[target].append(i)
+    return clusters
@@ -2,6 +2,9 @@
 
 from .distance_calculator import haversine_distance, euclidean_distance
 from .time_formatter import format_time_minutes, minutes_to_time, round_to_5_minutes
+from .deadline import Deadline
+from .service_time import service_minutes, node_service_times
+from .tracing import Tracer, trace_span, trace_add, trace_set, trace_increment
 
 __all__ = [
     "haversine_distance",
@@ -9,4 +12,12 @@ __all__ = [
     "format_time_minutes",
     "minutes_to_time",
     "round_to_5_minutes",
+    "Deadline",
+    "service_minutes",
+    "node_service_times",
+    "Tracer",
+    "trace_span",
+    "trace_add",
+    "trace_set",
+    "trace_increment",
 ]
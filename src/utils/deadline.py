@@ -0,0 +1,116 @@
+"""Wall-clock deadline of a request, shared by all of its stages."""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from .tracing import Span, trace_span
+from .events import emit
+
+
+class Deadline:
+    """
+    Absolute point in time by which a request must be answered.
+    
+    Stages (matrix fetch, model build, search, ...) ask for the time left or
+    for a share of it, and record how long they took so the split can be
+    reported with the result.
+    """
+    
+    def __init__(self, seconds: float, start: Optional[float] = None):
+        """
+        Initialize a deadline.
+        
+        Args:
+            seconds: Wall-clock budget of the request
+            start: Start of the request (time.time()), defaults to now
+        """
+        self.start = start if start is not None else time.time()
+        self.seconds = float(seconds)
+        self.expires_at = self.start + self.seconds
+        self.stages: Dict[str, float] = {}
+        # Extra facts reported with the stages (e.g. how many matrix pairs were estimated)
+        self.details: Dict = {}
+        # Peak Python memory allocated by each stage (only while tracemalloc is tracing)
+        self.memory_peaks: Dict[str, int] = {}
+    
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.time())
+    
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return time.time() >= self.expires_at
+    
+    def budget(self, fraction: float) -> float:
+        """
+        Absolute time (time.time()) at which a stage allowed to use a
+        fraction of the whole request budget has to stop.
+        """
+        return min(self.expires_at, time.time() + self.seconds * fraction)
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Optional[Span]]:
+        """
+        Time a stage; repeated stages of the same name are summed.
+        
+        The stage is also traced as a span of the active trace (yielded, None
+        outside of a trace) and reported to the event channel of a streaming
+        request.
+        """
+        stage_start = time.time()
+        emit('stage', stage=name, status='started')
+        try:
+            with trace_span(name) as span, self.track_memory(name):
+                yield span
+        finally:
+            seconds = time.time() - stage_start
+            self.record(name, seconds)
+            emit('stage', stage=name, status='finished', seconds=round(seconds, 3),
+                 remaining_seconds=round(self.remaining(), 3))
+    
+    @contextmanager
+    def track_memory(self, name: str) -> Iterator[None]:
+        """
+        Record the peak Python memory allocated inside the block.
+        
+        Only active while tracemalloc is tracing (debug mode); memory held by
+        native engine code (OR-Tools, Gurobi) is not visible to it.
+        """
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1] - base
+            self.memory_peaks[name] = max(self.memory_peaks.get(name, 0), peak)
+    
+    def record(self, name: str, seconds: float) -> None:
+        """Add time measured elsewhere to a stage."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+    
+    def report(self) -> Dict:
+        """Budget, elapsed time and each stage's seconds and share of the elapsed time."""
+        elapsed = time.time() - self.start
+        report = {
+            **self.details,
+            'budget_seconds': round(self.seconds, 2),
+            'elapsed_seconds': round(elapsed, 2),
+            'met': elapsed <= self.seconds,
+            'stages': {
+                name: {
+                    'seconds': round(seconds, 3),
+                    'share_pct': round(seconds / elapsed * 100, 1) if elapsed > 0 else 0.0
+                }
+                for name, seconds in self.stages.items()
+            }
+        }
+        if self.memory_peaks:
+            report['peak_memory_mb'] = {
+                name: round(peak / 1024 / 1024, 2) for name, peak in self.memory_peaks.items()
+            }
+        return report
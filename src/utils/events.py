@@ -0,0 +1,293 @@
+"""
+Per-request event channels for streaming endpoints.
+
+An EventChannel carries typed events (stage, progress, incumbent, log, ...)
+from the thread solving one request to that request's response. The channel
+of the current request is kept in a context variable, so code deep inside a
+solve calls ``emit(...)`` without a channel being passed around; outside of
+a streaming request these calls do nothing, and concurrent requests never
+see each other's events.
+
+Events cross from the solving thread to the event loop through
+``loop.call_soon_threadsafe`` into a bounded ``asyncio.Queue``:
+
+- High-frequency types (progress, incumbent) are coalesced: an undelivered
+  event is replaced by the next one of the same type and stage, and they are
+  delivered at most once per ``min_interval``.
+- Log records are rate limited before they are formatted; suppressed lines
+  are counted in the next delivered log event.
+- When the queue is full (slow client), events wait on the producer side,
+  where coalesced types keep collapsing, and flow again as the client reads.
+
+Every channel has a ``stream_id`` under which a client may ask the solve to
+stop early (``request_stop``); engines poll ``stop_requested()`` between
+incumbents and return their best solution so far. A client that goes away
+stops its solve the same way.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional
+
+_current_channel: ContextVar[Optional["EventChannel"]] = ContextVar("current_channel", default=None)
+
+# Per event type, a function applied to events emitted in the current context
+_transforms: ContextVar[Dict[str, Callable[[Dict], Dict]]] = ContextVar("event_transforms", default={})
+
+# Open channels by stream ID (this process only)
+_channels: "weakref.WeakValueDictionary[str, EventChannel]" = weakref.WeakValueDictionary()
+
+# Event types where only the latest undelivered event matters
+COALESCED_TYPES = frozenset({'progress', 'incumbent'})
+
+# Event types that end a solve: coalesced events held back go out before them
+FINAL_TYPES = frozenset({'result', 'error'})
+
+_CLOSED = object()
+
+
+class EventChannel:
+    """Event stream of one request, from solving threads to the response."""
+    
+    def __init__(self,
+                 max_queued: int = 64,
+                 min_interval: float = 0.25,
+                 log_rate: float = 20.0,
+                 log_level: int = logging.INFO,
+                 incumbent_routes: bool = False):
+        """
+        Initialize a channel on the running event loop.
+        
+        Args:
+            max_queued: Events buffered for the client before producers hold them back
+            min_interval: Minimum seconds between two coalesced events of one kind
+            log_rate: Log records forwarded per second (0 = no logs)
+            log_level: Lowest level of forwarded log records
+            incumbent_routes: Include the routes in incumbent events
+        """
+        self.stream_id = uuid.uuid4().hex
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_queued))
+        self.min_interval = min_interval
+        self.log_rate = log_rate
+        self.log_level = log_level
+        self.incumbent_routes = incumbent_routes
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[object, object]" = OrderedDict()
+        self._sequence = 0
+        self._last_sent: Dict[object, float] = {}
+        self._flush_scheduled = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._closed = False
+        self._log_tokens = log_rate
+        self._log_refilled = time.monotonic()
+        self._logs_suppressed = 0
+        self._stop = threading.Event()
+        _channels[self.stream_id] = self
+        _install_log_handler()
+    
+    @contextmanager
+    def activate(self) -> Iterator["EventChannel"]:
+        """Make this the channel of the current context (e.g. a solving thread)."""
+        token = _current_channel.set(self)
+        try:
+            yield self
+        finally:
+            _current_channel.reset(token)
+    
+    def publish(self, event: Dict) -> None:
+        """Queue an event; safe to call from any thread."""
+        with self._lock:
+            if self._closed:
+                return
+            if event.get('type') in COALESCED_TYPES:
+                key = (event['type'], event.get('stage'))
+                if self._pending.pop(key, None) is not None:
+                    self.coalesced += 1
+            else:
+                self._sequence += 1
+                key = self._sequence
+            self._pending[key] = event
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self.loop.call_soon_threadsafe(self._flush)
+    
+    def request_stop(self) -> None:
+        """Ask the solve of this stream to finish with its best solution so far."""
+        self._stop.set()
+    
+    @property
+    def stop_requested(self) -> bool:
+        """Whether the solve of this stream should stop early."""
+        return self._stop.is_set()
+    
+    def close(self) -> None:
+        """End the stream after the events published so far; safe from any thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._sequence += 1
+            self._pending[self._sequence] = _CLOSED
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self.loop.call_soon_threadsafe(self._flush)
+    
+    async def events(self) -> AsyncIterator[Dict]:
+        """Deliver events until the channel is closed (or the client goes away)."""
+        completed = False
+        try:
+            while True:
+                event = await self.queue.get()
+                if event is _CLOSED:
+                    completed = True
+                    return
+                if self._pending and not self._flush_scheduled:
+                    # Room in the queue again: release events held back
+                    self._flush()
+                yield event
+        finally:
+            if not completed:
+                # Nobody reads the result anymore
+                self.request_stop()
+            with self._lock:
+                self._closed = True
+                self._pending.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+            _channels.pop(self.stream_id, None)
+    
+    def allow_log(self) -> Optional[int]:
+        """
+        Take a token of the log rate limit.
+        
+        Returns:
+            Number of records suppressed since the last forwarded one, or
+            None if this record is suppressed too
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._log_tokens = min(
+                self.log_rate, self._log_tokens + (now - self._log_refilled) * self.log_rate
+            )
+            self._log_refilled = now
+            if self._log_tokens < 1:
+                self._logs_suppressed += 1
+                return None
+            self._log_tokens -= 1
+            suppressed, self._logs_suppressed = self._logs_suppressed, 0
+            return suppressed
+    
+    def _flush(self) -> None:
+        """Move pending events into the queue (runs on the event loop)."""
+        now = time.monotonic()
+        retry = None
+        with self._lock:
+            self._flush_scheduled = False
+            final = self._closed or any(
+                event is not _CLOSED and event.get('type') in FINAL_TYPES
+                for event in self._pending.values()
+            )
+            for key in list(self._pending):
+                if self.queue.full():
+                    break
+                if isinstance(key, tuple) and not final:
+                    wait = self._last_sent.get(key, float('-inf')) + self.min_interval - now
+                    if wait > 0:
+                        retry = wait if retry is None else min(retry, wait)
+                        continue
+                    self._last_sent[key] = now
+                self.queue.put_nowait(self._pending.pop(key))
+        if retry is not None and self._timer is None:
+            self._timer = self.loop.call_later(retry, self._on_timer)
+    
+    def _on_timer(self) -> None:
+        """Flush events that were held back by the interval of their kind."""
+        self._timer = None
+        self._flush()
+
+
+def emit(event_type: str, **fields) -> None:
+    """Publish an event to the channel of the current request, if any."""
+    channel = _current_channel.get()
+    if channel is not None:
+        event = {'type': event_type, **fields}
+        transform = _transforms.get().get(event_type)
+        channel.publish(transform(event) if transform else event)
+
+
+def current_channel() -> Optional[EventChannel]:
+    """The event channel of the current request, or None."""
+    return _current_channel.get()
+
+
+def find_channel(stream_id: str) -> Optional[EventChannel]:
+    """Open channel with a stream ID, or None."""
+    return _channels.get(stream_id)
+
+
+def stop_requested() -> bool:
+    """Whether the client of the current request asked the solve to stop."""
+    channel = _current_channel.get()
+    return channel is not None and channel.stop_requested
+
+
+@contextmanager
+def transform(event_type: str, function: Callable[[Dict], Dict]) -> Iterator[None]:
+    """
+    Rewrite events of one type emitted in the current context.
+    
+    Used to translate engine-level events into the terms of the request
+    (e.g. node indices of a reduced problem into customer IDs).
+    """
+    token = _transforms.set(dict(_transforms.get(), **{event_type: function}))
+    try:
+        yield
+    finally:
+        _transforms.reset(token)
+
+
+class _ChannelLogHandler(logging.Handler):
+    """Forwards log records of a streaming request to its channel."""
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        channel = _current_channel.get()
+        if channel is None or channel.log_rate <= 0 or record.levelno < channel.log_level:
+            return
+        # Rate limit before the record is formatted
+        suppressed = channel.allow_log()
+        if suppressed is None:
+            return
+        event = {
+            'type': 'log',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'time': record.created
+        }
+        if suppressed:
+            event['suppressed'] = suppressed
+        channel.publish(event)
+
+
+_log_handler: Optional[_ChannelLogHandler] = None
+_log_handler_lock = threading.Lock()
+
+
+def _install_log_handler() -> None:
+    """Attach the channel log handler to the root logger once per process."""
+    global _log_handler
+    with _log_handler_lock:
+        if _log_handler is None:
+            _log_handler = _ChannelLogHandler()
+            logging.getLogger().addHandler(_log_handler)
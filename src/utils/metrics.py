@@ -0,0 +1,261 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A minimal registry of counters, gauges and histograms with labels, enough
+for the /metrics endpoint without an extra dependency. Values are per
+process: every API worker exposes its own.
+"""
+
+import os
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds (solves run from milliseconds to an hour)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+class _Metric:
+    """Base class: name, help text, label names and a lock."""
+    
+    kind = ''
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def _format_labels(self, key: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (
+            name + '="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+            for name, value in pairs
+        )
+        return '{' + ','.join(escaped) + '}'
+    
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+    
+    kind = 'counter'
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase the counter."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_fmt(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is computed at scrape time."""
+    
+    kind = 'gauge'
+    
+    def __init__(self, *args, function: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+    
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase the gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Decrease the gauge."""
+        self.inc(-amount, **labels)
+    
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name} {_fmt(self._function())}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_fmt(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+    
+    kind = 'histogram'
+    
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: bucket counts (non-cumulative), sum, count
+        self._values: Dict[Tuple[str, ...], List] = {}
+    
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation."""
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(c), s, n)) for key, (c, s, n) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == math.inf else _fmt(bound)
+                lines.append(
+                    f"{self.name}_bucket{self._format_labels(key, (('le', le),))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+def _fmt(value: float) -> str:
+    """Format a sample value (integers without a trailing .0)."""
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def size_class(num_customers: int) -> str:
+    """Instance size label, so latency can be compared across similar problems."""
+    if num_customers <= 25:
+        return 'xs'
+    if num_customers <= 100:
+        return 's'
+    if num_customers <= 400:
+        return 'm'
+    if num_customers <= 1000:
+        return 'l'
+    return 'xl'
+
+
+def _resident_memory_bytes() -> float:
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        return usage if os.uname().sysname == 'Darwin' else usage * 1024
+
+
+REGISTRY = Registry()
+
+# Solver service
+SOLVE_DURATION = Histogram(
+    'solver_solve_duration_seconds', 'Wall-clock time of solve requests',
+    ['solver', 'size']
+)
+SOLVE_REQUESTS = Counter(
+    'solver_requests_total', 'Solve requests by outcome',
+    ['solver', 'status']
+)
+SOLVER_QUEUE_DEPTH = Gauge(
+    'solver_queue_depth', 'Solve requests currently holding or waiting for the solver'
+)
+SOLVER_REJECTED = Counter(
+    'solver_rejected_total', 'Solve requests rejected because the solver was busy'
+)
+DROPPED_CUSTOMERS = Counter(
+    'solver_dropped_customers_total', 'Customers left unserved by returned solutions',
+    ['solver']
+)
+MEMORY_ADMISSIONS = Counter(
+    'solver_memory_admissions_total', 'Memory guard decisions (admitted, downgraded, rejected)',
+    ['outcome']
+)
+
+# Engines
+INCUMBENTS = Counter(
+    'solver_incumbents_total', 'Improving solutions found during search (use rate() for incumbents per second)',
+    ['engine']
+)
+MODEL_BUILD_DURATION = Histogram(
+    'solver_model_build_duration_seconds', 'Engine model build time',
+    ['solver']
+)
+
+# Distance cache and routing backend
+CACHE_LOOKUPS = Counter(
+    'distance_cache_lookups_total', 'Matrix pairs by result, each counted once (hit, miss, estimated)',
+    ['result']
+)
+MATRIX_BUILD_DURATION = Histogram(
+    'distance_matrix_build_duration_seconds', 'Time to populate the distance and travel time matrices'
+)
+ROUTING_BACKEND_DURATION = Histogram(
+    'routing_backend_request_duration_seconds', 'OSRM request latency',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+ROUTING_BACKEND_ERRORS = Counter(
+    'routing_backend_errors_total', 'Failed OSRM requests by reason',
+    ['reason']
+)
+
+# Process
+PROCESS_MEMORY = Gauge(
+    'process_resident_memory_bytes', 'Resident memory size in bytes',
+    function=_resident_memory_bytes
+)
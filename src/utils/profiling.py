@@ -0,0 +1,172 @@
+"""
+Profiling hooks for diagnosing slow solves in place.
+
+- profile_call: run one call under cProfile (deterministic, high overhead,
+  per request) and summarize the hottest functions.
+- SamplingProfiler: background thread that samples the stacks of the
+  threads currently solving at a fixed interval and aggregates them across
+  requests into folded stacks (input format of flamegraph.pl / speedscope).
+"""
+
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+def profile_call(func: Callable, *args,
+                 top: int = 40,
+                 output_dir: Optional[str] = None,
+                 **kwargs) -> Tuple[Any, Dict]:
+    """
+    Run a call under cProfile.
+    
+    Only the calling thread is profiled; work done in worker processes
+    (e.g. HGS education) is not included.
+    
+    Args:
+        func: Function to call
+        top: Number of functions to report, by cumulative time
+        output_dir: Optional directory to store the raw profile (pstats format)
+        *args, **kwargs: Arguments of the call
+    
+    Returns:
+        (return value of the call, profile summary)
+    """
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+    elapsed = time.perf_counter() - start
+    
+    stats = pstats.Stats(profiler)
+    entries = []
+    for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+        entries.append({
+            'function': f"{_short_path(filename)}:{line}({name})",
+            'calls': calls,
+            'total_time': round(total, 6),
+            'cumulative_time': round(cumulative, 6)
+        })
+    entries.sort(key=lambda e: e['cumulative_time'], reverse=True)
+    
+    summary = {
+        'profiler': 'cProfile',
+        'wall_seconds': round(elapsed, 3),
+        'total_calls': stats.total_calls,
+        'functions': entries[:top]
+    }
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"solve-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+        stats.dump_stats(path)
+        summary['file'] = path
+    return result, summary
+
+
+class SamplingProfiler:
+    """
+    Low-overhead stack sampler for solving threads.
+    
+    Threads opt in with watch(); while none is watched the sampler only
+    sleeps. Each sample walks the watched threads' frames and counts the
+    folded stack ("module:function;module:function ...").
+    """
+    
+    def __init__(self):
+        self.interval = 0.01
+        self._watched: Dict[int, int] = {}
+        self._stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self, interval_ms: float = 10.0) -> None:
+        """Start the sampling thread (no-op if already running)."""
+        if self.running:
+            return
+        self.interval = max(0.001, interval_ms / 1000.0)
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the sampling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self._thread = None
+    
+    @contextmanager
+    def watch(self) -> Iterator[None]:
+        """Sample the current thread while inside the block."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._watched[ident] = self._watched.get(ident, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._watched[ident] > 1:
+                    self._watched[ident] -= 1
+                else:
+                    del self._watched[ident]
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                watched = list(self._watched)
+            if not watched:
+                continue
+            frames = sys._current_frames()
+            stacks = [self._fold(frames[ident]) for ident in watched if ident in frames]
+            with self._lock:
+                self._stacks.update(stacks)
+                self.samples += len(stacks)
+    
+    @staticmethod
+    def _fold(frame) -> str:
+        """Folded stack of a frame, outermost first."""
+        names: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            module = frame.f_globals.get('__name__', _short_path(code.co_filename))
+            names.append(f"{module}:{code.co_name}")
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+    
+    def folded(self, reset: bool = False) -> str:
+        """Aggregated stacks as "stack count" lines, most frequent first."""
+        with self._lock:
+            items = self._stacks.most_common()
+            if reset:
+                self._stacks.clear()
+                self.samples = 0
+        return ''.join(f"{stack} {count}\n" for stack, count in items)
+
+
+def _short_path(filename: str) -> str:
+    """File name relative to the closest sys.path entry."""
+    for base in sorted(sys.path, key=len, reverse=True):
+        if base and filename.startswith(base + os.sep):
+            return filename[len(base) + 1:]
+    return filename
+
+
+# Process-wide sampler, started at application startup when enabled
+SAMPLER = SamplingProfiler()
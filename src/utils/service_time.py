@@ -0,0 +1,41 @@
+"""Service time model shared by time matrices, stop aggregation and reports."""
+
+from typing import Dict, List
+
+# Fixed minutes per stop plus minutes per delivered unit
+SERVICE_BASE_MIN = 10
+SERVICE_PER_UNIT_MIN = 2
+
+
+def service_minutes(units: float) -> float:
+    """
+    Service time of one customer stop.
+    
+    Args:
+        units: Units delivered at the stop
+    
+    Returns:
+        Service time in minutes
+    """
+    return SERVICE_BASE_MIN + SERVICE_PER_UNIT_MIN * units
+
+
+def node_service_times(problem: Dict) -> List[float]:
+    """
+    Service time of each node of a problem.
+    
+    Merged stops carry the summed service time of their customers in
+    'service_times'; otherwise it follows from each node's demand. The
+    depot and the virtual start nodes of vehicles ('vehicle_starts') have
+    no service.
+    
+    Args:
+        problem: Problem data with 'demands' and 'depot'
+    
+    Returns:
+        Service time of each node in minutes
+    """
+    no_service = {problem['depot'], *(problem.get('vehicle_starts') or {}).values()}
+    if problem.get('service_times'):
+        return [0 if i in no_service else s for i, s in enumerate(problem['service_times'])]
+    return [0 if i in no_service else service_minutes(d) for i, d in enumerate(problem['demands'])]
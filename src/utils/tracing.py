@@ -0,0 +1,182 @@
+"""
+Lightweight tracing of solve stages.
+
+A Tracer collects nested spans with durations and counters. The active span
+is kept in a context variable, so code deep inside a solve (engines,
+callbacks running on the solving thread) can open child spans or add
+counters without a tracer being passed around; outside of a trace these
+calls do nothing.
+
+Traces are returned as nested dictionaries and can be exported in the
+Chrome trace event format (chrome://tracing, Perfetto).
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed stage with counters and child spans."""
+    
+    def __init__(self, name: str, tracer: "Tracer", attributes: Optional[Dict] = None):
+        self.name = name
+        self.tracer = tracer
+        self.attributes: Dict = dict(attributes or {})
+        self.children: List["Span"] = []
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.thread_id = threading.get_ident()
+    
+    @property
+    def duration(self) -> float:
+        """Duration in seconds (up to now while the span is open)."""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+    
+    def set(self, **attributes) -> None:
+        """Set counters / attributes, replacing previous values."""
+        self.attributes.update(attributes)
+    
+    def increment(self, name: str, amount: float = 1) -> None:
+        """Add to a counter."""
+        self.attributes[name] = self.attributes.get(name, 0) + amount
+    
+    def to_dict(self) -> Dict:
+        """Nested dictionary with offsets and durations in milliseconds."""
+        entry = {
+            'name': self.name,
+            'start_ms': round((self.start - self.tracer.start) * 1000, 2),
+            'duration_ms': round(self.duration * 1000, 2),
+        }
+        if self.attributes:
+            entry['counters'] = dict(self.attributes)
+        if self.children:
+            entry['children'] = [child.to_dict() for child in self.children]
+        return entry
+
+
+class Tracer:
+    """Collects the spans of one request."""
+    
+    def __init__(self, name: str):
+        """
+        Initialize a tracer.
+        
+        Args:
+            name: Name of the traced request (root span)
+        """
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.start = time.perf_counter()
+        self.root = Span(name, self)
+    
+    @contextmanager
+    def activate(self) -> Iterator[Span]:
+        """Make the root span current and close it on exit."""
+        token = _current_span.set(self.root)
+        try:
+            yield self.root
+        finally:
+            self.root.end = time.perf_counter()
+            _current_span.reset(token)
+    
+    def to_dict(self) -> Dict:
+        """Spans of the trace, for API responses."""
+        return {
+            'trace_id': self.trace_id,
+            'total_ms': round(self.root.duration * 1000, 2),
+            'spans': [child.to_dict() for child in self.root.children]
+        }
+    
+    def export_chrome(self, directory: str) -> str:
+        """
+        Write the trace as Chrome trace events ("X" complete events).
+        
+        Args:
+            directory: Output directory (created if missing)
+        
+        Returns:
+            Path of the written file
+        """
+        events = []
+        pid = os.getpid()
+        
+        def add(span: Span) -> None:
+            events.append({
+                'name': span.name,
+                'ph': 'X',
+                'ts': round((span.start - self.start) * 1e6),
+                'dur': round(span.duration * 1e6),
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': span.attributes
+            })
+            for child in span.children:
+                add(child)
+        
+        add(self.root)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.root.name}-{self.trace_id}.json")
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+        return path
+
+
+@contextmanager
+def trace_span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Open a child span of the current span.
+    
+    Yields None (and records nothing) when no trace is active.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    span = Span(name, parent.tracer, attributes)
+    parent.children.append(span)
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        span.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def trace_add(name: str, duration: float, **attributes) -> None:
+    """
+    Record a stage timed elsewhere as a child span of the current span,
+    ending now and lasting ``duration`` seconds.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return
+    span = Span(name, parent.tracer, attributes)
+    span.end = span.start
+    span.start -= duration
+    parent.children.append(span)
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span, or None outside of a trace."""
+    return _current_span.get()
+
+
+def trace_set(**attributes) -> None:
+    """Set counters on the current span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        span.set(**attributes)
+
+
+def trace_increment(name: str, amount: float = 1) -> None:
+    """Increment a counter of the current span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        span.increment(name, amount)
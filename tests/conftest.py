@@ -0,0 +1,72 @@
+"""Shared fixtures for the unit tests."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from src.utils import haversine_distance, service_minutes  # noqa: E402
+
+# Travel speed of the test problems
+SPEED_KMPH = 40.0
+
+
+def build_problem(locations, demands, time_windows, vehicle_capacities, vehicle_ids=None):
+    """
+    Build a small problem in the shape produced by ProblemBuilder and SolverService.
+    
+    Args:
+        locations: (lat, lon) of each node, depot first
+        demands: Demand of each node (0 for the depot)
+        time_windows: (start, end) minutes of each node
+        vehicle_capacities: Capacity of each vehicle
+        vehicle_ids: Names of the vehicles (default V1, V2, ...)
+    
+    Returns:
+        Problem dict with distance and time matrices attached
+    """
+    n = len(locations)
+    distance_matrix = [
+        [haversine_distance(locations[i], locations[j]) for j in range(n)] for i in range(n)
+    ]
+    service = [0] + [service_minutes(d) for d in demands[1:]]
+    time_matrix = [
+        [
+            int(round((distance_matrix[i][j] / SPEED_KMPH * 60.0 + (service[j] if j else 0)) * 100))
+            for j in range(n)
+        ]
+        for i in range(n)
+    ]
+    return {
+        'locations': [tuple(loc) for loc in locations],
+        'demands': list(demands),
+        'time_windows': [tuple(tw) for tw in time_windows],
+        'vehicle_capacities': list(vehicle_capacities),
+        'num_vehicles': len(vehicle_capacities),
+        'vehicle_ids': vehicle_ids or [f"V{k + 1}" for k in range(len(vehicle_capacities))],
+        'depot': 0,
+        'coord_type': 'latlon',
+        'node_customers': [None] + [{'id': f"C{i}", 'name': f"Customer {i}"} for i in range(1, n)],
+        'distance_matrix': distance_matrix,
+        'time_matrix': time_matrix,
+    }
+
+
+@pytest.fixture
+def small_problem():
+    """Depot and six customers a few kilometres apart, served by three vehicles."""
+    locations = [
+        (40.4168, -3.7038),
+        (40.4268, -3.7038),
+        (40.4368, -3.6938),
+        (40.4068, -3.6838),
+        (40.3968, -3.7138),
+        (40.4168, -3.7338),
+        (40.4368, -3.7238),
+    ]
+    demands = [0, 3, 2, 4, 1, 5, 2]
+    time_windows = [(480, 1200), (480, 720), (540, 900), (480, 1200),
+                    (600, 960), (480, 1080), (720, 1200)]
+    return build_problem(locations, demands, time_windows, [10, 10, 8])
@@ -0,0 +1,134 @@
+"""Tests for move evaluation against full recomputation of the routes."""
+
+import itertools
+
+import pytest
+
+from src.core.solvers.evaluation_impl import RouteEvaluatorImpl
+
+from conftest import build_problem
+
+PLAN = {0: [1, 2, 3], 1: [4, 5, 6]}
+
+
+@pytest.fixture
+def evaluator():
+    locations = [
+        (40.4168, -3.7038),
+        (40.4268, -3.7038),
+        (40.4368, -3.6938),
+        (40.4068, -3.6838),
+        (40.3968, -3.7138),
+        (40.4168, -3.7338),
+        (40.4368, -3.7238),
+        (40.4468, -3.7038),
+    ]
+    demands = [0, 3, 2, 4, 1, 5, 2, 3]
+    time_windows = [(480, 720), (480, 520), (500, 560), (540, 620),
+                    (480, 540), (520, 600), (560, 700), (600, 660)]
+    problem = build_problem(locations, demands, time_windows, [10, 9, 6])
+    # Customer 7 is left unplanned
+    return RouteEvaluatorImpl(problem, PLAN)
+
+
+def _apply(move, routes):
+    """Routes of every vehicle after a move, rebuilt from scratch."""
+    routes = {vehicle: list(route) for vehicle, route in routes.items()}
+    customer = move['customer']
+    for route in routes.values():
+        if customer in route and move['type'] != 'swap':
+            route.remove(customer)
+    if move['type'] in ('relocate', 'insert'):
+        routes.setdefault(move['vehicle'], []).insert(move['position'], customer)
+    elif move['type'] == 'swap':
+        other = move['other']
+        for route in routes.values():
+            for k, node in enumerate(route):
+                route[k] = other if node == customer else customer if node == other else node
+    return routes
+
+
+def _moves(evaluator):
+    planned = [node for route in PLAN.values() for node in route]
+    for customer in planned:
+        yield {'type': 'remove', 'customer': customer}
+        for vehicle in range(3):
+            stops = len(PLAN.get(vehicle, [])) + (customer not in PLAN.get(vehicle, []))
+            for position in range(stops):
+                yield {'type': 'relocate', 'customer': customer, 'vehicle': vehicle, 'position': position}
+    for u, v in itertools.combinations(planned, 2):
+        yield {'type': 'swap', 'customer': u, 'other': v}
+    for customer in evaluator.unplanned:
+        for vehicle in range(3):
+            for position in range(len(PLAN.get(vehicle, [])) + 1):
+                yield {'type': 'insert', 'customer': customer, 'vehicle': vehicle, 'position': position}
+
+
+def test_plan_matches_full_recomputation(evaluator):
+    assert evaluator.unplanned == [7]
+    assert evaluator.plan_objective() == pytest.approx(evaluator._objective(list(PLAN.values())))
+    for vehicle, route in PLAN.items():
+        report = evaluator.route_report(vehicle)
+        assert report['feasible'] == evaluator._feasible(route, vehicle)
+        assert report['distance'] == pytest.approx(evaluator._distance(route), abs=0.01)
+
+
+def test_every_move_matches_full_recomputation(evaluator):
+    before = evaluator.plan_objective()
+    outcomes = set()
+    for move in _moves(evaluator):
+        result = evaluator.evaluate(move)
+        routes = _apply(move, PLAN)
+        changed = {report['vehicle_id'] for report in result['routes']}
+        
+        for report in result['routes']:
+            route = routes.get(report['vehicle_id'], [])
+            assert report['feasible'] == evaluator._feasible(route, report['vehicle_id']), move
+            assert report['distance'] == pytest.approx(evaluator._distance(route), abs=0.01), move
+            assert report['stops'] == len(route), move
+            if report['feasible'] and route:
+                arrivals = evaluator._arrivals(route)
+                duration = (arrivals[-1] - arrivals[0]) / 100.0
+                assert report['duration_minutes'] == pytest.approx(duration, abs=0.01), move
+        
+        # Routes outside the reports are untouched by the move
+        assert all(routes.get(vehicle, []) == PLAN.get(vehicle, []) for vehicle in range(3) if vehicle not in changed)
+        assert result['feasible'] == all(
+            evaluator._feasible(routes.get(vehicle, []), vehicle) for vehicle in changed
+        ), move
+        distance = sum(evaluator._distance(route) for route in routes.values())
+        assert result['distance_delta'] == pytest.approx(
+            distance - sum(evaluator._distance(route) for route in PLAN.values()), abs=0.01
+        ), move
+        after = evaluator._objective([route for route in routes.values() if route])
+        assert result['objective_delta'] == pytest.approx(after - before, abs=0.01), move
+        outcomes.add(result['feasible'])
+    
+    # The windows leave both feasible and infeasible moves
+    assert outcomes == {True, False}
+
+
+def test_default_position_is_cheapest_feasible(evaluator):
+    for vehicle in range(3):
+        move = {'type': 'insert', 'customer': 7, 'vehicle': vehicle}
+        result = evaluator.evaluate(move)
+        
+        candidates = []
+        for position in range(len(PLAN.get(vehicle, [])) + 1):
+            route = _apply(dict(move, position=position), PLAN)[vehicle]
+            candidates.append((not evaluator._feasible(route, vehicle), evaluator._distance(route), position))
+        assert result['position'] == min(candidates)[2]
+
+
+@pytest.mark.parametrize('move, message', [
+    ({'type': 'shuffle', 'customer': 1}, "Unknown move type"),
+    ({'type': 'remove', 'customer': 99}, "Unknown customer"),
+    ({'type': 'insert', 'customer': 1, 'vehicle': 2}, "already planned"),
+    ({'type': 'relocate', 'customer': 7, 'vehicle': 0}, "not planned"),
+    ({'type': 'relocate', 'customer': 1, 'vehicle': 5}, "Unknown vehicle"),
+    ({'type': 'relocate', 'customer': 1, 'vehicle': 1, 'position': 4}, "outside"),
+    ({'type': 'swap', 'customer': 1, 'other': 1}, "itself"),
+])
+def test_invalid_moves_raise(evaluator, move, message):
+    with pytest.raises(ValueError, match=message):
+        evaluator.evaluate(move)
@@ -0,0 +1,205 @@
+"""Tests for event channel coalescing, back-pressure and stop handling."""
+
+import asyncio
+import logging
+import threading
+import time
+
+from src.utils.events import EventChannel, emit, find_channel, stop_requested, transform
+
+
+def _progress(step, stage='search'):
+    return {'type': 'progress', 'stage': stage, 'step': step}
+
+
+async def _drain(channel):
+    return [event async for event in channel.events()]
+
+
+def test_undelivered_progress_coalesced_to_latest():
+    async def main():
+        channel = EventChannel(min_interval=0)
+        # Published on the loop thread: nothing is delivered before the first flush
+        for step in range(10):
+            channel.publish(_progress(step))
+        channel.publish(_progress(0, stage='polish'))
+        channel.publish({'type': 'stage', 'name': 'done'})
+        channel.close()
+        return channel, await _drain(channel)
+    
+    channel, delivered = asyncio.run(main())
+    
+    assert delivered == [_progress(9), _progress(0, stage='polish'), {'type': 'stage', 'name': 'done'}]
+    assert channel.coalesced == 9
+
+
+def test_other_types_never_coalesced():
+    async def main():
+        channel = EventChannel(min_interval=0)
+        for k in range(5):
+            channel.publish({'type': 'stage', 'name': f"s{k}"})
+        channel.close()
+        return await _drain(channel)
+    
+    assert [event['name'] for event in asyncio.run(main())] == ['s0', 's1', 's2', 's3', 's4']
+
+
+def test_progress_held_back_for_min_interval():
+    async def main():
+        channel = EventChannel(min_interval=0.2)
+        channel.publish(_progress(0))
+        await asyncio.sleep(0)
+        first = await channel.queue.get()
+        sent = time.monotonic()
+        channel.publish(_progress(1))
+        channel.publish(_progress(2))
+        second = await asyncio.wait_for(channel.queue.get(), timeout=2)
+        waited = time.monotonic() - sent
+        channel.close()
+        return first, second, waited, await _drain(channel)
+    
+    first, second, waited, rest = asyncio.run(main())
+    
+    assert first == _progress(0)
+    assert second == _progress(2)
+    assert waited >= 0.15
+    assert rest == []
+
+
+def test_final_event_releases_held_progress_at_once():
+    async def main():
+        channel = EventChannel(min_interval=10.0)
+        channel.publish(_progress(0))
+        await asyncio.sleep(0)
+        channel.publish(_progress(1))
+        channel.publish({'type': 'result', 'data': {}})
+        channel.close()
+        return await asyncio.wait_for(_drain(channel), timeout=2)
+    
+    assert asyncio.run(main()) == [_progress(0), _progress(1), {'type': 'result', 'data': {}}]
+
+
+def test_full_queue_holds_events_in_order():
+    async def main():
+        channel = EventChannel(max_queued=1, min_interval=0)
+        
+        def produce():
+            for k in range(50):
+                channel.publish({'type': 'stage', 'name': k})
+                channel.publish(_progress(k))
+            channel.close()
+        
+        producer = threading.Thread(target=produce)
+        producer.start()
+        delivered = await asyncio.wait_for(_drain(channel), timeout=5)
+        producer.join()
+        return delivered
+    
+    delivered = asyncio.run(main())
+    
+    stages = [event['name'] for event in delivered if event['type'] == 'stage']
+    steps = [event['step'] for event in delivered if event['type'] == 'progress']
+    assert stages == list(range(50))
+    assert steps == sorted(steps)
+    assert steps[-1] == 49
+
+
+def test_publish_after_close_ignored():
+    async def main():
+        channel = EventChannel()
+        channel.publish({'type': 'stage', 'name': 'a'})
+        channel.close()
+        channel.publish({'type': 'stage', 'name': 'b'})
+        return await _drain(channel)
+    
+    assert asyncio.run(main()) == [{'type': 'stage', 'name': 'a'}]
+
+
+def test_stop_request_reaches_solving_context():
+    async def main():
+        channel = EventChannel()
+        
+        def solve():
+            with channel.activate():
+                seen = [stop_requested()]
+                find_channel(channel.stream_id).request_stop()
+                seen.append(stop_requested())
+                return seen
+        
+        seen = await asyncio.to_thread(solve)
+        channel.close()
+        await _drain(channel)
+        return channel, seen
+    
+    channel, seen = asyncio.run(main())
+    
+    assert seen == [False, True]
+    assert channel.stop_requested
+    assert not stop_requested()
+
+
+def test_client_going_away_stops_solve():
+    async def main():
+        channel = EventChannel()
+        channel.publish({'type': 'stage', 'name': 'a'})
+        stream = channel.events()
+        await stream.__anext__()
+        await stream.aclose()
+        return channel
+    
+    channel = asyncio.run(main())
+    
+    assert channel.stop_requested
+    assert find_channel(channel.stream_id) is None
+
+
+def test_completed_stream_does_not_stop():
+    async def main():
+        channel = EventChannel()
+        channel.close()
+        await _drain(channel)
+        return channel
+    
+    channel = asyncio.run(main())
+    
+    assert not channel.stop_requested
+    assert find_channel(channel.stream_id) is None
+
+
+def test_emit_uses_current_channel_and_transforms():
+    async def main():
+        channel = EventChannel(min_interval=0)
+        emit('stage', name='outside')
+        with channel.activate():
+            emit('stage', name='inside')
+            with transform('incumbent', lambda event: dict(event, objective=-event['objective'])):
+                emit('incumbent', objective=5)
+            emit('incumbent', stage='other', objective=7)
+        channel.close()
+        return await _drain(channel)
+    
+    assert asyncio.run(main()) == [
+        {'type': 'stage', 'name': 'inside'},
+        {'type': 'incumbent', 'objective': -5},
+        {'type': 'incumbent', 'stage': 'other', 'objective': 7},
+    ]
+
+
+def test_log_records_rate_limited():
+    logger = logging.getLogger('tests.events')
+    
+    async def main():
+        channel = EventChannel(log_rate=2, log_level=logging.WARNING)
+        with channel.activate():
+            for k in range(5):
+                logger.warning("line %d", k)
+            logger.info("below level")
+            channel._log_refilled -= 1.0
+            logger.warning("after refill")
+        channel.close()
+        return await _drain(channel)
+    
+    logs = [event for event in asyncio.run(main()) if event['type'] == 'log']
+    
+    assert [event['message'] for event in logs] == ['line 0', 'line 1', 'after refill']
+    assert [event.get('suppressed', 0) for event in logs] == [0, 0, 3]
@@ -0,0 +1,101 @@
+"""Tests for the fleet compression bounds."""
+
+from src.services.fleet_reducer import FleetReducer
+
+
+def _problem(demands, capacities, **extra):
+    problem = {
+        'demands': list(demands),
+        'vehicle_capacities': list(capacities),
+        'num_vehicles': len(capacities),
+        'vehicle_ids': [f"V{k}" for k in range(len(capacities))],
+        'depot': 0,
+    }
+    problem.update(extra)
+    return problem
+
+
+def test_identical_vehicles_capped_by_customer_count():
+    problem = _problem([0, 2, 3, 4], [10] * 10)
+    
+    reduced, vehicle_map = FleetReducer.compress(problem)
+    
+    assert vehicle_map == [0, 1, 2]
+    assert reduced['num_vehicles'] == 3
+    assert reduced['vehicle_capacities'] == [10, 10, 10]
+    assert reduced['vehicle_classes'] == [0, 0, 0]
+    assert reduced['vehicle_ids'] == ['V0', 'V1', 'V2']
+
+
+def test_dominated_class_dropped_when_dominators_cover_all_customers():
+    # Four capacity-20 vehicles can take over any route of a capacity-10 vehicle
+    problem = _problem([0, 2, 3, 4], [10] * 5 + [20] * 4)
+    
+    reduced, vehicle_map = FleetReducer.compress(problem)
+    
+    assert vehicle_map == [5, 6, 7]
+    assert reduced['vehicle_capacities'] == [20, 20, 20]
+    assert reduced['vehicle_classes'] == [0, 0, 0]
+
+
+def test_dominated_class_keeps_vehicles_beyond_its_dominators():
+    problem = _problem([0, 1, 1, 1, 1, 1], [10] * 6 + [20] * 2)
+    
+    reduced, vehicle_map = FleetReducer.compress(problem)
+    
+    # 5 customers: 2 dominators leave room for 3 capacity-10 vehicles
+    assert vehicle_map == [6, 7, 0, 1, 2]
+    assert reduced['vehicle_classes'] == [0, 0, 1, 1, 1]
+
+
+def test_class_capped_by_customers_it_can_serve():
+    problem = _problem([0, 15, 15, 5, 5], [10] * 6 + [20])
+    
+    reduced, vehicle_map = FleetReducer.compress(problem)
+    
+    # Capacity-10 vehicles only fit the two 5-unit customers
+    assert vehicle_map == [6, 0, 1]
+    assert reduced['vehicle_capacities'] == [20, 10, 10]
+    assert reduced['vehicle_classes'] == [0, 1, 1]
+
+
+def test_mixed_fleet_keeps_largest_vehicles_first():
+    demands = [0] + [4] * 7
+    capacities = [5, 8, 5, 12, 8, 5, 12, 8, 5, 5, 5]
+    
+    reduced, vehicle_map = FleetReducer.compress(_problem(demands, capacities))
+    
+    # Enough vehicles for one route per customer, largest vehicles first
+    assert reduced['num_vehicles'] == 7
+    assert reduced['vehicle_capacities'] == [12, 12, 8, 8, 8, 5, 5]
+    assert all(capacities[k] == c for k, c in zip(vehicle_map, reduced['vehicle_capacities']))
+
+
+def test_no_vehicle_fits_any_customer_keeps_fleet():
+    problem = _problem([0, 30, 40], [10, 20])
+    
+    reduced, vehicle_map = FleetReducer.compress(problem)
+    
+    assert reduced is problem
+    assert vehicle_map == [0, 1]
+
+
+def test_locked_prefixes_skip_compression():
+    problem = _problem([0, 2, 3], [10] * 5, locked_prefixes=[[], [1], [], [], []])
+    
+    reduced, vehicle_map = FleetReducer.compress(problem)
+    
+    assert reduced is problem
+    assert vehicle_map == list(range(5))
+
+
+def test_expand_solution_restores_original_vehicles():
+    problem = _problem([0, 2, 3, 4], [10] * 5 + [20] * 4)
+    _, vehicle_map = FleetReducer.compress(problem)
+    solution = {'routes': [{'vehicle_id': 0}, {'vehicle_id': 2}]}
+    
+    expanded = FleetReducer.expand_solution(solution, vehicle_map, problem)
+    
+    assert [r['vehicle_id'] for r in expanded['routes']] == [5, 7]
+    assert [r['vehicle_name'] for r in expanded['routes']] == ['V5', 'V7']
+    assert expanded['total_vehicles_available'] == 9
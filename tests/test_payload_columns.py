@@ -0,0 +1,117 @@
+"""Tests comparing payload columns with the dict path of ProblemBuilder."""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from src.services.payload_reader import PayloadError, read_payload, read_payload_object
+from src.services.problem_builder import ProblemBuilder
+
+INPUTS = os.path.join(os.path.dirname(__file__), os.pardir, 'inputs')
+
+AGGREGATED = {
+    'depot': {'location': [40.4168, -3.7038]},
+    'vehicles': [
+        {'id': 'V1', 'capacity_units': 20, 'time_window': {'start_min': 300, 'end_min': 1200}},
+        {'id': 'V2', 'capacity_units': 12},
+    ],
+    'metadata': {'date_range': ['2026-10-19', '2026-10-20']},
+    'customers': [
+        {
+            'id': 1, 'name': 'Per-date window', 'location': [40.42, -3.70],
+            'demands_units': {'2026-10-19': 4, '2026-10-20': 2},
+            'time_windows': {'2026-10-19': {'start_min': 480, 'end_min': 600}},
+            'time_window': {'start_min': 420, 'end_min': 900},
+        },
+        {
+            'id': 'C2', 'name': None, 'location': [40.43, -3.71],
+            'demands_units': {'2026-10-20': 5, '2026-10-21': 3},
+            'service_time_min': 25,
+        },
+        {
+            'id': 3, 'name': 'Inactive first day', 'location': [40.41, -3.69],
+            'demands_units': {'2026-10-19': 0, '2026-10-20': 1.0},
+            'time_windows': {'2026-10-20': {'start_min': 600, 'end_min': 660}},
+        },
+        {
+            'id': 4, 'name': 'No window', 'location': [40.40, -3.72],
+            'demands_units': {'2026-10-19': 7},
+        },
+    ],
+}
+
+
+def _load(name):
+    with open(os.path.join(INPUTS, f"CVRPTW_{name}.json")) as f:
+        return json.load(f)
+
+
+def _assert_same_problem(payload, date):
+    from_dict = ProblemBuilder.build_from_payload(payload, date)
+    from_columns = ProblemBuilder.build_from_payload(read_payload_object(payload), date)
+    
+    assert from_columns == from_dict
+    if from_dict is not None:
+        # Same Python types as the dict path, not numpy scalars
+        assert all(type(d) is int for d in from_columns['demands'])
+        assert all(type(x) is float for location in from_columns['locations'][1:] for x in location)
+
+
+@pytest.mark.parametrize('date', ['2026-10-19', '2026-10-20', '2026-10-21', '2026-10-22'])
+def test_aggregated_payload_builds_same_problem(date):
+    _assert_same_problem(AGGREGATED, date)
+
+
+def test_aggregated_payload_dates_match():
+    columns = read_payload_object(AGGREGATED)
+    
+    assert ProblemBuilder.payload_dates(columns) == ProblemBuilder.payload_dates(AGGREGATED)
+    assert ProblemBuilder.payload_dates(columns) == ['2026-10-19', '2026-10-20']
+    assert ProblemBuilder.infer_date_from_payload(columns) == ProblemBuilder.infer_date_from_payload(AGGREGATED)
+
+
+@pytest.mark.parametrize('name', ['SMALL', 'MEDIUM', 'LARGE'])
+def test_input_files_build_same_problem(name):
+    _assert_same_problem(_load(name), '2026-10-19')
+
+
+def test_streamed_json_matches_decoded_payload():
+    body = json.dumps(AGGREGATED).encode()
+    
+    async def chunks():
+        for k in range(0, len(body), 64):
+            yield body[k:k + 64]
+    
+    streamed = asyncio.run(read_payload(chunks()))
+    decoded = read_payload_object(AGGREGATED)
+    
+    assert streamed.header() == decoded.header()
+    assert streamed.ids == decoded.ids
+    assert streamed.names == decoded.names
+    for date in ('2026-10-19', '2026-10-20'):
+        assert streamed.demands_on(date).tolist() == decoded.demands_on(date).tolist()
+        assert [a.tolist() for a in streamed.time_windows_on(date)] == \
+            [a.tolist() for a in decoded.time_windows_on(date)]
+
+
+def test_invalid_customer_reported_with_location():
+    payload = dict(AGGREGATED, customers=AGGREGATED['customers'] + [
+        {'id': 5, 'location': [40.4], 'demand_units': -1},
+    ])
+    
+    with pytest.raises(PayloadError) as error:
+        read_payload_object(payload)
+    
+    locations = [entry['loc'] for entry in error.value.errors]
+    assert all(loc[:3] == ['body', 'customers', 4] for loc in locations)
+    assert {loc[3] for loc in locations} == {'location', 'demand_units'}
+
+
+def test_invalid_json_body():
+    async def chunks():
+        yield b'{"depot": {"location": [40.4, -3.7]}, "customers": [{'
+    
+    with pytest.raises(PayloadError):
+        asyncio.run(read_payload(chunks()))
@@ -0,0 +1,169 @@
+"""Tests for the compact response format and field projection."""
+
+import copy
+import json
+
+import pytest
+from fastapi.responses import Response
+
+from src.api.response_format import ResponseFormat, timeline_segments
+
+
+def _stop(location, time, load_before, load_after, customer_id=None, window=None):
+    stop = {
+        'location': location,
+        'location_info': (
+            {'type': 'customer', 'customer_id': customer_id, 'name': f"Customer {customer_id}"}
+            if customer_id else {'type': 'depot', 'name': 'Depot'}
+        ),
+        'time': time,
+        'time_formatted': f"{time // 60:02d}:{time % 60:02d}",
+        'load_before': load_before,
+        'load_after': load_after,
+        'segment_distance': 1.5,
+        'segment_distance_formatted': "1.50 km",
+    }
+    if window:
+        stop['time_window'] = list(window)
+        stop['time_window_formatted'] = "-"
+    return stop
+
+
+@pytest.fixture
+def result():
+    route = {
+        'vehicle_id': 0,
+        'vehicle_name': 'V1',
+        'capacity': 10,
+        'distance': 4.5,
+        'distance_km': 4.5,
+        'distance_formatted': "4.50 km",
+        'load': 5,
+        'load_units': 5,
+        'load_formatted': "5 units",
+        'duration_minutes': 60,
+        'duration_hours': 1.0,
+        'num_customers': 2,
+        'route': [
+            _stop(0, 480, 5, 5),
+            _stop(1, 500, 5, 2, 'C1', (480, 600)),
+            _stop(2, 525, 2, 0, 'C2', (500, 700)),
+            _stop(0, 540, 0, 0),
+        ],
+    }
+    return {
+        'date': '2026-10-19',
+        'status': 'success',
+        'summary': {'total_distance': 4.5, 'vehicles_used': 1},
+        'routes': [route],
+        'objective_value': 1004.5,
+        'solver': 'ortools',
+    }
+
+
+def test_full_format_adds_segments_only(result):
+    original = copy.deepcopy(result)
+    
+    formatted = ResponseFormat().apply(result)
+    
+    assert result == original
+    route = formatted['routes'][0]
+    assert route['segments'] == timeline_segments(route['route'])
+    assert {key: value for key, value in route.items() if key != 'segments'} == original['routes'][0]
+
+
+def test_projection_keeps_selected_paths(result):
+    fields = ['summary', 'routes.vehicle_id', 'routes.stops.time']
+    
+    formatted = ResponseFormat(fields=fields).apply(result)
+    
+    assert formatted == {
+        'summary': result['summary'],
+        'routes': [{'vehicle_id': 0, 'route': [{'time': t} for t in (480, 500, 525, 540)]}],
+    }
+
+
+def test_compact_stop_columns(result):
+    formatted = ResponseFormat(compact=True).apply(result)
+    
+    route = formatted['routes'][0]
+    assert formatted['format'] == 'compact'
+    assert set(route) == {'vehicle_id', 'capacity', 'distance_km', 'load', 'duration_minutes',
+                          'num_customers', 'stops'}
+    assert route['stops'] == {
+        'location': [0, 1, 2, 0],
+        'time': [480, 500, 525, 540],
+        'load_after': [5, 2, 0, 0],
+        'segment_distance': [1.5] * 4,
+        'tw_start': [None, 480, 500, None],
+        'tw_end': [None, 600, 700, None],
+        'customer_id': [None, 'C1', 'C2', None],
+    }
+    json.dumps(formatted)
+
+
+def test_compact_projection_accepts_full_stop_name(result):
+    formatted = ResponseFormat(compact=True, fields=['routes.route.customer_id', 'routes.stops.time']).apply(result)
+    
+    assert formatted == {'routes': [{'stops': {
+        'customer_id': [None, 'C1', 'C2', None],
+        'time': [480, 500, 525, 540],
+    }}]}
+
+
+@pytest.mark.parametrize('fields', [['routes', 'routes.vehicle_id'], ['routes.vehicle_id', 'routes']])
+def test_selected_parent_wins_over_children(result, fields):
+    formatted = ResponseFormat(fields=fields).apply(result)
+    
+    assert formatted['routes'][0]['route'] == result['routes'][0]['route']
+    assert 'vehicle_name' in formatted['routes'][0]
+
+
+def test_segments_built_only_when_selected(result):
+    without = ResponseFormat(fields=['routes.vehicle_id']).apply(result)
+    selected = ResponseFormat(compact=True, fields=['routes.segments']).apply(result)
+    
+    assert 'segments' not in without['routes'][0]
+    assert selected['routes'][0]['segments'] == timeline_segments(result['routes'][0]['route'])
+
+
+@pytest.mark.parametrize('compact, fields', [
+    (False, ['routes.speed']),
+    (False, ['routes.stops.customer_id']),
+    (True, ['routes.stops.time_formatted']),
+    (True, ['routes.vehicle_name']),
+    (False, ['routes.segments.color']),
+    (False, ['totals']),
+])
+def test_unknown_fields_rejected(compact, fields):
+    with pytest.raises(ValueError, match="Unknown field"):
+        ResponseFormat(compact=compact, fields=fields)
+
+
+def test_status_results_only_projected():
+    status = {'status': 'running', 'message': 'Solving', 'session': 'abc'}
+    
+    formatted = ResponseFormat(compact=True, fields=['status', 'session']).apply(status)
+    
+    assert formatted == {'status': 'running', 'session': 'abc'}
+
+
+def test_render_keeps_default_responses_as_dicts(result):
+    assert isinstance(ResponseFormat().render(result), dict)
+    
+    response = ResponseFormat(compact=True).render(result)
+    
+    assert isinstance(response, Response)
+    assert json.loads(response.body) == ResponseFormat(compact=True).apply(result)
+
+
+def test_timeline_splits_travel_and_service(result):
+    segments = timeline_segments(result['routes'][0]['route'])
+    
+    assert [(s['type'], s['start_time'], s['end_time']) for s in segments] == [
+        # 3 units: 16 minutes of service, 2 units: 14 minutes
+        ('travel', 480, 484), ('service', 484, 500),
+        ('travel', 500, 511), ('service', 511, 525),
+        ('travel', 525, 540),
+    ]
+    assert [s['units'] for s in segments if s['type'] == 'service'] == [3, 2]
@@ -0,0 +1,118 @@
+"""Tests for the window arithmetic of co-located stop aggregation."""
+
+from src.services.stop_aggregator import StopAggregator
+from src.utils import service_minutes
+
+DEPOT = (40.4168, -3.7038)
+SHOP = (40.4268, -3.7038)
+# About 5 m north of SHOP
+NEXT_DOOR = (40.426845, -3.7038)
+
+
+def _problem(locations, demands, time_windows, capacities=(20,), **extra):
+    problem = {
+        'locations': [DEPOT] + list(locations),
+        'demands': [0] + list(demands),
+        'time_windows': [(480, 1200)] + list(time_windows),
+        'vehicle_capacities': list(capacities),
+        'num_vehicles': len(capacities),
+        'depot': 0,
+    }
+    problem.update(extra)
+    return problem
+
+
+def _assert_members_on_time(problem, members, window):
+    """Every node time in the window keeps each member inside its own window."""
+    service = [service_minutes(problem['demands'][i]) for i in members]
+    for node_time in range(window[0], window[1] + 1):
+        for position, i in enumerate(members):
+            done = node_time - sum(service[position + 1:])
+            start, end = problem['time_windows'][i]
+            assert start <= done <= end, (node_time, i, done)
+
+
+def test_merged_window_shifts_by_later_service():
+    problem = _problem([SHOP] * 3, [1, 2, 3], [(480, 600), (500, 700), (540, 900)])
+    
+    reduced, node_groups = StopAggregator.merge(problem)
+    
+    assert node_groups == [[0], [1, 2, 3]]
+    # Service 12, 14 and 16 minutes: [480, 600] -> [500, 614] -> [540, 630]
+    assert reduced['time_windows'] == [(480, 1200), (540, 630)]
+    assert reduced['demands'] == [0, 6]
+    assert reduced['service_times'] == [0, 42]
+    assert reduced['locations'] == [DEPOT, SHOP]
+    _assert_members_on_time(problem, node_groups[1], reduced['time_windows'][1])
+
+
+def test_members_served_by_window_end():
+    problem = _problem([SHOP] * 3, [2, 1, 1], [(480, 1000), (480, 700), (600, 800)])
+    
+    reduced, node_groups = StopAggregator.merge(problem)
+    
+    assert node_groups == [[0], [2, 3, 1]]
+    _assert_members_on_time(problem, node_groups[1], reduced['time_windows'][1])
+
+
+def test_disjoint_windows_start_new_node():
+    problem = _problem([SHOP] * 3, [1, 1, 1], [(480, 540), (700, 800), (490, 560)])
+    
+    reduced, node_groups = StopAggregator.merge(problem)
+    
+    assert node_groups == [[0], [1, 3], [2]]
+    assert reduced['locations'] == [DEPOT, SHOP, SHOP]
+    assert reduced['time_windows'][2] == (700, 800)
+    _assert_members_on_time(problem, node_groups[1], reduced['time_windows'][1])
+
+
+def test_load_beyond_largest_vehicle_starts_new_node():
+    problem = _problem([SHOP] * 3, [4, 4, 4], [(480, 1200)] * 3, capacities=(5, 9))
+    
+    reduced, node_groups = StopAggregator.merge(problem)
+    
+    assert node_groups == [[0], [1, 2], [3]]
+    assert reduced['demands'] == [0, 8, 4]
+
+
+def test_radius_controls_nearby_customers():
+    problem = _problem([SHOP, NEXT_DOOR], [1, 1], [(480, 1200)] * 2)
+    
+    _, groups = StopAggregator.merge(problem, radius_m=10.0)
+    separate, no_groups = StopAggregator.merge(problem, radius_m=0)
+    
+    assert groups == [[0], [1, 2]]
+    assert separate is problem
+    assert no_groups is None
+
+
+def test_vehicle_starts_skip_aggregation():
+    problem = _problem([SHOP] * 2, [1, 1], [(480, 1200)] * 2, vehicle_starts={0: 3})
+    
+    reduced, node_groups = StopAggregator.merge(problem)
+    
+    assert reduced is problem
+    assert node_groups is None
+
+
+def test_expand_solution_times_members_back_from_node_time():
+    problem = _problem([SHOP] * 3, [1, 2, 3], [(480, 600), (500, 700), (540, 900)])
+    _, node_groups = StopAggregator.merge(problem)
+    solution = {
+        'routes': [{
+            'vehicle_id': 0,
+            'route': [
+                {'location': 0, 'arrival_time': 480.0, 'load_before': 6, 'load_after': 6},
+                {'location': 1, 'arrival_time': 600.0, 'demand': 6, 'load_before': 6, 'load_after': 0},
+                {'location': 0, 'arrival_time': 630.0, 'load_before': 0, 'load_after': 0},
+            ],
+        }],
+    }
+    
+    expanded = StopAggregator.expand_solution(solution, node_groups, problem)
+    
+    stops = expanded['routes'][0]['route']
+    assert [stop['location'] for stop in stops] == [0, 1, 2, 3, 0]
+    assert [stop['arrival_time'] for stop in stops[1:4]] == [570.0, 584.0, 600.0]
+    assert [stop['demand'] for stop in stops[1:4]] == [1, 2, 3]
+    assert [(stop['load_before'], stop['load_after']) for stop in stops[1:4]] == [(6, 5), (5, 3), (3, 0)]
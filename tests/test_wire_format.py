@@ -0,0 +1,205 @@
+"""Tests for MessagePack and compressed request and response bodies."""
+
+import asyncio
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from src.api import wire_format
+from src.api.wire_format import MIN_COMPRESS_BYTES, WireFormat
+from src.services.payload_reader import PayloadError
+
+msgpack = pytest.importorskip('msgpack')
+zstandard = pytest.importorskip('zstandard')
+
+PAYLOAD = {
+    'customers': [
+        {'id': f"C{i}", 'name': f"Customer {i}", 'demand': i % 7, 'lat': 40.4 + i / 1000, 'lon': -3.7}
+        for i in range(200)
+    ],
+    'vehicles': [{'id': 'V1', 'capacity': 20}],
+    'name': 'Señal',
+}
+
+
+def _request(body=b'', headers=None, chunk_size=512):
+    """Request whose body arrives in chunks of chunk_size bytes."""
+    chunks = [body[k:k + chunk_size] for k in range(0, len(body), chunk_size)] or [b'']
+    
+    async def receive():
+        chunk = chunks.pop(0)
+        return {'type': 'http.request', 'body': chunk, 'more_body': bool(chunks)}
+    
+    scope = {
+        'type': 'http',
+        'method': 'POST',
+        'path': '/solve',
+        'query_string': b'',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    return Request(scope, receive)
+
+
+def _compress(data, encoding):
+    if encoding == 'gzip':
+        return gzip.compress(data)
+    if encoding == 'deflate':
+        return zlib.compress(data)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def _decompress(data, encoding):
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'zstd':
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+@pytest.mark.parametrize('encoding', ['identity', 'gzip', 'deflate', 'zstd'])
+def test_msgpack_request_round_trip(encoding):
+    body = _compress(msgpack.packb(PAYLOAD, use_bin_type=True), encoding)
+    request = _request(body, {'Content-Type': 'application/msgpack', 'Content-Encoding': encoding})
+    
+    wire = WireFormat.from_request(request)
+    
+    assert wire.msgpack_body
+    assert wire.content_encoding == encoding
+    assert asyncio.run(wire.unpack(request)) == PAYLOAD
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'deflate', 'zstd'])
+def test_compressed_json_body(encoding):
+    body = _compress(json.dumps(PAYLOAD).encode(), encoding)
+    request = _request(body, {'Content-Type': 'application/json', 'Content-Encoding': encoding})
+    wire = WireFormat.from_request(request)
+    
+    async def read():
+        return b''.join([chunk async for chunk in wire.body(request)])
+    
+    assert not wire.msgpack_body
+    assert json.loads(asyncio.run(read())) == PAYLOAD
+
+
+def test_unsupported_content_encoding_rejected():
+    request = _request(b'', {'Content-Encoding': 'br'})
+    
+    with pytest.raises(HTTPException) as error:
+        WireFormat.from_request(request)
+    assert error.value.status_code == 415
+
+
+def test_corrupt_gzip_body_rejected():
+    request = _request(b'not gzip at all', {'Content-Encoding': 'gzip'})
+    wire = WireFormat.from_request(request)
+    
+    async def read():
+        return [chunk async for chunk in wire.body(request)]
+    
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read())
+    assert error.value.status_code == 400
+
+
+def test_invalid_msgpack_raises_payload_error():
+    request = _request(b'\xc1\xc1', {'Content-Type': 'application/msgpack'})
+    wire = WireFormat.from_request(request)
+    
+    with pytest.raises(PayloadError):
+        asyncio.run(wire.unpack(request))
+
+
+@pytest.mark.parametrize('accept, accept_encoding, msgpack_response, encoding', [
+    ('', '', False, 'identity'),
+    ('application/msgpack', 'gzip', True, 'gzip'),
+    ('application/json, application/msgpack;q=0.5', 'gzip, zstd', False, 'zstd'),
+    ('application/json;q=0.5, application/x-msgpack', 'zstd;q=0, gzip', True, 'gzip'),
+    ('*/*', '*', False, 'zstd'),
+    ('', 'gzip;q=0', False, 'identity'),
+])
+def test_response_negotiation(accept, accept_encoding, msgpack_response, encoding):
+    request = _request(headers={'Accept': accept, 'Accept-Encoding': accept_encoding})
+    
+    wire = WireFormat.from_request(request)
+    
+    assert wire.msgpack_response == msgpack_response
+    assert wire.response_encoding == encoding
+    assert wire.is_default == (not msgpack_response and encoding == 'identity')
+
+
+@pytest.mark.parametrize('msgpack_response', [False, True])
+@pytest.mark.parametrize('encoding', ['identity', 'gzip', 'zstd'])
+def test_response_round_trip(msgpack_response, encoding):
+    wire = WireFormat(msgpack_response=msgpack_response, response_encoding=encoding)
+    
+    response = wire.response(PAYLOAD)
+    
+    body = _decompress(response.body, response.headers.get('content-encoding', 'identity'))
+    decoded = msgpack.unpackb(body, raw=False) if msgpack_response else json.loads(body)
+    assert decoded == PAYLOAD
+    assert (response.headers.get('content-encoding') == encoding) == (encoding != 'identity')
+    assert response.media_type == ('application/msgpack' if msgpack_response else 'application/json')
+
+
+def test_small_response_not_compressed():
+    wire = WireFormat(response_encoding='gzip')
+    
+    response = wire.response({'status': 'ok'})
+    
+    assert len(response.body) < MIN_COMPRESS_BYTES
+    assert 'content-encoding' not in response.headers
+    assert json.loads(response.body) == {'status': 'ok'}
+
+
+@pytest.mark.parametrize('msgpack_response', [False, True])
+@pytest.mark.parametrize('encoding', ['identity', 'gzip', 'zstd'])
+def test_stream_delivers_each_event_on_its_own(msgpack_response, encoding):
+    events = [{'type': 'progress', 'step': k, 'detail': 'x' * 50} for k in range(5)]
+    events.append({'type': 'result', 'data': PAYLOAD})
+    wire = WireFormat(msgpack_response=msgpack_response, response_encoding=encoding)
+    
+    async def source():
+        for event in events:
+            yield event
+    
+    async def collect():
+        return [chunk async for chunk in wire._encode_events(source())]
+    
+    if encoding == 'gzip':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == 'zstd':
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+    unpacker = msgpack.Unpacker(raw=False)
+    text = b''
+    received = []
+    chunks = asyncio.run(collect())
+    for chunk in chunks[:len(events)]:
+        data = chunk if encoding == 'identity' else decompressor.decompress(chunk)
+        # Every chunk completes exactly one event
+        if msgpack_response:
+            unpacker.feed(data)
+            decoded = list(unpacker)
+        else:
+            text += data
+            *complete, text = text.split(b'\n\n')
+            decoded = [json.loads(line[len(b'data: '):]) for line in complete]
+        assert len(decoded) == 1
+        received.extend(decoded)
+    assert received == events
+
+
+def test_msgpack_unavailable_falls_back_to_json(monkeypatch):
+    monkeypatch.setattr(wire_format, 'MSGPACK_AVAILABLE', False)
+    
+    wire = WireFormat.from_request(_request(headers={'Accept': 'application/msgpack'}))
+    
+    assert not wire.msgpack_response
+    with pytest.raises(HTTPException) as error:
+        WireFormat.from_request(_request(headers={'Content-Type': 'application/msgpack'}))
+    assert error.value.status_code == 415